@@ -0,0 +1,105 @@
+import os
+import shutil
+import statistics
+import tempfile
+import time
+
+from helpers import abi_cache, constants
+from tests.fake_etherscan import FakeEtherscan
+
+# Round trip of api.etherscan.io measured from a VPS, it is simulated locally.
+ETHERSCAN_LATENCY = 0.15
+TICKS = 20
+
+TOKEN_ADDRESS = "0x6B175474E89094C44Da98b954EedeAC495271d0F"
+PAIR_ADDRESS = "0xA478c2975Ab1Ea89e8196811F51A7B7Ade33eB11"
+UNKNOWN_ADDRESS = "0x1f9840a85d5aF5bf1D1762F925BDADdC4201F984"
+
+
+def _tick_without_cache() -> None:
+    """Resolve the ABIs of one tick like `utils.get_abi` did before the cache.
+
+    :return None:
+    """
+
+    for address in (
+        constants.UNISWAP_V2_ROUTER_CONTRACT_ADDRESS,
+        TOKEN_ADDRESS,
+        constants.UNISWAP_V2_FACTORY_CONTRACT_ADDRESS,
+        PAIR_ADDRESS,
+    ):
+        abi_cache._fetch_from_etherscan(address)
+
+
+def _tick_with_cache() -> None:
+    """Resolve the ABIs of one tick, plus a contract that is not bundled.
+
+    :return None:
+    """
+
+    abi_cache.get_abi(constants.UNISWAP_V2_ROUTER_CONTRACT_ADDRESS)
+    abi_cache.get_abi(TOKEN_ADDRESS, abi_cache.ERC20_ABI)
+    abi_cache.get_abi(constants.UNISWAP_V2_FACTORY_CONTRACT_ADDRESS)
+    abi_cache.get_abi(PAIR_ADDRESS, abi_cache.UNISWAP_V2_PAIR_ABI)
+    abi_cache.get_abi(UNKNOWN_ADDRESS)
+
+
+def _measure(tick, before_tick=None) -> list[float]:
+    """Measure the latency of a tick.
+
+    :param tick: The tick to measure.
+    :param before_tick: A function called before every tick, outside of the timing.
+    :return list[float]: The latencies in milliseconds.
+    """
+
+    latencies = []
+
+    for _ in range(TICKS):
+        if before_tick:
+            before_tick()
+
+        start = time.perf_counter()
+        tick()
+        latencies.append((time.perf_counter() - start) * 1000)
+
+    return latencies
+
+
+def _report(name: str, latencies: list[float]) -> None:
+    """Print the latency statistics of a scenario.
+
+    :param str name: The name of the scenario.
+    :param list[float] latencies: The latencies in milliseconds.
+    :return None:
+    """
+
+    print(
+        f"{name:<24} median {statistics.median(latencies):>10.3f} ms"
+        f" | max {max(latencies):>10.3f} ms"
+    )
+
+
+def main() -> None:
+    """Run the benchmark."""
+
+    os.environ.setdefault("ETHERSCAN_API_KEY", "benchmark")
+
+    with tempfile.TemporaryDirectory() as cache_dir, FakeEtherscan(
+        latency=ETHERSCAN_LATENCY
+    ):
+        os.environ["CACHE_DIR"] = cache_dir
+
+        def clear_all() -> None:
+            abi_cache.clear()
+            shutil.rmtree(os.path.join(cache_dir, "abi"), ignore_errors=True)
+
+        print(f"ABI resolution per tick, Etherscan latency {ETHERSCAN_LATENCY}s")
+
+        _report("no cache", _measure(_tick_without_cache))
+        _report("cold cache", _measure(_tick_with_cache, clear_all))
+        _report("warm disk cache", _measure(_tick_with_cache, abi_cache.clear))
+        _report("warm in-process cache", _measure(_tick_with_cache))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,103 @@
+import asyncio
+import os
+import statistics
+import time
+
+from helpers import async_client, rpc_middleware, signals, snapshot
+from tests.fake_node import WALLET_PRIVATE_KEY, WALLET_PUBLIC_KEY, FakeNode
+
+# Round trip of a hosted RPC node from a VPS is a few tens of milliseconds, it is
+# simulated locally.
+RPC_LATENCY = 0.01
+SALES = 10
+TOKEN_BALANCE = 10 * 10**18
+
+
+def _get_token_addresses(token_count: int) -> list[str]:
+    """Get the addresses of fake tokens.
+
+    :param int token_count: The number of tokens.
+    :return list[str]: The token addresses.
+    """
+
+    return [f"0x{index + 1:040x}" for index in range(token_count)]
+
+
+async def _measure(
+    node: FakeNode, token_addresses: list[str], armed: bool = False
+) -> list[float]:
+    """Measure the delay between the trigger of the first sale of every position
+    and its broadcast.
+
+    :param FakeNode node: The fake node.
+    :param list[str] token_addresses: The token addresses.
+    :param bool armed: If the exits are armed on every block, like the engine does.
+    :return list[float]: The delays in seconds.
+    """
+
+    client = await async_client.get_async_client()
+    delays = []
+
+    for index, token_address in enumerate(token_addresses):
+        if armed:
+            await signals.async_arm_exits(client, token_addresses[index:])
+            node.mine()
+
+        rpc_middleware.new_head(client, node.block_number)
+        market_snapshot = await snapshot.async_get_market_snapshot(
+            client, token_address
+        )
+
+        start = time.perf_counter()
+        await signals.async_submit_sell(
+            client, token_address, TOKEN_BALANCE, market_snapshot=market_snapshot
+        )
+        delays.append(time.perf_counter() - start)
+
+        node.mine()
+
+    return delays
+
+
+async def _run(node: FakeNode) -> None:
+    """Sell half of the positions the regular way, and the other half armed.
+
+    :param FakeNode node: The fake node.
+    :return None:
+    """
+
+    token_addresses = _get_token_addresses(2 * SALES)
+
+    regular_delays = await _measure(node, token_addresses[:SALES])
+
+    armed_delays = await _measure(node, token_addresses[SALES:], armed=True)
+
+    regular_delay = statistics.median(regular_delays) * 1000
+    armed_delay = statistics.median(armed_delays) * 1000
+
+    print(f"Trigger to broadcast of a first sale, RPC latency {RPC_LATENCY}s")
+    print(f"regular | {regular_delay:>6.2f} ms")
+    print(f"armed   | {armed_delay:>6.2f} ms | x{regular_delay / armed_delay:.1f}")
+
+
+def main() -> None:
+    """Run the benchmark."""
+
+    os.environ.setdefault("WALLET_ADDRESS", WALLET_PRIVATE_KEY)
+
+    with FakeNode(latency=RPC_LATENCY) as node:
+        node.eth_balances[WALLET_PUBLIC_KEY.lower()] = 10**18
+
+        for index, token_address in enumerate(_get_token_addresses(2 * SALES)):
+            node.set_pair(token_address, f"0x{index + 1:038x}ff", 50 * 10**18, 10**24)
+            node.token_balances[(token_address.lower(), WALLET_PUBLIC_KEY.lower())] = (
+                TOKEN_BALANCE
+            )
+
+        os.environ["RPC_URL"] = node.url
+
+        asyncio.run(_run(node))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,137 @@
+import asyncio
+import multiprocessing
+import os
+import time
+
+from helpers import async_client, rpc_middleware, utils
+from tests.fake_node import WALLET_PRIVATE_KEY, FakeNode
+
+# Round trip of a hosted RPC node from a VPS is a few tens of milliseconds, it is
+# simulated locally.
+RPC_LATENCY = 0.01
+TICKS = 3
+TOKEN_COUNTS = (1, 10, 100)
+
+
+def _get_token_addresses(token_count: int) -> list[str]:
+    """Get the addresses of fake tokens.
+
+    :param int token_count: The number of tokens.
+    :return list[str]: The token addresses.
+    """
+
+    return [f"0x{index + 1:040x}" for index in range(token_count)]
+
+
+def _serve(token_count: int, connection) -> None:
+    """Serve a fake node with the pairs of the fake tokens, in its own process so
+    it does not share the GIL with the measured client.
+
+    :param int token_count: The number of tokens.
+    :param connection: The pipe to send the node URL to, closed to stop the node.
+    :return None:
+    """
+
+    with FakeNode(latency=RPC_LATENCY) as node:
+        for index, token_address in enumerate(_get_token_addresses(token_count)):
+            node.set_pair(token_address, f"0x{index + 1:038x}ff", 50 * 10**18, 10**24)
+
+        connection.send(node.url)
+        connection.recv()
+
+
+def _sync_tick(client, token_addresses: list[str]) -> None:
+    """Read the price, liquidity and balance of every token, one call after another.
+
+    :param Web3 client: The Web3 client.
+    :param list[str] token_addresses: The token addresses.
+    :return None:
+    """
+
+    for token_address in token_addresses:
+        utils.get_token_price_in_wei(client, token_address)
+        utils.get_token_liquidity_in_wei(client, token_address)
+        utils.get_token_balance(client, token_address)
+
+
+async def _async_tick(token_addresses: list[str]) -> None:
+    """Read the price, liquidity and balance of every token concurrently.
+
+    :param list[str] token_addresses: The token addresses.
+    :return None:
+    """
+
+    client = await async_client.get_async_client()
+
+    await asyncio.gather(
+        *(
+            read(client, token_address)
+            for token_address in token_addresses
+            for read in (
+                utils.async_get_token_price_in_wei,
+                utils.async_get_token_liquidity_in_wei,
+                utils.async_get_token_balance,
+            )
+        )
+    )
+
+
+def _measure(tick) -> float:
+    """Measure the ticks per second of a tick, after a warm-up tick.
+
+    Every tick reads a new block, so nothing is served from the RPC cache.
+
+    :param tick: The tick to measure.
+    :return float: The ticks per second.
+    """
+
+    cache = rpc_middleware.get_block_cache(os.environ["RPC_URL"])
+    tick()
+
+    start = time.perf_counter()
+    for _ in range(TICKS):
+        cache.clear()
+        tick()
+
+    return TICKS / (time.perf_counter() - start)
+
+
+def main() -> None:
+    """Run the benchmark."""
+
+    os.environ.setdefault("WALLET_ADDRESS", WALLET_PRIVATE_KEY)
+
+    token_addresses = _get_token_addresses(max(TOKEN_COUNTS))
+    connection, node_connection = multiprocessing.Pipe()
+    node = multiprocessing.Process(
+        target=_serve, args=(len(token_addresses), node_connection)
+    )
+    node.start()
+
+    try:
+        os.environ["RPC_URL"] = connection.recv()
+        client = utils.get_client()
+
+        print(f"Ticks per second, RPC latency {RPC_LATENCY}s")
+
+        for token_count in TOKEN_COUNTS:
+            sync_ticks = _measure(
+                lambda: _sync_tick(client, token_addresses[:token_count])
+            )
+            async_ticks = _measure(
+                lambda: async_client.run(_async_tick(token_addresses[:token_count]))
+            )
+
+            print(
+                f"{token_count:>3} tokens"
+                f" | sync {sync_ticks:>8.2f} ticks/s"
+                f" | async {async_ticks:>8.2f} ticks/s"
+                f" | x{async_ticks / sync_ticks:.1f}"
+            )
+    finally:
+        connection.send(None)
+        node.join()
+
+
+if __name__ == "__main__":
+    main()
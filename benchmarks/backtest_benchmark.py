@@ -0,0 +1,66 @@
+import json
+import os
+import tempfile
+import time
+
+import numpy as np
+
+from helpers import backtest
+from jobs.example_job import example_job
+
+TOKEN_ADDRESS = "0x6B175474E89094C44Da98b954EedeAC495271d0F"
+PAIR_ADDRESS = "0xA478c2975Ab1Ea89e8196811F51A7B7Ade33eB11"
+BLOCKS = 30 * 24 * 60 * 60 // 12  # a month of blocks, with a swap in each
+TOKEN_BALANCE = 10_000 * 10**18
+ETH_BALANCE = 10**18
+
+
+def _write_sync_events(path: str) -> None:
+    """Write a random walk of the reserves of a pair as `Sync` logs.
+
+    :param str path: The file path.
+    :return None:
+    """
+
+    generator = np.random.default_rng(0)
+    weth_reserves = 50e18 * np.exp(np.cumsum(generator.normal(0, 0.002, BLOCKS)))
+
+    with open(path, "w") as file:
+        for block_number, weth_reserve in enumerate(weth_reserves.tolist(), start=1):
+            data = (10**24).to_bytes(32) + int(weth_reserve).to_bytes(32)
+            log = {
+                "address": PAIR_ADDRESS,
+                "blockNumber": hex(block_number),
+                "logIndex": "0x0",
+                "data": "0x" + data.hex(),
+            }
+            file.write(json.dumps(log) + "\n")
+
+
+def main() -> None:
+    """Run the benchmark."""
+
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, "sync.jsonl")
+        _write_sync_events(path)
+
+        start = time.perf_counter()
+        events = backtest.load_sync_events(path, TOKEN_ADDRESS)
+        print(
+            f"{'load_sync_events':<28} {time.perf_counter() - start:>8.2f} s"
+            f" | {len(events):,} blocks"
+        )
+
+    start = time.perf_counter()
+    result = backtest.run_backtest(
+        example_job, TOKEN_ADDRESS, events, ETH_BALANCE, TOKEN_BALANCE
+    )
+    print(
+        f"{'run_backtest':<28} {time.perf_counter() - start:>8.2f} s"
+        f" | PnL {result.pnl_percent:.2f}% | drawdown"
+        f" {result.max_drawdown_percent:.2f}% | {result.trade_count} trades"
+    )
+
+
+if __name__ == "__main__":
+    main()
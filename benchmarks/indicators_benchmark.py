@@ -0,0 +1,113 @@
+import random
+import statistics
+import time
+
+from helpers import indicators
+
+TOKENS = 10_000
+WINDOW = 100
+TICKS = 200
+
+
+def _get_prices() -> list[list[float]]:
+    """Build a random walk of prices per token.
+
+    :return list[list[float]]: The prices of every tick, one per token.
+    """
+
+    generator = random.Random(0)
+    prices = [100.0] * TOKENS
+    ticks = []
+
+    for _ in range(TICKS):
+        prices = [price * (1 + generator.gauss(0, 0.01)) for price in prices]
+        ticks.append(prices)
+
+    return ticks
+
+
+def _run_streaming(ticks: list[list[float]]) -> float:
+    """Update the streaming indicators of every token on every tick.
+
+    :param list[list[float]] ticks: The prices of every tick.
+    :return float: The duration in seconds.
+    """
+
+    tokens = [
+        (
+            indicators.EMA(WINDOW),
+            indicators.RollingMin(WINDOW),
+            indicators.RollingMax(WINDOW),
+            indicators.VWAP(WINDOW),
+            indicators.Volatility(WINDOW),
+        )
+        for _ in range(TOKENS)
+    ]
+
+    start = time.perf_counter()
+
+    for prices in ticks:
+        for (ema, minimum, maximum, vwap, volatility), price in zip(tokens, prices):
+            ema.update(price)
+            minimum.update(price)
+            maximum.update(price)
+            vwap.update(price, 1.0)
+            volatility.update(price)
+
+    return time.perf_counter() - start
+
+
+def _run_recomputed(ticks: list[list[float]], count: int) -> float:
+    """Recompute the same indicators over the window of a few tokens.
+
+    :param list[list[float]] ticks: The prices of every tick.
+    :param int count: The number of tokens.
+    :return float: The duration in seconds.
+    """
+
+    histories = [[] for _ in range(count)]
+
+    start = time.perf_counter()
+
+    for prices in ticks:
+        for history, price in zip(histories, prices):
+            history.append(price)
+            last_prices = history[-WINDOW:]
+
+            ema = last_prices[0]
+            for value in last_prices:
+                ema += 2 / (WINDOW + 1) * (value - ema)
+
+            min(last_prices)
+            max(last_prices)
+            sum(last_prices) / len(last_prices)
+
+            if len(last_prices) > 1:
+                statistics.stdev(last_prices)
+
+    return time.perf_counter() - start
+
+
+def main() -> None:
+    """Run the benchmark."""
+
+    ticks = _get_prices()
+
+    print(f"{TOKENS:,} tokens, {TICKS} ticks, window of {WINDOW}")
+
+    duration = _run_streaming(ticks)
+    print(
+        f"{'streaming':<28} {duration / TICKS * 1000:>10.1f} ms per tick"
+        f" | {duration / TICKS / TOKENS * 1e6:.2f} µs per token"
+    )
+
+    # The recomputation is too slow for every token, a tenth is enough.
+    duration = _run_recomputed(ticks, TOKENS // 10) * 10
+    print(
+        f"{'recomputed':<28} {duration / TICKS * 1000:>10.1f} ms per tick"
+        f" | {duration / TICKS / TOKENS * 1e6:.2f} µs per token"
+    )
+
+
+if __name__ == "__main__":
+    main()
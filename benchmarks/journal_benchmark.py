@@ -0,0 +1,88 @@
+import os
+import tempfile
+import time
+
+import numpy as np
+
+from helpers import constants, journal, models
+
+TOKENS = 200
+BLOCKS = 7 * 24 * 60 * 60 // 12  # a week of blocks
+BLOCKS_PER_WRITE = 1_000
+
+
+def _write_journal(directory: str) -> int:
+    """Write a week of ticks of every token, like a writer would.
+
+    :param str directory: The journal directory.
+    :return int: The number of ticks.
+    """
+
+    token_ids = np.arange(1, TOKENS + 1, dtype="<u8") << 32
+    writer = journal.JournalWriter(directory)
+    writer._rotate()
+
+    for first_block in range(0, BLOCKS, BLOCKS_PER_WRITE):
+        blocks = np.arange(first_block, min(first_block + BLOCKS_PER_WRITE, BLOCKS))
+        ticks = np.zeros(len(blocks) * TOKENS, dtype=journal.get_tick_dtype())
+
+        ticks["block_number"] = np.repeat(blocks, TOKENS)
+        ticks["timestamp"] = 1_700_000_000 + ticks["block_number"] * 12
+        ticks["token_id"] = np.tile(token_ids, len(blocks))
+        ticks["weth_reserve_in_wei"] = 50e18
+        ticks["token_reserve"] = 1e24 - ticks["block_number"] * 1e18
+        ticks["price_in_wei"] = ticks["weth_reserve_in_wei"] / ticks["token_reserve"]
+        ticks["action"] = journal.ACTIONS.index(models.TransactionType.HOLD)
+
+        if writer._file.tell() >= constants.JOURNAL_SEGMENT_SIZE:
+            writer._rotate()
+
+        ticks.tofile(writer._file)
+
+    writer.close()
+
+    return BLOCKS * TOKENS
+
+
+def main() -> None:
+    """Run the benchmark."""
+
+    with tempfile.TemporaryDirectory() as directory:
+        count = _write_journal(directory)
+        size = sum(
+            os.path.getsize(os.path.join(directory, name))
+            for name in os.listdir(directory)
+        )
+
+        print(
+            f"{count:,} ticks of {TOKENS} tokens over {BLOCKS:,} blocks,"
+            f" {size / 1024**2:.0f} MB in {len(os.listdir(directory))} segments"
+        )
+
+        start = time.perf_counter()
+        segments = journal.read_segments(directory)
+        print(f"{'map segments':<28} {(time.perf_counter() - start) * 1000:>10.1f} ms")
+
+        # Prices of a single token, scanned over the memory-mapped segments.
+        start = time.perf_counter()
+        token_id = segments[-1]["token_id"][-1]
+        prices = [
+            segment["price_in_wei"][segment["token_id"] == token_id]
+            for segment in segments
+        ]
+        print(
+            f"{'scan one token':<28} {(time.perf_counter() - start) * 1000:>10.1f} ms"
+            f" | {sum(len(price) for price in prices):,} ticks"
+        )
+
+        start = time.perf_counter()
+        ticks = journal.read_ticks(directory)
+        print(
+            f"{'read in one array':<28} {(time.perf_counter() - start) * 1000:>10.1f} ms"
+        )
+
+        assert len(ticks) == count, "Wrong tick count"
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,166 @@
+import asyncio
+import json
+import socket
+import statistics
+import time
+
+import websockets
+
+from helpers import log_hub
+
+TOKEN_ADDRESSES = [f"0x{index:040x}" for index in range(20)]
+PRODUCERS = 200
+SUBSCRIBERS = 20
+RECORDS = 500
+BATCH_SIZE = 25
+# Every job sends a batch every interval, like the logger flushing its queue.
+BATCH_INTERVAL = 0.2
+# The other dashboards follow a single token.
+EVERY_TOKEN_SUBSCRIBERS = 2
+LAG_INTERVAL = 0.01
+
+
+async def _produce(uri: str, index: int) -> None:
+    """Send the records of a job, in batches like the logger.
+
+    :param str uri: The WebSocket URI of the hub.
+    :param int index: The index of the job.
+    :return None:
+    """
+
+    token = TOKEN_ADDRESSES[index % len(TOKEN_ADDRESSES)]
+
+    async with websockets.connect(uri) as websocket:
+        for start in range(0, RECORDS, BATCH_SIZE):
+            await websocket.send(
+                json.dumps(
+                    [
+                        {
+                            "v": 1,
+                            "ts": time.time(),
+                            "token": token,
+                            "level": "INFO",
+                            "message": f"Job {index} message {number}",
+                        }
+                        for number in range(start, start + BATCH_SIZE)
+                    ]
+                )
+            )
+            await asyncio.sleep(BATCH_INTERVAL)
+
+
+async def _subscribe(uri: str, expected: int, received: list[int]) -> None:
+    """Receive records until all are received.
+
+    :param str uri: The subscription URI.
+    :param int expected: The number of records expected.
+    :param list[int] received: The count of records received, updated.
+    :return None:
+    """
+
+    async with websockets.connect(uri, max_size=None) as websocket:
+        while received[0] < expected:
+            received[0] += len(json.loads(await websocket.recv()))
+
+
+async def _measure_lag(lags: list[float], stop: asyncio.Event) -> None:
+    """Measure how late the event loop of the hub wakes a sleeping task.
+
+    :param list[float] lags: The lags in milliseconds, updated.
+    :param asyncio.Event stop: Set to stop.
+    :return None:
+    """
+
+    while not stop.is_set():
+        start = time.perf_counter()
+        await asyncio.sleep(LAG_INTERVAL)
+        lags.append((time.perf_counter() - start - LAG_INTERVAL) * 1000)
+
+
+async def _run(hub: log_hub.LogHub) -> tuple[float, list[int]]:
+    """Run the jobs and the dashboards against the hub.
+
+    :param log_hub.LogHub hub: The started hub.
+    :return tuple[float, list[int]]: The duration, and the records received by
+        every dashboard reading them.
+    """
+
+    total = PRODUCERS * RECORDS
+    counts = [[0] for _ in range(SUBSCRIBERS)]
+    subscriptions = [
+        (
+            (f"{hub.uri}/subscribe", total, counts[index])
+            if index < EVERY_TOKEN_SUBSCRIBERS
+            else (
+                f"{hub.uri}/subscribe?token={TOKEN_ADDRESSES[index]}",
+                total // len(TOKEN_ADDRESSES),
+                counts[index],
+            )
+        )
+        for index in range(SUBSCRIBERS)
+    ]
+
+    # A dashboard that never reads, with a small receive buffer and without
+    # compression so it does not absorb the records, its queue fills until it is
+    # evicted.
+    slow_socket = socket.socket()
+    slow_socket.setsockopt(socket.SOL_SOCKET, socket.SO_RCVBUF, 4096)
+    slow_socket.connect(("127.0.0.1", int(hub.uri.rsplit(":", 1)[1])))
+    slow = await websockets.connect(
+        f"{hub.uri}/subscribe", sock=slow_socket, max_queue=1, compression=None
+    )
+    subscribers = [
+        asyncio.create_task(_subscribe(*subscription)) for subscription in subscriptions
+    ]
+
+    while hub.subscribers < SUBSCRIBERS + 1:
+        await asyncio.sleep(0.01)
+
+    start = time.perf_counter()
+
+    await asyncio.gather(*(_produce(hub.uri, index) for index in range(PRODUCERS)))
+    await asyncio.gather(*subscribers)
+
+    duration = time.perf_counter() - start
+
+    # Its close frame waits behind the records it does not read.
+    slow.transport.abort()
+
+    return duration, [count[0] for count in counts]
+
+
+def main() -> None:
+    """Run the benchmark."""
+
+    hub = log_hub.LogHub().start("127.0.0.1", 0)
+    lags = []
+    stop = asyncio.Event()
+    monitor = asyncio.run_coroutine_threadsafe(_measure_lag(lags, stop), hub._loop)
+
+    try:
+        duration, counts = asyncio.run(_run(hub))
+    finally:
+        hub._loop.call_soon_threadsafe(stop.set)
+        monitor.result()
+        hub.stop()
+
+    delivered = sum(counts)
+
+    print(
+        f"{PRODUCERS} jobs sending {RECORDS} records each, "
+        f"{SUBSCRIBERS} dashboards and a slow one"
+    )
+    print(f"{'records received':<24} {hub.received:>10}")
+    print(f"{'records delivered':<24} {delivered:>10}")
+    print(f"{'duration':<24} {duration:>10.2f} s")
+    print(f"{'records received/s':<24} {hub.received / duration:>10.0f}")
+    print(f"{'records delivered/s':<24} {delivered / duration:>10.0f}")
+    print(
+        f"{'hub loop lag':<24} {statistics.median(lags):>10.2f} ms median, "
+        f"{max(lags):.2f} ms max"
+    )
+    print(f"{'dashboards evicted':<24} {hub.evicted:>10}")
+
+
+if __name__ == "__main__":
+    main()
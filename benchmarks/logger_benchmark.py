@@ -0,0 +1,101 @@
+import asyncio
+import logging
+import os
+import statistics
+import time
+
+import websockets
+
+from helpers import logger
+from tests.fake_log_server import FakeLogServer
+
+TOKEN_ADDRESS = "0x6B175474E89094C44Da98b954EedeAC495271d0F"
+CALLS = 10_000
+CALLS_BEFORE = 200
+
+
+async def _send_ws_message(uri: str, message: str) -> None:
+    """Send a message like the logger did before the shipper, with a connection per
+    message.
+
+    :param str uri: The WebSocket URI.
+    :param str message: The message.
+    :return None:
+    """
+
+    async with websockets.connect(uri) as websocket:
+        await websocket.send(message)
+
+
+def _measure(log, calls: int) -> list[float]:
+    """Measure the latency of log calls.
+
+    :param log: The log call, it takes the message.
+    :param int calls: The number of calls.
+    :return list[float]: The latencies in microseconds.
+    """
+
+    latencies = []
+
+    for index in range(calls):
+        start = time.perf_counter()
+        log(f"Message {index}")
+        latencies.append((time.perf_counter() - start) * 1_000_000)
+
+    return latencies
+
+
+def _report(name: str, latencies: list[float]) -> None:
+    """Print the latency statistics of a scenario.
+
+    :param str name: The name of the scenario.
+    :param list[float] latencies: The latencies in microseconds.
+    :return None:
+    """
+
+    latencies = sorted(latencies)
+
+    print(
+        f"{name:<28} median {statistics.median(latencies):>10.1f} us"
+        f" | p99 {latencies[int(len(latencies) * 0.99)]:>10.1f} us"
+    )
+
+
+def main() -> None:
+    """Run the benchmark."""
+
+    os.environ.setdefault("TOKEN_ADDRESS", TOKEN_ADDRESS)
+
+    # Only the shipping is measured, not the console and the log file.
+    logging.disable(logging.CRITICAL)
+
+    with FakeLogServer() as server:
+        print("Latency of a log call shipped to a local WebSocket server")
+
+        _report(
+            "connection per message",
+            _measure(
+                lambda message: asyncio.run(
+                    _send_ws_message(server.uri, logger._format_message(message))
+                ),
+                CALLS_BEFORE,
+            ),
+        )
+
+        os.environ["WEBSOCKET_URI"] = server.uri
+
+        _report("background shipper", _measure(logger.info, CALLS))
+
+        start = time.perf_counter()
+        while len(server.messages) < CALLS_BEFORE + CALLS:
+            time.sleep(0.001)
+
+        print(
+            f"{CALLS} messages in {len(server.frames) - CALLS_BEFORE} frames,"
+            f" all received {(time.perf_counter() - start) * 1000:.1f} ms after the"
+            " last call"
+        )
+
+
+if __name__ == "__main__":
+    main()
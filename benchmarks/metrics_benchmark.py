@@ -0,0 +1,57 @@
+import statistics
+import time
+
+from helpers import metrics
+
+CALLS = 100_000
+ROUNDS = 5
+
+
+def _stage() -> int:
+    return 1
+
+
+@metrics.timed("stage_duration_seconds", stage="benchmark")
+def _timed_stage() -> int:
+    return 1
+
+
+def _measure(function) -> float:
+    """Measure the cost of a call.
+
+    :param function: The function, it takes no argument.
+    :return float: The median cost of a call over the rounds, in nanoseconds.
+    """
+
+    costs = []
+
+    for _ in range(ROUNDS):
+        start = time.perf_counter()
+
+        for _ in range(CALLS):
+            function()
+
+        costs.append((time.perf_counter() - start) / CALLS * 1_000_000_000)
+
+    return statistics.median(costs)
+
+
+def main() -> None:
+    """Run the benchmark."""
+
+    print(f"Cost of a call, median of {ROUNDS} rounds of {CALLS} calls")
+
+    bare = _measure(_stage)
+    metrics.disable()
+    disabled = _measure(_timed_stage)
+    metrics.enable()
+    enabled = _measure(_timed_stage)
+    metrics.disable()
+
+    print(f"{'not instrumented':<20} {bare:>8.0f} ns")
+    print(f"{'metrics disabled':<20} {disabled:>8.0f} ns (+{disabled - bare:.0f} ns)")
+    print(f"{'metrics enabled':<20} {enabled:>8.0f} ns (+{enabled - bare:.0f} ns)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,160 @@
+import multiprocessing
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+from helpers import constants, orchestrator, utils
+from tests.fake_node import WALLET_PRIVATE_KEY, FakeNode
+
+# Round trip of a hosted RPC node from a VPS is a few tens of milliseconds, it is
+# simulated locally.
+RPC_LATENCY = 0.03
+CONTAINERS = 10
+
+TOKEN_ADDRESS = "0x6B175474E89094C44Da98b954EedeAC495271d0F"
+PAIR_ADDRESS = "0xA478c2975Ab1Ea89e8196811F51A7B7Ade33eB11"
+
+
+def _run_container(results) -> None:
+    """Read the price once like the first tick of a new container, in a new process.
+
+    :param results: The queue to put the latency in milliseconds in.
+    :return None:
+    """
+
+    client = utils.get_client()
+
+    start = time.perf_counter()
+    utils.get_token_price_in_wei(client, TOKEN_ADDRESS)
+    results.put((time.perf_counter() - start) * 1000)
+
+
+def _measure_first_tick() -> list[float]:
+    """Measure the first tick of new containers, one after another.
+
+    :return list[float]: The latencies in milliseconds.
+    """
+
+    context = multiprocessing.get_context("spawn")
+    results = context.Queue()
+    latencies = []
+
+    for _ in range(CONTAINERS):
+        process = context.Process(target=_run_container, args=(results,))
+        process.start()
+        latencies.append(results.get())
+        process.join()
+
+    return latencies
+
+
+# Cold start of a trading job, from its imports to its first tick.
+COLD_START = f"""
+import time
+
+start = time.perf_counter()
+
+import main
+from helpers import environment, snapshot, utils
+
+imported = time.perf_counter()
+client = utils.get_client()
+
+if environment.get_prewarm():
+    utils.prewarm(client, ["{TOKEN_ADDRESS}"])
+else:
+    client.is_connected()
+
+snapshot.get_market_snapshot(client, "{TOKEN_ADDRESS}")
+print((imported - start) * 1000, (time.perf_counter() - imported) * 1000)
+"""
+
+
+def _measure_cold_start(prewarm: bool) -> tuple[list[float], list[float]]:
+    """Measure the cold start of new trading jobs, one after another.
+
+    :param bool prewarm: Whether the jobs resolve their first tick while connecting.
+    :return tuple[list[float], list[float]]: The import times and the times from
+        the imports to the first tick, in milliseconds.
+    """
+
+    import_times, first_ticks = [], []
+
+    for _ in range(CONTAINERS):
+        result = subprocess.run(
+            [sys.executable, "-c", COLD_START],
+            env={**os.environ, "PREWARM": str(prewarm).lower()},
+            capture_output=True,
+            text=True,
+            check=True,
+        )
+        import_time, first_tick = map(float, result.stdout.split()[-2:])
+        import_times.append(import_time)
+        first_ticks.append(first_tick)
+
+    return import_times, first_ticks
+
+
+def _report(name: str, latencies: list[float]) -> None:
+    """Print the latency statistics of a scenario.
+
+    :param str name: The name of the scenario.
+    :param list[float] latencies: The latencies in milliseconds.
+    :return None:
+    """
+
+    print(
+        f"{name:<28} median {statistics.median(latencies):>10.3f} ms"
+        f" | max {max(latencies):>10.3f} ms"
+    )
+
+
+def main() -> None:
+    """Run the benchmark."""
+
+    print("Startup of the bot, before building the image")
+
+    path = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    latencies = []
+
+    for _ in range(CONTAINERS):
+        start = time.perf_counter()
+        orchestrator.get_build_hash(path, constants.DOCKER_BUILD_PATHS)
+        latencies.append((time.perf_counter() - start) * 1000)
+
+    _report("hash of the image files", latencies)
+
+    print(f"First tick of a new container, RPC latency {RPC_LATENCY}s")
+
+    with tempfile.TemporaryDirectory() as cache_dir, FakeNode(
+        latency=RPC_LATENCY
+    ) as node:
+        node.set_pair(TOKEN_ADDRESS, PAIR_ADDRESS, 50 * 10**18, 10**24)
+        os.environ["RPC_URL"] = node.url
+        os.environ["CACHE_DIR"] = cache_dir
+
+        os.environ["CACHE_PAIRS"] = "false"
+        _report("without the cache volume", _measure_first_tick())
+
+        # The first container fills the cache.
+        os.environ["CACHE_PAIRS"] = "true"
+        _report("with the cache volume", _measure_first_tick())
+
+        print(f"Cold start of a trading job, warm cache, RPC latency {RPC_LATENCY}s")
+
+        os.environ["PYTHONPATH"] = path
+        os.environ.setdefault("WALLET_ADDRESS", WALLET_PRIVATE_KEY)
+
+        for prewarm in (False, True):
+            import_times, first_ticks = _measure_cold_start(prewarm)
+            name = "with prewarm" if prewarm else "without prewarm"
+
+            _report(f"imports, {name}", import_times)
+            _report(f"first tick, {name}", first_ticks)
+
+
+if __name__ == "__main__":
+    main()
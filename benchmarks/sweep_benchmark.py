@@ -0,0 +1,94 @@
+import concurrent.futures
+import functools
+import os
+import pickle
+import time
+
+import numpy as np
+
+from helpers import backtest, sweep
+from jobs.example_job import example_job
+
+TOKEN_ADDRESS = "0x6B175474E89094C44Da98b954EedeAC495271d0F"
+BLOCKS = 7 * 24 * 60 * 60 // 12  # a week of blocks, with a swap in each
+TOKEN_BALANCE = 10_000 * 10**18
+ETH_BALANCE = 10**18
+SPACE = {"take_profit_percent": [1, 2, 5, 10], "slippage_percent": [0.1, 0.5, 1, 2]}
+
+
+def _get_events() -> np.ndarray:
+    """Build a random walk of the reserves of a pair.
+
+    :return np.ndarray: The events.
+    """
+
+    generator = np.random.default_rng(0)
+    events = np.zeros(BLOCKS, dtype=backtest.EVENT_DTYPE)
+    events["block_number"] = np.arange(1, BLOCKS + 1)
+    events["weth_reserve_in_wei"] = 50e18 * np.exp(
+        np.cumsum(generator.normal(0, 0.002, BLOCKS))
+    )
+    events["token_reserve"] = 1e24
+
+    return events
+
+
+def _run_pickled(events: np.ndarray, parameters: list[dict]) -> list:
+    """Run a sweep sending the events with every run, like before shared memory.
+
+    :param np.ndarray events: The events.
+    :param list[dict] parameters: The parameters of every run.
+    :return list: The results.
+    """
+
+    replay = functools.partial(
+        backtest.run_backtest,
+        token_address=TOKEN_ADDRESS,
+        events=events,
+        eth_balance_in_wei=ETH_BALANCE,
+        token_balance=TOKEN_BALANCE,
+    )
+
+    with concurrent.futures.ProcessPoolExecutor() as executor:
+        return list(
+            executor.map(
+                replay,
+                [functools.partial(example_job, **kwargs) for kwargs in parameters],
+            )
+        )
+
+
+def main() -> None:
+    """Run the benchmark."""
+
+    events = _get_events()
+    parameters = sweep.get_grid(SPACE)
+
+    print(
+        f"{len(parameters)} runs over {BLOCKS:,} blocks on {os.cpu_count()} cores,"
+        f" {len(pickle.dumps(events)) / 1024**2:.1f} MB of events"
+    )
+
+    start = time.perf_counter()
+    _run_pickled(events, parameters)
+    elapsed = time.perf_counter() - start
+    print(
+        f"{'events pickled per run':<28} {elapsed:>8.2f} s"
+        f" | {len(parameters) / elapsed:.2f} runs/s"
+    )
+
+    start = time.perf_counter()
+    runs = sweep.run(
+        example_job, TOKEN_ADDRESS, events, parameters, ETH_BALANCE, TOKEN_BALANCE
+    )
+    elapsed = time.perf_counter() - start
+    print(
+        f"{'events in shared memory':<28} {elapsed:>8.2f} s"
+        f" | {len(parameters) / elapsed:.2f} runs/s"
+    )
+
+    print(f"Best: {runs[0][0]} | PnL {runs[0][1].pnl_percent:.2f}%")
+
+
+if __name__ == "__main__":
+    main()
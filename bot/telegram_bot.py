@@ -1,16 +1,25 @@
+import asyncio
 import logging
 import os
+import time
 import colorama
 from docker import DockerClient
 import dotenv
 from telethon import events, TelegramClient
 from web3 import Web3
-import websockets
 
-# This is a global variable, which is not a good practice, but it is used for
-# simplicity. It is used to store the connected clients to the WebSocket server.
-# The key is the token address and the value is the WebSocket client.
-connected_clients = {}
+from helpers import (
+    constants,
+    engine,
+    environment,
+    log_hub,
+    metrics,
+    notifier,
+    orchestrator,
+    strategy,
+    utils,
+)
+import jobs  # noqa: F401, registers the strategies
 
 BOT_NAME = os.environ.get("BOT_NAME") if os.environ.get("BOT_NAME") else "smart"
 
@@ -19,8 +28,14 @@ if os.path.exists(f"env/{BOT_NAME}.env"):
 else:
     raise ValueError(f"env/{BOT_NAME}.env is not found")
 
+# In "engine" mode every token is traded by a single engine in this process, in
+# "container" mode every token is traded by its own Docker container.
+bot_mode = os.environ.get("BOT_MODE") or "engine"
+if bot_mode not in ("engine", "container"):
+    raise ValueError(f"Invalid BOT_MODE: {bot_mode}")
+
 docker_context = os.environ.get("DOCKER_CONTEXT")
-if not docker_context:
+if bot_mode == "container" and not docker_context:
     raise ValueError("DOCKER_CONTEXT is not set")
 
 telegram_api_id = os.environ.get("TELEGRAM_API_ID")
@@ -46,17 +61,52 @@ if not os.environ.get("WEBSOCKET_URI"):
     os.environ["WEBSOCKET_URI"] = "ws://0.0.0.0:8765"
 
 docker_image_tag = f"tun43p/{BOT_NAME}"
-
-docker_client = DockerClient(base_url=docker_context)
+docker_cache_volume = f"{BOT_NAME}-cache"
+
+docker_client = (
+    DockerClient(base_url=docker_context) if bot_mode == "container" else None
+)
+# The Docker calls block, they are made from its worker threads.
+docker_orchestrator = (
+    orchestrator.Orchestrator(docker_client) if bot_mode == "container" else None
+)
+trading_engine = (
+    engine.Engine(
+        utils.get_client(),
+        strategy.get_job(environment.get_strategy_name()),
+        environment.get_rpc_websocket_url(),
+        armed_exits=environment.get_armed_exits(),
+    )
+    if bot_mode == "engine"
+    else None
+)
 telegram_client = TelegramClient(BOT_NAME, telegram_api_id, telegram_api_hash)
-
-
-async def _log(
+telegram_notifier = notifier.Notifier(
+    lambda chat_id, message: telegram_client.send_message(
+        entity=chat_id, message=message
+    ),
+    rate=environment.get_telegram_rate(),
+    burst=environment.get_telegram_burst(),
+)
+
+LEVEL_COLORS = {
+    "ERROR": colorama.Fore.RED,
+    "CRITICAL": colorama.Fore.RED,
+    "FATAL": colorama.Fore.RED,
+    "WARNING": colorama.Fore.YELLOW,
+    "DEBUG": colorama.Fore.BLUE,
+}
+
+
+def _log(
     event: events.NewMessage.Event,
     message: str,
     without_print: bool = False,
 ) -> None:
-    """Log the message to the console and send it to the Telegram channel.
+    """Log the message to the console and queue it for the chat of the event.
+
+    The messages are sent by the notifier, gathered in digests within the rate
+    limit of Telegram.
 
     :param events.NewMessage.Event event: The event object of the new message.
     :param str message: The message to log and send.
@@ -67,14 +117,11 @@ async def _log(
     if not without_print:
         print(message)
 
-    await telegram_client.send_message(
-        entity=event.message.chat_id,
-        message=message,
-    )
+    telegram_notifier.notify(event.message.chat_id, message)
 
 
 async def _start_command(event: events.NewMessage.Event) -> None:
-    """Start a Docker instance of the trading bot with the given token address.
+    """Start trading with the given token address, in the engine or a container.
 
     :param events.NewMessage.Event event: The event object of the new message.
     :return None:
@@ -84,39 +131,51 @@ async def _start_command(event: events.NewMessage.Event) -> None:
 
     try:
         if not Web3.is_address(token):
-            await _log(event, "Invalid token address!")
+            _log(event, "Invalid token address!")
+            return
+
+        if bot_mode == "engine":
+            if Web3.to_checksum_address(token) in trading_engine.token_addresses:
+                _log(event, f"Already trading this token {token}.")
+                return
+
+            _log(event, f"Starting trading with token {token}...")
+            await trading_engine.add_token(token)
+            _log(event, f"Trading with token {token} started!")
+            return
 
-        containers = docker_client.containers.list(all=True)
+        containers = await docker_orchestrator.get_containers()
 
-        if any(token in container.name for container in containers):
-            await _log(event, f"Already trading this token {token}.")
+        if any(token in name for name in containers):
+            _log(event, f"Already trading this token {token}.")
             return
 
         envron = os.environ.copy()
         envron["TOKEN_ADDRESS"] = token
         envron["WEBSOCKET_URI"] = "ws://host.docker.internal:8765"
+        # The ABIs and the pair addresses resolved by a container are kept for the
+        # next ones, in a volume kept across the restarts.
+        envron["CACHE_DIR"] = constants.DOCKER_CACHE_DIR
+        envron["CACHE_PAIRS"] = "true"
 
-        await _log(event, f"Starting container {token}...")
+        _log(event, f"Starting container {token}...")
 
-        container = docker_client.containers.run(
+        await docker_orchestrator.start(
             docker_image_tag,
-            name=token,
-            environment=envron,
-            detach=True,
-            stdout=True,
-            stderr=True,
+            token,
+            envron,
+            volumes={
+                docker_cache_volume: {"bind": constants.DOCKER_CACHE_DIR, "mode": "rw"}
+            },
         )
 
-        if not container:
-            raise Exception(f"Failed to start container {token}")
-
-        await _log(event, f"Container {token} started!")
+        _log(event, f"Container {token} started!")
     except Exception as error:
         _log(event, f"Failed to start trading with token {token}: {error}")
 
 
 async def _stop_command(event: events.NewMessage.Event) -> None:
-    """Stop the Docker instance of the trading bot with the given token address.
+    """Stop trading with the given token address, in the engine or a container.
 
     :param events.NewMessage.Event event: The event object of the new message.
     :return None:
@@ -129,62 +188,89 @@ async def _stop_command(event: events.NewMessage.Event) -> None:
             _log(event, "Invalid token address!")
             return
 
-        containers = docker_client.containers.list(all=True)
+        if bot_mode == "engine":
+            if await trading_engine.remove_token(token):
+                _log(event, f"Trading with token {token} deleted!")
+            else:
+                _log(event, f"Trading with token {token} is not running.")
+            return
+
+        containers = await docker_orchestrator.get_containers()
 
-        if not any(token in container.name for container in containers):
-            await _log(event, f"Trading with token {token} is not running.")
+        if not any(token in name for name in containers):
+            _log(event, f"Trading with token {token} is not running.")
 
-        for container in containers:
-            if token in container.name:
-                await _log(event, f"Deleting container {token}...")
+        for name in containers:
+            if token in name:
+                _log(event, f"Deleting container {token}...")
 
-                container.stop()
-                container.remove()
+                await docker_orchestrator.stop(name)
 
-                await _log(event, f"Trading with token {token} deleted!")
+                _log(event, f"Trading with token {token} deleted!")
 
     except Exception as error:
-        await _log(event, f"Failed to stop trading with token {token}: {error}")
+        _log(event, f"Failed to stop trading with token {token}: {error}")
 
 
 async def _stop_all_command(event: events.NewMessage.Event) -> None:
-    """Stop all Docker instances of the trading bot.
+    """Stop trading with all tokens, in the engine or the containers.
 
     :param events.NewMessage.Event event: The event object of the new message.
     :return None:
     """
 
-    containers = docker_client.containers.list(all=True)
+    if bot_mode == "engine":
+        if not trading_engine.token_addresses:
+            _log(event, "No tokens are traded!")
+            return
 
-    if not any("0x" in container.name for container in containers):
-        await _log(event, "No containers are running!")
+        for token in trading_engine.token_addresses:
+            await trading_engine.remove_token(token)
+            _log(event, f"Trading with token {token} deleted!")
         return
 
-    for container in containers:
-        if "0x" in container.name:
-            await _log(event, f"Deleting container {container.name}...")
+    names = [
+        name for name in await docker_orchestrator.get_containers() if "0x" in name
+    ]
+
+    if not names:
+        _log(event, "No containers are running!")
+        return
 
-            container.stop()
-            container.remove()
+    _log(event, f"Deleting {len(names)} containers...")
 
-            await _log(event, f"Container {container.name} is deleted!")
+    # Stopped a few at once, a container takes seconds to stop.
+    for name, error in (await docker_orchestrator.stop_all(names)).items():
+        if error is None:
+            _log(event, f"Container {name} is deleted!")
+        else:
+            _log(event, f"Failed to delete container {name}: {error}")
 
 
 async def _status_command(event: events.NewMessage.Event) -> None:
-    """Get the status of the Docker instances of the trading bot.
+    """Get the status of the traded tokens, in the engine or the containers.
 
     :param events.NewMessage.Event event: The event object of the new message.
     :return None:
     """
 
-    containers = docker_client.containers.list(all=True)
+    if bot_mode == "engine":
+        if not trading_engine.token_addresses:
+            _log(event, "No tokens are traded!")
+            return
+
+        for token in trading_engine.token_addresses:
+            _log(event, f"Trading with token {token} is running!")
+        return
+
+    containers = await docker_orchestrator.get_containers()
 
     if not containers:
-        await _log(event, "No containers are running!")
+        _log(event, "No containers are running!")
         return
 
-    for container in containers:
-        await _log(event, f"Container {container.name} is running!")
+    for name, status in containers.items():
+        _log(event, f"Container {name} is {status}!")
 
 
 async def _new_message_handler(event: events.NewMessage.Event) -> None:
@@ -206,7 +292,7 @@ async def _new_message_handler(event: events.NewMessage.Event) -> None:
         elif message.startswith("/status"):
             await _status_command(event)
         elif message.startswith("/help"):
-            await _log(
+            _log(
                 event,
                 "/trade 0x...: Start trading with the token\n"
                 "/stop 0x...: Stop trading with the token\n"
@@ -216,111 +302,79 @@ async def _new_message_handler(event: events.NewMessage.Event) -> None:
             )
 
     except Exception as error:
-        await _log(event, f"Failed to process command: {error}")
+        _log(event, f"Failed to process command: {error}")
 
 
-async def _handle_websocket_connection(
-    websocket: websockets.WebSocketServerProtocol,
-    path: str,
-) -> None:
-    """Handle the WebSocket connection.
+def _on_records(records: list[dict]) -> None:
+    """Print the records of the trading jobs, and send their trades to Telegram.
+
+    It is called from the thread of the log hub, one print per batch.
 
-    :param websockets.WebSocketServerProtocol websocket: The WebSocket client.
-    :param str path: The path of the WebSocket connection.
+    :param list[dict] records: The records.
     :return None:
     """
 
-    global connected_clients
-    connected_clients[path] = websocket
+    lines = []
 
-    try:
-        async for message in websocket:
-            data = message.split("::")
-            _, token, level, message = data
-
-            log_message = f"{token} {message}"
-
-            # TODO: Check if the message send works
-            if "[BUY]" in log_message or "[SELL]" in log_message:
-                try:
-                    _log(
-                        events.NewMessage.Event(
-                            message_id=0,
-                            chat_id=telegram_channel_id,
-                            message=log_message,
-                        ),
-                        log_message,
-                        without_print=True,
-                    )
-                except Exception as error:
-                    print(f"Failed to send message to Telegram: {error}")
-
-            if level == "ERROR" or level == "CRITICAL" or level == "FATAL":
-                log_message = (
-                    f"{colorama.Fore.RED}{log_message}{colorama.Style.RESET_ALL}"
-                )
-            elif level == "WARNING":
-                log_message = (
-                    f"{colorama.Fore.YELLOW}{log_message}{colorama.Style.RESET_ALL}"
-                )
-            elif level == "DEBUG":
-                log_message = (
-                    f"{colorama.Fore.BLUE}{log_message}{colorama.Style.RESET_ALL}"
-                )
+    for record in records:
+        log_message = f"{record['token']} {record['message']}"
 
-            print(log_message)
+        if record.get("txn") in ("BUY", "SELL"):
+            telegram_notifier.notify_threadsafe(
+                telegram_channel_id, log_message, notifier.TRADE
+            )
 
-            await websocket.send(log_message)
-    except websockets.exceptions.ConnectionClosedOK:
-        pass
-    except Exception as error:
-        print(f"Error in WebSocket connection: {error}")
-    finally:
-        connected_clients.pop(path, None)
+        color = LEVEL_COLORS.get(record["level"])
+        lines.append(
+            f"{color}{log_message}{colorama.Style.RESET_ALL}" if color else log_message
+        )
 
+    print("\n".join(lines))
 
-async def _main() -> None:
-    """Start the Telegram bot and the WebSocket server.
+
+async def _prepare_containers() -> None:
+    """Build the image of the trading containers if it changed, and remove the
+    containers not running it healthy.
 
     :return None:
     """
 
-    try:
-        await telegram_client.start(bot_token=telegram_bot_token)
-
-        if not telegram_client.is_connected():
-            raise ConnectionError(
-                "Failed to connect to Telegram with API_ID={}".format(telegram_api_id)
-            )
+    print("Building Docker image...")
 
-        if len(docker_client.images.list(name=docker_image_tag)) > 0:
-            print("Removing existing Docker containers...")
+    if await docker_orchestrator.run(docker_orchestrator.build_image, docker_image_tag):
+        print("Docker image built!")
+    else:
+        print("Docker image is up to date!")
 
-            for container in docker_client.containers.list(all=True):
-                if docker_image_tag not in container.image.tags:
-                    container.stop()
-                    container.remove()
+    for name in await docker_orchestrator.run(
+        docker_orchestrator.remove_stale_containers
+    ):
+        print(f"Container {name} removed!")
 
-                    print(f"Container {container.name} removed!")
+    docker_orchestrator.watch()
 
-            print("Removing existing Docker image...")
 
-            for image in docker_client.images.list(name=docker_image_tag):
-                docker_client.images.remove(image.id, force=True)
+async def _main() -> None:
+    """Start the Telegram bot and the WebSocket server.
 
-                print(f"Image {image.id} removed!")
+    :return None:
+    """
 
-        print("Building Docker image...")
+    started_at = time.perf_counter()
 
-        docker_client.images.build(
-            path=".",
-            tag=docker_image_tag,
-            nocache=True,
-            rm=True,
+    try:
+        # The image is built while connecting to Telegram.
+        await asyncio.gather(
+            telegram_client.start(bot_token=telegram_bot_token),
+            *([_prepare_containers()] if bot_mode == "container" else []),
         )
 
-        print("Docker image built!")
+        if not telegram_client.is_connected():
+            raise ConnectionError(
+                "Failed to connect to Telegram with API_ID={}".format(telegram_api_id)
+            )
 
+        telegram_notifier.start()
         telegram_client.add_event_handler(
             _new_message_handler,
             events.NewMessage(),
@@ -333,16 +387,36 @@ async def _main() -> None:
             os.environ.get("WEBSOCKET_URI").split("://")[1].split(":")
         )
 
-        websocket_server = websockets.serve(
-            _handle_websocket_connection,
+        # The hub has its own thread, a burst of logs never delays the commands.
+        hub = log_hub.LogHub(_on_records).start(
             websocket_uri_informations[0],
-            websocket_uri_informations[1],
+            int(websocket_uri_informations[1]),
             logger=websocket_logger,
         )
 
-        async with websocket_server:
-            print(f"Bot {BOT_NAME} started!")
+        try:
+            if bot_mode == "engine":
+                if environment.get_metrics_port() is not None:
+                    metrics.start_server(environment.get_metrics_port())
+
+                engine_task = asyncio.create_task(trading_engine.run())
+
+            print(
+                "Bot {} started in {:.1f}s!".format(
+                    BOT_NAME, time.perf_counter() - started_at
+                )
+            )
             await telegram_client.run_until_disconnected()
+
+            if bot_mode == "engine":
+                trading_engine.stop()
+                await engine_task
+        finally:
+            hub.stop()
+            await telegram_notifier.stop()
+
+            if bot_mode == "container":
+                docker_orchestrator.close()
     except Exception as error:
         print(f"Failed to start {BOT_NAME} bot: {error}")
 
@@ -0,0 +1,219 @@
+import functools
+import hashlib
+import json
+import os
+import tempfile
+
+import requests
+
+from helpers import constants, environment, errors, metrics, retry
+
+ERC20_ABI = "erc20"
+ERC20_PERMIT_ABI = "erc20_permit"
+UNISWAP_V2_PAIR_ABI = "uniswap_v2_pair"
+UNISWAP_V2_FACTORY_ABI = "uniswap_v2_factory"
+UNISWAP_V2_ROUTER_ABI = "uniswap_v2_router"
+MULTICALL3_ABI = "multicall3"
+
+_BUNDLED_ABI_DIR = os.path.join(os.path.dirname(__file__), "abis")
+
+# The contracts we always talk to are resolved from the bundled ABIs without ever
+# touching the disk cache or Etherscan.
+_BUNDLED_ADDRESSES = {
+    constants.WETH_CONTRACT_ADDRESS.lower(): ERC20_ABI,
+    constants.UNISWAP_V2_FACTORY_CONTRACT_ADDRESS.lower(): UNISWAP_V2_FACTORY_ABI,
+    constants.UNISWAP_V2_ROUTER_CONTRACT_ADDRESS.lower(): UNISWAP_V2_ROUTER_ABI,
+    constants.MULTICALL3_CONTRACT_ADDRESS.lower(): MULTICALL3_ABI,
+}
+
+
+@functools.cache
+def get_bundled_abi(name: str) -> list:
+    """Get an ABI shipped with the package.
+
+    :param str name: The name of the bundled ABI, e.g. `ERC20_ABI`.
+    :return list: The ABI.
+    """
+
+    with open(os.path.join(_BUNDLED_ABI_DIR, f"{name}.json")) as file:
+        return json.load(file)
+
+
+def get_abi(address: str, kind: str | None = None) -> list:
+    """Get the ABI of a contract, from the fastest layer that has it.
+
+    The layers are, in order: the bundled ABIs, the in-process LRU, the on-disk
+    cache and Etherscan.
+
+    :param str address: The contract address.
+    :param str | None kind: The name of a bundled ABI the contract is known to
+        implement, e.g. `ERC20_ABI` for a token.
+    :return list: The ABI of the contract.
+    """
+
+    address = address.lower()
+    kind = kind or _BUNDLED_ADDRESSES.get(address)
+
+    if kind:
+        return get_bundled_abi(kind)
+
+    return _resolve_abi(address)
+
+
+def clear() -> None:
+    """Clear the in-process cache, the bundled ABIs and the on-disk cache are kept.
+
+    :return None:
+    """
+
+    _resolve_abi.cache_clear()
+
+
+@functools.lru_cache(maxsize=constants.ABI_CACHE_SIZE)
+def _resolve_abi(address: str) -> list:
+    """Get the ABI of a contract from the on-disk cache or Etherscan.
+
+    :param str address: The lowercase contract address.
+    :return list: The ABI of the contract.
+    """
+
+    abi = _read_from_disk(address)
+
+    if abi is None:
+        abi = retry.DEFAULT_POLICY.call(_fetch_from_etherscan, address)
+        _write_to_disk(address, abi)
+
+    return abi
+
+
+@metrics.collector
+def _collect_metrics() -> list[tuple]:
+    """Read the hits and misses of the in-process cache.
+
+    :return list[tuple]: The samples.
+    """
+
+    cache_info = _resolve_abi.cache_info()
+
+    return [
+        ("cache_requests_total", {"cache": "abi", "result": "hit"}, cache_info.hits),
+        (
+            "cache_requests_total",
+            {"cache": "abi", "result": "miss"},
+            cache_info.misses,
+        ),
+    ]
+
+
+def _get_abi_cache_dir() -> str:
+    """Get the directory of the ABI on-disk cache.
+
+    :return str: The ABI cache directory.
+    """
+
+    return os.path.join(environment.get_cache_dir(), "abi")
+
+
+def _read_from_disk(address: str) -> list | None:
+    """Read an ABI from the on-disk cache.
+
+    The cache is content addressed: `addresses/<address>` holds the SHA-256 of the
+    ABI and `objects/<sha256>.json` holds the ABI itself, so contracts sharing the
+    same code (e.g. clones of a token) share the same object.
+
+    :param str address: The lowercase contract address.
+    :return list | None: The ABI, or None if it is not cached or is corrupted.
+    """
+
+    cache_dir = _get_abi_cache_dir()
+
+    try:
+        with open(os.path.join(cache_dir, "addresses", address)) as file:
+            digest = file.read().strip()
+
+        with open(os.path.join(cache_dir, "objects", f"{digest}.json"), "rb") as file:
+            content = file.read()
+    except OSError:
+        return None
+
+    if hashlib.sha256(content).hexdigest() != digest:
+        return None
+
+    return json.loads(content)
+
+
+def _write_to_disk(address: str, abi: list) -> None:
+    """Write an ABI to the on-disk cache.
+
+    Every file is written to a temporary file and renamed, so concurrent
+    containers sharing the cache never read a partially written file.
+
+    :param str address: The lowercase contract address.
+    :param list abi: The ABI of the contract.
+    :return None:
+    """
+
+    cache_dir = _get_abi_cache_dir()
+    content = json.dumps(abi, sort_keys=True, separators=(",", ":")).encode()
+    digest = hashlib.sha256(content).hexdigest()
+
+    try:
+        write_atomically(os.path.join(cache_dir, "objects", f"{digest}.json"), content)
+        write_atomically(os.path.join(cache_dir, "addresses", address), digest.encode())
+    except OSError:
+        # The on-disk cache is an optimization, a read-only volume must not stop
+        # the bot from trading.
+        pass
+
+
+def write_atomically(path: str, content: bytes) -> None:
+    """Write a file atomically.
+
+    :param str path: The path of the file.
+    :param bytes content: The content of the file.
+    :return None:
+    """
+
+    directory = os.path.dirname(path)
+    os.makedirs(directory, exist_ok=True)
+
+    descriptor, temporary_path = tempfile.mkstemp(dir=directory)
+
+    try:
+        with os.fdopen(descriptor, "wb") as file:
+            file.write(content)
+
+        os.replace(temporary_path, path)
+    except OSError:
+        os.unlink(temporary_path)
+        raise
+
+
+def _fetch_from_etherscan(address: str) -> list:
+    """Fetch an ABI from Etherscan.
+
+    :param str address: The contract address.
+    :return list: The ABI of the contract.
+    """
+
+    http_response = requests.get(
+        constants.ETHERSCAN_API_URL,
+        params={
+            "module": "contract",
+            "action": "getabi",
+            "address": address,
+            "apikey": environment.get_etherscan_api_key(),
+        },
+        timeout=constants.ETHERSCAN_TIMEOUT,
+    )
+    http_response.raise_for_status()
+    response = http_response.json()
+
+    # Etherscan answers its rate limit with a regular error.
+    if "rate limit" in str(response.get("result")).lower():
+        raise errors.TransientError(f"Etherscan error: {response.get('result')}")
+
+    if response.get("status") != "1":
+        raise ValueError(f"Etherscan error: {response.get('result')}")
+
+    return json.loads(response["result"])
@@ -0,0 +1,273 @@
+import asyncio
+import math
+
+from eth_abi import encode
+from eth_account.messages import encode_typed_data
+from eth_utils import keccak
+from hexbytes import HexBytes
+from web3 import AsyncWeb3
+
+from helpers import abi_cache, constants, environment, registry
+
+# EIP-2612 tokens sign their permits with one of these domain versions.
+PERMIT_VERSIONS = ("1", "2")
+PERMIT_TYPES = {
+    "Permit": [
+        {"name": "owner", "type": "address"},
+        {"name": "spender", "type": "address"},
+        {"name": "value", "type": "uint256"},
+        {"name": "nonce", "type": "uint256"},
+        {"name": "deadline", "type": "uint256"},
+    ]
+}
+
+_managers = {}
+
+
+class AllowanceManager:
+    """Remember the router allowances of a wallet, so sales skip the approval.
+
+    The allowances are read with the market snapshots and spent locally by the
+    swaps of the wallet. While a swap or an approval is in flight, or after it, the
+    snapshots read before its receipt are ignored, they are older than the local
+    allowance.
+    """
+
+    def __init__(self, owner: str) -> None:
+        self.owner = owner
+
+        self._allowances = {}
+        self._block_numbers = {}
+        self._lock = asyncio.Lock()
+
+    def get_allowance(self, token_address: str) -> int:
+        """Get the known allowance of a token.
+
+        :param str token_address: The token address.
+        :return int: The allowance, 0 if unknown.
+        """
+
+        return self._allowances.get(token_address.lower(), 0)
+
+    def update(self, token_address: str, allowance: int, block_number: int) -> None:
+        """Record the allowance of a token read at a block.
+
+        :param str token_address: The token address.
+        :param int allowance: The allowance.
+        :param int block_number: The block it was read at.
+        :return None:
+        """
+
+        token_address = token_address.lower()
+
+        if block_number >= self._block_numbers.get(token_address, 0):
+            self._allowances[token_address] = allowance
+
+    async def async_reserve(
+        self,
+        client: AsyncWeb3,
+        token_address: str,
+        amount_in_wei: int,
+        approve,
+        spend: bool = True,
+    ) -> HexBytes | None:
+        """Spend an allowance for a swap, approving the cap first if it is short.
+
+        :param AsyncWeb3 client: The AsyncWeb3 client.
+        :param str token_address: The token address.
+        :param int amount_in_wei: The amount the swap spends.
+        :param approve: The async function sending an approval, called with the
+            client, the token address and the amount.
+        :param bool spend: If the swap is sent now, otherwise the allowance is only
+            approved ahead of it.
+        :return HexBytes | None: The approval hash, None if the allowance was enough.
+        """
+
+        token_address = token_address.lower()
+        approval_hash = None
+
+        async with self._lock:
+            allowance = self.get_allowance(token_address)
+
+            if allowance < amount_in_wei:
+                allowance = max(environment.get_approval_cap(), amount_in_wei)
+                approval_hash = await approve(client, token_address, allowance)
+
+            self._allowances[token_address] = allowance
+
+            if approval_hash or spend:
+                self._block_numbers[token_address] = math.inf
+
+            if spend:
+                self.spend(token_address, amount_in_wei)
+
+        return approval_hash
+
+    def spend(self, token_address: str, amount_in_wei: int) -> None:
+        """Spend an allowance for a sent swap, until its receipt settles it.
+
+        :param str token_address: The token address.
+        :param int amount_in_wei: The amount the swap spends.
+        :return None:
+        """
+
+        token_address = token_address.lower()
+        allowance = self.get_allowance(token_address)
+
+        # Tokens do not spend an unlimited allowance.
+        if allowance < constants.MAX_UINT256:
+            self._allowances[token_address] = allowance - amount_in_wei
+
+        self._block_numbers[token_address] = math.inf
+
+    def settle(
+        self,
+        token_address: str,
+        block_number: int,
+        failed: bool = False,
+    ) -> None:
+        """Accept the snapshots again once a swap is mined, or given up on.
+
+        :param str token_address: The token address.
+        :param int block_number: The block of the receipt, or the latest block.
+        :param bool failed: If the swap or its approval failed, the allowance is
+            then unknown until the next snapshot.
+        :return None:
+        """
+
+        token_address = token_address.lower()
+
+        if failed:
+            self._allowances[token_address] = 0
+
+        self._block_numbers[token_address] = block_number
+
+
+def get_allowance_manager(owner: str) -> AllowanceManager:
+    """Get the allowance manager of a wallet for the running event loop.
+
+    :param str owner: The wallet address.
+    :return AllowanceManager: The allowance manager.
+    """
+
+    key = (id(asyncio.get_running_loop()), owner.lower())
+
+    if key not in _managers:
+        _managers[key] = AllowanceManager(owner)
+
+    return _managers[key]
+
+
+def get_domain_separator(
+    name: str, version: str, chain_id: int, token_address: str
+) -> bytes:
+    """Get the EIP-712 domain separator of the permits of a token.
+
+    :param str name: The token name.
+    :param str version: The domain version.
+    :param int chain_id: The chain ID.
+    :param str token_address: The token address.
+    :return bytes: The domain separator.
+    """
+
+    return keccak(
+        encode(
+            ["bytes32", "bytes32", "bytes32", "uint256", "address"],
+            [
+                keccak(
+                    b"EIP712Domain(string name,string version,uint256 chainId,"
+                    b"address verifyingContract)"
+                ),
+                keccak(text=name),
+                keccak(text=version),
+                chain_id,
+                registry.to_checksum_address(token_address),
+            ],
+        )
+    )
+
+
+async def async_get_permit_version(client: AsyncWeb3, token_address: str) -> str | None:
+    """Get the EIP-712 domain version of the permits of a token.
+
+    :param AsyncWeb3 client: The AsyncWeb3 client.
+    :param str token_address: The token address.
+    :return str | None: The version, None if the token does not support EIP-2612.
+    """
+
+    token = registry.get_registry(client).get_contract(
+        token_address, abi_cache.ERC20_PERMIT_ABI
+    )
+
+    try:
+        domain_separator = await token.functions.DOMAIN_SEPARATOR().call()
+        name = await token.functions.name().call()
+    except Exception:
+        return None
+
+    chain_id = await client.eth.chain_id
+
+    for version in PERMIT_VERSIONS:
+        if (
+            get_domain_separator(name, version, chain_id, token_address)
+            == domain_separator
+        ):
+            return version
+
+    return None
+
+
+async def async_sign_permit(
+    client: AsyncWeb3,
+    token_address: str,
+    spender: str,
+    value: int,
+    deadline: int,
+) -> tuple[int, bytes, bytes]:
+    """Sign an EIP-2612 permit of the wallet.
+
+    The permit lets anyone set the allowance of the wallet with `permit`, e.g. in
+    the same transaction as the transfer it allows.
+
+    :param AsyncWeb3 client: The AsyncWeb3 client.
+    :param str token_address: The token address.
+    :param str spender: The spender address.
+    :param int value: The allowance.
+    :param int deadline: The timestamp the permit expires at.
+    :return tuple[int, bytes, bytes]: The v, r and s of the signature.
+    """
+
+    version = await async_get_permit_version(client, token_address)
+
+    if version is None:
+        raise Exception(f"Token {token_address} does not support permits")
+
+    owner = environment.get_public_key()
+    token = registry.get_registry(client).get_contract(
+        token_address, abi_cache.ERC20_PERMIT_ABI
+    )
+
+    domain = {
+        "name": await token.functions.name().call(),
+        "version": version,
+        "chainId": await client.eth.chain_id,
+        "verifyingContract": registry.to_checksum_address(token_address),
+    }
+    message = {
+        "owner": owner,
+        "spender": registry.to_checksum_address(spender),
+        "value": value,
+        "nonce": await token.functions.nonces(owner).call(),
+        "deadline": deadline,
+    }
+
+    signed_message = client.eth.account.sign_message(
+        encode_typed_data(domain, PERMIT_TYPES, message),
+        environment.get_private_key(),
+    )
+
+    return (
+        signed_message.v,
+        signed_message.r.to_bytes(32, "big"),
+        signed_message.s.to_bytes(32, "big"),
+    )
@@ -0,0 +1,99 @@
+import asyncio
+import dataclasses
+
+from helpers import quote, snapshot
+
+_armories = {}
+
+
+@dataclasses.dataclass
+class ArmedExit:
+    """A sale of a whole position, built and signed ahead of its trigger."""
+
+    token_address: str
+    amount_in_wei: int
+    amount_out_min: int
+    deadline: int
+    block_number: int
+    txn: dict
+    raw_transaction: bytes
+
+    def is_valid(
+        self,
+        market_snapshot: snapshot.MarketSnapshot,
+        slippage_percent: int | float,
+    ) -> bool:
+        """Whether the signed sale can be sent as is on a tick.
+
+        Its minimum output must still be reachable at the reserves of the tick, and
+        not below what the slippage allows.
+
+        :param snapshot.MarketSnapshot market_snapshot: The market snapshot of the
+            tick.
+        :param int | float slippage_percent: The slippage percentage.
+        :return bool: True if the sale can be sent.
+        """
+
+        amount_out = quote.get_amount_out(
+            self.amount_in_wei,
+            market_snapshot.token_reserve,
+            market_snapshot.weth_reserve_in_wei,
+        )
+
+        return (
+            int(amount_out * (1 - slippage_percent / 100))
+            <= self.amount_out_min
+            <= amount_out
+            and market_snapshot.timestamp < self.deadline
+        )
+
+
+class Armory:
+    """The armed exits of a wallet, one per held token."""
+
+    def __init__(self, owner: str) -> None:
+        self.owner = owner
+
+        self._exits = {}
+
+    def arm(self, armed_exit: ArmedExit) -> None:
+        """Replace the armed exit of a token.
+
+        :param ArmedExit armed_exit: The armed exit.
+        :return None:
+        """
+
+        self._exits[armed_exit.token_address.lower()] = armed_exit
+
+    def disarm(self, token_address: str) -> ArmedExit | None:
+        """Remove the armed exit of a token.
+
+        :param str token_address: The token address.
+        :return ArmedExit | None: The armed exit, None if the token had none.
+        """
+
+        return self._exits.pop(token_address.lower(), None)
+
+    def get(self, token_address: str) -> ArmedExit | None:
+        """Get the armed exit of a token.
+
+        :param str token_address: The token address.
+        :return ArmedExit | None: The armed exit, None if the token has none.
+        """
+
+        return self._exits.get(token_address.lower())
+
+
+def get_armory(owner: str) -> Armory:
+    """Get the armory of a wallet for the running event loop.
+
+    :param str owner: The wallet address.
+    :return Armory: The armory.
+    """
+
+    key = (id(asyncio.get_running_loop()), owner.lower())
+
+    if key not in _armories:
+        _armories[key] = Armory(owner)
+
+    return _armories[key]
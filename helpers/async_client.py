@@ -0,0 +1,193 @@
+import asyncio
+import atexit
+import concurrent.futures
+import threading
+import weakref
+from collections.abc import AsyncGenerator, Awaitable, Callable
+
+import aiohttp
+from web3 import AsyncWeb3, Web3
+
+from helpers import constants, environment, multi_provider, rpc_middleware
+
+# The clients of every event loop, forgotten with their loop.
+_clients = weakref.WeakKeyDictionary()
+_loop = None
+_loop_thread = None
+_loop_lock = threading.Lock()
+
+
+class _LoopClients:
+    """The clients of an event loop, their sessions are closed when it shuts down."""
+
+    def __init__(self) -> None:
+        self.tasks: dict[str, asyncio.Task] = {}
+        self.sessions: list[aiohttp.ClientSession] = []
+
+        # Closed by the loop before its own close, e.g. at the end of asyncio.run.
+        self.closer = self._close_on_shutdown()
+
+    async def _close_on_shutdown(self) -> AsyncGenerator[None]:
+        """Close the sessions once the event loop shuts its async generators down.
+
+        :return AsyncGenerator[None]: The generator, started by `get_async_client`.
+        """
+
+        try:
+            yield
+        finally:
+            for session in self.sessions:
+                await session.close()
+
+
+async def get_async_client(rpc_url: str | None = None) -> AsyncWeb3:
+    """Get the AsyncWeb3 client of an RPC URL for the running event loop.
+
+    The client is created once per event loop, with a pooled HTTP session that
+    keeps its connections alive, so concurrent calls reuse a few connections. The
+    client of RPC_URL also uses the backup RPC URLs. Its session is closed when the
+    event loop shuts down.
+
+    :param str | None rpc_url: The RPC URL, RPC_URL if not given.
+    :return AsyncWeb3: The AsyncWeb3 client.
+    """
+
+    rpc_url = rpc_url or environment.get_rpc_url()
+    loop = asyncio.get_running_loop()
+    loop_clients = _clients.get(loop)
+
+    if loop_clients is None:
+        loop_clients = _clients[loop] = _LoopClients()
+        await anext(loop_clients.closer)
+
+    if rpc_url not in loop_clients.tasks:
+        # Published before its first await, so concurrent first calls share it.
+        loop_clients.tasks[rpc_url] = loop.create_task(
+            _create_client(rpc_url, loop_clients.sessions)
+        )
+
+    task = loop_clients.tasks[rpc_url]
+
+    try:
+        # Shielded, a cancelled caller does not cancel the client of the others.
+        return await asyncio.shield(task)
+    except Exception:
+        if loop_clients.tasks.get(rpc_url) is task:
+            del loop_clients.tasks[rpc_url]
+
+        raise
+
+
+def run(coroutine: Awaitable):
+    """Run a coroutine from synchronous code and wait for its result.
+
+    The coroutines run in a single background event loop, so their clients and
+    connection pools are shared by every thread.
+
+    :param Awaitable coroutine: The coroutine.
+    :return: The result of the coroutine.
+    """
+
+    if threading.current_thread() is _loop_thread:
+        raise RuntimeError("Can not wait for a coroutine in the background loop")
+
+    return submit(coroutine).result()
+
+
+def submit(coroutine: Awaitable) -> concurrent.futures.Future:
+    """Run a coroutine in the background event loop without waiting for it.
+
+    :param Awaitable coroutine: The coroutine.
+    :return concurrent.futures.Future: The future of its result.
+    """
+
+    return asyncio.run_coroutine_threadsafe(coroutine, _get_loop())
+
+
+def call(client: Web3, function: Callable[..., Awaitable], *args, **kwargs):
+    """Call an async helper from synchronous code.
+
+    The helper gets the AsyncWeb3 client of the RPC URL of the Web3 client.
+
+    :param Web3 client: The Web3 client.
+    :param Callable[..., Awaitable] function: The async helper, it takes the AsyncWeb3
+        client as first argument.
+    :return: The result of the helper.
+    """
+
+    async def call_with_async_client():
+        async_client = await get_async_client(client.provider.endpoint_uri)
+        return await function(async_client, *args, **kwargs)
+
+    return run(call_with_async_client())
+
+
+def _get_loop() -> asyncio.AbstractEventLoop:
+    """Get the background event loop, started on first use.
+
+    :return asyncio.AbstractEventLoop: The event loop.
+    """
+
+    global _loop, _loop_thread
+
+    with _loop_lock:
+        if _loop is None:
+            _loop = asyncio.new_event_loop()
+            _loop_thread = threading.Thread(target=_loop.run_forever, daemon=True)
+            _loop_thread.start()
+
+            atexit.register(_shutdown_loop)
+
+    return _loop
+
+
+def _shutdown_loop() -> None:
+    """Close the sessions of the background event loop, at exit.
+
+    :return None:
+    """
+
+    try:
+        asyncio.run_coroutine_threadsafe(_loop.shutdown_asyncgens(), _loop).result(
+            constants.HTTP_CLOSE_TIMEOUT
+        )
+    except concurrent.futures.TimeoutError:
+        pass
+
+    _loop.call_soon_threadsafe(_loop.stop)
+
+
+async def _create_client(
+    rpc_url: str, sessions: list[aiohttp.ClientSession]
+) -> AsyncWeb3:
+    """Create the AsyncWeb3 client of an RPC URL, in the running event loop.
+
+    :param str rpc_url: The RPC URL.
+    :param list[aiohttp.ClientSession] sessions: The sessions of the event loop,
+        the session of the client is added to them.
+    :return AsyncWeb3: The AsyncWeb3 client.
+    """
+
+    rpc_urls = (
+        environment.get_rpc_urls()
+        if rpc_url == environment.get_rpc_url()
+        else [rpc_url]
+    )
+
+    # Caching lets web3 ask the chain ID once instead of around every call.
+    client = AsyncWeb3(
+        multi_provider.AsyncMultiHTTPProvider(rpc_urls, cache_allowed_requests=True)
+    )
+    session = aiohttp.ClientSession(
+        raise_for_status=True,
+        connector=aiohttp.TCPConnector(
+            limit=constants.HTTP_POOL_SIZE,
+            keepalive_timeout=constants.HTTP_KEEPALIVE_TIMEOUT,
+        ),
+    )
+    sessions.append(session)
+
+    await client.provider.cache_async_session(session)
+    rpc_middleware.install(client)
+
+    return client
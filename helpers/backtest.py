@@ -0,0 +1,506 @@
+import dataclasses
+import json
+
+import numpy as np
+from web3 import Web3
+
+from helpers import (
+    constants,
+    environment,
+    models,
+    price_feed,
+    quote,
+    registry,
+    snapshot,
+)
+
+# State of the pair at the end of every block with a `Sync` log. The reserves are
+# floats, like in the tick journal, and are rounded back to integers for the jobs.
+EVENT_DTYPE = np.dtype(
+    [
+        ("block_number", "<u8"),
+        ("timestamp", "<u8"),
+        ("weth_reserve_in_wei", "<f8"),
+        ("token_reserve", "<f8"),
+    ]
+)
+
+
+@dataclasses.dataclass(frozen=True)
+class Trade:
+    """A simulated swap, filled or reverted."""
+
+    block_number: int
+    transaction_type: models.TransactionType
+    amount_in: int
+    amount_out: int
+    gas_cost_in_wei: int
+    filled: bool
+
+
+@dataclasses.dataclass(frozen=True)
+class BacktestResult:
+    """Outcome of a job replayed over the history of a pair.
+
+    The equity is the ETH balance plus the token balance valued at the spot price
+    of the pair, after every event.
+    """
+
+    initial_equity_in_wei: int
+    final_equity_in_wei: int
+    max_drawdown_percent: float
+    trade_count: int
+    failed_trade_count: int
+    error_count: int
+    gas_cost_in_wei: int
+    trades: list[Trade]
+
+    @property
+    def pnl_in_wei(self) -> int:
+        """The profit and loss, the gas included.
+
+        :return int: The PnL in WEI.
+        """
+
+        return self.final_equity_in_wei - self.initial_equity_in_wei
+
+    @property
+    def pnl_percent(self) -> float:
+        """The profit and loss, relative to the initial equity.
+
+        :return float: The PnL percentage.
+        """
+
+        return self.pnl_in_wei / self.initial_equity_in_wei * 100
+
+
+class SimulatedClient:
+    """Stand-in for the Web3 client of a job, it fills its swaps from the history.
+
+    `signals.buy` and `signals.sell` hand it the swaps of the job. A swap is mined
+    `delay_blocks` after the block of the snapshot it was decided on, against the
+    reserves at the end of that block, and reverts when it gets less than the
+    slippage allows. A mined swap costs its gas, reverted or not, and a sale pays
+    for an approval of the cap first when the allowance is short, like
+    `signals.sell`. The swaps of the job do not move the recorded reserves.
+    """
+
+    def __init__(
+        self,
+        events: np.ndarray,
+        eth_balance_in_wei: int,
+        token_balance: int = 0,
+        gas_price_in_wei: int = Web3.to_wei(constants.BACKTEST_GAS_PRICE, "gwei"),
+        delay_blocks: int = constants.BACKTEST_DELAY_BLOCKS,
+    ) -> None:
+        self.events = events
+        self.eth_balance_in_wei = eth_balance_in_wei
+        self.token_balance = token_balance
+        self.gas_price_in_wei = gas_price_in_wei
+        self.delay_blocks = delay_blocks
+        self.approval_cap = environment.get_approval_cap()
+        self.router_allowance = 0
+        self.trades = []
+
+        # Changes of the balances, by event index, for the equity curve.
+        self.balance_changes = []
+
+    def buy(
+        self,
+        token_address: str,
+        amount_in_wei: int,
+        slippage_percent: int | float,
+        market_snapshot: snapshot.MarketSnapshot,
+    ) -> str:
+        """Buy a token with ETH, like `signals.async_buy`.
+
+        :param str token_address: The token address.
+        :param int amount_in_wei: The amount in wei to buy.
+        :param int | float slippage_percent: The slippage percentage.
+        :param snapshot.MarketSnapshot market_snapshot: The market snapshot.
+        :return str: The transaction hash.
+        """
+
+        if amount_in_wei <= 0:
+            raise Exception("Invalid amount")
+
+        gas_cost_in_wei = constants.BACKTEST_SWAP_GAS * self.gas_price_in_wei
+
+        if market_snapshot.eth_balance_in_wei < amount_in_wei + gas_cost_in_wei:
+            raise Exception("Insufficient funds")
+
+        if market_snapshot.liquidity_in_wei < amount_in_wei:
+            raise Exception("Insufficient liquidity")
+
+        amount_out_min = int(
+            quote.get_amount_out(
+                amount_in_wei,
+                market_snapshot.weth_reserve_in_wei,
+                market_snapshot.token_reserve,
+            )
+            * (1 - slippage_percent / 100)
+        )
+
+        return self._swap(
+            models.TransactionType.BUY,
+            market_snapshot.block_number,
+            amount_in_wei,
+            amount_out_min,
+            gas_cost_in_wei,
+        )
+
+    def sell(
+        self,
+        token_address: str,
+        amount_in_wei: int,
+        slippage_percent: int | float,
+        market_snapshot: snapshot.MarketSnapshot,
+    ) -> str:
+        """Sell a token for ETH, like `signals.async_sell`.
+
+        :param str token_address: The token address.
+        :param int amount_in_wei: The amount in wei to sell.
+        :param int | float slippage_percent: The slippage percentage.
+        :param snapshot.MarketSnapshot market_snapshot: The market snapshot.
+        :return str: The transaction hash.
+        """
+
+        if amount_in_wei <= 0:
+            raise Exception("Invalid amount")
+
+        if market_snapshot.token_balance < amount_in_wei:
+            raise Exception("Insufficient funds")
+
+        amount_out_min = int(
+            quote.get_amount_out(
+                amount_in_wei,
+                market_snapshot.token_reserve,
+                market_snapshot.weth_reserve_in_wei,
+            )
+            * (1 - slippage_percent / 100)
+        )
+
+        gas = constants.BACKTEST_SWAP_GAS
+
+        if self.router_allowance < amount_in_wei:
+            gas += constants.BACKTEST_APPROVE_GAS
+            self.router_allowance = max(self.approval_cap, amount_in_wei)
+
+        txn_hash = self._swap(
+            models.TransactionType.SELL,
+            market_snapshot.block_number,
+            amount_in_wei,
+            amount_out_min,
+            gas * self.gas_price_in_wei,
+        )
+
+        if self.trades[-1].filled and self.router_allowance < constants.MAX_UINT256:
+            self.router_allowance -= amount_in_wei
+
+        return txn_hash
+
+    def _swap(
+        self,
+        transaction_type: models.TransactionType,
+        block_number: int,
+        amount_in: int,
+        amount_out_min: int,
+        gas_cost_in_wei: int,
+    ) -> str:
+        """Mine a swap at the end of its block, or revert it.
+
+        :param models.TransactionType transaction_type: BUY or SELL.
+        :param int block_number: The block the swap was decided on.
+        :param int amount_in: The input amount.
+        :param int amount_out_min: The minimum output amount.
+        :param int gas_cost_in_wei: The gas cost.
+        :return str: The transaction hash.
+        """
+
+        # The last event at or before the block the swap is mined in.
+        index = int(
+            np.searchsorted(
+                self.events["block_number"],
+                block_number + self.delay_blocks,
+                side="right",
+            )
+            - 1
+        )
+        event = self.events[index]
+        weth_reserve_in_wei = int(event["weth_reserve_in_wei"])
+        token_reserve = int(event["token_reserve"])
+
+        if transaction_type == models.TransactionType.BUY:
+            amount_out = quote.get_amount_out(
+                amount_in, weth_reserve_in_wei, token_reserve
+            )
+        else:
+            amount_out = quote.get_amount_out(
+                amount_in, token_reserve, weth_reserve_in_wei
+            )
+
+        filled = amount_out >= amount_out_min
+        self.trades.append(
+            Trade(
+                block_number=block_number + self.delay_blocks,
+                transaction_type=transaction_type,
+                amount_in=amount_in,
+                amount_out=amount_out if filled else 0,
+                gas_cost_in_wei=gas_cost_in_wei,
+                filled=filled,
+            )
+        )
+
+        eth_change, token_change = -gas_cost_in_wei, 0
+
+        if filled and transaction_type == models.TransactionType.BUY:
+            eth_change, token_change = eth_change - amount_in, amount_out
+        elif filled:
+            eth_change, token_change = eth_change + amount_out, -amount_in
+
+        self.eth_balance_in_wei += eth_change
+        self.token_balance += token_change
+        self.balance_changes.append((index, eth_change, token_change))
+
+        txn_hash = f"0x{len(self.trades):064x}"
+
+        if not filled:
+            raise Exception(f"Transaction failed: {txn_hash}")
+
+        return txn_hash
+
+
+def load_sync_events(path: str, token_address: str) -> np.ndarray:
+    """Load the `Sync` logs of the WETH pair of a token from a JSON lines file.
+
+    Every line is a log as returned by `eth_getLogs`, `save_sync_events` writes
+    them. Only the last log of every block is kept, and the removed ones are left
+    out.
+
+    :param str path: The file path.
+    :param str token_address: The token address.
+    :return np.ndarray: The events, as a structured array of `EVENT_DTYPE`.
+    """
+
+    rows = []
+
+    with open(path) as file:
+        for line in file:
+            if not line.strip():
+                continue
+
+            log = json.loads(line)
+
+            if log.get("removed", False):
+                continue
+
+            data = log["data"].removeprefix("0x")
+            rows.append(
+                (
+                    _to_int(log["blockNumber"]),
+                    _to_int(log["logIndex"]),
+                    _to_int(log.get("blockTimestamp", 0)),
+                    float(int(data[:64], 16)),
+                    float(int(data[64:128], 16)),
+                )
+            )
+
+    if not rows:
+        return np.empty(0, dtype=EVENT_DTYPE)
+
+    rows.sort()
+
+    block_numbers, _, timestamps, reserves0, reserves1 = zip(*rows)
+    weth_reserves, token_reserves = snapshot.sort_reserves(
+        token_address, reserves0, reserves1
+    )
+
+    events = np.empty(len(rows), dtype=EVENT_DTYPE)
+    events["block_number"] = block_numbers
+    events["timestamp"] = timestamps
+    events["weth_reserve_in_wei"] = weth_reserves
+    events["token_reserve"] = token_reserves
+
+    # The state a block ends with is the one of its last log.
+    last_of_block = np.append(
+        events["block_number"][1:] != events["block_number"][:-1], True
+    )
+
+    return events[last_of_block]
+
+
+def save_sync_events(
+    client: Web3,
+    token_address: str,
+    from_block: int,
+    to_block: int,
+    path: str,
+) -> int:
+    """Save the `Sync` logs of the WETH pair of a token to a JSON lines file.
+
+    :param Web3 client: The Web3 client.
+    :param str token_address: The token address.
+    :param int from_block: The first block.
+    :param int to_block: The last block.
+    :param str path: The file path.
+    :return int: The number of logs.
+    """
+
+    pair_address = registry.get_registry(client).get_pair_address(token_address)
+    count = 0
+
+    with open(path, "w") as file:
+        for start in range(from_block, to_block + 1, constants.LOGS_BLOCK_RANGE):
+            logs = client.eth.get_logs(
+                {
+                    "fromBlock": start,
+                    "toBlock": min(start + constants.LOGS_BLOCK_RANGE - 1, to_block),
+                    "address": pair_address,
+                    "topics": [price_feed.SYNC_TOPIC],
+                }
+            )
+
+            for log in logs:
+                file.write(Web3.to_json(log) + "\n")
+
+            count += len(logs)
+
+    return count
+
+
+def run_backtest(
+    job,
+    token_address: str,
+    events: np.ndarray,
+    eth_balance_in_wei: int,
+    token_balance: int = 0,
+    gas_price_in_wei: int = Web3.to_wei(constants.BACKTEST_GAS_PRICE, "gwei"),
+    delay_blocks: int = constants.BACKTEST_DELAY_BLOCKS,
+) -> BacktestResult:
+    """Replay the history of a pair through a job, tick by tick.
+
+    The job is called like the engine calls it, once per event, with the price of
+    the first event as its initial price. Its swaps go through `signals.buy` and
+    `signals.sell`, which hand them to a `SimulatedClient`. The equity curve and
+    the drawdown are computed at once over all the events.
+
+    :param Job job: The job.
+    :param str token_address: The token address.
+    :param np.ndarray events: The events, from `load_sync_events`.
+    :param int eth_balance_in_wei: The initial ETH balance.
+    :param int token_balance: The initial token balance.
+    :param int gas_price_in_wei: The gas price of the swaps.
+    :param int delay_blocks: The blocks between a tick and its swaps.
+    :return BacktestResult: The result.
+    """
+
+    if len(events) == 0:
+        raise ValueError("No events to replay")
+
+    client = SimulatedClient(
+        events, eth_balance_in_wei, token_balance, gas_price_in_wei, delay_blocks
+    )
+    pair_address = registry.ZERO_ADDRESS
+    initial_price_in_wei = None
+    error_count = 0
+
+    for block_number, timestamp, weth_reserve_in_wei, token_reserve in zip(
+        events["block_number"].tolist(),
+        events["timestamp"].tolist(),
+        events["weth_reserve_in_wei"].tolist(),
+        events["token_reserve"].tolist(),
+    ):
+        market_snapshot = snapshot.MarketSnapshot(
+            token_address=token_address,
+            pair_address=pair_address,
+            block_number=block_number,
+            timestamp=timestamp,
+            eth_balance_in_wei=client.eth_balance_in_wei,
+            token_balance=client.token_balance,
+            weth_reserve_in_wei=int(weth_reserve_in_wei),
+            token_reserve=int(token_reserve),
+        )
+
+        if initial_price_in_wei is None:
+            initial_price_in_wei = market_snapshot.price_in_wei
+
+        transaction_type, *_ = job(
+            client, token_address, initial_price_in_wei, market_snapshot
+        )
+
+        if transaction_type == models.TransactionType.ERROR:
+            error_count += 1
+
+    return _get_result(events, client, eth_balance_in_wei, token_balance, error_count)
+
+
+def _get_result(
+    events: np.ndarray,
+    client: SimulatedClient,
+    eth_balance_in_wei: int,
+    token_balance: int,
+    error_count: int,
+) -> BacktestResult:
+    """Compute the equity curve and the drawdown of a replay.
+
+    :param np.ndarray events: The events.
+    :param SimulatedClient client: The client of the replay.
+    :param int eth_balance_in_wei: The initial ETH balance.
+    :param int token_balance: The initial token balance.
+    :param int error_count: The number of ticks the job returned an error on.
+    :return BacktestResult: The result.
+    """
+
+    # A swap changes the balances from the event it is mined at, the swaps are
+    # few and the curve is computed at once over the events.
+    eth_changes = np.zeros(len(events))
+    token_changes = np.zeros(len(events))
+
+    for index, eth_change, token_change in client.balance_changes:
+        eth_changes[index] += eth_change
+        token_changes[index] += token_change
+
+    prices = events["weth_reserve_in_wei"] / events["token_reserve"]
+    initial_equity = eth_balance_in_wei + token_balance * prices[0]
+    equity = (eth_balance_in_wei + np.cumsum(eth_changes)) + (
+        token_balance + np.cumsum(token_changes)
+    ) * prices
+    peaks = np.maximum.accumulate(np.append(initial_equity, equity))[1:]
+    trades = client.trades
+
+    return BacktestResult(
+        initial_equity_in_wei=_get_equity(eth_balance_in_wei, token_balance, events[0]),
+        final_equity_in_wei=_get_equity(
+            client.eth_balance_in_wei, client.token_balance, events[-1]
+        ),
+        max_drawdown_percent=float(np.max((peaks - equity) / peaks) * 100),
+        trade_count=sum(trade.filled for trade in trades),
+        failed_trade_count=sum(not trade.filled for trade in trades),
+        error_count=error_count,
+        gas_cost_in_wei=sum(trade.gas_cost_in_wei for trade in trades),
+        trades=trades,
+    )
+
+
+def _get_equity(eth_balance_in_wei: int, token_balance: int, event) -> int:
+    """Get the exact equity of balances, at the spot price of an event.
+
+    :param int eth_balance_in_wei: The ETH balance.
+    :param int token_balance: The token balance.
+    :param event: The event.
+    :return int: The equity in WEI.
+    """
+
+    return eth_balance_in_wei + token_balance * int(
+        event["weth_reserve_in_wei"]
+    ) // int(event["token_reserve"])
+
+
+def _to_int(value: int | str) -> int:
+    """Convert a JSON-RPC quantity to an integer.
+
+    :param int | str value: The quantity, hex encoded or already decoded.
+    :return int: The integer.
+    """
+
+    return int(value, 16) if isinstance(value, str) else value
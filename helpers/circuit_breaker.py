@@ -0,0 +1,121 @@
+import threading
+import time
+
+from helpers import constants
+
+CLOSED = "closed"
+OPEN = "open"
+HALF_OPEN = "half_open"
+
+
+class CircuitBreaker:
+    """Stop calling an endpoint failing in a row, and try it again later.
+
+    While closed, the calls go through. After `failure_threshold` consecutive
+    failures it opens and refuses them for `reset_timeout`, then it is half-open
+    and lets a single trial call through: its success closes it, its failure opens
+    it again for twice as long, up to `max_reset_timeout`.
+    """
+
+    def __init__(
+        self,
+        failure_threshold: int = constants.CIRCUIT_FAILURE_THRESHOLD,
+        reset_timeout: float = constants.CIRCUIT_RESET_TIMEOUT,
+        max_reset_timeout: float = constants.CIRCUIT_MAX_RESET_TIMEOUT,
+    ) -> None:
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.max_reset_timeout = max_reset_timeout
+        self.failures = 0
+
+        self._state = CLOSED
+        self._opened_at = 0.0
+        self._timeout = reset_timeout
+        self._trial = False
+        self._lock = threading.Lock()
+
+    @property
+    def state(self) -> str:
+        """The state of the breaker, `closed`, `open` or `half_open`.
+
+        :return str: The state.
+        """
+
+        with self._lock:
+            if self._state == OPEN and self._is_timed_out():
+                return HALF_OPEN
+
+            return self._state
+
+    def is_open(self) -> bool:
+        """Whether the calls are refused.
+
+        :return bool: True if open, or half-open with its trial call in flight.
+        """
+
+        state = self.state
+
+        return state == OPEN or (state == HALF_OPEN and self._trial)
+
+    def allow_request(self) -> bool:
+        """Let a call through, the only one if half-open.
+
+        :return bool: True if the call can be made, its result must be recorded.
+        """
+
+        with self._lock:
+            if self._state == CLOSED:
+                return True
+
+            if self._state == OPEN and not self._is_timed_out():
+                return False
+
+            if self._trial:
+                return False
+
+            self._state = HALF_OPEN
+            self._trial = True
+
+            return True
+
+    def record_success(self) -> None:
+        """Close the breaker after a successful call.
+
+        :return None:
+        """
+
+        with self._lock:
+            self.failures = 0
+            self._state = CLOSED
+            self._timeout = self.reset_timeout
+            self._trial = False
+
+    def record_failure(self) -> None:
+        """Count a failed call, the breaker opens after too many in a row.
+
+        :return None:
+        """
+
+        with self._lock:
+            self.failures += 1
+
+            if self._state == HALF_OPEN:
+                self._timeout = min(self._timeout * 2, self.max_reset_timeout)
+            elif self.failures < self.failure_threshold:
+                return
+
+            self._state = OPEN
+            self._opened_at = time.monotonic()
+            self._trial = False
+
+    def record_cancel(self) -> None:
+        """Forget a call given up on before its result, another one may be a trial.
+
+        :return None:
+        """
+
+        with self._lock:
+            self._trial = False
+
+    def _is_timed_out(self) -> bool:
+        return time.monotonic() >= self._opened_at + self._timeout
@@ -1,9 +1,85 @@
 SLIPPAGE_PERCENT = 0.1
+DEFAULT_STRATEGY = "example"
 GAS_MULTIPLIER = 1.8
-MAX_PRIORITY_FEE_PER_GAS = 0.05
+MAX_PRIORITY_FEE_PER_GAS = 0.05  # gwei, the lowest priority fee offered
+GAS_PRIORITY_PERCENTILE = 50  # of the priority fees paid in the recent blocks
+GAS_FEE_HISTORY_BLOCKS = 10
+GAS_BASE_FEE_MULTIPLIER = 2  # room for the base fee to rise for 6 full blocks
+SWAP_GAS_LIMIT = 350_000  # gas of a swap sent before its approval is mined
+RECEIPT_POLL_INTERVAL = 0.1  # seconds
+MAX_UINT256 = 2**256 - 1
+APPROVAL_CAP = MAX_UINT256  # approved once per token, at least the sold amount
+ARMED_EXITS = False  # sign the sales of the held tokens on every block
 
 BLOCK_TIME_LIMIT = 10 * 60  # 10 minutes
 
 WETH_CONTRACT_ADDRESS = "0xC02aaA39b223FE8D0A0e5C4F27eAD9083C756Cc2"
 UNISWAP_V2_FACTORY_CONTRACT_ADDRESS = "0x5C69bEe701ef814a2B6a3EDD4B1652CB9cc5aA6f"
 UNISWAP_V2_ROUTER_CONTRACT_ADDRESS = "0x7a250d5630B4cF539739dF2C5dAcb4c659F2488D"
+MULTICALL3_CONTRACT_ADDRESS = "0xcA11bde05977b3631167028862bE2a173976CA11"
+
+ETHERSCAN_API_URL = "https://api.etherscan.io/api"
+ETHERSCAN_TIMEOUT = 10  # seconds
+
+DEFAULT_CACHE_DIR = ".cache"
+CACHE_PAIRS = False  # keep the WETH pair addresses in the cache directory
+PREWARM = True  # resolve the contracts of the first tick while connecting
+ABI_CACHE_SIZE = 256
+JOURNAL_DIR_NAME = "journal"  # in the cache directory
+JOURNAL_SEGMENT_SIZE = 64 * 1024 * 1024  # bytes
+
+POLL_INTERVAL = 2  # seconds
+REORG_DEPTH = 64  # blocks
+LOGS_BLOCK_RANGE = 1000  # blocks per eth_getLogs request
+WEBSOCKET_MAX_RECONNECT_DELAY = 30  # seconds
+
+LOG_QUEUE_SIZE = 10_000  # messages waiting for the WebSocket server
+LOG_BATCH_SIZE = 100  # messages per WebSocket frame
+LOG_DROP_POLICY = "drop_oldest"  # or "drop_newest" or "block"
+LOG_FLUSH_TIMEOUT = 2  # seconds
+LOG_SCHEMA_VERSION = 1  # of the records shipped to the log hub
+HUB_QUEUE_SIZE = 10_000  # records waiting for a subscriber before it is evicted
+HUB_BATCH_SIZE = 500  # records per frame sent to a subscriber
+
+TELEGRAM_RATE = 0.3  # messages per second, Telegram allows 20 per minute in a group
+TELEGRAM_BURST = 5  # messages sent at once before the rate applies
+TELEGRAM_DIGEST_INTERVAL = 2  # seconds the other messages of a chat are gathered
+TELEGRAM_MAX_MESSAGE_LENGTH = 4096  # characters
+TELEGRAM_QUEUE_SIZE = 1000  # messages waiting per chat, the oldest are dropped
+
+DOCKER_WORKERS = 8  # threads calling the Docker SDK
+DOCKER_STOP_PARALLELISM = 4  # containers stopped at once
+DOCKER_EVENTS_RETRY_DELAY = 1  # seconds before the Docker events are watched again
+# Files copied to the image of the trading containers, it is built when they change.
+DOCKER_BUILD_PATHS = ("Dockerfile", "requirements.txt", "main.py", "helpers", "jobs")
+DOCKER_CACHE_DIR = "/cache"  # of the cache volume shared by the trading containers
+
+HTTP_POOL_SIZE = 100  # connections per RPC URL
+HTTP_KEEPALIVE_TIMEOUT = 30  # seconds
+HTTP_CLOSE_TIMEOUT = 2  # seconds to close the HTTP sessions at exit
+
+RPC_MAX_BATCH_SIZE = 100  # requests per JSON-RPC batch
+RPC_CACHE_MAX_AGE = 1  # seconds a result read at the latest block is kept
+RPC_CACHE_SIZE = 4096  # results
+RPC_HEDGE_DELAY = 0.5  # seconds before a read is sent to another endpoint too
+RPC_HEDGE_MIN_DELAY = 0.02  # seconds, the hedge delay is the p95 latency above it
+RPC_HEDGE_MIN_SAMPLES = 20  # latencies of an endpoint before its p95 is used
+RPC_LATENCY_WINDOW = 200  # latencies kept per endpoint
+RPC_LATENCY_SMOOTHING = 0.2  # weight of a new latency in the average of an endpoint
+RPC_LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)
+RPC_TIMEOUT = 10  # seconds before a request to an endpoint is given up
+
+RETRY_ATTEMPTS = 4  # attempts of a read failing with transient errors
+RETRY_BASE_DELAY = 0.1  # seconds, the delay before a retry doubles every retry
+RETRY_MAX_DELAY = 2  # seconds
+CIRCUIT_FAILURE_THRESHOLD = 3  # consecutive failures before an endpoint is skipped
+CIRCUIT_RESET_TIMEOUT = 1  # seconds before a trial request, doubled if it fails
+CIRCUIT_MAX_RESET_TIMEOUT = 60  # seconds
+
+# Seconds, the trades wait for their receipts for a few blocks.
+METRICS_BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 15, 60)
+
+BACKTEST_GAS_PRICE = 20  # gwei
+BACKTEST_SWAP_GAS = 150_000  # gas used by a router swap
+BACKTEST_APPROVE_GAS = 46_000  # gas used by an ERC-20 approval
+BACKTEST_DELAY_BLOCKS = 1  # blocks between a tick and the block its swaps are mined in
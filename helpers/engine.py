@@ -0,0 +1,357 @@
+import asyncio
+import dataclasses
+from collections.abc import Callable
+
+from web3 import Web3
+
+from helpers import (
+    constants,
+    errors,
+    journal,
+    logger,
+    metrics,
+    models,
+    price_feed,
+    registry,
+    signals,
+    snapshot,
+)
+
+# Token address logged by the engine itself, outside of the jobs of the tokens.
+ENGINE_LOG_NAME = "engine"
+
+Job = Callable[
+    [Web3, str, int, snapshot.MarketSnapshot],
+    tuple[models.TransactionType, int, int, str | None],
+]
+
+
+@dataclasses.dataclass
+class TrackedToken:
+    """A token traded by the engine."""
+
+    token_address: str
+    pair_address: str
+    initial_price_in_wei: int
+
+
+@metrics.timed("tick_duration_seconds")
+def run_job(
+    client: Web3,
+    job: Job,
+    token_address: str,
+    initial_price_in_wei: int,
+    market_snapshot: snapshot.MarketSnapshot,
+) -> None:
+    """Run the job of a token on a market snapshot, journal the tick and log its
+    transaction.
+
+    A transient error, like an RPC endpoint down after its retries, only skips the
+    tick. Any other error is fatal.
+
+    :param Web3 client: The Web3 client.
+    :param Job job: The job.
+    :param str token_address: The token address.
+    :param int initial_price_in_wei: The initial price in WEI.
+    :param snapshot.MarketSnapshot market_snapshot: The market snapshot.
+    :return None:
+    """
+
+    try:
+        transaction_type, current_price_in_wei, _, message = job(
+            client, token_address, initial_price_in_wei, market_snapshot
+        )
+
+        try:
+            journal.get_writer().write(market_snapshot, transaction_type)
+        except OSError as error:
+            logger.error(f"Failed to journal the tick: {error}")
+
+        price_change_percent = (
+            (current_price_in_wei - initial_price_in_wei) / initial_price_in_wei
+        ) * 100
+
+        logger.txn(
+            transaction_type,
+            current_price_in_wei,
+            price_change_percent,
+            market_snapshot.liquidity_in_wei,
+            message,
+        )
+
+    except Exception as error:
+        if not errors.is_transient(error):
+            logger.fatal(error)
+
+        logger.error(f"Skipped the tick: {error}")
+
+
+class Engine:
+    """Trade many tokens in a single process.
+
+    The tokens share the Web3 client, so its connection pool, and the ABI and
+    contract caches. The reserves of their pairs are followed by a single
+    `price_feed.ReserveFeed`, and when some of them change the snapshots of the
+    changed tokens are read in one Multicall3 `eth_call` before their jobs run.
+
+    A job that fails with `logger.fatal`, which would exit its container, only
+    removes its token from the engine. The ticks whose snapshots can not be read
+    are run again on the next change.
+
+    With `armed_exits`, the sale of every held token is signed again on every new
+    block, so a sale of the whole position is sent with a single request.
+    """
+
+    def __init__(
+        self,
+        client: Web3,
+        job: Job,
+        websocket_url: str | None = None,
+        poll_interval: int | float = constants.POLL_INTERVAL,
+        armed_exits: bool = False,
+    ) -> None:
+        self.client = client
+        self.job = job
+        self.poll_interval = poll_interval
+        self.armed_exits = armed_exits
+        self.feed = price_feed.ReserveFeed(client, self._on_change, websocket_url)
+
+        self._tokens = {}
+        self._pairs = {}
+        self._changed_pairs = set()
+        self._changed = asyncio.Event()
+        self._loop = None
+        self._running = False
+
+    @property
+    def token_addresses(self) -> list[str]:
+        """The addresses of the traded tokens.
+
+        :return list[str]: The token addresses.
+        """
+
+        return list(self._tokens)
+
+    async def add_token(self, token_address: str) -> TrackedToken:
+        """Start trading a token, its job runs once right away.
+
+        :param str token_address: The token address.
+        :return TrackedToken: The traded token.
+        """
+
+        token_address = registry.to_checksum_address(token_address)
+
+        if token_address in self._tokens:
+            return self._tokens[token_address]
+
+        def target() -> snapshot.MarketSnapshot:
+            logger.token_address.set(token_address)
+
+            initial_snapshot = snapshot.get_market_snapshot(self.client, token_address)
+            self.feed.track(initial_snapshot.pair_address)
+
+            return initial_snapshot
+
+        try:
+            initial_snapshot = await asyncio.to_thread(target)
+        except SystemExit:
+            raise RuntimeError(f"Failed to start trading with token {token_address}")
+
+        token = TrackedToken(
+            token_address=token_address,
+            pair_address=initial_snapshot.pair_address,
+            initial_price_in_wei=initial_snapshot.price_in_wei,
+        )
+
+        self._tokens[token_address] = token
+        self._pairs[token.pair_address] = token_address
+        self._mark_changed(token.pair_address)
+
+        return token
+
+    async def remove_token(self, token_address: str) -> bool:
+        """Stop trading a token.
+
+        :param str token_address: The token address.
+        :return bool: Whether the token was traded.
+        """
+
+        token = self._tokens.pop(registry.to_checksum_address(token_address), None)
+
+        if token is None:
+            return False
+
+        self._pairs.pop(token.pair_address, None)
+        await asyncio.to_thread(self.feed.untrack, token.pair_address)
+
+        return True
+
+    async def run(self) -> None:
+        """Follow the reserves and run the jobs until stopped.
+
+        :return None:
+        """
+
+        logger.token_address.set(ENGINE_LOG_NAME)
+
+        self._loop = asyncio.get_running_loop()
+        self._running = True
+
+        feed_task = asyncio.create_task(self._watch_feed())
+        arm_task = asyncio.create_task(self._arm_exits()) if self.armed_exits else None
+
+        try:
+            while self._running:
+                await self._changed.wait()
+                self._changed.clear()
+
+                await self._run_jobs()
+        finally:
+            self._running = False
+            self.feed.stop()
+            await feed_task
+
+            if arm_task is not None:
+                await arm_task
+
+    def stop(self) -> None:
+        """Stop `run`, it returns once the running jobs are done.
+
+        :return None:
+        """
+
+        self._running = False
+        self.feed.stop()
+
+        if self._loop is not None:
+            self._loop.call_soon_threadsafe(self._changed.set)
+
+    async def _watch_feed(self) -> None:
+        """Follow the reserves until stopped, the feed is started again if it fails.
+
+        :return None:
+        """
+
+        delay = 1
+
+        while self._running:
+            try:
+                await self.feed.watch(self.poll_interval)
+            except Exception as error:
+                logger.error(f"Reserve feed failed, restarting it: {error}")
+
+                await asyncio.sleep(delay)
+                delay = min(delay * 2, constants.WEBSOCKET_MAX_RECONNECT_DELAY)
+
+    async def _arm_exits(self) -> None:
+        """Arm the exits of the held tokens on every new block, until stopped.
+
+        :return None:
+        """
+
+        armed_block = None
+
+        while self._running:
+            if self._tokens and self.feed.last_block != armed_block:
+                armed_block = self.feed.last_block
+
+                try:
+                    await asyncio.to_thread(
+                        signals.arm_exits, self.client, self.token_addresses
+                    )
+                except Exception as error:
+                    logger.error(f"Failed to arm the exits: {error}")
+
+            await asyncio.sleep(self.poll_interval)
+
+    def _on_change(self, changed_reserves: dict, _block_number: int) -> None:
+        """Mark pairs as changed, called by the feed from any thread.
+
+        :param dict changed_reserves: The new reserves of the changed pairs.
+        :param int _block_number: The block number.
+        :return None:
+        """
+
+        self._loop.call_soon_threadsafe(self._mark_changed, *changed_reserves)
+
+    def _mark_changed(self, *pair_addresses: str) -> None:
+        """Mark pairs as changed, in the event loop thread.
+
+        :param str pair_addresses: The pair addresses.
+        :return None:
+        """
+
+        self._changed_pairs.update(pair_addresses)
+        self._changed.set()
+
+    async def _run_jobs(self) -> None:
+        """Run the jobs of the tokens whose reserves changed.
+
+        :return None:
+        """
+
+        changed_pairs, self._changed_pairs = self._changed_pairs, set()
+        tokens = [
+            self._tokens[self._pairs[pair_address]]
+            for pair_address in changed_pairs
+            if pair_address in self._pairs
+        ]
+
+        if not tokens:
+            return
+
+        try:
+            market_snapshots = await asyncio.to_thread(
+                snapshot.get_market_snapshots,
+                self.client,
+                [token.token_address for token in tokens],
+                return_exceptions=True,
+            )
+        except Exception as error:
+            logger.error(f"Failed to get the market snapshots: {error}")
+            self._changed_pairs |= changed_pairs
+            return
+
+        # A token whose calls revert skips its tick, not the ticks of the others.
+        for token, market_snapshot in zip(tokens, market_snapshots):
+            if isinstance(market_snapshot, errors.CallFailedError):
+                logger.error(
+                    "Skipped the tick of {}: {}".format(
+                        token.token_address, market_snapshot
+                    )
+                )
+
+        await asyncio.gather(
+            *(
+                self._run_job(token, market_snapshot)
+                for token, market_snapshot in zip(tokens, market_snapshots)
+                if not isinstance(market_snapshot, errors.CallFailedError)
+            )
+        )
+
+    async def _run_job(
+        self,
+        token: TrackedToken,
+        market_snapshot: snapshot.MarketSnapshot,
+    ) -> None:
+        """Run the job of a token in a worker thread.
+
+        :param TrackedToken token: The token.
+        :param snapshot.MarketSnapshot market_snapshot: The market snapshot.
+        :return None:
+        """
+
+        def target() -> None:
+            logger.token_address.set(token.token_address)
+            run_job(
+                self.client,
+                self.job,
+                token.token_address,
+                token.initial_price_in_wei,
+                market_snapshot,
+            )
+
+        try:
+            await asyncio.to_thread(target)
+        except SystemExit:
+            await self.remove_token(token.token_address)
@@ -1,8 +1,9 @@
+import functools
 import os
 
 from web3 import Web3
 
-from helpers import logger
+from helpers import constants, logger
 
 
 def _get_env_variable(name: str, not_required: bool = False) -> str:
@@ -51,7 +52,7 @@ def get_public_key() -> str:
     """
 
     try:
-        return Web3().eth.account.from_key(get_private_key()).address
+        return _get_address(get_private_key())
     except Exception as error:
         logger.fatal(f"Failed to get PUBLIC_KEY variable: {error}")
 
@@ -65,6 +66,28 @@ def get_rpc_url() -> str:
     return _get_env_variable("RPC_URL")
 
 
+def get_rpc_urls() -> list[str]:
+    """Get the RPC URLs, the RPC URL then the backup ones.
+
+    :return list[str]: The RPC URLs.
+    """
+
+    backup_urls = _get_env_variable("RPC_BACKUP_URLS", not_required=True) or ""
+
+    return [get_rpc_url()] + [
+        url.strip() for url in backup_urls.split(",") if url.strip()
+    ]
+
+
+def get_rpc_websocket_url() -> str | None:
+    """Get the WebSocket URL of the RPC node, used to subscribe to logs.
+
+    :return str | None: The RPC WebSocket URL, or None to poll the RPC URL instead.
+    """
+
+    return _get_env_variable("RPC_WEBSOCKET_URL", not_required=True)
+
+
 def get_etherscan_api_key() -> str:
     """Get the Etherscan API key.
 
@@ -81,3 +104,149 @@ def get_websocket_uri() -> str:
     """
 
     return _get_env_variable("WEBSOCKET_URI", not_required=True)
+
+
+def get_strategy_name() -> str:
+    """Get the name of the strategy to trade with.
+
+    :return str: The strategy name.
+    """
+
+    return (
+        _get_env_variable("STRATEGY", not_required=True) or constants.DEFAULT_STRATEGY
+    )
+
+
+def get_armed_exits() -> bool:
+    """Get whether the sales of the held tokens are signed ahead of their triggers.
+
+    :return bool: True to arm the exits.
+    """
+
+    armed_exits = _get_env_variable("ARMED_EXITS", not_required=True)
+
+    return armed_exits.lower() == "true" if armed_exits else constants.ARMED_EXITS
+
+
+def get_cache_pairs() -> bool:
+    """Get whether the WETH pair addresses are kept in the on-disk cache too.
+
+    The cache directory must then be used with a single chain.
+
+    :return bool: True to keep the pair addresses on disk.
+    """
+
+    cache_pairs = _get_env_variable("CACHE_PAIRS", not_required=True)
+
+    return cache_pairs.lower() == "true" if cache_pairs else constants.CACHE_PAIRS
+
+
+def get_prewarm() -> bool:
+    """Get whether a job resolves the contracts of its first tick while connecting.
+
+    :return bool: True to resolve them in parallel.
+    """
+
+    prewarm = _get_env_variable("PREWARM", not_required=True)
+
+    return prewarm.lower() == "true" if prewarm else constants.PREWARM
+
+
+def get_metrics_port() -> int | None:
+    """Get the port the Prometheus metrics are served on.
+
+    :return int | None: The port, or None to not record the metrics.
+    """
+
+    metrics_port = _get_env_variable("METRICS_PORT", not_required=True)
+
+    return int(metrics_port) if metrics_port else None
+
+
+def get_approval_cap() -> int:
+    """Get the allowance approved for the router when a sale needs one.
+
+    :return int: The approval cap, in token WEI, 0 to approve the sold amount only.
+    """
+
+    approval_cap = _get_env_variable("APPROVAL_CAP", not_required=True)
+
+    return int(approval_cap) if approval_cap else constants.APPROVAL_CAP
+
+
+def get_gas_priority_percentile() -> float:
+    """Get the percentile of the recent priority fees a transaction offers.
+
+    :return float: The percentile, from 0 to 100.
+    """
+
+    percentile = _get_env_variable("GAS_PRIORITY_PERCENTILE", not_required=True)
+
+    return float(percentile) if percentile else constants.GAS_PRIORITY_PERCENTILE
+
+
+def get_log_drop_policy() -> str:
+    """Get what the log shipper does when its queue is full.
+
+    :return str: The drop policy, drop_oldest, drop_newest or block.
+    """
+
+    return (
+        _get_env_variable("LOG_DROP_POLICY", not_required=True)
+        or constants.LOG_DROP_POLICY
+    )
+
+
+def get_telegram_rate() -> float:
+    """Get the rate of the messages sent to Telegram.
+
+    :return float: The rate, in messages per second.
+    """
+
+    rate = _get_env_variable("TELEGRAM_RATE", not_required=True)
+
+    return float(rate) if rate else constants.TELEGRAM_RATE
+
+
+def get_telegram_burst() -> int:
+    """Get the number of messages sent to Telegram at once before the rate applies.
+
+    :return int: The burst.
+    """
+
+    burst = _get_env_variable("TELEGRAM_BURST", not_required=True)
+
+    return int(burst) if burst else constants.TELEGRAM_BURST
+
+
+def get_cache_dir() -> str:
+    """Get the directory of the on-disk cache shared between the trading containers.
+
+    :return str: The cache directory.
+    """
+
+    return (
+        _get_env_variable("CACHE_DIR", not_required=True) or constants.DEFAULT_CACHE_DIR
+    )
+
+
+def get_journal_dir() -> str:
+    """Get the directory of the tick journal.
+
+    :return str: The journal directory.
+    """
+
+    return _get_env_variable("JOURNAL_DIR", not_required=True) or os.path.join(
+        get_cache_dir(), constants.JOURNAL_DIR_NAME
+    )
+
+
+@functools.lru_cache(maxsize=8)
+def _get_address(private_key: str) -> str:
+    """Get the address of a private key, memoized since deriving it takes a few ms.
+
+    :param str private_key: The private key.
+    :return str: The address.
+    """
+
+    return Web3().eth.account.from_key(private_key).address
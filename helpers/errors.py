@@ -0,0 +1,90 @@
+import asyncio
+
+import aiohttp
+import requests
+
+# JSON-RPC errors of a node busy or behind, the same request may succeed later.
+TRANSIENT_RPC_CODES = {
+    -32005,  # limit exceeded
+    -32603,  # internal error
+}
+TRANSIENT_HTTP_STATUSES = {408, 425, 429, 500, 502, 503, 504}
+
+
+class BotError(Exception):
+    """Error of the bot, the process keeps running."""
+
+
+class TransientError(BotError):
+    """Error that may not happen again, the operation can be retried."""
+
+
+class RPCUnavailableError(TransientError):
+    """An RPC endpoint did not answer, or answered that it is unavailable."""
+
+
+class CircuitOpenError(TransientError):
+    """Every RPC endpoint failed too many times in a row, none is called until its
+    circuit breaker lets a trial request through."""
+
+
+class CallFailedError(BotError):
+    """A contract call of a Multicall3 batch reverted, or returned no result."""
+
+
+class TransactionError(BotError):
+    """A transaction failed, or may have been sent.
+
+    It is never retried, sending it again could buy or sell twice.
+    """
+
+    def __init__(self, message: str, txn_hash: str | None = None) -> None:
+        super().__init__(message)
+        self.txn_hash = txn_hash
+
+
+def is_transient(error: BaseException) -> bool:
+    """Whether an error may not happen again, like a timeout or a node down.
+
+    :param BaseException error: The error.
+    :return bool: True if the operation can be retried.
+    """
+
+    if isinstance(error, TransientError):
+        return True
+
+    if isinstance(error, TransactionError):
+        return False
+
+    if isinstance(error, (requests.HTTPError, aiohttp.ClientResponseError)):
+        response = getattr(error, "response", None)
+        status = getattr(error, "status", None) or getattr(
+            response, "status_code", None
+        )
+
+        return status in TRANSIENT_HTTP_STATUSES
+
+    return isinstance(
+        error,
+        (
+            TimeoutError,
+            asyncio.TimeoutError,
+            ConnectionError,
+            requests.ConnectionError,
+            requests.Timeout,
+            aiohttp.ClientConnectionError,
+            aiohttp.ServerTimeoutError,
+        ),
+    )
+
+
+def is_transient_response(response: dict) -> bool:
+    """Whether a JSON-RPC response is an error of a node busy or behind.
+
+    :param dict response: The JSON-RPC response.
+    :return bool: True if the request can be sent again.
+    """
+
+    error = response.get("error")
+
+    return isinstance(error, dict) and error.get("code") in TRANSIENT_RPC_CODES
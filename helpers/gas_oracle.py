@@ -0,0 +1,163 @@
+import asyncio
+import statistics
+
+from web3 import AsyncWeb3
+from web3.contract.async_contract import AsyncContractFunction
+
+from helpers import constants, environment, logger, metrics
+
+_oracles = {}
+
+
+class GasOracle:
+    """Fee suggestions from the `eth_feeHistory` of the recent blocks.
+
+    The history is read again on every poll, in the background, so the fees of a
+    transaction are known without a round trip. The priority fee is the median
+    over the blocks of the configured percentile of their rewards, and the max
+    fee leaves room for the base fee to rise for a few full blocks.
+
+    The gas estimates of the contract functions are cached per function and
+    token, so `estimate_gas` is only called the first time.
+    """
+
+    def __init__(
+        self,
+        priority_percentile: int | float = constants.GAS_PRIORITY_PERCENTILE,
+        block_count: int = constants.GAS_FEE_HISTORY_BLOCKS,
+    ) -> None:
+        self.priority_percentile = priority_percentile
+        self.block_count = block_count
+        self.block_number = None
+        self.base_fee = None
+        self.priority_fee = None
+
+        self._gas_estimates = {}
+        self._task = None
+
+    async def async_update(self, client: AsyncWeb3) -> None:
+        """Read the fee history of the latest blocks.
+
+        :param AsyncWeb3 client: The AsyncWeb3 client.
+        :return None:
+        """
+
+        fee_history = await client.eth.fee_history(
+            self.block_count, "latest", [self.priority_percentile]
+        )
+        rewards = [reward[0] for reward in fee_history["reward"]]
+
+        # The last base fee is the one of the next block.
+        self.base_fee = fee_history["baseFeePerGas"][-1]
+        self.priority_fee = max(
+            int(statistics.median(rewards)) if rewards else 0,
+            client.to_wei(constants.MAX_PRIORITY_FEE_PER_GAS, "gwei"),
+        )
+        self.block_number = fee_history["oldestBlock"] + len(rewards) - 1
+
+    async def async_get_fees(self, client: AsyncWeb3) -> tuple[int, int]:
+        """Get the fees of a transaction, the history is read first if unknown.
+
+        :param AsyncWeb3 client: The AsyncWeb3 client.
+        :return tuple[int, int]: The max priority fee and the max fee per gas.
+        """
+
+        if self.base_fee is None:
+            await self.async_update(client)
+
+        self.start(client)
+
+        return (
+            self.priority_fee,
+            int(self.base_fee * constants.GAS_BASE_FEE_MULTIPLIER) + self.priority_fee,
+        )
+
+    async def async_estimate_gas(
+        self,
+        function: AsyncContractFunction,
+        txn_params: dict,
+        token_address: str,
+    ) -> int:
+        """Get the gas limit of a contract function, estimated once per token.
+
+        :param AsyncContractFunction function: The contract function.
+        :param dict txn_params: The transaction parameters.
+        :param str token_address: The traded token address.
+        :return int: The gas limit.
+        """
+
+        key = (function.fn_name, token_address.lower())
+
+        if key in self._gas_estimates:
+            metrics.inc("cache_requests_total", cache="gas", result="hit")
+        else:
+            metrics.inc("cache_requests_total", cache="gas", result="miss")
+            self._gas_estimates[key] = int(
+                await function.estimate_gas(txn_params) * constants.GAS_MULTIPLIER
+            )
+
+        return self._gas_estimates[key]
+
+    def get_gas_estimate(self, function_name: str, token_address: str) -> int | None:
+        """Get the cached gas limit of a contract function.
+
+        :param str function_name: The function name.
+        :param str token_address: The traded token address.
+        :return int | None: The gas limit, None if not estimated yet.
+        """
+
+        return self._gas_estimates.get((function_name, token_address.lower()))
+
+    def start(self, client: AsyncWeb3) -> None:
+        """Follow the fee history in the background of the running event loop.
+
+        :param AsyncWeb3 client: The AsyncWeb3 client.
+        :return None:
+        """
+
+        if self._task is None or self._task.done():
+            self._task = asyncio.ensure_future(self.watch(client))
+
+    def stop(self) -> None:
+        """Stop following the fee history, from any thread.
+
+        :return None:
+        """
+
+        if self._task is not None and not self._task.done():
+            self._task.get_loop().call_soon_threadsafe(self._task.cancel)
+
+    async def watch(
+        self,
+        client: AsyncWeb3,
+        poll_interval: int | float = constants.POLL_INTERVAL,
+    ) -> None:
+        """Read the fee history after every poll interval, until cancelled.
+
+        :param AsyncWeb3 client: The AsyncWeb3 client.
+        :param int | float poll_interval: The delay between two polls, in seconds.
+        :return None:
+        """
+
+        while True:
+            await asyncio.sleep(poll_interval)
+
+            try:
+                await self.async_update(client)
+            except Exception as error:
+                logger.warning(f"Failed to read the fee history: {error}")
+
+
+def get_gas_oracle(client: AsyncWeb3) -> GasOracle:
+    """Get the gas oracle of the RPC URL of a client, for the running event loop.
+
+    :param AsyncWeb3 client: The AsyncWeb3 client.
+    :return GasOracle: The gas oracle.
+    """
+
+    key = (id(asyncio.get_running_loop()), client.provider.endpoint_uri)
+
+    if key not in _oracles:
+        _oracles[key] = GasOracle(environment.get_gas_priority_percentile())
+
+    return _oracles[key]
@@ -0,0 +1,191 @@
+import collections
+import math
+
+
+class RingBuffer:
+    """The last `size` values of a series, in a preallocated list."""
+
+    def __init__(self, size: int) -> None:
+        if size <= 0:
+            raise ValueError("Invalid size")
+
+        self.size = size
+        self.count = 0
+
+        self._values = [0.0] * size
+        self._index = 0
+
+    def append(self, value: float) -> float | None:
+        """Append a value, the oldest one is evicted once the buffer is full.
+
+        :param float value: The value.
+        :return float | None: The evicted value, None if the buffer was not full.
+        """
+
+        evicted = self._values[self._index] if self.count == self.size else None
+
+        self._values[self._index] = value
+        self._index = (self._index + 1) % self.size
+        self.count = min(self.count + 1, self.size)
+
+        return evicted
+
+    def __len__(self) -> int:
+        return self.count
+
+    def __iter__(self):
+        start = self._index if self.count == self.size else 0
+
+        for offset in range(self.count):
+            yield self._values[(start + offset) % self.size]
+
+
+class EMA:
+    """Exponential moving average, the first value is its seed."""
+
+    def __init__(self, span: int) -> None:
+        self.alpha = 2 / (span + 1)
+        self.value = None
+
+    def update(self, value: float) -> float:
+        """Add a value.
+
+        :param float value: The value.
+        :return float: The average.
+        """
+
+        if self.value is None:
+            self.value = value
+        else:
+            self.value += self.alpha * (value - self.value)
+
+        return self.value
+
+
+class RollingMax:
+    """Maximum of the last `window` values.
+
+    The candidates are kept in a monotonic deque, every value is pushed and popped
+    at most once, so an update is O(1) amortized.
+    """
+
+    def __init__(self, window: int) -> None:
+        self.window = window
+        self.value = None
+
+        self._candidates = collections.deque()
+        self._tick = 0
+
+    def update(self, value: float) -> float:
+        """Add a value.
+
+        :param float value: The value.
+        :return float: The maximum.
+        """
+
+        candidates = self._candidates
+
+        while candidates and not self._keeps(candidates[-1][1], value):
+            candidates.pop()
+
+        candidates.append((self._tick, value))
+
+        if candidates[0][0] <= self._tick - self.window:
+            candidates.popleft()
+
+        self._tick += 1
+        self.value = candidates[0][1]
+
+        return self.value
+
+    @staticmethod
+    def _keeps(candidate: float, value: float) -> bool:
+        """Whether an older candidate can still be the extremum after a value.
+
+        :param float candidate: The older candidate.
+        :param float value: The new value.
+        :return bool: True if the candidate is kept.
+        """
+
+        return candidate > value
+
+
+class RollingMin(RollingMax):
+    """Minimum of the last `window` values."""
+
+    @staticmethod
+    def _keeps(candidate: float, value: float) -> bool:
+        return candidate < value
+
+
+class VWAP:
+    """Volume-weighted average price of the last `window` values."""
+
+    def __init__(self, window: int) -> None:
+        self.value = None
+
+        self._notionals = RingBuffer(window)
+        self._volumes = RingBuffer(window)
+        self._notional = 0.0
+        self._volume = 0.0
+
+    def update(self, price: float, volume: float) -> float | None:
+        """Add a price and its volume.
+
+        :param float price: The price.
+        :param float volume: The volume.
+        :return float | None: The average price, None until some volume is seen.
+        """
+
+        notional = price * volume
+
+        self._notional += notional - (self._notionals.append(notional) or 0.0)
+        self._volume += volume - (self._volumes.append(volume) or 0.0)
+
+        # A window without volume keeps the last average.
+        if self._volume > 0:
+            self.value = self._notional / self._volume
+
+        return self.value
+
+
+class Volatility:
+    """Standard deviation of the last `window` values.
+
+    The mean and the sum of squared deviations are updated with Welford's
+    algorithm when a value enters the window, and reversed when it leaves.
+    """
+
+    def __init__(self, window: int) -> None:
+        self.mean = 0.0
+        self.value = None
+
+        self._values = RingBuffer(window)
+        self._squares = 0.0
+
+    def update(self, value: float) -> float | None:
+        """Add a value.
+
+        :param float value: The value.
+        :return float | None: The sample standard deviation, None until two values.
+        """
+
+        evicted = self._values.append(value)
+        count = len(self._values)
+
+        if evicted is not None and count == 1:
+            self.mean, self._squares = 0.0, 0.0
+        elif evicted is not None:
+            # The evicted value leaves a window of `count` values first.
+            delta = evicted - self.mean
+            self.mean -= delta / (count - 1)
+            self._squares -= delta * (evicted - self.mean)
+
+        delta = value - self.mean
+        self.mean += delta / count
+        self._squares += delta * (value - self.mean)
+
+        if count > 1:
+            self.value = math.sqrt(max(self._squares, 0.0) / (count - 1))
+
+        return self.value
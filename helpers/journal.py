@@ -0,0 +1,297 @@
+import functools
+import glob
+import os
+import socket
+import struct
+import threading
+import typing
+
+from helpers import constants, environment, models, snapshot
+
+if typing.TYPE_CHECKING:
+    import numpy as np
+
+# Code of every `models.TransactionType`, in the `action` field.
+ACTIONS = list(models.TransactionType)
+
+SEGMENT_EXTENSION = ".ticks"
+TOKENS_FILE_NAME = "tokens.csv"
+
+_MAGIC = b"TICKS\x00\x00\x01"
+_HEADER = struct.Struct("<8sI52x")
+_TICK = struct.Struct("<QQQddddB7x")
+
+_writer = None
+_writer_lock = threading.Lock()
+
+
+@functools.cache
+def get_tick_dtype() -> "np.dtype":
+    """Get the dtype of the ticks read from the journal.
+
+    Every tick is one fixed-width record. The reserves, price and balance are in
+    WEI or token units, as floats: exact up to 2**53, about 16 significant digits
+    beyond. NumPy is only imported by the readers, the trading jobs write the
+    ticks with `struct`.
+
+    :return np.dtype: The structured dtype, the layout of `_TICK`.
+    """
+
+    import numpy as np
+
+    return np.dtype(
+        [
+            ("timestamp", "<u8"),
+            ("block_number", "<u8"),
+            ("token_id", "<u8"),
+            ("weth_reserve_in_wei", "<f8"),
+            ("token_reserve", "<f8"),
+            ("price_in_wei", "<f8"),
+            ("token_balance", "<f8"),
+            ("action", "u1"),
+            ("padding", "V7"),
+        ]
+    )
+
+
+def get_token_id(token_address: str) -> int:
+    """Get the ID of a token in the journal, the first 8 bytes of its address.
+
+    It is the same in every process, so the journals of many containers can be
+    read together.
+
+    :param str token_address: The token address.
+    :return int: The token ID.
+    """
+
+    return int(token_address[2:18], 16)
+
+
+class JournalWriter:
+    """Append the ticks to the segments of a journal directory.
+
+    Every writer has its own segments, named after its host and process, so the
+    containers sharing a directory never write to the same file. A segment is
+    rotated once it reaches `segment_size` bytes.
+    """
+
+    def __init__(
+        self,
+        directory: str,
+        segment_size: int = constants.JOURNAL_SEGMENT_SIZE,
+    ) -> None:
+        self.directory = directory
+        self.segment_size = segment_size
+        self.name = f"{socket.gethostname()}-{os.getpid()}"
+
+        self._file = None
+        self._sequence = 0
+        self._token_ids = set()
+        self._lock = threading.Lock()
+
+        os.makedirs(directory, exist_ok=True)
+
+    def write(
+        self,
+        market_snapshot: snapshot.MarketSnapshot,
+        transaction_type: models.TransactionType,
+    ) -> None:
+        """Append a tick.
+
+        :param snapshot.MarketSnapshot market_snapshot: The market snapshot.
+        :param models.TransactionType transaction_type: The action of the job.
+        :return None:
+        """
+
+        token_id = get_token_id(market_snapshot.token_address)
+        record = _TICK.pack(
+            market_snapshot.timestamp,
+            market_snapshot.block_number,
+            token_id,
+            market_snapshot.weth_reserve_in_wei,
+            market_snapshot.token_reserve,
+            market_snapshot.price_in_wei,
+            market_snapshot.token_balance,
+            ACTIONS.index(transaction_type),
+        )
+
+        with self._lock:
+            if token_id not in self._token_ids:
+                self._add_token(token_id, market_snapshot.token_address)
+
+            if self._file is None or self._file.tell() >= self.segment_size:
+                self._rotate()
+
+            # Flushed right away, so a crash loses no tick and the readers see it.
+            self._file.write(record)
+            self._file.flush()
+
+    def close(self) -> None:
+        """Close the current segment.
+
+        :return None:
+        """
+
+        with self._lock:
+            if self._file is not None:
+                self._file.close()
+                self._file = None
+
+    def __enter__(self) -> "JournalWriter":
+        return self
+
+    def __exit__(self, *args) -> None:
+        self.close()
+
+    def _rotate(self) -> None:
+        """Close the current segment and start the next one.
+
+        :return None:
+        """
+
+        if self._file is not None:
+            self._file.close()
+
+        # A restarted container has the same host name and process ID.
+        while True:
+            self._sequence += 1
+            path = os.path.join(
+                self.directory,
+                f"{self.name}-{self._sequence:06d}{SEGMENT_EXTENSION}",
+            )
+
+            if not os.path.exists(path):
+                break
+
+        self._file = open(path, "wb")
+        self._file.write(_HEADER.pack(_MAGIC, _TICK.size))
+
+    def _add_token(self, token_id: int, token_address: str) -> None:
+        """Record the address of a token ID, for the readers.
+
+        :param int token_id: The token ID.
+        :param str token_address: The token address.
+        :return None:
+        """
+
+        # A single short line is appended at once, even by concurrent writers.
+        with open(os.path.join(self.directory, TOKENS_FILE_NAME), "a") as file:
+            file.write(f"{token_id},{token_address}\n")
+
+        self._token_ids.add(token_id)
+
+
+def get_writer() -> JournalWriter:
+    """Get the journal writer of the process, in JOURNAL_DIR.
+
+    :return JournalWriter: The journal writer.
+    """
+
+    global _writer
+
+    with _writer_lock:
+        if _writer is None:
+            _writer = JournalWriter(environment.get_journal_dir())
+
+        return _writer
+
+
+def close() -> None:
+    """Close the journal writer of the process, the next tick starts a new one.
+
+    :return None:
+    """
+
+    global _writer
+
+    with _writer_lock:
+        if _writer is not None:
+            _writer.close()
+            _writer = None
+
+
+def read_segments(directory: str | None = None) -> list["np.ndarray"]:
+    """Memory-map the segments of a journal, without copying them.
+
+    A record still being written at the end of a segment is left out.
+
+    :param str | None directory: The journal directory, JOURNAL_DIR if not given.
+    :return list[np.ndarray]: The ticks of every segment, as structured arrays of
+        `get_tick_dtype`, in the order of their names.
+    """
+
+    import numpy as np
+
+    directory = directory or environment.get_journal_dir()
+    segments = []
+
+    for path in sorted(glob.glob(os.path.join(directory, f"*{SEGMENT_EXTENSION}"))):
+        with open(path, "rb") as file:
+            header = file.read(_HEADER.size)
+
+        if len(header) < _HEADER.size:
+            continue
+
+        magic, record_size = _HEADER.unpack(header)
+
+        if magic != _MAGIC or record_size != _TICK.size:
+            raise ValueError(f"{path} is not a tick journal segment")
+
+        count = (os.path.getsize(path) - _HEADER.size) // _TICK.size
+
+        if count:
+            segments.append(
+                np.memmap(
+                    path,
+                    dtype=get_tick_dtype(),
+                    mode="r",
+                    offset=_HEADER.size,
+                    shape=(count,),
+                )
+            )
+
+    return segments
+
+
+def read_ticks(directory: str | None = None) -> "np.ndarray":
+    """Read all the ticks of a journal, in one array.
+
+    A single segment is returned without a copy, many are concatenated.
+
+    :param str | None directory: The journal directory, JOURNAL_DIR if not given.
+    :return np.ndarray: The ticks, as a structured array of `get_tick_dtype`.
+    """
+
+    import numpy as np
+
+    segments = read_segments(directory)
+
+    if not segments:
+        return np.empty(0, dtype=get_tick_dtype())
+
+    if len(segments) == 1:
+        return segments[0]
+
+    return np.concatenate(segments)
+
+
+def read_token_addresses(directory: str | None = None) -> dict[int, str]:
+    """Read the addresses of the token IDs of a journal.
+
+    :param str | None directory: The journal directory, JOURNAL_DIR if not given.
+    :return dict[int, str]: The token addresses, by token ID.
+    """
+
+    directory = directory or environment.get_journal_dir()
+    path = os.path.join(directory, TOKENS_FILE_NAME)
+
+    if not os.path.exists(path):
+        return {}
+
+    with open(path) as file:
+        return {
+            int(token_id): token_address
+            for token_id, token_address in (
+                line.strip().split(",") for line in file if line.strip()
+            )
+        }
@@ -0,0 +1,434 @@
+import asyncio
+import collections
+import json
+import logging
+import re
+import threading
+import urllib.parse
+from collections.abc import Callable
+
+import websockets
+
+from helpers import constants
+
+# Topic of the subscribers receiving the records of every token.
+ALL_TOPICS = "*"
+SUBSCRIBE_PATH = "/subscribe"
+
+# Close code of a subscriber evicted for not keeping up, "try again later".
+SLOW_CONSUMER_CLOSE_CODE = 1013
+
+_LEGACY_TXN_PATTERN = re.compile(r"\[(BUY|SELL)\]")
+
+
+class Subscriber:
+    """A dashboard receiving the records of its topics.
+
+    The records wait in a bounded queue and are sent as JSON arrays, one frame per
+    batch, so a subscriber catching up gets few large frames.
+    """
+
+    def __init__(
+        self,
+        connection,
+        topics: set[str],
+        queue_size: int = constants.HUB_QUEUE_SIZE,
+        batch_size: int = constants.HUB_BATCH_SIZE,
+    ) -> None:
+        self.connection = connection
+        self.topics = topics
+        self.queue_size = queue_size
+        self.batch_size = batch_size
+        self.evicted = False
+
+        self._queue = collections.deque()
+        self._ready = asyncio.Event()
+
+    def put(self, encoded_record: str) -> bool:
+        """Queue a record.
+
+        :param str encoded_record: The record, encoded in JSON.
+        :return bool: False if the queue is full.
+        """
+
+        if len(self._queue) >= self.queue_size:
+            return False
+
+        self._queue.append(encoded_record)
+        self._ready.set()
+
+        return True
+
+    async def run(self) -> None:
+        """Send the queued records until cancelled.
+
+        :return None:
+        """
+
+        while True:
+            await self._ready.wait()
+
+            batch = [
+                self._queue.popleft()
+                for _ in range(min(len(self._queue), self.batch_size))
+            ]
+
+            if not self._queue:
+                self._ready.clear()
+
+            await self.connection.send("[" + ",".join(batch) + "]")
+
+    def evict(self) -> None:
+        """Drop the queued records and close the connection.
+
+        :return None:
+        """
+
+        self.evicted = True
+        self._queue.clear()
+
+        asyncio.ensure_future(
+            self.connection.close(SLOW_CONSUMER_CLOSE_CODE, "Slow consumer")
+        )
+
+
+class LogHub:
+    """WebSocket server fanning out the records of the trading jobs.
+
+    The jobs connect to any path and send their records. The dashboards connect to
+    `/subscribe`, with a `token` query parameter per topic, or none for every
+    token, and can send `{"subscribe": [...]}` or `{"unsubscribe": [...]}` to change
+    their topics. A dashboard whose queue is full is evicted, so a slow one never
+    holds back the jobs or the other dashboards.
+
+    It runs its own event loop in a background thread, `on_records` is called
+    there with every batch of records received.
+    """
+
+    def __init__(
+        self,
+        on_records: Callable[[list[dict]], None] | None = None,
+        queue_size: int = constants.HUB_QUEUE_SIZE,
+        batch_size: int = constants.HUB_BATCH_SIZE,
+    ) -> None:
+        self.on_records = on_records
+        self.queue_size = queue_size
+        self.batch_size = batch_size
+        self.producers = 0
+        self.received = 0
+        self.invalid = 0
+        self.evicted = 0
+        self.uri = None
+
+        self._subscribers = {}
+        self._loop = None
+        self._stop = None
+        self._thread = None
+
+    @property
+    def subscribers(self) -> int:
+        """The number of connected subscribers.
+
+        :return int: The number of subscribers.
+        """
+
+        return len(set().union(*self._subscribers.values()))
+
+    def start(
+        self,
+        host: str,
+        port: int,
+        logger: logging.Logger | None = None,
+    ) -> "LogHub":
+        """Serve the WebSocket server from a background thread.
+
+        :param str host: The interface to listen on.
+        :param int port: The port, 0 for any free one.
+        :param logging.Logger | None logger: The logger of the connections.
+        :return LogHub: The hub, `uri` is set once it listens.
+        """
+
+        started = threading.Event()
+        failures = []
+
+        async def serve() -> None:
+            self._loop = asyncio.get_running_loop()
+            self._stop = asyncio.Event()
+
+            try:
+                async with websockets.serve(
+                    self.handle, host, port, logger=logger
+                ) as server:
+                    self.uri = "ws://{}:{}".format(
+                        host, server.sockets[0].getsockname()[1]
+                    )
+                    started.set()
+
+                    await self._stop.wait()
+            except Exception as error:
+                failures.append(error)
+                started.set()
+
+        self._thread = threading.Thread(
+            target=asyncio.run, args=(serve(),), name="log_hub", daemon=True
+        )
+        self._thread.start()
+        started.wait()
+
+        if failures:
+            raise failures[0]
+
+        return self
+
+    def stop(self) -> None:
+        """Stop the server started by `start`.
+
+        :return None:
+        """
+
+        self._loop.call_soon_threadsafe(self._stop.set)
+        self._thread.join()
+
+    async def handle(self, connection) -> None:
+        """Serve a WebSocket connection, of a job or of a dashboard.
+
+        :param connection: The WebSocket connection.
+        :return None:
+        """
+
+        url = urllib.parse.urlsplit(connection.request.path)
+
+        if url.path != SUBSCRIBE_PATH:
+            await self._serve_producer(connection)
+            return
+
+        topics = {
+            topic.strip().lower()
+            for value in urllib.parse.parse_qs(url.query).get("token", [])
+            for topic in value.split(",")
+            if topic.strip()
+        }
+
+        await self._serve_subscriber(connection, topics or {ALL_TOPICS})
+
+    def subscribe(self, connection, topics: set[str]) -> Subscriber:
+        """Add a subscriber, its records are sent by its `run` task.
+
+        :param connection: The WebSocket connection.
+        :param set[str] topics: The lowercase token addresses, or `ALL_TOPICS`.
+        :return Subscriber: The subscriber.
+        """
+
+        subscriber = Subscriber(connection, set(), self.queue_size, self.batch_size)
+        self._set_topics(subscriber, topics)
+
+        return subscriber
+
+    def unsubscribe(self, subscriber: Subscriber) -> None:
+        """Remove a subscriber.
+
+        :param Subscriber subscriber: The subscriber.
+        :return None:
+        """
+
+        self._set_topics(subscriber, set())
+
+    def publish(self, records: list[dict]) -> None:
+        """Fan out records to the subscribers of their tokens.
+
+        :param list[dict] records: The records.
+        :return None:
+        """
+
+        if not records:
+            return
+
+        self.received += len(records)
+
+        if self.on_records is not None:
+            self.on_records(records)
+
+        every_token = self._subscribers.get(ALL_TOPICS, ())
+
+        for record in records:
+            token = record.get("token")
+            subscribers = [
+                *every_token,
+                *self._subscribers.get(token.lower() if token else None, ()),
+            ]
+
+            if not subscribers:
+                continue
+
+            # Encoded once, whatever the number of subscribers.
+            encoded_record = json.dumps(record)
+
+            for subscriber in subscribers:
+                if not subscriber.evicted and not subscriber.put(encoded_record):
+                    self.evicted += 1
+                    self.unsubscribe(subscriber)
+                    subscriber.evict()
+
+    def parse_frame(self, frame: str | bytes) -> list[dict]:
+        """Get the records of a frame, the invalid ones are counted and skipped.
+
+        :param str | bytes frame: The frame, a JSON array or a single message.
+        :return list[dict]: The records.
+        """
+
+        if isinstance(frame, bytes):
+            frame = frame.decode()
+
+        try:
+            messages = json.loads(frame) if frame[:1] in ("[", "{") else [frame]
+        except ValueError:
+            messages = [frame]
+
+        if not isinstance(messages, list):
+            messages = [messages]
+
+        records = []
+
+        for message in messages:
+            try:
+                records.append(parse_record(message))
+            except ValueError:
+                self.invalid += 1
+
+        return records
+
+    async def _serve_producer(self, connection) -> None:
+        """Receive the records of a job until it disconnects.
+
+        :param connection: The WebSocket connection.
+        :return None:
+        """
+
+        self.producers += 1
+
+        try:
+            async for frame in connection:
+                self.publish(self.parse_frame(frame))
+        except websockets.exceptions.ConnectionClosed:
+            pass
+        finally:
+            self.producers -= 1
+
+    async def _serve_subscriber(self, connection, topics: set[str]) -> None:
+        """Send the records of its topics to a dashboard until it disconnects.
+
+        :param connection: The WebSocket connection.
+        :param set[str] topics: The topics.
+        :return None:
+        """
+
+        subscriber = self.subscribe(connection, topics)
+        sender = asyncio.create_task(subscriber.run())
+
+        try:
+            async for frame in connection:
+                self._update_topics(subscriber, frame)
+        except websockets.exceptions.ConnectionClosed:
+            pass
+        finally:
+            sender.cancel()
+            self.unsubscribe(subscriber)
+
+    def _update_topics(self, subscriber: Subscriber, frame: str | bytes) -> None:
+        """Change the topics of a subscriber from its message.
+
+        :param Subscriber subscriber: The subscriber.
+        :param str | bytes frame: The message, with `subscribe` or `unsubscribe`
+            lists of topics.
+        :return None:
+        """
+
+        try:
+            message = json.loads(frame)
+        except ValueError:
+            return
+
+        if not isinstance(message, dict) or subscriber.evicted:
+            return
+
+        topics = set(subscriber.topics)
+        topics |= {topic.lower() for topic in message.get("subscribe", [])}
+        topics -= {topic.lower() for topic in message.get("unsubscribe", [])}
+
+        self._set_topics(subscriber, topics)
+
+    def _set_topics(self, subscriber: Subscriber, topics: set[str]) -> None:
+        """Set the topics of a subscriber.
+
+        :param Subscriber subscriber: The subscriber.
+        :param set[str] topics: The topics, none to remove it.
+        :return None:
+        """
+
+        for topic in subscriber.topics - topics:
+            self._subscribers[topic].discard(subscriber)
+
+            if not self._subscribers[topic]:
+                del self._subscribers[topic]
+
+        for topic in topics - subscriber.topics:
+            self._subscribers.setdefault(topic, set()).add(subscriber)
+
+        subscriber.topics = topics
+
+
+def parse_record(message: dict | str) -> dict:
+    """Parse a message shipped by a trading job.
+
+    A record is a JSON object with the schema version `v`, the `ts` timestamp, the
+    `token` address, the `level`, the `message`, and `txn`, the transaction type,
+    for the transactions. The jobs of older versions send strings formatted as
+    `timestamp::token::level::message` instead.
+
+    :param dict | str message: The message.
+    :return dict: The record.
+    """
+
+    if isinstance(message, dict):
+        if not isinstance(message.get("message"), str):
+            raise ValueError("Record without message")
+
+        # Read by the hub and the bot, a job can send anything.
+        for field in ("token", "txn"):
+            if not isinstance(message.get(field), str | None):
+                raise ValueError(f"Invalid {field}: {message[field]!r}")
+
+        if not isinstance(message.get("level", "INFO"), str):
+            raise ValueError(f"Invalid level: {message['level']!r}")
+
+        return {
+            "v": constants.LOG_SCHEMA_VERSION,
+            "ts": None,
+            "token": None,
+            "level": "INFO",
+            **message,
+        }
+
+    if not isinstance(message, str):
+        raise ValueError(f"Invalid record: {message!r}")
+
+    # The message is last, its own `::` are kept.
+    parts = message.split("::", 3)
+
+    if len(parts) != 4:
+        raise ValueError(f"Invalid record: {message!r}")
+
+    timestamp, token, level, text = parts
+    record = {
+        "v": constants.LOG_SCHEMA_VERSION,
+        "ts": timestamp,
+        "token": None if token == "None" else token,
+        "level": level,
+        "message": text,
+    }
+    txn = _LEGACY_TXN_PATTERN.search(text)
+
+    if txn:
+        record["txn"] = txn.group(1)
+
+    return record
@@ -1,12 +1,19 @@
-import asyncio
+import atexit
+import collections
+import contextvars
 import datetime
+import json
 import logging
+import os
+import threading
+import typing
 
-import colorama
 from web3 import Web3
-import websockets
 
-from helpers import environment, models
+from helpers import constants, environment, models
+
+if typing.TYPE_CHECKING:
+    import websockets.sync.client
 
 
 logging.basicConfig(
@@ -18,6 +25,10 @@ logging.basicConfig(
     ],
 )
 
+# Token address of the messages logged in the current context. The multi-token
+# engine sets it for every token, a single job logs its TOKEN_ADDRESS instead.
+token_address = contextvars.ContextVar("token_address", default=None)
+
 
 def _format_message(message: str, logging_level: int = logging.INFO) -> str:
     """Format the message with the current timestamp, token address, and logging level.
@@ -27,34 +38,270 @@ def _format_message(message: str, logging_level: int = logging.INFO) -> str:
     :return str: The formatted message.
     """
 
-    from helpers import environment
-
     return "{}::{}::{}::{}".format(
         datetime.datetime.now().isoformat(),
-        environment.get_token_address(),
+        _get_token_address(),
         logging.getLevelName(logging_level),
         message,
     )
 
 
-async def _send_ws_message(message: str, logging_level: int = logging.INFO) -> None:
-    """Send the message to the WebSocket server.
+def _get_record(message: str, logging_level: int = logging.INFO, **fields) -> dict:
+    """Get the record of a message shipped to the WebSocket server.
 
-    :param str message: The message to be sent.
+    :param str message: The message.
     :param int logging_level: The logging level.
-    :return None:
+    :return dict: The record, in the schema read by `log_hub.parse_record`.
+    """
+
+    return {
+        "v": constants.LOG_SCHEMA_VERSION,
+        "ts": datetime.datetime.now().isoformat(),
+        "token": _get_token_address(),
+        "level": logging.getLevelName(logging_level),
+        "message": message,
+        **fields,
+    }
+
+
+def _get_token_address() -> str | None:
+    """Get the token address of the messages logged in the current context.
+
+    :return str | None: The token address, None if there is none.
+    """
+
+    # Not `environment.get_token_address`, whose fatal error is logged with it.
+    return token_address.get() or os.environ.get("TOKEN_ADDRESS")
+
+
+class LogShipper:
+    """Ship the log messages to the WebSocket server from a background thread.
+
+    Logging only puts the message in a bounded queue. The thread keeps one
+    connection open, reconnecting with a backoff, and sends the queued records
+    as JSON arrays, one frame per batch. When the queue is full, the drop policy
+    drops the oldest or the newest message, or makes the logging thread wait.
+    """
+
+    def __init__(
+        self,
+        uri: str,
+        drop_policy: models.DropPolicy = models.DropPolicy.DROP_OLDEST,
+        queue_size: int = constants.LOG_QUEUE_SIZE,
+        batch_size: int = constants.LOG_BATCH_SIZE,
+    ) -> None:
+        self.uri = uri
+        self.drop_policy = drop_policy
+        self.queue_size = queue_size
+        self.batch_size = batch_size
+        self.dropped = 0
+
+        self._queue = collections.deque()
+        self._in_flight = 0
+        self._lock = threading.Lock()
+        self._not_empty = threading.Condition(self._lock)
+        self._not_full = threading.Condition(self._lock)
+        self._stopped = threading.Event()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+
+    def put(self, message: dict | str) -> None:
+        """Queue a message.
+
+        :param dict | str message: The record of the message.
+        :return None:
+        """
+
+        with self._lock:
+            if len(self._queue) >= self.queue_size:
+                if self.drop_policy == models.DropPolicy.DROP_NEWEST:
+                    self.dropped += 1
+                    return
+
+                if self.drop_policy == models.DropPolicy.DROP_OLDEST:
+                    self._queue.popleft()
+                    self.dropped += 1
+
+                while (
+                    len(self._queue) >= self.queue_size and not self._stopped.is_set()
+                ):
+                    self._not_full.wait()
+
+            self._queue.append(message)
+            self._not_empty.notify()
+
+    def flush(self, timeout: int | float = constants.LOG_FLUSH_TIMEOUT) -> bool:
+        """Wait until the queued messages are sent.
+
+        :param int | float timeout: The maximum time to wait, in seconds.
+        :return bool: Whether all the messages were sent.
+        """
+
+        with self._lock:
+            return self._not_full.wait_for(
+                lambda: not self._queue and not self._in_flight, timeout
+            )
+
+    def stop(self) -> None:
+        """Stop the thread, the messages still queued are not sent.
+
+        :return None:
+        """
+
+        self._stopped.set()
+
+        with self._lock:
+            self._queue.clear()
+            self._not_empty.notify()
+            self._not_full.notify_all()
+
+        self._thread.join()
+
+    def _run(self) -> None:
+        """Send the queued messages until stopped.
+
+        :return None:
+        """
+
+        # Imported here, most jobs ship no logs.
+        import websockets
+        import websockets.sync.client
+
+        delay = 1
+
+        while not self._stopped.is_set():
+            try:
+                with websockets.sync.client.connect(self.uri) as websocket:
+                    delay = 1
+
+                    while not self._stopped.is_set():
+                        self._send(websocket, self._take())
+
+                        # Older servers answer every message, the answers are not
+                        # read so they would block it once its buffer is full.
+                        self._drain(websocket)
+            except (OSError, websockets.exceptions.WebSocketException) as error:
+                logging.error(f"Failed to send messages: {error}")
+
+                self._stopped.wait(delay)
+                delay = min(delay * 2, constants.WEBSOCKET_MAX_RECONNECT_DELAY)
+
+    def _take(self) -> list[dict | str]:
+        """Take the next batch of messages, waiting a second at most for one.
+
+        :return list[dict | str]: The records of the messages.
+        """
+
+        with self._lock:
+            self._not_empty.wait_for(
+                lambda: self._queue or self._stopped.is_set(), timeout=1
+            )
+
+            batch = [
+                self._queue.popleft()
+                for _ in range(min(len(self._queue), self.batch_size))
+            ]
+            self._in_flight = len(batch)
+            self._not_full.notify_all()
+
+        return batch
+
+    def _send(
+        self,
+        websocket: "websockets.sync.client.ClientConnection",
+        batch: list[dict | str],
+    ) -> None:
+        """Send a batch of messages in one frame, it is queued again on failure.
+
+        :param websockets.sync.client.ClientConnection websocket: The connection.
+        :param list[dict | str] batch: The records of the messages.
+        :return None:
+        """
+
+        try:
+            if batch:
+                websocket.send(json.dumps(batch))
+        except Exception:
+            with self._lock:
+                self._queue.extendleft(reversed(batch))
+
+                while len(self._queue) > self.queue_size:
+                    self._queue.popleft()
+                    self.dropped += 1
+
+            raise
+        finally:
+            with self._lock:
+                self._in_flight = 0
+                self._not_full.notify_all()
+
+    def _drain(self, websocket: "websockets.sync.client.ClientConnection") -> None:
+        """Drop the messages received from the server.
+
+        :param websockets.sync.client.ClientConnection websocket: The connection.
+        :return None:
+        """
+
+        try:
+            while True:
+                websocket.recv(timeout=0)
+        except TimeoutError:
+            pass
+
+
+_shipper = None
+_shipper_lock = threading.Lock()
+
+
+def _get_shipper(uri: str) -> LogShipper:
+    """Get the shipper of the WebSocket server, started on first use.
+
+    :param str uri: The WebSocket URI.
+    :return LogShipper: The shipper.
     """
 
-    from helpers import environment
+    global _shipper
 
-    try:
-        if not environment.get_websocket_uri():
-            raise ValueError("WEBSOCKET_URI is not set")
+    with _shipper_lock:
+        if _shipper is None or _shipper.uri != uri:
+            if _shipper is not None:
+                _shipper.stop()
+                atexit.unregister(_shipper.flush)
 
-        async with websockets.connect(environment.get_websocket_uri()) as websocket:
-            await websocket.send(_format_message(message, logging_level))
-    except Exception as error:
-        logging.error(f"Failed to send message: {error}")
+            try:
+                drop_policy = models.DropPolicy(environment.get_log_drop_policy())
+            except ValueError as error:
+                logging.error(f"Invalid log drop policy: {error}")
+                drop_policy = models.DropPolicy(constants.LOG_DROP_POLICY)
+
+            _shipper = LogShipper(uri, drop_policy)
+
+            # The last messages, like the fatal one, are sent before exiting.
+            atexit.register(_shipper.flush)
+
+        return _shipper
+
+
+def _ship(
+    message: str,
+    logging_level: int = logging.INFO,
+    disable_ws_message: bool = False,
+    **fields,
+) -> None:
+    """Queue the record of a message for the WebSocket server, if there is one.
+
+    :param str message: The message.
+    :param int logging_level: The logging level.
+    :param bool disable_ws_message: If the message should not be sent to the server.
+    :return None:
+    """
+
+    websocket_uri = environment.get_websocket_uri()
+
+    if websocket_uri and not disable_ws_message:
+        _get_shipper(websocket_uri).put(
+            _get_record(message, logging_level, **fields)
+        )
 
 
 def info(message: str, disable_ws_message: bool = False) -> None:
@@ -65,10 +312,10 @@ def info(message: str, disable_ws_message: bool = False) -> None:
     :return None:
     """
 
-    logging.info(_format_message(message))
+    formatted_message = _format_message(message)
 
-    if environment.get_websocket_uri() or disable_ws_message:
-        asyncio.run(_send_ws_message(message))
+    logging.info(formatted_message)
+    _ship(message, logging.INFO, disable_ws_message)
 
 
 def debug(message: str, disable_ws_message: bool = False) -> None:
@@ -79,10 +326,10 @@ def debug(message: str, disable_ws_message: bool = False) -> None:
     :return None:
     """
 
-    logging.debug(_format_message(message, logging.DEBUG))
+    formatted_message = _format_message(message, logging.DEBUG)
 
-    if environment.get_websocket_uri() or disable_ws_message:
-        asyncio.run(_send_ws_message(message, logging.DEBUG))
+    logging.debug(formatted_message)
+    _ship(message, logging.DEBUG, disable_ws_message)
 
 
 def warning(message: str, disable_ws_message: bool = False) -> None:
@@ -93,10 +340,10 @@ def warning(message: str, disable_ws_message: bool = False) -> None:
     :return None:
     """
 
-    logging.warning(_format_message(message, logging.WARNING))
+    formatted_message = _format_message(message, logging.WARNING)
 
-    if environment.get_websocket_uri() or disable_ws_message:
-        asyncio.run(_send_ws_message(message, logging.WARNING))
+    logging.warning(formatted_message)
+    _ship(message, logging.WARNING, disable_ws_message)
 
 
 def error(message: str, disable_ws_message: bool = False) -> None:
@@ -107,10 +354,10 @@ def error(message: str, disable_ws_message: bool = False) -> None:
     :return None:
     """
 
-    logging.error(_format_message(message, logging.ERROR))
+    formatted_message = _format_message(message, logging.ERROR)
 
-    if environment.get_websocket_uri() or disable_ws_message:
-        asyncio.run(_send_ws_message(message, logging.ERROR))
+    logging.error(formatted_message)
+    _ship(message, logging.ERROR, disable_ws_message)
 
 
 def critical(message: str, disable_ws_message: bool = False) -> None:
@@ -121,10 +368,10 @@ def critical(message: str, disable_ws_message: bool = False) -> None:
     :return None:
     """
 
-    logging.critical(_format_message(message, logging.CRITICAL))
+    formatted_message = _format_message(message, logging.CRITICAL)
 
-    if environment.get_websocket_uri() or disable_ws_message:
-        asyncio.run(_send_ws_message(message, logging.CRITICAL))
+    logging.critical(formatted_message)
+    _ship(message, logging.CRITICAL, disable_ws_message)
 
 
 def fatal(message: str, disable_ws_message: bool = False) -> None:
@@ -135,10 +382,10 @@ def fatal(message: str, disable_ws_message: bool = False) -> None:
     :return None:
     """
 
-    logging.fatal(_format_message(message, logging.FATAL))
+    formatted_message = _format_message(message, logging.FATAL)
 
-    if environment.get_websocket_uri() or disable_ws_message:
-        asyncio.run(_send_ws_message(message, logging.FATAL))
+    logging.fatal(formatted_message)
+    _ship(message, logging.FATAL, disable_ws_message)
 
     raise SystemExit(1)
 
@@ -162,6 +409,9 @@ def txn(
     :return None:
     """
 
+    # Imported here, only the trades are colorized.
+    import colorama
+
     def format_colorized(value, threshold, color_positive, color_negative):
         """Return colorized string based on the threshold."""
 
@@ -184,11 +434,13 @@ def txn(
         float(price_change_percent), 0, colorama.Fore.GREEN, colorama.Fore.RED
     )
 
-    info(
+    message = (
         f"{action_color}[{transaction_type.name}]{colorama.Style.RESET_ALL} "
         f"PRICE: {colorama.Fore.CYAN}{price_in_eth} ETH{colorama.Style.RESET_ALL} | "
         f"CHANGE: {price_change_colorized_text} | "
         f"LIQUIDITY: {colorama.Fore.YELLOW}{liquidity_in_eth} ETH{colorama.Style.RESET_ALL}"
-        f"{f" | TXN HASH: {colorama.Fore.MAGENTA}{txn_hash}{colorama.Style.RESET_ALL}" if txn_hash else ''}",
-        disable_ws_message=disable_ws_message,
+        f"{f" | TXN HASH: {colorama.Fore.MAGENTA}{txn_hash}{colorama.Style.RESET_ALL}" if txn_hash else ''}"
     )
+
+    logging.info(_format_message(message))
+    _ship(message, logging.INFO, disable_ws_message, txn=transaction_type.name)
@@ -0,0 +1,358 @@
+import bisect
+import functools
+import http.server
+import inspect
+import itertools
+import threading
+import time
+from collections.abc import Callable
+
+from helpers import constants
+
+# Type and help of every metric exported, in their order on the endpoint.
+METRICS = {
+    "tick_duration_seconds": (
+        "histogram",
+        "Duration of a tick, from its market snapshot to its logged transaction.",
+    ),
+    "trade_duration_seconds": (
+        "histogram",
+        "Duration of a trade, from its decision to its receipt.",
+    ),
+    "stage_duration_seconds": ("histogram", "Duration of a stage of a tick."),
+    "rpc_requests_total": ("counter", "JSON-RPC requests sent, by method."),
+    "rpc_endpoint_latency_seconds": (
+        "histogram",
+        "Latency of the successful requests of an RPC endpoint.",
+    ),
+    "rpc_endpoint_failures_total": ("counter", "Failed requests of an RPC endpoint."),
+    "rpc_endpoint_circuit_open": (
+        "gauge",
+        "Whether the circuit breaker of an RPC endpoint refuses its requests.",
+    ),
+    "retries_total": ("counter", "Operations retried after a transient error."),
+    "cache_requests_total": ("counter", "Cache lookups, by cache and result."),
+}
+
+_enabled = False
+_lock = threading.Lock()
+_counters = {}
+_histograms = {}
+_collectors = []
+
+
+class _Timer:
+    """Context manager observing the duration of its block, if enabled."""
+
+    __slots__ = ("key", "start")
+
+    def __init__(self, key: tuple) -> None:
+        self.key = key
+        self.start = None
+
+    def __enter__(self) -> "_Timer":
+        if _enabled:
+            self.start = time.perf_counter()
+
+        return self
+
+    def __exit__(self, *args) -> None:
+        if self.start is not None:
+            _observe(self.key, time.perf_counter() - self.start)
+
+
+def is_enabled() -> bool:
+    """Whether the metrics are recorded.
+
+    :return bool: True if enabled.
+    """
+
+    return _enabled
+
+
+def enable() -> None:
+    """Record the metrics, they are not until enabled.
+
+    :return None:
+    """
+
+    global _enabled
+
+    _enabled = True
+
+
+def disable() -> None:
+    """Stop recording the metrics, and forget the recorded ones.
+
+    :return None:
+    """
+
+    global _enabled
+
+    _enabled = False
+
+    with _lock:
+        _counters.clear()
+        _histograms.clear()
+
+
+def inc(metric: str, value: int | float = 1, **labels: str) -> None:
+    """Increment a counter.
+
+    :param str metric: The metric name.
+    :param int | float value: The increment.
+    :param str labels: The labels of the series.
+    :return None:
+    """
+
+    if not _enabled:
+        return
+
+    key = _get_key(metric, labels)
+
+    with _lock:
+        _counters[key] = _counters.get(key, 0) + value
+
+
+def observe(metric: str, seconds: float, **labels: str) -> None:
+    """Count a duration in a histogram.
+
+    :param str metric: The metric name.
+    :param float seconds: The duration in seconds.
+    :param str labels: The labels of the series.
+    :return None:
+    """
+
+    if _enabled:
+        _observe(_get_key(metric, labels), seconds)
+
+
+def timer(metric: str, **labels: str) -> _Timer:
+    """Time a block of code, e.g. `with metrics.timer("stage_duration_seconds",
+    stage="sign"):`.
+
+    :param str metric: The histogram name.
+    :param str labels: The labels of the series.
+    :return _Timer: The context manager.
+    """
+
+    return _Timer(_get_key(metric, labels))
+
+
+def timed(metric: str, **labels: str) -> Callable:
+    """Decorate a function, or an async function, to time its calls.
+
+    Disabled, a call only costs the wrapper and a check of a global.
+
+    :param str metric: The histogram name.
+    :param str labels: The labels of the series.
+    :return Callable: The decorator.
+    """
+
+    key = _get_key(metric, labels)
+
+    def decorator(function: Callable) -> Callable:
+        if inspect.iscoroutinefunction(function):
+
+            @functools.wraps(function)
+            async def async_wrapper(*args, **kwargs):
+                if not _enabled:
+                    return await function(*args, **kwargs)
+
+                start = time.perf_counter()
+
+                try:
+                    return await function(*args, **kwargs)
+                finally:
+                    _observe(key, time.perf_counter() - start)
+
+            return async_wrapper
+
+        @functools.wraps(function)
+        def wrapper(*args, **kwargs):
+            if not _enabled:
+                return function(*args, **kwargs)
+
+            start = time.perf_counter()
+
+            try:
+                return function(*args, **kwargs)
+            finally:
+                _observe(key, time.perf_counter() - start)
+
+        return wrapper
+
+    return decorator
+
+
+def collector(function: Callable[[], list[tuple]]) -> Callable[[], list[tuple]]:
+    """Register a function reading metrics kept elsewhere, when they are exported.
+
+    It returns `(metric, labels, value)` samples, the value of a histogram being a
+    dict with its cumulative `buckets`, its `count` and its `sum`.
+
+    :param Callable[[], list[tuple]] function: The collector.
+    :return Callable[[], list[tuple]]: The same collector.
+    """
+
+    _collectors.append(function)
+
+    return function
+
+
+def render() -> str:
+    """Render the metrics in the Prometheus text format.
+
+    :return str: The metrics.
+    """
+
+    with _lock:
+        samples = [
+            (metric, dict(labels), value)
+            for (metric, labels), value in _counters.items()
+        ] + [
+            (metric, dict(labels), _to_histogram(counts, total))
+            for (metric, labels), (counts, total) in _histograms.items()
+        ]
+
+    for function in _collectors:
+        samples.extend(function())
+
+    lines = []
+
+    for metric, metric_samples in itertools.groupby(
+        sorted(samples, key=lambda sample: list(METRICS).index(sample[0])),
+        key=lambda sample: sample[0],
+    ):
+        kind, description = METRICS[metric]
+        lines.append(f"# HELP {metric} {description}")
+        lines.append(f"# TYPE {metric} {kind}")
+
+        for _, labels, value in metric_samples:
+            if kind != "histogram":
+                lines.append(f"{metric}{_format_labels(labels)} {value}")
+                continue
+
+            for upper_bound, count in value["buckets"]:
+                bucket_labels = {**labels, "le": _format_bound(upper_bound)}
+                lines.append(f"{metric}_bucket{_format_labels(bucket_labels)} {count}")
+
+            lines.append(f"{metric}_count{_format_labels(labels)} {value['count']}")
+            lines.append(f"{metric}_sum{_format_labels(labels)} {value['sum']}")
+
+    return "\n".join(lines) + "\n"
+
+
+def start_server(port: int, host: str = "0.0.0.0") -> http.server.HTTPServer:
+    """Enable the metrics and serve them on `/metrics` from a background thread.
+
+    :param int port: The port, 0 for any free one.
+    :param str host: The interface to listen on.
+    :return http.server.HTTPServer: The server, its `server_address` has the port.
+    """
+
+    class Handler(http.server.BaseHTTPRequestHandler):
+        def do_GET(self) -> None:
+            if self.path.split("?")[0] != "/metrics":
+                self.send_error(404)
+                return
+
+            content = render().encode()
+
+            self.send_response(200)
+            self.send_header("Content-Type", "text/plain; version=0.0.4")
+            self.send_header("Content-Length", str(len(content)))
+            self.end_headers()
+            self.wfile.write(content)
+
+        def log_message(self, *args) -> None:
+            pass
+
+    enable()
+
+    server = http.server.ThreadingHTTPServer((host, port), Handler)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, name="metrics", daemon=True).start()
+
+    return server
+
+
+def _get_key(metric: str, labels: dict) -> tuple:
+    """Get the key of a series.
+
+    :param str metric: The metric name.
+    :param dict labels: The labels of the series.
+    :return tuple: The key.
+    """
+
+    return metric, tuple(sorted(labels.items()))
+
+
+def _observe(key: tuple, seconds: float) -> None:
+    """Count a duration in the histogram of a series.
+
+    :param tuple key: The key of the series.
+    :param float seconds: The duration in seconds.
+    :return None:
+    """
+
+    bucket = bisect.bisect_left(constants.METRICS_BUCKETS, seconds)
+
+    with _lock:
+        if key not in _histograms:
+            _histograms[key] = [[0] * (len(constants.METRICS_BUCKETS) + 1), 0.0]
+
+        histogram = _histograms[key]
+        histogram[0][bucket] += 1
+        histogram[1] += seconds
+
+
+def _to_histogram(counts: list[int], total: float) -> dict:
+    """Convert the bucket counts of a histogram to its exported form.
+
+    :param list[int] counts: The count of every bucket, then of the overflow.
+    :param float total: The sum of the durations.
+    :return dict: The cumulative `buckets`, the `count` and the `sum`.
+    """
+
+    cumulative = list(itertools.accumulate(counts))
+
+    return {
+        "buckets": list(zip((*constants.METRICS_BUCKETS, float("inf")), cumulative)),
+        "count": cumulative[-1],
+        "sum": total,
+    }
+
+
+def _format_labels(labels: dict) -> str:
+    """Format the labels of a sample.
+
+    :param dict labels: The labels.
+    :return str: The labels in braces, empty if none.
+    """
+
+    if not labels:
+        return ""
+
+    return "{{{}}}".format(
+        ",".join(
+            '{}="{}"'.format(
+                name,
+                str(value)
+                .replace("\\", "\\\\")
+                .replace('"', '\\"')
+                .replace("\n", "\\n"),
+            )
+            for name, value in labels.items()
+        )
+    )
+
+
+def _format_bound(upper_bound: float) -> str:
+    """Format the upper bound of a bucket.
+
+    :param float upper_bound: The upper bound.
+    :return str: The bound, `+Inf` for the overflow bucket.
+    """
+
+    return "+Inf" if upper_bound == float("inf") else str(upper_bound)
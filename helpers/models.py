@@ -8,3 +8,11 @@ class TransactionType(Enum):
     SELL = "SELL"
     HOLD = "HOLD"
     ERROR = "ERROR"
+
+
+class DropPolicy(Enum):
+    """Enum class for what the log shipper does when its queue is full."""
+
+    DROP_OLDEST = "drop_oldest"
+    DROP_NEWEST = "drop_newest"
+    BLOCK = "block"
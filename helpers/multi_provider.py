@@ -0,0 +1,642 @@
+import asyncio
+import bisect
+import concurrent.futures
+import itertools
+import statistics
+import threading
+import time
+from collections import deque
+
+import aiohttp
+from web3 import AsyncHTTPProvider, HTTPProvider
+from web3._utils.batching import sort_batch_response_by_response_ids
+
+from helpers import circuit_breaker, constants, errors, metrics, retry
+
+# Sent to every endpoint at once, the first node to accept it propagates it.
+BROADCAST_METHODS = {"eth_sendRawTransaction"}
+
+_stats = {}
+_stats_lock = threading.Lock()
+_executor = None
+_executor_lock = threading.Lock()
+
+
+class EndpointStats:
+    """Latencies and failures of an RPC endpoint, shared by all its providers.
+
+    Its score is its average latency, or the age of its oldest request in flight if
+    longer, so a stalled endpoint is avoided before its requests time out. Its
+    circuit breaker skips it after too many failures in a row.
+    """
+
+    def __init__(self, url: str) -> None:
+        self.url = url
+        self.average_latency = None
+        self.requests = 0
+        self.failures = 0
+        self.breaker = circuit_breaker.CircuitBreaker()
+
+        self._latencies = deque(maxlen=constants.RPC_LATENCY_WINDOW)
+        self._bucket_counts = [0] * (len(constants.RPC_LATENCY_BUCKETS) + 1)
+        self._latency_sum = 0.0
+        self._in_flight = {}
+        self._ids = itertools.count()
+        self._lock = threading.Lock()
+
+    def begin(self) -> int:
+        """Record the start of a request.
+
+        :return int: The ID of the request.
+        """
+
+        request_id = next(self._ids)
+
+        with self._lock:
+            self._in_flight[request_id] = time.perf_counter()
+
+        return request_id
+
+    def end(
+        self, request_id: int, failed: bool = False, cancelled: bool = False
+    ) -> None:
+        """Record the end of a request.
+
+        A cancelled request records the time it had been waiting, it lost to a
+        faster endpoint.
+
+        :param int request_id: The ID of the request.
+        :param bool failed: If the request failed.
+        :param bool cancelled: If the request was given up on before its response.
+        :return None:
+        """
+
+        now = time.perf_counter()
+
+        if failed:
+            self.breaker.record_failure()
+        elif cancelled:
+            self.breaker.record_cancel()
+        else:
+            self.breaker.record_success()
+
+        with self._lock:
+            latency = now - self._in_flight.pop(request_id)
+            self.requests += 1
+
+            if failed:
+                self.failures += 1
+                return
+
+            self._latencies.append(latency)
+            self._latency_sum += latency
+            self._bucket_counts[
+                bisect.bisect_left(constants.RPC_LATENCY_BUCKETS, latency)
+            ] += 1
+
+            if self.average_latency is None:
+                self.average_latency = latency
+            else:
+                self.average_latency += constants.RPC_LATENCY_SMOOTHING * (
+                    latency - self.average_latency
+                )
+
+    def get_score(self) -> float:
+        """Get the expected latency of the endpoint, lower is better.
+
+        :return float: The score in seconds, 0 if never used.
+        """
+
+        with self._lock:
+            stalled = time.perf_counter() - min(
+                self._in_flight.values(), default=time.perf_counter()
+            )
+
+            return max(self.average_latency or 0.0, stalled)
+
+    def get_hedge_delay(self, default: float = constants.RPC_HEDGE_DELAY) -> float:
+        """Get the delay after which a read is sent to another endpoint too.
+
+        :param float default: The delay until enough latencies are known.
+        :return float: The p95 latency of the endpoint, in seconds.
+        """
+
+        with self._lock:
+            if len(self._latencies) < constants.RPC_HEDGE_MIN_SAMPLES:
+                return default
+
+            p95 = statistics.quantiles(self._latencies, n=20)[-1]
+
+        return max(p95, constants.RPC_HEDGE_MIN_DELAY)
+
+    def get_histogram(self) -> dict:
+        """Get the latency histogram of the successful requests.
+
+        :return dict: The cumulative count per upper bound in seconds, under
+            `buckets`, with the `count` and `sum` of the latencies.
+        """
+
+        with self._lock:
+            counts = list(itertools.accumulate(self._bucket_counts))
+
+            return {
+                "buckets": list(
+                    zip((*constants.RPC_LATENCY_BUCKETS, float("inf")), counts)
+                ),
+                "count": counts[-1],
+                "sum": self._latency_sum,
+            }
+
+
+class MultiHTTPProvider(HTTPProvider):
+    """HTTP provider spreading the requests of a client over one or more RPC URLs.
+
+    Reads go to the endpoint with the best score, and to the next one too if they
+    are not answered after the p95 latency of the first. The endpoints failing are
+    skipped, and the reads failing on all of them are retried with the retry
+    policy. The raw transactions are sent to all of them at once, and never
+    retried. The `endpoint_uri` is the first URL, which the caches of the client
+    are keyed by.
+    """
+
+    def __init__(
+        self,
+        endpoint_uris: list[str],
+        hedge_delay: float = constants.RPC_HEDGE_DELAY,
+        retry_policy: retry.RetryPolicy = retry.DEFAULT_POLICY,
+        **kwargs,
+    ) -> None:
+        # The retries are the other endpoints, then the retry policy.
+        kwargs.setdefault("exception_retry_configuration", None)
+        kwargs.setdefault("request_kwargs", {"timeout": constants.RPC_TIMEOUT})
+
+        super().__init__(endpoint_uris[0], **kwargs)
+        self.endpoint_uris = list(endpoint_uris)
+        self.hedge_delay = hedge_delay
+        self.retry_policy = retry_policy
+
+    def _make_request(self, method: str, request_data: bytes) -> bytes:
+        metrics.inc("rpc_requests_total", method=method)
+
+        if method in BROADCAST_METHODS:
+            return self._broadcast(request_data)
+
+        return self.retry_policy.call(self._route, request_data)
+
+    def make_batch_request(self, batch_requests: list[tuple]) -> list[dict] | dict:
+        for method, _ in batch_requests:
+            metrics.inc("rpc_requests_total", method=method)
+
+        response = self.decode_rpc_response(
+            self.retry_policy.call(
+                self._route, self.encode_batch_rpc_request(batch_requests)
+            )
+        )
+
+        # RPC errors return only one response with the error object.
+        if not isinstance(response, list):
+            return response
+
+        return sort_batch_response_by_response_ids(response)
+
+    def _post(self, endpoint_uri: str, request_data: bytes) -> bytes:
+        """Send a request to an endpoint, recording its latency.
+
+        :param str endpoint_uri: The endpoint URL.
+        :param bytes request_data: The encoded request.
+        :return bytes: The raw response.
+        """
+
+        stats = get_endpoint_stats(endpoint_uri)
+        request_id = stats.begin()
+
+        try:
+            raw_response = self._request_session_manager.make_post_request(
+                endpoint_uri, request_data, **self.get_request_kwargs()
+            )
+            _check_response(raw_response, self.decode_rpc_response)
+        except Exception as error:
+            stats.end(request_id, failed=True)
+            raise _get_error(endpoint_uri, error) from error
+
+        stats.end(request_id)
+
+        return raw_response
+
+    def _route(self, request_data: bytes) -> bytes:
+        """Send a read to the best endpoint, hedged and failed over to the others.
+
+        :param bytes request_data: The encoded request.
+        :return bytes: The first raw response.
+        """
+
+        endpoint_uris = rank(self.endpoint_uris)
+        endpoint_uri = _get_next_endpoint(endpoint_uris)
+
+        if endpoint_uri is None:
+            raise errors.CircuitOpenError("Every RPC endpoint is failing")
+
+        # Nothing to hedge with, the request is sent from this thread.
+        if not endpoint_uris:
+            return self._post(endpoint_uri, request_data)
+
+        hedge_delay = get_endpoint_stats(endpoint_uri).get_hedge_delay(self.hedge_delay)
+        executor = _get_executor()
+        pending = {executor.submit(self._post, endpoint_uri, request_data)}
+        error = None
+
+        def send_next() -> None:
+            endpoint_uri = _get_next_endpoint(endpoint_uris)
+
+            if endpoint_uri is not None:
+                pending.add(executor.submit(self._post, endpoint_uri, request_data))
+
+        while pending:
+            done, pending = concurrent.futures.wait(
+                pending,
+                timeout=hedge_delay if endpoint_uris else None,
+                return_when=concurrent.futures.FIRST_COMPLETED,
+            )
+
+            if not done:
+                send_next()
+
+            for future in done:
+                if future.exception() is None:
+                    return future.result()
+
+                error = future.exception()
+                send_next()
+
+        raise error
+
+    def _broadcast(self, request_data: bytes) -> bytes:
+        """Send a transaction to every endpoint at once.
+
+        :param bytes request_data: The encoded request.
+        :return bytes: The first response accepting it, or the first error.
+        """
+
+        futures = [
+            _get_executor().submit(self._post, endpoint_uri, request_data)
+            for endpoint_uri in _get_broadcast_endpoints(self.endpoint_uris)
+        ]
+        rejection = None
+        error = None
+
+        for future in concurrent.futures.as_completed(futures):
+            if future.exception() is not None:
+                error = error or future.exception()
+                continue
+
+            raw_response = future.result()
+
+            if "error" not in self.decode_rpc_response(raw_response):
+                return raw_response
+
+            rejection = rejection or raw_response
+
+        if rejection is None:
+            raise error
+
+        return rejection
+
+
+class AsyncMultiHTTPProvider(AsyncHTTPProvider):
+    """Async HTTP provider spreading the requests of a client over one or more RPC
+    URLs.
+
+    It routes the requests like `MultiHTTPProvider`. The reads hedged are
+    cancelled once answered, the raw transactions are sent to every endpoint even
+    after the first accepts them.
+    """
+
+    def __init__(
+        self,
+        endpoint_uris: list[str],
+        hedge_delay: float = constants.RPC_HEDGE_DELAY,
+        retry_policy: retry.RetryPolicy = retry.DEFAULT_POLICY,
+        **kwargs,
+    ) -> None:
+        # The retries are the other endpoints, then the retry policy.
+        kwargs.setdefault("exception_retry_configuration", None)
+        kwargs.setdefault(
+            "request_kwargs",
+            {"timeout": aiohttp.ClientTimeout(total=constants.RPC_TIMEOUT)},
+        )
+
+        super().__init__(endpoint_uris[0], **kwargs)
+        self.endpoint_uris = list(endpoint_uris)
+        self.hedge_delay = hedge_delay
+        self.retry_policy = retry_policy
+
+        self._broadcasts = set()
+
+    async def cache_async_session(self, session):
+        for endpoint_uri in self.endpoint_uris:
+            await self._request_session_manager.async_cache_and_return_session(
+                endpoint_uri, session
+            )
+
+        return session
+
+    async def _make_request(self, method: str, request_data: bytes) -> bytes:
+        metrics.inc("rpc_requests_total", method=method)
+
+        if method in BROADCAST_METHODS:
+            return await self._broadcast(request_data)
+
+        return await self.retry_policy.async_call(self._route, request_data)
+
+    async def make_batch_request(
+        self, batch_requests: list[tuple]
+    ) -> list[dict] | dict:
+        for method, _ in batch_requests:
+            metrics.inc("rpc_requests_total", method=method)
+
+        response = self.decode_rpc_response(
+            await self.retry_policy.async_call(
+                self._route, self.encode_batch_rpc_request(batch_requests)
+            )
+        )
+
+        # RPC errors return only one response with the error object.
+        if not isinstance(response, list):
+            return response
+
+        return sort_batch_response_by_response_ids(response)
+
+    async def _post(self, endpoint_uri: str, request_data: bytes) -> bytes:
+        """Send a request to an endpoint, recording its latency.
+
+        :param str endpoint_uri: The endpoint URL.
+        :param bytes request_data: The encoded request.
+        :return bytes: The raw response.
+        """
+
+        stats = get_endpoint_stats(endpoint_uri)
+        request_id = stats.begin()
+
+        try:
+            raw_response = await self._request_session_manager.async_make_post_request(
+                endpoint_uri, request_data, **self.get_request_kwargs()
+            )
+            _check_response(raw_response, self.decode_rpc_response)
+        except asyncio.CancelledError:
+            stats.end(request_id, cancelled=True)
+            raise
+        except Exception as error:
+            stats.end(request_id, failed=True)
+            raise _get_error(endpoint_uri, error) from error
+
+        stats.end(request_id)
+
+        return raw_response
+
+    async def _route(self, request_data: bytes) -> bytes:
+        """Send a read to the best endpoint, hedged and failed over to the others.
+
+        :param bytes request_data: The encoded request.
+        :return bytes: The first raw response.
+        """
+
+        endpoint_uris = rank(self.endpoint_uris)
+        endpoint_uri = _get_next_endpoint(endpoint_uris)
+
+        if endpoint_uri is None:
+            raise errors.CircuitOpenError("Every RPC endpoint is failing")
+
+        # Nothing to hedge with, the request is awaited directly.
+        if not endpoint_uris:
+            return await self._post(endpoint_uri, request_data)
+
+        hedge_delay = get_endpoint_stats(endpoint_uri).get_hedge_delay(self.hedge_delay)
+        pending = {asyncio.ensure_future(self._post(endpoint_uri, request_data))}
+        error = None
+
+        def send_next() -> None:
+            endpoint_uri = _get_next_endpoint(endpoint_uris)
+
+            if endpoint_uri is not None:
+                pending.add(
+                    asyncio.ensure_future(self._post(endpoint_uri, request_data))
+                )
+
+        try:
+            while pending:
+                done, pending = await asyncio.wait(
+                    pending,
+                    timeout=hedge_delay if endpoint_uris else None,
+                    return_when=asyncio.FIRST_COMPLETED,
+                )
+
+                if not done:
+                    send_next()
+
+                for task in done:
+                    if task.exception() is None:
+                        return task.result()
+
+                    error = task.exception()
+                    send_next()
+        finally:
+            for task in pending:
+                task.cancel()
+
+        raise error
+
+    async def _broadcast(self, request_data: bytes) -> bytes:
+        """Send a transaction to every endpoint at once.
+
+        :param bytes request_data: The encoded request.
+        :return bytes: The first response accepting it, or the first error.
+        """
+
+        tasks = [
+            asyncio.ensure_future(self._post(endpoint_uri, request_data))
+            for endpoint_uri in _get_broadcast_endpoints(self.endpoint_uris)
+        ]
+
+        # The slower endpoints still get the transaction.
+        for task in tasks:
+            self._broadcasts.add(task)
+            task.add_done_callback(self._broadcasts.discard)
+
+        rejection = None
+        error = None
+
+        for next_task in asyncio.as_completed(tasks):
+            try:
+                raw_response = await next_task
+            except Exception as task_error:
+                error = error or task_error
+                continue
+
+            if "error" not in self.decode_rpc_response(raw_response):
+                return raw_response
+
+            rejection = rejection or raw_response
+
+        if rejection is None:
+            raise error
+
+        return rejection
+
+
+def get_endpoint_stats(url: str) -> EndpointStats:
+    """Get the statistics of an RPC endpoint.
+
+    :param str url: The endpoint URL.
+    :return EndpointStats: The statistics.
+    """
+
+    with _stats_lock:
+        if url not in _stats:
+            _stats[url] = EndpointStats(url)
+
+        return _stats[url]
+
+
+def get_histograms() -> dict[str, dict]:
+    """Get the latency histograms of the RPC endpoints used.
+
+    :return dict[str, dict]: The histogram of every endpoint URL.
+    """
+
+    with _stats_lock:
+        endpoints = list(_stats.values())
+
+    return {stats.url: stats.get_histogram() for stats in endpoints}
+
+
+def rank(urls: list[str]) -> list[str]:
+    """Sort RPC endpoints from the best to the worst.
+
+    The endpoints whose circuit is open come last, then the ones whose last
+    request failed. The ones with the same score keep their order, so the first
+    URL is preferred until measured.
+
+    :param list[str] urls: The endpoint URLs.
+    :return list[str]: The endpoint URLs, sorted.
+    """
+
+    stats = [get_endpoint_stats(url) for url in urls]
+
+    return [
+        endpoint.url
+        for endpoint in sorted(
+            stats,
+            key=lambda endpoint: (
+                endpoint.breaker.is_open(),
+                endpoint.breaker.failures > 0,
+                endpoint.get_score(),
+            ),
+        )
+    ]
+
+
+@metrics.collector
+def _collect_metrics() -> list[tuple]:
+    """Read the latencies, failures and circuits of the RPC endpoints used.
+
+    :return list[tuple]: The samples.
+    """
+
+    with _stats_lock:
+        endpoints = list(_stats.values())
+
+    samples = []
+
+    for stats in endpoints:
+        labels = {"endpoint": stats.url}
+        samples.append(("rpc_endpoint_latency_seconds", labels, stats.get_histogram()))
+        samples.append(("rpc_endpoint_failures_total", labels, stats.failures))
+        samples.append(
+            ("rpc_endpoint_circuit_open", labels, int(stats.breaker.is_open()))
+        )
+
+    return samples
+
+
+def _get_next_endpoint(endpoint_uris: list[str]) -> str | None:
+    """Take the next endpoint whose circuit breaker lets a request through.
+
+    :param list[str] endpoint_uris: The endpoint URLs left, ranked.
+    :return str | None: The endpoint URL, None if none is left.
+    """
+
+    while endpoint_uris:
+        endpoint_uri = endpoint_uris.pop(0)
+
+        if get_endpoint_stats(endpoint_uri).breaker.allow_request():
+            return endpoint_uri
+
+    return None
+
+
+def _get_broadcast_endpoints(endpoint_uris: list[str]) -> list[str]:
+    """Get the endpoints a transaction is sent to.
+
+    :param list[str] endpoint_uris: The endpoint URLs.
+    :return list[str]: The endpoints whose circuit breaker lets it through, or all
+        of them if none does, a transaction is not given up on.
+    """
+
+    allowed = [
+        endpoint_uri
+        for endpoint_uri in endpoint_uris
+        if get_endpoint_stats(endpoint_uri).breaker.allow_request()
+    ]
+
+    return allowed or list(endpoint_uris)
+
+
+def _check_response(raw_response: bytes, decode) -> None:
+    """Raise for the JSON-RPC errors of a node busy or behind.
+
+    :param bytes raw_response: The raw response.
+    :param decode: The function decoding it.
+    :return None:
+    """
+
+    # Most responses are results, they are not decoded twice.
+    if b'"error"' not in raw_response:
+        return
+
+    response = decode(raw_response)
+
+    if isinstance(response, dict) and errors.is_transient_response(response):
+        raise errors.RPCUnavailableError(response["error"].get("message"))
+
+
+def _get_error(endpoint_uri: str, error: Exception) -> Exception:
+    """Get the error raised for a failed request.
+
+    :param str endpoint_uri: The endpoint URL.
+    :param Exception error: The error of the request.
+    :return Exception: An `errors.RPCUnavailableError` if the error is transient,
+        the error otherwise.
+    """
+
+    if errors.is_transient(error) and not isinstance(error, errors.BotError):
+        return errors.RPCUnavailableError(f"{endpoint_uri}: {error}")
+
+    return error
+
+
+def _get_executor() -> concurrent.futures.ThreadPoolExecutor:
+    """Get the threads sending the concurrent requests of the sync providers.
+
+    :return concurrent.futures.ThreadPoolExecutor: The executor.
+    """
+
+    global _executor
+
+    with _executor_lock:
+        if _executor is None:
+            _executor = concurrent.futures.ThreadPoolExecutor(
+                max_workers=constants.HTTP_POOL_SIZE,
+                thread_name_prefix="rpc",
+            )
+
+    return _executor
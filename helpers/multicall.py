@@ -0,0 +1,107 @@
+from eth_abi import decode
+from eth_utils.abi import get_abi_output_types
+from web3 import AsyncWeb3, Web3, contract
+from web3.types import BlockIdentifier
+
+from helpers import errors, registry
+
+
+def aggregate(
+    client: Web3,
+    calls: list[tuple[contract.Contract, str, list]],
+    block_identifier: BlockIdentifier = "latest",
+) -> list:
+    """Run read-only contract calls in a single `eth_call` to Multicall3.
+
+    All the calls are executed against the same block, so their results are
+    consistent with each other.
+
+    :param Web3 client: The Web3 client.
+    :param list[tuple[Contract, str, list]] calls: The contract, function name and
+        arguments of every call.
+    :param BlockIdentifier block_identifier: The block to run the calls against.
+    :return list: The decoded result of every call, unwrapped when the function
+        has a single output, or the `errors.CallFailedError` of a call that failed.
+    """
+
+    multicall = registry.get_registry(client).get_multicall()
+
+    results = multicall.functions.aggregate3(_encode_calls(calls)).call(
+        block_identifier=block_identifier
+    )
+
+    return _decode_results(calls, results)
+
+
+async def async_aggregate(
+    client: AsyncWeb3,
+    calls: list[tuple[contract.AsyncContract, str, list]],
+    block_identifier: BlockIdentifier = "latest",
+) -> list:
+    """Run read-only contract calls in a single `eth_call` to Multicall3.
+
+    :param AsyncWeb3 client: The AsyncWeb3 client.
+    :param list[tuple[AsyncContract, str, list]] calls: The contract, function name
+        and arguments of every call.
+    :param BlockIdentifier block_identifier: The block to run the calls against.
+    :return list: The decoded result of every call, unwrapped when the function
+        has a single output, or the `errors.CallFailedError` of a call that failed.
+    """
+
+    multicall = registry.get_registry(client).get_multicall()
+
+    results = await multicall.functions.aggregate3(_encode_calls(calls)).call(
+        block_identifier=block_identifier
+    )
+
+    return _decode_results(calls, results)
+
+
+def _encode_calls(calls: list[tuple]) -> list[tuple[str, bool, bytes]]:
+    """Encode the calls as Multicall3 `Call3` structs, any of them may fail.
+
+    :param list[tuple] calls: The contract, function name and arguments of every call.
+    :return list[tuple[str, bool, bytes]]: The target, allowFailure flag and data.
+    """
+
+    return [
+        (target.address, True, target.encode_abi(function_name, args=args))
+        for target, function_name, args in calls
+    ]
+
+
+def _decode_results(calls: list[tuple], results: list) -> list:
+    """Decode the Multicall3 results of the calls.
+
+    :param list[tuple] calls: The contract, function name and arguments of every call.
+    :param list results: The success flag and return data of every call.
+    :return list: The decoded result of every call, or its `errors.CallFailedError`.
+    """
+
+    decoded_results = []
+
+    for (target, function_name, _), (success, return_data) in zip(calls, results):
+        if not success:
+            decoded_results.append(
+                errors.CallFailedError(f"{function_name} of {target.address} reverted")
+            )
+            continue
+
+        output_types = get_abi_output_types(
+            target.get_function_by_name(function_name).abi
+        )
+
+        try:
+            values = decode(output_types, return_data)
+        except Exception as error:
+            # A call to an address without code succeeds with no data.
+            decoded_results.append(
+                errors.CallFailedError(
+                    f"{function_name} of {target.address} returned no result: {error}"
+                )
+            )
+            continue
+
+        decoded_results.append(values[0] if len(values) == 1 else values)
+
+    return decoded_results
@@ -0,0 +1,94 @@
+import asyncio
+
+from web3 import AsyncWeb3
+
+_managers = {}
+
+
+class NonceManager:
+    """Hand out the nonces of a wallet locally.
+
+    The next nonce is read from the pending transaction count of the node once,
+    then incremented for every transaction, so transactions of the same wallet,
+    like an approval and its swap or the sales of two tokens, can be sent back to
+    back without colliding. After a failure, the count is read again.
+    """
+
+    def __init__(self, address: str) -> None:
+        self.address = address
+
+        self._next_nonce = None
+        self._lock = asyncio.Lock()
+
+    async def get_nonce(self, client: AsyncWeb3) -> int:
+        """Get the nonce of the next transaction of the wallet.
+
+        :param AsyncWeb3 client: The AsyncWeb3 client.
+        :return int: The nonce.
+        """
+
+        async with self._lock:
+            if self._next_nonce is None:
+                self._next_nonce = await client.eth.get_transaction_count(
+                    self.address, "pending"
+                )
+
+            nonce = self._next_nonce
+            self._next_nonce += 1
+
+            return nonce
+
+    async def peek_nonce(self, client: AsyncWeb3) -> int:
+        """Get the nonce of the next transaction, without handing it out.
+
+        :param AsyncWeb3 client: The AsyncWeb3 client.
+        :return int: The nonce.
+        """
+
+        async with self._lock:
+            if self._next_nonce is None:
+                self._next_nonce = await client.eth.get_transaction_count(
+                    self.address, "pending"
+                )
+
+            return self._next_nonce
+
+    def claim(self, nonce: int) -> bool:
+        """Hand out a peeked nonce, if it is still the next one.
+
+        :param int nonce: The nonce.
+        :return bool: True if the nonce was handed out.
+        """
+
+        if self._next_nonce != nonce or self._lock.locked():
+            return False
+
+        self._next_nonce += 1
+
+        return True
+
+    def resync(self) -> None:
+        """Read the nonce from the node again on the next transaction.
+
+        A transaction that was not sent, or dropped, leaves a gap the next nonces
+        would wait behind forever.
+
+        :return None:
+        """
+
+        self._next_nonce = None
+
+
+def get_nonce_manager(address: str) -> NonceManager:
+    """Get the nonce manager of a wallet for the running event loop.
+
+    :param str address: The wallet address.
+    :return NonceManager: The nonce manager.
+    """
+
+    key = (id(asyncio.get_running_loop()), address.lower())
+
+    if key not in _managers:
+        _managers[key] = NonceManager(address)
+
+    return _managers[key]
@@ -0,0 +1,295 @@
+import asyncio
+import collections
+import time
+from collections.abc import Awaitable, Callable
+
+from helpers import constants, logger
+
+# Priorities of the messages, the trades are sent before the other messages.
+TRADE = 0
+CHATTER = 1
+
+
+class TokenBucket:
+    """Rate limit of `rate` calls per second, up to `capacity` of them at once."""
+
+    def __init__(self, rate: float, capacity: int) -> None:
+        self.rate = rate
+        self.capacity = capacity
+
+        self._tokens = float(capacity)
+        self._updated_at = time.monotonic()
+
+    def get_delay(self) -> float:
+        """Get the time before a call is allowed.
+
+        :return float: The delay in seconds, 0 if a call is allowed now.
+        """
+
+        now = time.monotonic()
+        self._tokens = min(
+            self.capacity, self._tokens + (now - self._updated_at) * self.rate
+        )
+        self._updated_at = now
+
+        return max(0.0, (1 - self._tokens) / self.rate)
+
+    async def acquire(self) -> None:
+        """Wait until a call is allowed, and count it.
+
+        :return None:
+        """
+
+        while (delay := self.get_delay()) > 0:
+            await asyncio.sleep(delay)
+
+        self._tokens -= 1
+
+    def pause(self, seconds: float) -> None:
+        """Allow no call for a while, e.g. when asked to by the server.
+
+        :param float seconds: The pause in seconds.
+        :return None:
+        """
+
+        self._tokens = 0.0
+        self._updated_at = time.monotonic() + seconds
+
+
+class Notifier:
+    """Send the messages of the bot to Telegram within its rate limit.
+
+    The messages are queued per chat. The trades of a chat are sent as soon as
+    the rate limit allows, before any other message. The other messages of a
+    chat are gathered for `digest_interval`, and those queued are sent together,
+    joined in messages of at most `max_length` characters, so a burst takes a few
+    messages instead of one per line. When Telegram asks to wait, with the
+    `seconds` of its flood wait error, the message is sent again after.
+    """
+
+    def __init__(
+        self,
+        send: Callable[[str | int, str], Awaitable],
+        rate: float = constants.TELEGRAM_RATE,
+        burst: int = constants.TELEGRAM_BURST,
+        digest_interval: float = constants.TELEGRAM_DIGEST_INTERVAL,
+        max_length: int = constants.TELEGRAM_MAX_MESSAGE_LENGTH,
+        queue_size: int = constants.TELEGRAM_QUEUE_SIZE,
+    ) -> None:
+        self.send = send
+        self.bucket = TokenBucket(rate, burst)
+        self.digest_interval = digest_interval
+        self.max_length = max_length
+        self.queue_size = queue_size
+        self.sent = 0
+        self.dropped = 0
+        self.failed = 0
+
+        # Chat ID to queued messages, the chats being served in their order.
+        self._trades = {}
+        self._chatter = {}
+        # Chat ID to the time its oldest queued other message was queued.
+        self._chatter_since = {}
+        self._queued = asyncio.Event()
+        self._idle = asyncio.Event()
+        self._idle.set()
+        self._loop = None
+        self._task = None
+
+    def start(self) -> None:
+        """Send the queued messages from a task of the running event loop.
+
+        :return None:
+        """
+
+        self._loop = asyncio.get_running_loop()
+        self._task = asyncio.create_task(self.run())
+
+    async def stop(self) -> None:
+        """Stop the task started by `start`, the queued messages are not sent.
+
+        :return None:
+        """
+
+        self._task.cancel()
+
+        try:
+            await self._task
+        except asyncio.CancelledError:
+            pass
+
+    def notify(self, chat_id: str | int, message: str, priority: int = CHATTER) -> None:
+        """Queue a message, from the thread of the event loop.
+
+        :param str | int chat_id: The chat.
+        :param str message: The message.
+        :param int priority: `TRADE` or `CHATTER`.
+        :return None:
+        """
+
+        if priority == TRADE:
+            self._trades.setdefault(chat_id, collections.deque()).append(message)
+        else:
+            messages = self._chatter.setdefault(chat_id, collections.deque())
+
+            if not messages:
+                self._chatter_since[chat_id] = time.monotonic()
+            elif len(messages) >= self.queue_size:
+                messages.popleft()
+                self.dropped += 1
+
+            messages.append(message)
+
+        self._idle.clear()
+        self._queued.set()
+
+    def notify_threadsafe(
+        self,
+        chat_id: str | int,
+        message: str,
+        priority: int = CHATTER,
+    ) -> None:
+        """Queue a message, from any thread once started.
+
+        :param str | int chat_id: The chat.
+        :param str message: The message.
+        :param int priority: `TRADE` or `CHATTER`.
+        :return None:
+        """
+
+        self._loop.call_soon_threadsafe(self.notify, chat_id, message, priority)
+
+    async def join(self) -> None:
+        """Wait until every queued message is sent.
+
+        :return None:
+        """
+
+        await self._idle.wait()
+
+    async def run(self) -> None:
+        """Send the queued messages until cancelled.
+
+        :return None:
+        """
+
+        while True:
+            await self._wait_ready()
+            await self.bucket.acquire()
+
+            # Chosen once allowed, with the messages queued while waiting.
+            chat_id, priority = self._get_next()[0]
+            message = self._take(chat_id, priority)
+
+            try:
+                await self.send(chat_id, message)
+                self.sent += 1
+            except Exception as error:
+                self._on_error(chat_id, message, priority, error)
+
+            if not self._trades and not self._chatter:
+                self._idle.set()
+
+    async def _wait_ready(self) -> None:
+        """Wait until a chat has messages to send.
+
+        :return None:
+        """
+
+        while True:
+            next_chat, delay = self._get_next()
+
+            if next_chat is not None:
+                return
+
+            self._queued.clear()
+
+            try:
+                # A trade may be queued before the next digest is ready.
+                await asyncio.wait_for(self._queued.wait(), delay)
+            except asyncio.TimeoutError:
+                pass
+
+    def _get_next(self) -> tuple[tuple | None, float | None]:
+        """Get the next chat to send messages to.
+
+        :return tuple[tuple | None, float | None]: The chat ID and the priority of
+            its messages, or None and the delay before the next digest, None if
+            there is none.
+        """
+
+        for chat_id in self._trades:
+            return (chat_id, TRADE), 0.0
+
+        now = time.monotonic()
+        delay = None
+
+        for chat_id, since in self._chatter_since.items():
+            chat_delay = since + self.digest_interval - now
+
+            if chat_delay <= 0:
+                return (chat_id, CHATTER), 0.0
+
+            delay = chat_delay if delay is None else min(delay, chat_delay)
+
+        return None, delay
+
+    def _take(self, chat_id: str | int, priority: int) -> str:
+        """Take the queued messages of a chat fitting in a message.
+
+        :param str | int chat_id: The chat.
+        :param int priority: The priority of the messages.
+        :return str: The messages, one per line.
+        """
+
+        chats = self._trades if priority == TRADE else self._chatter
+        messages = chats.pop(chat_id)
+        lines = [messages.popleft()[: self.max_length]]
+        length = len(lines[0])
+
+        while messages and length + 1 + len(messages[0]) <= self.max_length:
+            lines.append(messages.popleft())
+            length += 1 + len(lines[-1])
+
+        since = self._chatter_since.pop(chat_id) if priority == CHATTER else None
+
+        # Back at the end of the chats, so the others are served first.
+        if messages:
+            chats[chat_id] = messages
+
+            if since is not None:
+                self._chatter_since[chat_id] = since
+
+        return "\n".join(lines)
+
+    def _on_error(
+        self,
+        chat_id: str | int,
+        message: str,
+        priority: int,
+        error: Exception,
+    ) -> None:
+        """Queue a message again after a flood wait, or give it up.
+
+        :param str | int chat_id: The chat.
+        :param str message: The message.
+        :param int priority: The priority of the message.
+        :param Exception error: The error of its sending.
+        :return None:
+        """
+
+        seconds = getattr(error, "seconds", None)
+
+        if not isinstance(seconds, (int, float)):
+            self.failed += 1
+            logger.warning(f"Failed to send a message to Telegram: {error}")
+            return
+
+        self.bucket.pause(seconds)
+
+        chats = self._trades if priority == TRADE else self._chatter
+        chats.setdefault(chat_id, collections.deque()).appendleft(message)
+
+        if priority == CHATTER:
+            # Ready at once, it was already gathered.
+            self._chatter_since[chat_id] = 0.0
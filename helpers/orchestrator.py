@@ -0,0 +1,355 @@
+import asyncio
+import concurrent.futures
+import hashlib
+import os
+import threading
+from collections.abc import Callable
+
+from helpers import constants, logger
+
+# Label of the images and their containers with the hash of the built files.
+BUILD_HASH_LABEL = "smart.build_hash"
+# The trading containers are named after their token address.
+TRADING_CONTAINER_PREFIX = "0x"
+
+# Status of a container in the inventory after an event of its Docker daemon.
+EVENT_STATUSES = {
+    "create": "created",
+    "start": "running",
+    "restart": "running",
+    "unpause": "running",
+    "pause": "paused",
+    "die": "exited",
+    "stop": "exited",
+}
+
+
+class Orchestrator:
+    """Run the trading containers without blocking the event loop.
+
+    The calls of the Docker SDK block, so they run in a pool of worker threads.
+    The inventory of the containers, their names and statuses, is listed once
+    and then kept up to date from the events of the Docker daemon, so reading it
+    does not ask Docker.
+    """
+
+    def __init__(
+        self,
+        docker_client,
+        workers: int = constants.DOCKER_WORKERS,
+        parallelism: int = constants.DOCKER_STOP_PARALLELISM,
+    ) -> None:
+        self.docker_client = docker_client
+        self.parallelism = parallelism
+        self.build_hash = None
+
+        self._executor = concurrent.futures.ThreadPoolExecutor(
+            max_workers=workers, thread_name_prefix="docker"
+        )
+        self._containers = {}
+        self._lock = threading.Lock()
+        self._synced = threading.Event()
+        self._closed = threading.Event()
+        self._events = None
+        self._watcher = None
+
+    def watch(self) -> None:
+        """Keep the inventory up to date from a background thread.
+
+        :return None:
+        """
+
+        self._watcher = threading.Thread(
+            target=self._watch, name="docker_events", daemon=True
+        )
+        self._watcher.start()
+
+    def close(self) -> None:
+        """Stop watching the events and the worker threads.
+
+        :return None:
+        """
+
+        self._closed.set()
+
+        if self._events is not None:
+            self._events.close()
+
+        self._executor.shutdown(wait=False, cancel_futures=True)
+
+    async def run(self, function: Callable, *args, **kwargs):
+        """Call a blocking function in a worker thread.
+
+        :param Callable function: The function.
+        :return: The result of the function.
+        """
+
+        return await asyncio.get_running_loop().run_in_executor(
+            self._executor, lambda: function(*args, **kwargs)
+        )
+
+    async def get_containers(self) -> dict[str, str]:
+        """Get the inventory, listed from Docker until the events are watched.
+
+        :return dict[str, str]: The container names and their statuses.
+        """
+
+        if not self._synced.is_set():
+            await self.run(self.refresh)
+
+        with self._lock:
+            return dict(self._containers)
+
+    def refresh(self) -> None:
+        """List every container again.
+
+        :return None:
+        """
+
+        containers = {
+            container.name: container.status
+            for container in self.docker_client.containers.list(all=True)
+        }
+
+        with self._lock:
+            self._containers = containers
+
+    def build_image(self, tag: str, path: str = ".") -> bool:
+        """Build the image of the trading containers, unless it is up to date.
+
+        The image is labelled with the hash of its files, it is only built again
+        when they changed, and then with the layer cache, so the dependencies are
+        only installed again when the requirements changed.
+
+        :param str tag: The image tag.
+        :param str path: The build context.
+        :return bool: True if the image was built.
+        """
+
+        self.build_hash = get_build_hash(path, constants.DOCKER_BUILD_PATHS)
+
+        if any(
+            image.labels.get(BUILD_HASH_LABEL) == self.build_hash
+            for image in self.docker_client.images.list(name=tag)
+        ):
+            return False
+
+        self.docker_client.images.build(
+            path=path, tag=tag, rm=True, labels={BUILD_HASH_LABEL: self.build_hash}
+        )
+
+        return True
+
+    def remove_stale_containers(self) -> list[str]:
+        """Remove the trading containers not running the image built, or not healthy.
+
+        The others keep trading across the restarts of the bot.
+
+        :return list[str]: The names of the containers removed.
+        """
+
+        removed = []
+
+        for container in self.docker_client.containers.list(all=True):
+            if not container.name.startswith(TRADING_CONTAINER_PREFIX):
+                continue
+
+            health = container.attrs.get("State", {}).get("Health", {}).get("Status")
+
+            if (
+                container.status == "running"
+                and health != "unhealthy"
+                and container.labels.get(BUILD_HASH_LABEL) == self.build_hash
+            ):
+                continue
+
+            container.remove(force=True)
+            removed.append(container.name)
+
+        return removed
+
+    async def start(
+        self,
+        image: str,
+        name: str,
+        environment: dict,
+        volumes: dict | None = None,
+    ) -> None:
+        """Start a container, detached.
+
+        :param str image: The image tag.
+        :param str name: The container name.
+        :param dict environment: The environment variables of the container.
+        :param dict | None volumes: The volumes mounted, by name.
+        :return None:
+        """
+
+        container = await self.run(
+            self.docker_client.containers.run,
+            image,
+            name=name,
+            environment=environment,
+            volumes=volumes,
+            detach=True,
+            stdout=True,
+            stderr=True,
+        )
+
+        if not container:
+            raise Exception(f"Failed to start container {name}")
+
+        self._set_status(name, "running")
+
+    async def stop(self, name: str) -> None:
+        """Stop and remove a container.
+
+        :param str name: The container name.
+        :return None:
+        """
+
+        await self.run(self._stop, name)
+
+    async def stop_all(self, names: list[str]) -> dict[str, Exception | None]:
+        """Stop and remove containers, `parallelism` of them at once.
+
+        :param list[str] names: The container names.
+        :return dict[str, Exception | None]: The error of every container, None if
+            it was removed.
+        """
+
+        semaphore = asyncio.Semaphore(self.parallelism)
+
+        async def stop(name: str) -> Exception | None:
+            async with semaphore:
+                try:
+                    await self.stop(name)
+                except Exception as error:
+                    return error
+
+        return dict(zip(names, await asyncio.gather(*(stop(name) for name in names))))
+
+    def _stop(self, name: str) -> None:
+        """Stop and remove a container, in a worker thread.
+
+        :param str name: The container name.
+        :return None:
+        """
+
+        container = self.docker_client.containers.get(name)
+        container.stop()
+        container.remove()
+
+        self._set_status(name, None)
+
+    def _set_status(self, name: str, status: str | None) -> None:
+        """Set the status of a container in the inventory.
+
+        :param str name: The container name.
+        :param str | None status: The status, None if it was removed.
+        :return None:
+        """
+
+        with self._lock:
+            if status is None:
+                self._containers.pop(name, None)
+            else:
+                self._containers[name] = status
+
+    def _watch(self) -> None:
+        """Apply the events of the containers to the inventory until closed.
+
+        :return None:
+        """
+
+        delay = constants.DOCKER_EVENTS_RETRY_DELAY
+
+        while not self._closed.is_set():
+            try:
+                self._events = self.docker_client.events(
+                    decode=True, filters={"type": "container"}
+                )
+
+                # Listed once subscribed, so no event is missed in between.
+                self.refresh()
+                self._synced.set()
+
+                for event in self._events:
+                    self._apply(event)
+            except Exception as error:
+                if self._closed.is_set():
+                    break
+
+                logger.warning(f"Failed to watch the Docker events: {error}")
+
+            # The inventory is listed again once the events are watched again.
+            self._synced.clear()
+            self._closed.wait(delay)
+
+    def _apply(self, event: dict) -> None:
+        """Apply an event of a container to the inventory.
+
+        :param dict event: The event, decoded.
+        :return None:
+        """
+
+        name = event.get("Actor", {}).get("Attributes", {}).get("name")
+        action = event.get("Action", "")
+
+        if not name:
+            return
+
+        with self._lock:
+            if action == "destroy":
+                self._containers.pop(name, None)
+            elif action in ("create", "start") or (
+                # Not one removed, whose last events come late.
+                action in EVENT_STATUSES
+                and name in self._containers
+            ):
+                self._containers[name] = EVENT_STATUSES[action]
+
+
+def get_build_hash(path: str, paths: tuple[str, ...]) -> str:
+    """Get the hash of the files copied to the image.
+
+    :param str path: The build context.
+    :param tuple[str, ...] paths: The files and directories, relative to it.
+    :return str: The SHA-256 of the relative paths and contents of the files,
+        without the compiled Python files.
+    """
+
+    digest = hashlib.sha256()
+
+    for file_path in sorted(_get_files(path, paths)):
+        digest.update(file_path.encode() + b"\0")
+
+        with open(os.path.join(path, file_path), "rb") as file:
+            digest.update(hashlib.sha256(file.read()).digest())
+
+    return digest.hexdigest()
+
+
+def _get_files(path: str, paths: tuple[str, ...]) -> list[str]:
+    """List the files of the image.
+
+    :param str path: The build context.
+    :param tuple[str, ...] paths: The files and directories, relative to it.
+    :return list[str]: The files, relative to the build context.
+    """
+
+    files = []
+
+    for relative_path in paths:
+        if os.path.isfile(os.path.join(path, relative_path)):
+            files.append(relative_path)
+            continue
+
+        for directory, directories, names in os.walk(os.path.join(path, relative_path)):
+            directories[:] = [name for name in directories if name != "__pycache__"]
+            files.extend(
+                os.path.relpath(os.path.join(directory, name), path)
+                for name in names
+                if not name.endswith(".pyc")
+            )
+
+    return files
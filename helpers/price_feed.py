@@ -0,0 +1,428 @@
+import asyncio
+import json
+import threading
+from collections.abc import Callable
+
+import websockets
+from hexbytes import HexBytes
+from web3 import Web3
+
+from helpers import abi_cache, constants, errors, logger, registry, rpc_middleware
+
+SYNC_TOPIC = "0x1c411e9a96e071241c2f21f7726b17ae89e3cab4c78be50e062b03a9fffbbad1"
+
+
+class ReserveFeed:
+    """Reserves of Uniswap V2 pairs kept in memory from their `Sync` logs.
+
+    Every swap, mint and burn of a pair emits a `Sync` log with its new reserves.
+    The logs are received from an `eth_subscribe` WebSocket subscription when a
+    WebSocket URL is given, and polled with `eth_getLogs` otherwise. `on_change` is
+    called with the new reserves of the pairs that actually changed, by address,
+    and the block number, once per batch of logs.
+
+    The hashes of the recent blocks are kept so a reorganization is detected, the
+    reserves are then rolled back to the last common block and the logs of the new
+    chain are applied.
+
+    Pairs can be tracked and untracked from another thread while the feed runs.
+    """
+
+    def __init__(
+        self,
+        client: Web3,
+        on_change: Callable[[dict[str, tuple[int, int]], int], None],
+        websocket_url: str | None = None,
+        reorg_depth: int = constants.REORG_DEPTH,
+    ) -> None:
+        self.client = client
+        self.on_change = on_change
+        self.websocket_url = websocket_url
+        self.reorg_depth = reorg_depth
+        self.reserves = {}
+        self.last_block = None
+
+        self._history = {}
+        self._notified_reserves = {}
+        self._block_hashes = {}
+        self._last_position = (-1, -1)
+        self._running = False
+        self._lock = threading.RLock()
+
+    def track(self, pair_address: str) -> None:
+        """Start tracking a pair, its current reserves are read once.
+
+        :param str pair_address: The pair address.
+        :return None:
+        """
+
+        pair_address = registry.to_checksum_address(pair_address)
+
+        with self._lock:
+            if self.last_block is None:
+                block = self.client.eth.get_block("latest")
+                self.last_block = block["number"]
+                self._block_hashes[block["number"]] = HexBytes(block["hash"])
+
+            # Read at the last block, the logs of the next ones are not applied yet.
+            reserves = self._read(pair_address, self.last_block)
+
+            self._history[pair_address] = []
+            self._set_reserves(pair_address, self.last_block, reserves)
+            self._notified_reserves[pair_address] = reserves
+
+    def untrack(self, pair_address: str) -> None:
+        """Stop tracking a pair.
+
+        :param str pair_address: The pair address.
+        :return None:
+        """
+
+        pair_address = registry.to_checksum_address(pair_address)
+
+        with self._lock:
+            for mapping in (self.reserves, self._history, self._notified_reserves):
+                mapping.pop(pair_address, None)
+
+    def apply_logs(self, logs: list[dict]) -> None:
+        """Apply `Sync` logs, from `eth_getLogs` or from a subscription.
+
+        :param list[dict] logs: The logs.
+        :return None:
+        """
+
+        with self._lock:
+            for log in sorted(map(_parse_log, logs), key=lambda log: log["position"]):
+                block_number = log["block_number"]
+                known_hash = self._block_hashes.get(block_number)
+
+                if log["removed"]:
+                    self._rollback(block_number - 1)
+                    continue
+
+                if known_hash is not None and known_hash != log["block_hash"]:
+                    self._rollback(block_number - 1)
+
+                # Logs already applied are received again when catching up.
+                if log["position"] <= self._last_position:
+                    continue
+
+                self._last_position = log["position"]
+                self._block_hashes[block_number] = log["block_hash"]
+                self.last_block = max(self.last_block, block_number)
+
+                if log["address"] in self.reserves:
+                    self._set_reserves(log["address"], block_number, log["reserves"])
+
+            self._prune()
+
+            # The reads done on change must not get the results of the last head.
+            rpc_middleware.new_head(self.client, self.last_block)
+            self._notify()
+
+    def poll(self) -> None:
+        """Fetch and apply the logs of the blocks mined since the last poll.
+
+        :return None:
+        """
+
+        with self._lock:
+            if self.last_block is None:
+                return
+
+            head = self.client.eth.get_block("latest")
+
+            if head["number"] < self.last_block:
+                return
+
+            self._check_reorg(head)
+
+            from_block = self.last_block + 1
+
+            while from_block <= head["number"] and self.reserves:
+                to_block = min(
+                    from_block + constants.LOGS_BLOCK_RANGE - 1, head["number"]
+                )
+
+                self.apply_logs(
+                    self.client.eth.get_logs(
+                        {
+                            "fromBlock": from_block,
+                            "toBlock": to_block,
+                            "address": list(self.reserves),
+                            "topics": [SYNC_TOPIC],
+                        }
+                    )
+                )
+
+                from_block = to_block + 1
+
+            self.last_block = head["number"]
+            self._last_position = max(self._last_position, (head["number"], 2**63))
+            self._block_hashes[head["number"]] = HexBytes(head["hash"])
+
+    async def subscribe(self) -> None:
+        """Apply the logs of an `eth_subscribe` subscription until stopped.
+
+        After every (re)connection the blocks missed while disconnected are caught
+        up with `eth_getLogs`. The subscription is opened again when the tracked
+        pairs change.
+
+        :return None:
+        """
+
+        delay = 1
+
+        while self._running:
+            pair_addresses = list(self.reserves)
+
+            if not pair_addresses:
+                # An empty address filter would match the logs of every contract.
+                await asyncio.sleep(1)
+                continue
+
+            try:
+                async with websockets.connect(self.websocket_url) as websocket:
+                    await websocket.send(
+                        json.dumps(
+                            {
+                                "jsonrpc": "2.0",
+                                "id": 1,
+                                "method": "eth_subscribe",
+                                "params": [
+                                    "logs",
+                                    {
+                                        "address": pair_addresses,
+                                        "topics": [SYNC_TOPIC],
+                                    },
+                                ],
+                            }
+                        )
+                    )
+
+                    response = json.loads(await websocket.recv())
+                    if "error" in response:
+                        raise ConnectionError(response["error"]["message"])
+
+                    # The subscription is open, so no log is lost between the
+                    # catch-up and the first notification.
+                    await asyncio.to_thread(self.poll)
+                    delay = 1
+
+                    while self._running and list(self.reserves) == pair_addresses:
+                        try:
+                            message = await asyncio.wait_for(websocket.recv(), 1)
+                        except TimeoutError:
+                            continue
+
+                        try:
+                            log = json.loads(message)["params"]["result"]
+                            _parse_log(log)
+                        except (KeyError, TypeError, ValueError) as error:
+                            logger.warning(f"Skipped a malformed notification: {error}")
+                            continue
+
+                        self.apply_logs([log])
+            except Exception as error:
+                # The catch-up and the reads on a reorganization use the RPC too.
+                if not isinstance(
+                    error, (OSError, websockets.exceptions.WebSocketException)
+                ) and not errors.is_transient(error):
+                    raise
+
+                logger.warning(f"Reserve feed disconnected: {error}")
+
+                await asyncio.sleep(delay)
+                delay = min(delay * 2, constants.WEBSOCKET_MAX_RECONNECT_DELAY)
+
+    async def watch(self, poll_interval: int | float = constants.POLL_INTERVAL) -> None:
+        """Keep the reserves up to date until stopped, in a running event loop.
+
+        :param int | float poll_interval: The delay between two polls, in seconds,
+            when no WebSocket URL is given.
+        :return None:
+        """
+
+        self._running = True
+
+        if self.websocket_url:
+            await self.subscribe()
+            return
+
+        delay = 1
+
+        while self._running:
+            try:
+                await asyncio.to_thread(self.poll)
+            except Exception as error:
+                if not errors.is_transient(error):
+                    raise
+
+                # Retried by the provider already, the node is down for a while.
+                logger.warning(f"Failed to poll the reserves: {error}")
+
+                await asyncio.sleep(delay)
+                delay = min(delay * 2, constants.WEBSOCKET_MAX_RECONNECT_DELAY)
+                continue
+
+            delay = 1
+            await asyncio.sleep(poll_interval)
+
+    def run(self, poll_interval: int | float = constants.POLL_INTERVAL) -> None:
+        """Keep the reserves up to date until stopped.
+
+        :param int | float poll_interval: The delay between two polls, in seconds,
+            when no WebSocket URL is given.
+        :return None:
+        """
+
+        asyncio.run(self.watch(poll_interval))
+
+    def stop(self) -> None:
+        """Stop `run`, it returns after its current poll or receive.
+
+        :return None:
+        """
+
+        self._running = False
+
+    def _read(self, pair_address: str, block_identifier: int | str = "latest") -> tuple:
+        """Read the reserves of a pair from the chain.
+
+        :param str pair_address: The pair address.
+        :param int | str block_identifier: The block to read the reserves at.
+        :return tuple: The reserves of `token0` and `token1`.
+        """
+
+        pair = registry.get_registry(self.client).get_contract(
+            pair_address, abi_cache.UNISWAP_V2_PAIR_ABI
+        )
+
+        return tuple(
+            pair.functions.getReserves().call(block_identifier=block_identifier)[:2]
+        )
+
+    def _set_reserves(self, pair_address: str, block_number: int, reserves) -> None:
+        self.reserves[pair_address] = tuple(reserves)
+        self._history[pair_address].append((block_number, tuple(reserves)))
+
+    def _check_reorg(self, head: dict) -> None:
+        """Roll back to the last block still in the chain, if the chain reorganized.
+
+        :param dict head: The latest block.
+        :return None:
+        """
+
+        head_hash = HexBytes(head["hash"])
+
+        if head["number"] == self.last_block and self._block_hashes.get(
+            self.last_block
+        ) in (None, head_hash):
+            return
+
+        common_block = min(self._block_hashes, default=self.last_block + 1) - 1
+
+        for block_number in sorted(self._block_hashes, reverse=True):
+            if block_number > self.last_block:
+                continue
+
+            if block_number == head["number"]:
+                block_hash = head_hash
+            else:
+                block_hash = HexBytes(self.client.eth.get_block(block_number)["hash"])
+
+            if block_hash == self._block_hashes[block_number]:
+                common_block = block_number
+                break
+
+        if common_block < self.last_block:
+            logger.warning(f"Chain reorganized after block {common_block}")
+            self._rollback(common_block)
+
+    def _rollback(self, block_number: int) -> None:
+        """Roll back the reserves to what they were at the end of a block.
+
+        :param int block_number: The last block still in the chain.
+        :return None:
+        """
+
+        for number in [
+            number for number in self._block_hashes if number > block_number
+        ]:
+            del self._block_hashes[number]
+
+        for pair_address, history in self._history.items():
+            while history and history[-1][0] > block_number:
+                history.pop()
+
+            if not history:
+                # The reorganization is deeper than the history, read it again.
+                history.append((block_number, self._read(pair_address, block_number)))
+
+            self.reserves[pair_address] = history[-1][1]
+
+        self.last_block = block_number
+        self._last_position = (block_number, 2**63)
+
+    def _prune(self) -> None:
+        """Forget what is older than the reorganization depth.
+
+        :return None:
+        """
+
+        oldest_block = self.last_block - self.reorg_depth
+
+        for number in [
+            number for number in self._block_hashes if number < oldest_block
+        ]:
+            del self._block_hashes[number]
+
+        for history in self._history.values():
+            while len(history) > 1 and history[1][0] <= oldest_block:
+                history.pop(0)
+
+    def _notify(self) -> None:
+        """Call `on_change` with the pairs whose reserves changed since last call.
+
+        :return None:
+        """
+
+        changed_reserves = {
+            pair_address: reserves
+            for pair_address, reserves in self.reserves.items()
+            if self._notified_reserves.get(pair_address) != reserves
+        }
+
+        if changed_reserves:
+            self._notified_reserves.update(changed_reserves)
+            self.on_change(changed_reserves, self.last_block)
+
+
+def _parse_log(log: dict) -> dict:
+    """Parse a `Sync` log, either decoded by web3 or raw from a subscription.
+
+    :param dict log: The log.
+    :return dict: The pair address, block, position, reserves and removal flag.
+    """
+
+    block_number = _to_int(log["blockNumber"])
+    data = HexBytes(log["data"])
+
+    return {
+        "address": registry.to_checksum_address(log["address"]),
+        "block_number": block_number,
+        "block_hash": HexBytes(log["blockHash"]),
+        "position": (block_number, _to_int(log["logIndex"])),
+        "reserves": (int.from_bytes(data[:32]), int.from_bytes(data[32:64])),
+        "removed": bool(log.get("removed", False)),
+    }
+
+
+def _to_int(value: int | str) -> int:
+    """Convert a JSON-RPC quantity to an integer.
+
+    :param int | str value: The quantity, hex encoded or already decoded.
+    :return int: The integer.
+    """
+
+    return int(value, 16) if isinstance(value, str) else value
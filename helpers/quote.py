@@ -0,0 +1,173 @@
+import typing
+
+if typing.TYPE_CHECKING:
+    import numpy as np
+
+# Uniswap V2 takes a 0.3% fee on the input amount.
+FEE_NUMERATOR = 997
+FEE_DENOMINATOR = 1000
+
+
+def get_amount_out(amount_in: int, reserve_in: int, reserve_out: int) -> int:
+    """Get the output amount of a swap, exactly like `UniswapV2Library.getAmountOut`.
+
+    :param int amount_in: The input amount.
+    :param int reserve_in: The reserve of the input token.
+    :param int reserve_out: The reserve of the output token.
+    :return int: The output amount.
+    """
+
+    if amount_in <= 0:
+        raise ValueError("Insufficient input amount")
+
+    if reserve_in <= 0 or reserve_out <= 0:
+        raise ValueError("Insufficient liquidity")
+
+    amount_in_with_fee = amount_in * FEE_NUMERATOR
+
+    return (amount_in_with_fee * reserve_out) // (
+        reserve_in * FEE_DENOMINATOR + amount_in_with_fee
+    )
+
+
+def get_amount_in(amount_out: int, reserve_in: int, reserve_out: int) -> int:
+    """Get the input amount of a swap, exactly like `UniswapV2Library.getAmountIn`.
+
+    :param int amount_out: The output amount.
+    :param int reserve_in: The reserve of the input token.
+    :param int reserve_out: The reserve of the output token.
+    :return int: The input amount.
+    """
+
+    if amount_out <= 0:
+        raise ValueError("Insufficient output amount")
+
+    if reserve_in <= 0 or reserve_out <= amount_out:
+        raise ValueError("Insufficient liquidity")
+
+    return (reserve_in * amount_out * FEE_DENOMINATOR) // (
+        (reserve_out - amount_out) * FEE_NUMERATOR
+    ) + 1
+
+
+def get_amounts_out(amount_in: int, reserves: list[tuple[int, int]]) -> list[int]:
+    """Get the amounts of a multi-hop swap, like the router `getAmountsOut`.
+
+    :param int amount_in: The input amount.
+    :param list[tuple[int, int]] reserves: The input and output reserves of every
+        pair along the path.
+    :return list[int]: The input amount followed by the output of every hop.
+    """
+
+    amounts = [amount_in]
+
+    for reserve_in, reserve_out in reserves:
+        amounts.append(get_amount_out(amounts[-1], reserve_in, reserve_out))
+
+    return amounts
+
+
+def get_amounts_in(amount_out: int, reserves: list[tuple[int, int]]) -> list[int]:
+    """Get the amounts of a multi-hop swap, like the router `getAmountsIn`.
+
+    :param int amount_out: The output amount.
+    :param list[tuple[int, int]] reserves: The input and output reserves of every
+        pair along the path.
+    :return list[int]: The input of every hop followed by the output amount.
+    """
+
+    amounts = [amount_out]
+
+    for reserve_in, reserve_out in reversed(reserves):
+        amounts.insert(0, get_amount_in(amounts[0], reserve_in, reserve_out))
+
+    return amounts
+
+
+def get_spot_price(reserve_in: int, reserve_out: int) -> float:
+    """Get the marginal price of the input token, without fee nor price impact.
+
+    :param int reserve_in: The reserve of the input token.
+    :param int reserve_out: The reserve of the output token.
+    :return float: The amount of output token per input token.
+    """
+
+    return reserve_out / reserve_in
+
+
+def get_price_impact_percent(amount_in: int, reserve_in: int) -> float:
+    """Get the price impact of a swap, the fee excluded.
+
+    It only depends on the share of the input reserve that is swapped.
+
+    :param int amount_in: The input amount.
+    :param int reserve_in: The reserve of the input token.
+    :return float: The price impact percentage.
+    """
+
+    amount_in_with_fee = amount_in * FEE_NUMERATOR / FEE_DENOMINATOR
+
+    return amount_in_with_fee / (reserve_in + amount_in_with_fee) * 100
+
+
+def get_max_amount_in(
+    max_price_impact_percent: int | float,
+    reserve_in: int,
+) -> int:
+    """Get the largest input amount whose price impact stays under a limit.
+
+    :param int | float max_price_impact_percent: The price impact percentage limit.
+    :param int reserve_in: The reserve of the input token.
+    :return int: The input amount.
+    """
+
+    impact = max_price_impact_percent / 100
+    amount_in_with_fee = impact * reserve_in / (1 - impact)
+
+    return int(amount_in_with_fee * FEE_DENOMINATOR / FEE_NUMERATOR)
+
+
+def get_amounts_out_array(
+    amounts_in: "np.ndarray",
+    reserve_in: int,
+    reserve_out: int,
+) -> "np.ndarray":
+    """Quote many input amounts against the same pair at once.
+
+    The amounts are computed with floats, which is precise to about 1e-15 relative
+    and meant for sizing orders, use `get_amount_out` for the amount of a swap.
+
+    :param np.ndarray amounts_in: The input amounts.
+    :param int reserve_in: The reserve of the input token.
+    :param int reserve_out: The reserve of the output token.
+    :return np.ndarray: The output amounts.
+    """
+
+    # Imported here, the jobs only quote single amounts.
+    import numpy as np
+
+    amounts_in_with_fee = np.asarray(amounts_in, dtype=np.float64) * FEE_NUMERATOR
+
+    return (amounts_in_with_fee * float(reserve_out)) / (
+        float(reserve_in) * FEE_DENOMINATOR + amounts_in_with_fee
+    )
+
+
+def get_price_impacts_percent_array(
+    amounts_in: "np.ndarray",
+    reserve_in: int,
+) -> "np.ndarray":
+    """Get the price impact of many input amounts against the same pair at once.
+
+    :param np.ndarray amounts_in: The input amounts.
+    :param int reserve_in: The reserve of the input token.
+    :return np.ndarray: The price impact percentages.
+    """
+
+    import numpy as np
+
+    amounts_in_with_fee = (
+        np.asarray(amounts_in, dtype=np.float64) * FEE_NUMERATOR / FEE_DENOMINATOR
+    )
+
+    return amounts_in_with_fee / (float(reserve_in) + amounts_in_with_fee) * 100
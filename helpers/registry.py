@@ -0,0 +1,258 @@
+import functools
+import os
+
+from web3 import AsyncWeb3, Web3, contract
+
+from helpers import abi_cache, constants, environment
+
+ZERO_ADDRESS = "0x0000000000000000000000000000000000000000"
+
+
+@functools.lru_cache(maxsize=4096)
+def to_checksum_address(address: str) -> str:
+    """Get the checksum address, memoized since it hashes the address every time.
+
+    :param str address: The address.
+    :return str: The checksum address.
+    """
+
+    return Web3.to_checksum_address(address)
+
+
+class ContractRegistry:
+    """Contract handles of a Web3 client, built once and reused on every tick."""
+
+    def __init__(self, client: Web3) -> None:
+        self.client = client
+        self._contracts = {}
+        self._pair_addresses = {}
+
+    def get_contract(self, address: str, kind: str | None = None) -> contract.Contract:
+        """Get the contract at the given address.
+
+        :param str address: The contract address.
+        :param str | None kind: The name of a bundled ABI the contract implements.
+        :return Contract: The contract.
+        """
+
+        address = to_checksum_address(address)
+        key = (address, kind)
+
+        if key not in self._contracts:
+            self._contracts[key] = self.client.eth.contract(
+                address=address,
+                abi=abi_cache.get_abi(address, kind),
+            )
+
+        return self._contracts[key]
+
+    def get_router(self) -> contract.Contract:
+        """Get the Uniswap V2 Router contract.
+
+        :return Contract: The Uniswap V2 Router contract.
+        """
+
+        return self.get_contract(constants.UNISWAP_V2_ROUTER_CONTRACT_ADDRESS)
+
+    def get_factory(self) -> contract.Contract:
+        """Get the Uniswap V2 Factory contract.
+
+        :return Contract: The Uniswap V2 Factory contract.
+        """
+
+        return self.get_contract(constants.UNISWAP_V2_FACTORY_CONTRACT_ADDRESS)
+
+    def get_multicall(self) -> contract.Contract:
+        """Get the Multicall3 contract.
+
+        :return Contract: The Multicall3 contract.
+        """
+
+        return self.get_contract(constants.MULTICALL3_CONTRACT_ADDRESS)
+
+    def get_token(self, token_address: str) -> contract.Contract:
+        """Get the ERC-20 contract of a token.
+
+        :param str token_address: The token address.
+        :return Contract: The token contract.
+        """
+
+        return self.get_contract(token_address, abi_cache.ERC20_ABI)
+
+    def get_pair_address(self, token_address: str) -> str:
+        """Get the address of the WETH pair of a token, the factory is only called once.
+
+        :param str token_address: The token address.
+        :return str: The pair address.
+        """
+
+        token_address = to_checksum_address(token_address)
+        pair_address = self._get_cached_pair_address(token_address)
+
+        if pair_address is None:
+            pair_address = self._set_pair_address(
+                token_address,
+                self.get_factory()
+                .functions.getPair(
+                    to_checksum_address(constants.WETH_CONTRACT_ADDRESS),
+                    token_address,
+                )
+                .call(),
+            )
+
+        return pair_address
+
+    def _get_cached_pair_address(self, token_address: str) -> str | None:
+        """Get the pair address of a token from memory, or from the disk if enabled.
+
+        :param str token_address: The checksum token address.
+        :return str | None: The pair address, None if it is not cached.
+        """
+
+        if token_address not in self._pair_addresses and environment.get_cache_pairs():
+            pair_address = _read_pair_address(token_address)
+
+            if pair_address is not None:
+                self._pair_addresses[token_address] = pair_address
+
+        return self._pair_addresses.get(token_address)
+
+    def _set_pair_address(self, token_address: str, pair_address: str) -> str:
+        """Cache the pair address of a token returned by the factory.
+
+        :param str token_address: The checksum token address.
+        :param str pair_address: The pair address.
+        :return str: The checksum pair address.
+        """
+
+        # The pair may be created later, so a missing pair is not cached.
+        if pair_address == ZERO_ADDRESS:
+            raise ValueError(f"No WETH pair for token {token_address}")
+
+        pair_address = to_checksum_address(pair_address)
+        self._pair_addresses[token_address] = pair_address
+
+        if environment.get_cache_pairs():
+            _write_pair_address(token_address, pair_address)
+
+        return pair_address
+
+    def get_pair(self, token_address: str) -> contract.Contract:
+        """Get the Uniswap V2 Pair contract of the WETH pair of a token.
+
+        :param str token_address: The token address.
+        :return Contract: The pair contract.
+        """
+
+        return self.get_contract(
+            self.get_pair_address(token_address),
+            abi_cache.UNISWAP_V2_PAIR_ABI,
+        )
+
+
+class AsyncContractRegistry(ContractRegistry):
+    """Contract handles of an AsyncWeb3 client, the pair lookups are awaited."""
+
+    async def get_pair_address(self, token_address: str) -> str:
+        """Get the address of the WETH pair of a token, the factory is only called once.
+
+        :param str token_address: The token address.
+        :return str: The pair address.
+        """
+
+        token_address = to_checksum_address(token_address)
+        pair_address = self._get_cached_pair_address(token_address)
+
+        if pair_address is None:
+            pair_address = self._set_pair_address(
+                token_address,
+                await self.get_factory()
+                .functions.getPair(
+                    to_checksum_address(constants.WETH_CONTRACT_ADDRESS),
+                    token_address,
+                )
+                .call(),
+            )
+
+        return pair_address
+
+    async def get_pair(self, token_address: str) -> contract.AsyncContract:
+        """Get the Uniswap V2 Pair contract of the WETH pair of a token.
+
+        :param str token_address: The token address.
+        :return AsyncContract: The pair contract.
+        """
+
+        return self.get_contract(
+            await self.get_pair_address(token_address),
+            abi_cache.UNISWAP_V2_PAIR_ABI,
+        )
+
+
+def get_registry(client: Web3 | AsyncWeb3) -> ContractRegistry:
+    """Get the contract registry of a Web3 or AsyncWeb3 client.
+
+    :param Web3 | AsyncWeb3 client: The Web3 client.
+    :return ContractRegistry: The contract registry.
+    """
+
+    # The registry is stored on the client so it is dropped with it, the contracts
+    # reference the client so a mapping keyed by client would keep it alive.
+    registry = getattr(client, "_contract_registry", None)
+
+    if registry is None:
+        registry_class = (
+            AsyncContractRegistry if isinstance(client, AsyncWeb3) else ContractRegistry
+        )
+        registry = client._contract_registry = registry_class(client)
+
+    return registry
+
+
+def _get_pair_path(token_address: str) -> str:
+    """Get the path of the pair address of a token in the on-disk cache.
+
+    :param str token_address: The token address.
+    :return str: The path, under the factory address since a pair is only known to
+        its factory.
+    """
+
+    return os.path.join(
+        environment.get_cache_dir(),
+        "pairs",
+        constants.UNISWAP_V2_FACTORY_CONTRACT_ADDRESS.lower(),
+        token_address.lower(),
+    )
+
+
+def _read_pair_address(token_address: str) -> str | None:
+    """Read the pair address of a token from the on-disk cache.
+
+    :param str token_address: The token address.
+    :return str | None: The checksum pair address, None if it is not cached.
+    """
+
+    try:
+        with open(_get_pair_path(token_address)) as file:
+            pair_address = file.read().strip()
+    except OSError:
+        return None
+
+    return to_checksum_address(pair_address) if Web3.is_address(pair_address) else None
+
+
+def _write_pair_address(token_address: str, pair_address: str) -> None:
+    """Write the pair address of a token to the on-disk cache.
+
+    A pair never moves once created, so the entries never expire.
+
+    :param str token_address: The token address.
+    :param str pair_address: The pair address.
+    :return None:
+    """
+
+    try:
+        abi_cache.write_atomically(_get_pair_path(token_address), pair_address.encode())
+    except OSError:
+        # An optimization only, like the ABI cache.
+        pass
@@ -0,0 +1,76 @@
+import asyncio
+import dataclasses
+import random
+import time
+from collections.abc import Awaitable, Callable
+
+from helpers import constants, errors, logger, metrics
+
+
+@dataclasses.dataclass(frozen=True)
+class RetryPolicy:
+    """Retry the operations failing with transient errors, with backoff.
+
+    The delay before the nth retry is drawn between 0 and `base_delay * 2**n`,
+    capped at `max_delay`, so the clients of a node coming back do not retry in
+    step. Only the errors `errors.is_transient` accepts are retried, so a
+    transaction, whose errors are `errors.TransactionError`, is never sent twice.
+    """
+
+    attempts: int = constants.RETRY_ATTEMPTS
+    base_delay: float = constants.RETRY_BASE_DELAY
+    max_delay: float = constants.RETRY_MAX_DELAY
+
+    def get_delay(self, retry: int) -> float:
+        """Get the delay before a retry.
+
+        :param int retry: The number of the retry, from 0.
+        :return float: The delay in seconds.
+        """
+
+        return random.uniform(0, min(self.max_delay, self.base_delay * 2**retry))
+
+    def call(self, function: Callable, *args, **kwargs):
+        """Call a function, retried on transient errors.
+
+        :param Callable function: The function.
+        :return: The result of the function.
+        """
+
+        for retry in range(self.attempts):
+            try:
+                return function(*args, **kwargs)
+            except Exception as error:
+                if retry == self.attempts - 1 or not errors.is_transient(error):
+                    raise
+
+                delay = self.get_delay(retry)
+                metrics.inc("retries_total")
+                logger.warning(
+                    f"Retrying in {delay:.2f}s: {error}", disable_ws_message=True
+                )
+                time.sleep(delay)
+
+    async def async_call(self, function: Callable[..., Awaitable], *args, **kwargs):
+        """Call an async function, retried on transient errors.
+
+        :param Callable[..., Awaitable] function: The async function.
+        :return: The result of the function.
+        """
+
+        for retry in range(self.attempts):
+            try:
+                return await function(*args, **kwargs)
+            except Exception as error:
+                if retry == self.attempts - 1 or not errors.is_transient(error):
+                    raise
+
+                delay = self.get_delay(retry)
+                metrics.inc("retries_total")
+                logger.warning(
+                    f"Retrying in {delay:.2f}s: {error}", disable_ws_message=True
+                )
+                await asyncio.sleep(delay)
+
+
+DEFAULT_POLICY = RetryPolicy()
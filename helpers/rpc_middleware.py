@@ -0,0 +1,482 @@
+import asyncio
+import json
+import threading
+import time
+
+from web3 import AsyncWeb3, Web3
+from web3.middleware import Web3Middleware
+
+from helpers import constants, metrics
+
+MIDDLEWARE_NAME = "rpc"
+
+# Index of the block parameter of the cached methods.
+CACHED_METHODS = {
+    "eth_call": 1,
+    "eth_getBalance": 1,
+    "eth_getBlockByNumber": 0,
+    "eth_getBlockByHash": 0,
+}
+
+# The chain ID is cached by the provider, which a batch would bypass, and the
+# transactions are sent right away instead of waiting behind the reads.
+UNBATCHED_METHODS = {"eth_chainId", "eth_sendRawTransaction", "eth_sendTransaction"}
+
+_caches = {}
+_caches_lock = threading.Lock()
+
+
+class BlockCache:
+    """Results of the read requests of an RPC URL, kept until a new head.
+
+    The results read at the `latest` block are also dropped after
+    `RPC_CACHE_MAX_AGE`, in case no new head is seen. The latest block itself is
+    never cached, it is how the new heads are seen.
+    """
+
+    def __init__(
+        self,
+        max_age: int | float = constants.RPC_CACHE_MAX_AGE,
+        max_size: int = constants.RPC_CACHE_SIZE,
+    ) -> None:
+        self.max_age = max_age
+        self.max_size = max_size
+        self.head = None
+
+        self._entries = {}
+        self._lock = threading.Lock()
+
+    def get(self, method: str, params: list, counted: bool = True) -> dict | None:
+        """Get the cached response of a request.
+
+        :param str method: The JSON-RPC method.
+        :param list params: The JSON-RPC parameters.
+        :param bool counted: If the lookup is counted in the metrics, a request
+            looked up again before it is sent is not.
+        :return dict | None: The response, None if not cached.
+        """
+
+        key = _get_key(method, params)
+
+        if key is None:
+            return None
+
+        with self._lock:
+            entry = self._entries.get(key)
+
+        response = None
+
+        if entry is not None and (entry[1] is None or time.monotonic() <= entry[1]):
+            response = entry[0]
+
+        if counted:
+            metrics.inc(
+                "cache_requests_total",
+                cache="rpc",
+                result="miss" if response is None else "hit",
+            )
+
+        return response
+
+    def set(self, method: str, params: list, response: dict) -> None:
+        """Cache the response of a request, if it is a cacheable result.
+
+        :param str method: The JSON-RPC method.
+        :param list params: The JSON-RPC parameters.
+        :param dict response: The response.
+        :return None:
+        """
+
+        key = _get_key(method, params)
+
+        if key is None or "result" not in response or response["result"] is None:
+            return
+
+        if _get_block(method, params) == "latest":
+            expires_at = time.monotonic() + self.max_age
+        else:
+            expires_at = None
+
+        with self._lock:
+            if len(self._entries) >= self.max_size:
+                self._entries.pop(next(iter(self._entries)))
+
+            self._entries[key] = (response, expires_at)
+
+    def new_head(self, block_number: int) -> None:
+        """Drop the cached results when the chain has a new head.
+
+        :param int block_number: The number of the latest block.
+        :return None:
+        """
+
+        with self._lock:
+            # A lower head is a reorganization, or a node behind the others.
+            if block_number != self.head:
+                self.head = block_number
+                self._entries.clear()
+
+    def clear(self) -> None:
+        """Drop all the cached results.
+
+        :return None:
+        """
+
+        with self._lock:
+            self.head = None
+            self._entries.clear()
+
+    def observe(self, method: str, params: list, response: dict) -> None:
+        """See the new heads in the responses of the latest block requests.
+
+        :param str method: The JSON-RPC method.
+        :param list params: The JSON-RPC parameters.
+        :param dict response: The response.
+        :return None:
+        """
+
+        result = response.get("result")
+
+        if not result:
+            return
+
+        if method == "eth_blockNumber":
+            self.new_head(int(result, 16))
+        elif method == "eth_getBlockByNumber" and params[0] == "latest":
+            self.new_head(_to_int(result["number"]))
+
+
+class RPCMiddleware(Web3Middleware):
+    """Cache the reads of the current head and pack concurrent requests.
+
+    The requests sent while a batch is in flight are packed into the next JSON-RPC
+    batch array, so a single request is sent right away and concurrent ones share
+    a round trip. It must be the innermost middleware, the requests it receives
+    are already formatted.
+    """
+
+    def __init__(self, w3: AsyncWeb3 | Web3) -> None:
+        super().__init__(w3)
+        self.cache = get_block_cache(w3.provider.endpoint_uri)
+
+        self._pending = []
+        self._sending = False
+        self._lock = threading.Lock()
+        self._task = None
+
+    def wrap_make_request(self, make_request):
+        def middleware(method: str, params: list) -> dict:
+            response = self.cache.get(method, params)
+
+            if response is not None:
+                return response
+
+            if method in UNBATCHED_METHODS:
+                return make_request(method, params)
+
+            return self._send(method, params)
+
+        return middleware
+
+    async def async_wrap_make_request(self, make_request):
+        async def middleware(method: str, params: list) -> dict:
+            response = self.cache.get(method, params)
+
+            if response is not None:
+                return response
+
+            if method in UNBATCHED_METHODS:
+                return await make_request(method, params)
+
+            return await self._async_send(method, params)
+
+        return middleware
+
+    def _send(self, method: str, params: list) -> dict:
+        """Send a request, in the next batch if one is in flight.
+
+        The thread of the first request sends the batch, then hands the next one to
+        the thread of its first request, the other threads wait for their response.
+
+        :param str method: The JSON-RPC method.
+        :param list params: The JSON-RPC parameters.
+        :return dict: The response.
+        """
+
+        request = _PendingRequest(method, params)
+
+        with self._lock:
+            self._pending.append(request)
+            sender = not self._sending
+            self._sending = True
+
+        if not sender:
+            request.done.wait()
+
+        # The thread is woken up to send the next batch, which has its request.
+        if sender or request.sender:
+            self._send_pending()
+
+        return request.get_response()
+
+    def _send_pending(self) -> None:
+        """Send the pending requests, then hand the next batch to its first thread.
+
+        :return None:
+        """
+
+        with self._lock:
+            batch = self._pending[: constants.RPC_MAX_BATCH_SIZE]
+            del self._pending[: constants.RPC_MAX_BATCH_SIZE]
+
+        try:
+            groups = self._group(batch)
+            requests = [group[0].request for group in groups]
+
+            if len(requests) == 1:
+                self._resolve(groups, [self._w3.provider.make_request(*requests[0])])
+            elif requests:
+                self._resolve(groups, self._w3.provider.make_batch_request(requests))
+        except Exception as error:
+            for request in batch:
+                request.error = error
+        finally:
+            for request in batch:
+                request.done.set()
+
+        with self._lock:
+            if self._pending:
+                self._pending[0].sender = True
+                self._pending[0].done.set()
+            else:
+                self._sending = False
+
+    async def _async_send(self, method: str, params: list) -> dict:
+        """Send a request, in the next batch if one is in flight.
+
+        :param str method: The JSON-RPC method.
+        :param list params: The JSON-RPC parameters.
+        :return dict: The response.
+        """
+
+        request = _PendingRequest(method, params)
+        request.future = asyncio.get_running_loop().create_future()
+        self._pending.append(request)
+
+        if not self._sending:
+            # The requests of the coroutines running in this loop iteration are
+            # pending by the time the task starts, so they go in the same batch.
+            self._sending = True
+            self._task = asyncio.create_task(self._async_send_pending())
+
+        return await request.future
+
+    async def _async_send_pending(self) -> None:
+        """Send the batches of pending requests until none is pending.
+
+        :return None:
+        """
+
+        batch = []
+
+        try:
+            while self._pending:
+                batch = self._pending[: constants.RPC_MAX_BATCH_SIZE]
+                del self._pending[: constants.RPC_MAX_BATCH_SIZE]
+
+                try:
+                    groups = self._group(batch)
+                    requests = [group[0].request for group in groups]
+
+                    if len(requests) == 1:
+                        responses = [await self._w3.provider.make_request(*requests[0])]
+                        self._resolve(groups, responses)
+                    elif requests:
+                        responses = await self._w3.provider.make_batch_request(requests)
+                        self._resolve(groups, responses)
+                except Exception as error:
+                    for request in batch:
+                        request.error = error
+
+                for request in batch:
+                    if request.error is not None:
+                        request.future.set_exception(request.error)
+                    else:
+                        request.future.set_result(request.response)
+        finally:
+            self._sending = False
+
+            # Nothing would send the requests left behind by a cancellation.
+            for request in batch + self._pending:
+                if not request.future.done():
+                    request.future.cancel()
+
+            self._pending.clear()
+
+    def _group(self, batch: list["_PendingRequest"]) -> list[list["_PendingRequest"]]:
+        """Group the identical requests of a batch, the cached ones are resolved.
+
+        A response cached since the request was made is not sent again, neither are
+        the identical requests made by concurrent callers before it was cached.
+
+        :param list[_PendingRequest] batch: The requests.
+        :return list[list[_PendingRequest]]: The requests to send, grouped.
+        """
+
+        groups = {}
+
+        for request in batch:
+            request.response = self.cache.get(*request.request, counted=False)
+
+            if request.response is None:
+                key = _get_request_key(*request.request)
+                groups.setdefault(key, []).append(request)
+
+        return list(groups.values())
+
+    def _resolve(
+        self,
+        groups: list[list["_PendingRequest"]],
+        responses: list[dict] | dict,
+    ) -> None:
+        """Give each group of requests its response, and cache it.
+
+        :param list[list[_PendingRequest]] groups: The requests, grouped.
+        :param list[dict] | dict responses: The responses, or the error of the batch.
+        :return None:
+        """
+
+        if isinstance(responses, dict):
+            responses = [responses] * len(groups)
+
+        if len(responses) != len(groups):
+            raise ValueError(
+                f"Got {len(responses)} responses for a batch of {len(groups)} requests"
+            )
+
+        for group, response in zip(groups, responses):
+            self.cache.observe(*group[0].request, response)
+            self.cache.set(*group[0].request, response)
+
+            for request in group:
+                request.response = response
+
+
+class _PendingRequest:
+    """A request waiting for its batch."""
+
+    __slots__ = ("request", "response", "error", "done", "sender", "future")
+
+    def __init__(self, method: str, params: list) -> None:
+        self.request = (method, params)
+        self.response = None
+        self.error = None
+        self.done = threading.Event()
+        self.sender = False
+        self.future = None
+
+    def get_response(self) -> dict:
+        """Get the response, or raise the error of the batch.
+
+        :return dict: The response.
+        """
+
+        if self.error is not None:
+            raise self.error
+
+        return self.response
+
+
+def get_block_cache(rpc_url: str) -> BlockCache:
+    """Get the cache of an RPC URL, shared by all its clients.
+
+    :param str rpc_url: The RPC URL.
+    :return BlockCache: The cache.
+    """
+
+    with _caches_lock:
+        if rpc_url not in _caches:
+            _caches[rpc_url] = BlockCache()
+
+        return _caches[rpc_url]
+
+
+def install(client: AsyncWeb3 | Web3) -> None:
+    """Add the middleware to a client, as its innermost middleware.
+
+    :param AsyncWeb3 | Web3 client: The Web3 or AsyncWeb3 client.
+    :return None:
+    """
+
+    # web3 builds the middleware again when the onion changes, so the instance
+    # holding the pending requests is built once and returned every time.
+    middleware = RPCMiddleware(client)
+    client.middleware_onion.add(lambda _: middleware, MIDDLEWARE_NAME)
+
+
+def new_head(client: AsyncWeb3 | Web3, block_number: int) -> None:
+    """Drop the cached results of the RPC URL of a client, on a new head.
+
+    :param AsyncWeb3 | Web3 client: The Web3 or AsyncWeb3 client.
+    :param int block_number: The number of the latest block.
+    :return None:
+    """
+
+    get_block_cache(client.provider.endpoint_uri).new_head(block_number)
+
+
+def _get_block(method: str, params: list):
+    """Get the block parameter of a cached request.
+
+    :param str method: The JSON-RPC method.
+    :param list params: The JSON-RPC parameters.
+    :return: The block number, hash or tag.
+    """
+
+    index = CACHED_METHODS[method]
+
+    return params[index] if len(params) > index else "latest"
+
+
+def _get_key(method: str, params: list) -> str | None:
+    """Get the cache key of a request.
+
+    :param str method: The JSON-RPC method.
+    :param list params: The JSON-RPC parameters.
+    :return str | None: The key, None if the request is not cacheable.
+    """
+
+    if method not in CACHED_METHODS:
+        return None
+
+    block = _get_block(method, params)
+
+    # The other tags, like pending, safe or finalized, move on their own.
+    if isinstance(block, str) and not block.startswith("0x") and block != "latest":
+        return None
+
+    if method == "eth_getBlockByNumber" and block == "latest":
+        return None
+
+    return _get_request_key(method, params)
+
+
+def _get_request_key(method: str, params: list) -> str:
+    """Get a key identifying a request.
+
+    :param str method: The JSON-RPC method.
+    :param list params: The JSON-RPC parameters.
+    :return str: The key.
+    """
+
+    return json.dumps([method, params], sort_keys=True, default=str)
+
+
+def _to_int(value: int | str) -> int:
+    """Convert a JSON-RPC quantity to an integer.
+
+    :param int | str value: The quantity, hex encoded or already decoded.
+    :return int: The integer.
+    """
+
+    return int(value, 16) if isinstance(value, str) else value
@@ -1,6 +1,39 @@
-from web3 import Web3
+import asyncio
+import concurrent.futures
+import dataclasses
+import sys
+
+from hexbytes import HexBytes
+from web3 import AsyncWeb3, Web3
+from web3.contract.async_contract import AsyncContractFunction
+
+from helpers import (
+    allowance,
+    armed_exit,
+    async_client,
+    constants,
+    environment,
+    errors,
+    gas_oracle,
+    logger,
+    metrics,
+    nonce_manager,
+    quote,
+    registry,
+    snapshot,
+)
+
+
+@dataclasses.dataclass
+class PendingTransaction:
+    """A sent transaction, whose receipt is awaited in the background.
+
+    The receipt future fails if the transaction, or the approval sent before it,
+    is reverted.
+    """
 
-from helpers import constants, environment, logger, utils
+    txn_hash: HexBytes
+    receipt: asyncio.Future | concurrent.futures.Future
 
 
 def buy(
@@ -8,6 +41,7 @@ def buy(
     token_address: str,
     amount_in_wei: int,
     slippage_percent: int | float = constants.SLIPPAGE_PERCENT,
+    market_snapshot: snapshot.MarketSnapshot | None = None,
 ) -> str:
     """Buy a token on Uniswap V2
 
@@ -15,195 +49,784 @@ def buy(
     :param str token_address: The token address.
     :param int amount_in_wei: The amount in wei to buy.
     :param int | float slippage_percent: The slippage percentage.
+    :param snapshot.MarketSnapshot | None market_snapshot: The market snapshot of the
+        current tick, fetched if not given.
     :return str: The transaction hash.
     """
 
-    try:
-        public_key = environment.get_public_key()
+    # A backtest fills the swap from the history, its failures are the job's.
+    if _is_simulated(client):
+        return client.buy(
+            token_address, amount_in_wei, slippage_percent, market_snapshot
+        )
 
-        if amount_in_wei < 0:
-            raise Exception("Invalid amount")
+    # The reads are retried by the provider, the transaction is never sent twice.
+    return async_client.call(
+        client,
+        async_buy,
+        token_address,
+        amount_in_wei,
+        slippage_percent,
+        market_snapshot,
+    )
 
-        balance = client.eth.get_balance(public_key)
-        if balance < amount_in_wei:
-            raise Exception("Insufficient funds")
 
-        liquidity = utils.get_token_liquidity_in_wei(client, token_address)
-        if liquidity < amount_in_wei:
-            raise Exception("Insufficient liquidity")
+def sell(
+    client: Web3,
+    token_address: str,
+    amount_in_wei: int,
+    slippage_percent: int | float = constants.SLIPPAGE_PERCENT,
+    market_snapshot: snapshot.MarketSnapshot | None = None,
+) -> str:
+    """Sell a token on Uniswap V2
 
-        router = utils.get_router(client)
+    :param Web3 client: The Web3 client.
+    :param str token_address: The token address.
+    :param int amount_in_wei: The amount in wei to sell.
+    :param int | float slippage_percent: The slippage percentage.
+    :param snapshot.MarketSnapshot | None market_snapshot: The market snapshot of the
+        current tick, fetched if not given.
+    :return str: The transaction hash.
+    """
 
-        eth_to_token_path = [
-            client.to_checksum_address(constants.WETH_CONTRACT_ADDRESS),
-            client.to_checksum_address(token_address),
-        ]
+    # A backtest fills the swap from the history, its failures are the job's.
+    if _is_simulated(client):
+        return client.sell(
+            token_address, amount_in_wei, slippage_percent, market_snapshot
+        )
 
-        amount_before_slippage = router.functions.getAmountsOut(
-            amount_in_wei,
-            eth_to_token_path,
-        ).call()[1]
+    # The reads are retried by the provider, the transaction is never sent twice.
+    return async_client.call(
+        client,
+        async_sell,
+        token_address,
+        amount_in_wei,
+        slippage_percent,
+        market_snapshot,
+    )
 
-        amount_after_slippage = int(
-            amount_before_slippage * (1 - slippage_percent / 100)
-        )
 
-        txn_count = client.eth.get_transaction_count(public_key)
+def submit_buy(
+    client: Web3,
+    token_address: str,
+    amount_in_wei: int,
+    slippage_percent: int | float = constants.SLIPPAGE_PERCENT,
+    market_snapshot: snapshot.MarketSnapshot | None = None,
+) -> PendingTransaction:
+    """Buy a token on Uniswap V2 without waiting for the receipt.
 
-        time_limit = (
-            client.eth.get_block("latest")["timestamp"] + constants.BLOCK_TIME_LIMIT
-        )
+    :param Web3 client: The Web3 client.
+    :param str token_address: The token address.
+    :param int amount_in_wei: The amount in wei to buy.
+    :param int | float slippage_percent: The slippage percentage.
+    :param snapshot.MarketSnapshot | None market_snapshot: The market snapshot of the
+        current tick, fetched if not given.
+    :return PendingTransaction: The sent transaction.
+    """
 
-        txn = router.functions.swapExactETHForTokens(
-            amount_after_slippage,
-            eth_to_token_path,
-            public_key,
-            time_limit,
-        ).build_transaction(
-            {
-                "from": public_key,
-                "value": amount_in_wei,
-                "nonce": txn_count,
-            }
-        )
+    return _submit(
+        client,
+        async_submit_buy,
+        token_address,
+        amount_in_wei,
+        slippage_percent,
+        market_snapshot,
+    )
 
-        return _sign(client, txn)
-    except Exception as error:
-        # TODO: Retry if failed
 
-        logger.fatal(f"Buy failed: {error}")
+def submit_sell(
+    client: Web3,
+    token_address: str,
+    amount_in_wei: int,
+    slippage_percent: int | float = constants.SLIPPAGE_PERCENT,
+    market_snapshot: snapshot.MarketSnapshot | None = None,
+) -> PendingTransaction:
+    """Sell a token on Uniswap V2 without waiting for the receipts.
+
+    :param Web3 client: The Web3 client.
+    :param str token_address: The token address.
+    :param int amount_in_wei: The amount in wei to sell.
+    :param int | float slippage_percent: The slippage percentage.
+    :param snapshot.MarketSnapshot | None market_snapshot: The market snapshot of the
+        current tick, fetched if not given.
+    :return PendingTransaction: The sent swap.
+    """
 
+    return _submit(
+        client,
+        async_submit_sell,
+        token_address,
+        amount_in_wei,
+        slippage_percent,
+        market_snapshot,
+    )
 
-def sell(
+
+def arm_exits(
     client: Web3,
+    token_addresses: list[str],
+    slippage_percent: int | float = constants.SLIPPAGE_PERCENT,
+) -> list[armed_exit.ArmedExit]:
+    """Sign the sales of the positions in tokens ahead of their triggers.
+
+    :param Web3 client: The Web3 client.
+    :param list[str] token_addresses: The token addresses.
+    :param int | float slippage_percent: The slippage percentage.
+    :return list[armed_exit.ArmedExit]: The armed exits of the held tokens.
+    """
+
+    return async_client.call(client, async_arm_exits, token_addresses, slippage_percent)
+
+
+@metrics.timed("trade_duration_seconds", side="buy")
+async def async_buy(
+    client: AsyncWeb3,
     token_address: str,
     amount_in_wei: int,
     slippage_percent: int | float = constants.SLIPPAGE_PERCENT,
+    market_snapshot: snapshot.MarketSnapshot | None = None,
+) -> str:
+    """Buy a token on Uniswap V2
+
+    :param AsyncWeb3 client: The AsyncWeb3 client.
+    :param str token_address: The token address.
+    :param int amount_in_wei: The amount in wei to buy.
+    :param int | float slippage_percent: The slippage percentage.
+    :param snapshot.MarketSnapshot | None market_snapshot: The market snapshot of the
+        current tick, fetched if not given.
+    :return str: The transaction hash.
+    """
+
+    pending_txn = await async_submit_buy(
+        client, token_address, amount_in_wei, slippage_percent, market_snapshot
+    )
+    await pending_txn.receipt
+
+    return pending_txn.txn_hash
+
+
+@metrics.timed("trade_duration_seconds", side="sell")
+async def async_sell(
+    client: AsyncWeb3,
+    token_address: str,
+    amount_in_wei: int,
+    slippage_percent: int | float = constants.SLIPPAGE_PERCENT,
+    market_snapshot: snapshot.MarketSnapshot | None = None,
 ) -> str:
     """Sell a token on Uniswap V2
 
-    :param Web3 client: The Web3 client.
+    :param AsyncWeb3 client: The AsyncWeb3 client.
     :param str token_address: The token address.
     :param int amount_in_wei: The amount in wei to sell.
     :param int | float slippage_percent: The slippage percentage.
+    :param snapshot.MarketSnapshot | None market_snapshot: The market snapshot of the
+        current tick, fetched if not given.
     :return str: The transaction hash.
     """
 
-    try:
-        public_key = environment.get_public_key()
+    pending_txn = await async_submit_sell(
+        client, token_address, amount_in_wei, slippage_percent, market_snapshot
+    )
+    await pending_txn.receipt
 
-        token_balance = utils.get_token_balance(client, token_address)
-        if token_balance < amount_in_wei:
-            raise Exception("Insufficient funds")
+    return pending_txn.txn_hash
 
-        liquidity = utils.get_token_liquidity_in_wei(client, token_address)
-        if liquidity < amount_in_wei:
-            raise Exception("Insufficient liquidity")
 
-        router = utils.get_router(client)
+@metrics.timed("stage_duration_seconds", stage="submit_buy")
+async def async_submit_buy(
+    client: AsyncWeb3,
+    token_address: str,
+    amount_in_wei: int,
+    slippage_percent: int | float = constants.SLIPPAGE_PERCENT,
+    market_snapshot: snapshot.MarketSnapshot | None = None,
+) -> PendingTransaction:
+    """Buy a token on Uniswap V2 without waiting for the receipt.
 
-        token_to_eth_path = [
-            client.to_checksum_address(token_address),
-            client.to_checksum_address(constants.WETH_CONTRACT_ADDRESS),
-        ]
+    :param AsyncWeb3 client: The AsyncWeb3 client.
+    :param str token_address: The token address.
+    :param int amount_in_wei: The amount in wei to buy.
+    :param int | float slippage_percent: The slippage percentage.
+    :param snapshot.MarketSnapshot | None market_snapshot: The market snapshot of the
+        current tick, fetched if not given.
+    :return PendingTransaction: The sent transaction.
+    """
 
-        amount_before_slippage = router.functions.getAmountsOut(
-            amount_in_wei,
-            token_to_eth_path,
-        ).call()[1]
+    public_key = environment.get_public_key()
 
-        amount_after_slippage = int(
-            amount_before_slippage * (1 - slippage_percent / 100)
+    if amount_in_wei < 0:
+        raise Exception("Invalid amount")
+
+    if market_snapshot is None:
+        market_snapshot = await snapshot.async_get_market_snapshot(
+            client, token_address
         )
 
-        _approve(client, token_address, amount_in_wei)
+    if market_snapshot.eth_balance_in_wei < amount_in_wei:
+        raise Exception("Insufficient funds")
+
+    if market_snapshot.liquidity_in_wei < amount_in_wei:
+        raise Exception("Insufficient liquidity")
+
+    router = registry.get_registry(client).get_router()
 
-        txn = router.functions.swapExactTokensForETH(
-            amount_before_slippage,
+    eth_to_token_path = [
+        registry.to_checksum_address(constants.WETH_CONTRACT_ADDRESS),
+        registry.to_checksum_address(token_address),
+    ]
+
+    amount_before_slippage = quote.get_amount_out(
+        amount_in_wei,
+        market_snapshot.weth_reserve_in_wei,
+        market_snapshot.token_reserve,
+    )
+
+    amount_after_slippage = int(amount_before_slippage * (1 - slippage_percent / 100))
+
+    time_limit = market_snapshot.timestamp + constants.BLOCK_TIME_LIMIT
+
+    txn_hash = await _async_send(
+        client,
+        router.functions.swapExactETHForTokens(
             amount_after_slippage,
-            token_to_eth_path,
+            eth_to_token_path,
             public_key,
-            client.eth.get_block("latest")["timestamp"] + constants.BLOCK_TIME_LIMIT,
-        ).build_transaction(
-            {
-                "from": public_key,
-                "value": amount_in_wei,
-                "nonce": client.eth.get_transaction_count(public_key),
-            }
-        )
+            time_limit,
+        ),
+        {"from": public_key, "value": amount_in_wei},
+        token_address,
+    )
 
-        return _sign(client, txn)
-    except Exception as error:
-        # TODO: Retry if failed
+    return PendingTransaction(
+        txn_hash,
+        asyncio.ensure_future(_async_wait_for_receipts(client, txn_hash)),
+    )
 
-        logger.fatal(error)
 
+@metrics.timed("stage_duration_seconds", stage="submit_sell")
+async def async_submit_sell(
+    client: AsyncWeb3,
+    token_address: str,
+    amount_in_wei: int,
+    slippage_percent: int | float = constants.SLIPPAGE_PERCENT,
+    market_snapshot: snapshot.MarketSnapshot | None = None,
+) -> PendingTransaction:
+    """Sell a token on Uniswap V2 without waiting for the receipts.
 
-def _approve(client: Web3, token_address: str, amount_in_wei: int) -> str:
-    """Approve a token on Uniswap V2
+    The armed exit of the position is sent when it sells the amount, without
+    any other request. Otherwise the router allowance is approved up to the cap
+    only when it is short, and the approval and the swap are sent back to back,
+    with consecutive nonces, so they can be mined in the same block.
 
-    :param Web3 client: The Web3 client.
+    :param AsyncWeb3 client: The AsyncWeb3 client.
     :param str token_address: The token address.
-    :param int amount_in_wei: The amount in wei to approve.
-    :return str: The transaction hash.
+    :param int amount_in_wei: The amount in wei to sell.
+    :param int | float slippage_percent: The slippage percentage.
+    :param snapshot.MarketSnapshot | None market_snapshot: The market snapshot of the
+        current tick, fetched if not given.
+    :return PendingTransaction: The sent swap.
     """
 
+    public_key = environment.get_public_key()
+
+    if market_snapshot is not None:
+        armed_exit_txn = armed_exit.get_armory(public_key).get(token_address)
+
+        if armed_exit_txn and armed_exit_txn.amount_in_wei == amount_in_wei:
+            return await _async_fire(
+                client, armed_exit_txn, slippage_percent, market_snapshot
+            )
+
+    if market_snapshot is None:
+        market_snapshot = await snapshot.async_get_market_snapshot(
+            client, token_address
+        )
+
+    if market_snapshot.token_balance < amount_in_wei:
+        raise Exception("Insufficient funds")
+
+    if market_snapshot.liquidity_in_wei < amount_in_wei:
+        raise Exception("Insufficient liquidity")
+
+    router = registry.get_registry(client).get_router()
+
+    token_to_eth_path = [
+        registry.to_checksum_address(token_address),
+        registry.to_checksum_address(constants.WETH_CONTRACT_ADDRESS),
+    ]
+
+    amount_before_slippage = quote.get_amount_out(
+        amount_in_wei,
+        market_snapshot.token_reserve,
+        market_snapshot.weth_reserve_in_wei,
+    )
+
+    amount_after_slippage = int(amount_before_slippage * (1 - slippage_percent / 100))
+
+    # The armed exit sells a balance the sale changes.
+    armed_exit.get_armory(public_key).disarm(token_address)
+
+    allowance_manager = allowance.get_allowance_manager(public_key)
+    allowance_manager.update(
+        token_address, market_snapshot.router_allowance, market_snapshot.block_number
+    )
+
+    approval_hash = await allowance_manager.async_reserve(
+        client, token_address, amount_in_wei, _async_approve
+    )
+
     try:
-        public_key = environment.get_public_key()
+        # The swap can not be estimated before its approval is mined.
+        gas = None
+
+        if approval_hash:
+            gas = (
+                gas_oracle.get_gas_oracle(client).get_gas_estimate(
+                    "swapExactTokensForETH", token_address
+                )
+                or constants.SWAP_GAS_LIMIT
+            )
+
+        txn_hash = await _async_send(
+            client,
+            router.functions.swapExactTokensForETH(
+                amount_in_wei,
+                amount_after_slippage,
+                token_to_eth_path,
+                public_key,
+                market_snapshot.timestamp + constants.BLOCK_TIME_LIMIT,
+            ),
+            {"from": public_key},
+            token_address,
+            gas=gas,
+        )
+    except Exception:
+        allowance_manager.settle(
+            token_address, market_snapshot.block_number, failed=True
+        )
+        raise
+
+    return PendingTransaction(
+        txn_hash,
+        asyncio.ensure_future(
+            _async_wait_for_sale(
+                client,
+                token_address,
+                txn_hash,
+                approval_hash,
+                market_snapshot.block_number,
+            )
+        ),
+    )
+
+
+async def async_arm_exits(
+    client: AsyncWeb3,
+    token_addresses: list[str],
+    slippage_percent: int | float = constants.SLIPPAGE_PERCENT,
+) -> list[armed_exit.ArmedExit]:
+    """Sign the sales of the positions in tokens ahead of their triggers.
+
+    Every held token gets a sale of its whole balance, signed with the next nonce,
+    the current fees and a minimum output from the current reserves, and is
+    approved first if needed. Armed again on every block, a sale is then sent with
+    a single `eth_sendRawTransaction` when it fires.
+
+    :param AsyncWeb3 client: The AsyncWeb3 client.
+    :param list[str] token_addresses: The token addresses.
+    :param int | float slippage_percent: The slippage percentage.
+    :return list[armed_exit.ArmedExit]: The armed exits of the held tokens.
+    """
 
-        token_contract = client.eth.contract(
-            address=token_address,
-            abi=utils.get_abi(token_address),
+    public_key = environment.get_public_key()
+    armory = armed_exit.get_armory(public_key)
+    allowance_manager = allowance.get_allowance_manager(public_key)
+    oracle = gas_oracle.get_gas_oracle(client)
+    router = registry.get_registry(client).get_router()
+
+    market_snapshots = await snapshot.async_get_market_snapshots(
+        client, token_addresses, return_exceptions=True
+    )
+    max_priority_fee, max_fee = await oracle.async_get_fees(client)
+    armed_exits = []
+
+    for token_address, market_snapshot in zip(token_addresses, market_snapshots):
+        # A token whose calls revert keeps its last exit, the others are armed.
+        if isinstance(market_snapshot, errors.CallFailedError):
+            logger.error(
+                f"Failed to arm the exit of {token_address}: {market_snapshot}"
+            )
+            continue
+
+        token_address = market_snapshot.token_address
+        amount_in_wei = market_snapshot.token_balance
+
+        if amount_in_wei == 0:
+            armory.disarm(token_address)
+            continue
+
+        allowance_manager.update(
+            token_address,
+            market_snapshot.router_allowance,
+            market_snapshot.block_number,
+        )
+        approval_hash = await allowance_manager.async_reserve(
+            client, token_address, amount_in_wei, _async_approve, spend=False
         )
 
-        txn = token_contract.functions.approve(
-            client.to_checksum_address(constants.UNISWAP_V2_ROUTER_CONTRACT_ADDRESS),
+        if approval_hash:
+            asyncio.ensure_future(
+                _async_wait_for_approval(
+                    client, token_address, approval_hash, market_snapshot.block_number
+                )
+            )
+
+        amount_out_min = int(
+            quote.get_amount_out(
+                amount_in_wei,
+                market_snapshot.token_reserve,
+                market_snapshot.weth_reserve_in_wei,
+            )
+            * (1 - slippage_percent / 100)
+        )
+        deadline = market_snapshot.timestamp + constants.BLOCK_TIME_LIMIT
+        function = router.functions.swapExactTokensForETH(
             amount_in_wei,
-        ).build_transaction(
+            amount_out_min,
+            [
+                registry.to_checksum_address(token_address),
+                registry.to_checksum_address(constants.WETH_CONTRACT_ADDRESS),
+            ],
+            public_key,
+            deadline,
+        )
+
+        # The swap can not be estimated before its approval is mined.
+        gas = oracle.get_gas_estimate("swapExactTokensForETH", token_address)
+
+        if gas is None and approval_hash is None:
+            gas = await oracle.async_estimate_gas(
+                function, {"from": public_key}, token_address
+            )
+
+        txn = await function.build_transaction(
             {
                 "from": public_key,
-                "nonce": client.eth.get_transaction_count(public_key),
+                "gas": gas or constants.SWAP_GAS_LIMIT,
+                "maxPriorityFeePerGas": max_priority_fee,
+                "maxFeePerGas": max_fee,
+                "nonce": await nonce_manager.get_nonce_manager(public_key).peek_nonce(
+                    client
+                ),
             }
         )
+        with metrics.timer("stage_duration_seconds", stage="sign"):
+            signed_txn = client.eth.account.sign_transaction(
+                txn, environment.get_private_key()
+            )
+
+        armed_exits.append(
+            armed_exit.ArmedExit(
+                token_address=token_address,
+                amount_in_wei=amount_in_wei,
+                amount_out_min=amount_out_min,
+                deadline=deadline,
+                block_number=market_snapshot.block_number,
+                txn=txn,
+                raw_transaction=signed_txn.raw_transaction,
+            )
+        )
+        armory.arm(armed_exits[-1])
 
-        return _sign(client, txn, is_approval=True)
-    except Exception as error:
-        # TODO: Retry if failed
+    return armed_exits
 
-        logger.fatal(f"Approval failed: {error}")
 
+async def _async_fire(
+    client: AsyncWeb3,
+    armed_exit_txn: armed_exit.ArmedExit,
+    slippage_percent: int | float,
+    market_snapshot: snapshot.MarketSnapshot,
+) -> PendingTransaction:
+    """Send an armed exit.
 
-def _sign(client: Web3, txn: dict, is_approval: bool = False) -> str:
-    """Sign a transaction and calculate the gas price.
+    It is signed again, without any request, if its nonce was handed out since,
+    or if its minimum output does not fit the reserves of the tick anymore.
 
-    :param Web3 client: The Web3 client.
-    :param dict txn: The transaction dictionary.
-    :param bool is_approval: If the transaction is an approval.
-    :return str: The transaction hash.
+    :param AsyncWeb3 client: The AsyncWeb3 client.
+    :param armed_exit.ArmedExit armed_exit_txn: The armed exit.
+    :param int | float slippage_percent: The slippage percentage.
+    :param snapshot.MarketSnapshot market_snapshot: The market snapshot of the
+        tick.
+    :return PendingTransaction: The sent swap.
     """
 
+    public_key = environment.get_public_key()
+    token_address = armed_exit_txn.token_address
+    manager = nonce_manager.get_nonce_manager(public_key)
+    txn = armed_exit_txn.txn
+    raw_transaction = armed_exit_txn.raw_transaction
+
+    if not armed_exit_txn.is_valid(market_snapshot, slippage_percent):
+        amount_out_min = int(
+            quote.get_amount_out(
+                armed_exit_txn.amount_in_wei,
+                market_snapshot.token_reserve,
+                market_snapshot.weth_reserve_in_wei,
+            )
+            * (1 - slippage_percent / 100)
+        )
+        txn = {
+            **txn,
+            "data": registry.get_registry(client)
+            .get_router()
+            .encode_abi(
+                "swapExactTokensForETH",
+                [
+                    armed_exit_txn.amount_in_wei,
+                    amount_out_min,
+                    [
+                        registry.to_checksum_address(token_address),
+                        registry.to_checksum_address(constants.WETH_CONTRACT_ADDRESS),
+                    ],
+                    public_key,
+                    market_snapshot.timestamp + constants.BLOCK_TIME_LIMIT,
+                ],
+            ),
+        }
+
+    if not manager.claim(txn["nonce"]):
+        txn = {**txn, "nonce": await manager.get_nonce(client)}
+
+    if txn is not armed_exit_txn.txn:
+        with metrics.timer("stage_duration_seconds", stage="sign"):
+            raw_transaction = client.eth.account.sign_transaction(
+                txn, environment.get_private_key()
+            ).raw_transaction
+
+    armed_exit.get_armory(public_key).disarm(token_address)
+
+    allowance_manager = allowance.get_allowance_manager(public_key)
+    allowance_manager.spend(token_address, armed_exit_txn.amount_in_wei)
+
     try:
-        txn.update(
-            {
-                "maxPriorityFeePerGas": client.to_wei(
-                    constants.MAX_PRIORITY_FEE_PER_GAS, "gwei"
-                ),
-                "maxFeePerGas": client.eth.gas_price,
-                "gas": int(client.eth.estimate_gas(txn) * constants.GAS_MULTIPLIER),
-            }
+        txn_hash = await client.eth.send_raw_transaction(raw_transaction)
+    except Exception as error:
+        manager.resync()
+        allowance_manager.settle(
+            token_address, market_snapshot.block_number, failed=True
         )
+        raise errors.TransactionError(f"Failed to send the exit: {error}") from error
+
+    return PendingTransaction(
+        txn_hash,
+        asyncio.ensure_future(
+            _async_wait_for_sale(
+                client, token_address, txn_hash, None, market_snapshot.block_number
+            )
+        ),
+    )
+
+
+async def _async_approve(
+    client: AsyncWeb3,
+    token_address: str,
+    amount_in_wei: int,
+) -> HexBytes:
+    """Approve a token on Uniswap V2, without waiting for the receipt.
+
+    :param AsyncWeb3 client: The AsyncWeb3 client.
+    :param str token_address: The token address.
+    :param int amount_in_wei: The amount in wei to approve.
+    :return HexBytes: The transaction hash.
+    """
+
+    token_contract = registry.get_registry(client).get_token(token_address)
+
+    return await _async_send(
+        client,
+        token_contract.functions.approve(
+            registry.to_checksum_address(constants.UNISWAP_V2_ROUTER_CONTRACT_ADDRESS),
+            amount_in_wei,
+        ),
+        {"from": environment.get_public_key()},
+        token_address,
+    )
+
 
-        signed_txn = client.eth.account.sign_transaction(
-            txn, environment.get_private_key()
+async def _async_send(
+    client: AsyncWeb3,
+    function: AsyncContractFunction,
+    txn_params: dict,
+    token_address: str,
+    gas: int | None = None,
+) -> HexBytes:
+    """Sign and send a transaction with the next nonce of the wallet.
+
+    The fees come from the gas oracle, and the gas limit is estimated once per
+    function and token.
+
+    :param AsyncWeb3 client: The AsyncWeb3 client.
+    :param AsyncContractFunction function: The contract function to call.
+    :param dict txn_params: The transaction parameters, with its sender.
+    :param str token_address: The traded token address.
+    :param int | None gas: The gas limit, estimated if not given.
+    :return HexBytes: The transaction hash.
+    """
+
+    oracle = gas_oracle.get_gas_oracle(client)
+
+    if gas is None:
+        gas = await oracle.async_estimate_gas(function, txn_params, token_address)
+
+    max_priority_fee, max_fee = await oracle.async_get_fees(client)
+
+    txn_params = {
+        **txn_params,
+        "gas": gas,
+        "maxPriorityFeePerGas": max_priority_fee,
+        "maxFeePerGas": max_fee,
+    }
+
+    manager = nonce_manager.get_nonce_manager(txn_params["from"])
+    txn_params["nonce"] = await manager.get_nonce(client)
+
+    try:
+        txn = await function.build_transaction(txn_params)
+
+        with metrics.timer("stage_duration_seconds", stage="sign"):
+            signed_txn = client.eth.account.sign_transaction(
+                txn, environment.get_private_key()
+            )
+
+        return await client.eth.send_raw_transaction(signed_txn.raw_transaction)
+    except Exception as error:
+        manager.resync()
+        raise errors.TransactionError(
+            f"Failed to send the transaction: {error}"
+        ) from error
+
+
+async def _async_wait_for_receipts(
+    client: AsyncWeb3,
+    txn_hash: HexBytes,
+    approval_hash: HexBytes | None = None,
+) -> dict:
+    """Wait for the receipts of a transaction and of its approval.
+
+    :param AsyncWeb3 client: The AsyncWeb3 client.
+    :param HexBytes txn_hash: The transaction hash.
+    :param HexBytes | None approval_hash: The hash of the approval sent before it.
+    :return dict: The receipt of the transaction.
+    """
+
+    txn_hashes = [txn_hash] if approval_hash is None else [approval_hash, txn_hash]
+
+    try:
+        receipts = await asyncio.gather(
+            *(
+                client.eth.wait_for_transaction_receipt(
+                    txn_hash, poll_latency=constants.RECEIPT_POLL_INTERVAL
+                )
+                for txn_hash in txn_hashes
+            )
         )
+    except Exception as error:
+        # A dropped transaction leaves its nonce unused.
+        nonce_manager.get_nonce_manager(environment.get_public_key()).resync()
+        raise errors.TransactionError(
+            f"Failed to get the receipt: {error}", txn_hash.to_0x_hex()
+        ) from error
+
+    if approval_hash is not None and receipts[0]["status"] != 1:
+        raise errors.TransactionError("Approval failed", approval_hash.to_0x_hex())
+
+    if receipts[-1]["status"] != 1:
+        raise errors.TransactionError("Transaction failed", txn_hash.to_0x_hex())
+
+    return receipts[-1]
+
+
+async def _async_wait_for_sale(
+    client: AsyncWeb3,
+    token_address: str,
+    txn_hash: HexBytes,
+    approval_hash: HexBytes | None,
+    block_number: int,
+) -> dict:
+    """Wait for the receipts of a sale, then let the snapshots update its allowance.
+
+    :param AsyncWeb3 client: The AsyncWeb3 client.
+    :param str token_address: The token address.
+    :param HexBytes txn_hash: The swap hash.
+    :param HexBytes | None approval_hash: The hash of the approval sent before it.
+    :param int block_number: The block the sale was decided on.
+    :return dict: The receipt of the swap.
+    """
 
-        txn_hash = client.eth.send_raw_transaction(signed_txn.raw_transaction)
+    allowance_manager = allowance.get_allowance_manager(environment.get_public_key())
+
+    try:
+        receipt = await _async_wait_for_receipts(client, txn_hash, approval_hash)
+    except Exception:
+        allowance_manager.settle(token_address, block_number, failed=True)
+        raise
+
+    allowance_manager.settle(token_address, receipt["blockNumber"])
+
+    return receipt
 
-        if client.eth.wait_for_transaction_receipt(txn_hash)["status"] != 1:
-            raise Exception(f"{"Approval" if is_approval else "Transaction"} failed")
 
-        return txn_hash
+async def _async_wait_for_approval(
+    client: AsyncWeb3,
+    token_address: str,
+    approval_hash: HexBytes,
+    block_number: int,
+) -> None:
+    """Wait for the receipt of an approval sent ahead of a sale.
+
+    :param AsyncWeb3 client: The AsyncWeb3 client.
+    :param str token_address: The token address.
+    :param HexBytes approval_hash: The approval hash.
+    :param int block_number: The block the approval was decided on.
+    :return None:
+    """
+
+    try:
+        await _async_wait_for_sale(
+            client, token_address, approval_hash, None, block_number
+        )
     except Exception as error:
-        # TODO: Retry if failed
+        logger.error(f"Approval of {token_address} failed: {error}")
+
+
+def _submit(client: Web3, function, *args) -> PendingTransaction:
+    """Send a transaction with an async helper, from synchronous code.
+
+    :param Web3 client: The Web3 client.
+    :param function: The async helper, returning a pending transaction.
+    :return PendingTransaction: The sent transaction, its receipt is a
+        `concurrent.futures.Future`.
+    """
+
+    async def wait(receipt: asyncio.Future) -> dict:
+        return await receipt
+
+    pending_txn = async_client.call(client, function, *args)
+
+    return PendingTransaction(
+        pending_txn.txn_hash, async_client.submit(wait(pending_txn.receipt))
+    )
+
+
+def _is_simulated(client: Web3) -> bool:
+    """Get whether the client is the simulated client of a backtest.
+
+    The backtest module, and NumPy with it, is only imported by the backtests, so
+    a client can only be simulated once it is.
+
+    :param Web3 client: The Web3 client.
+    :return bool: True for a `backtest.SimulatedClient`.
+    """
+
+    backtest = sys.modules.get("helpers.backtest")
 
-        logger.fatal(f"{'Approval' if is_approval else 'Transaction'} failed: {error}")
+    return backtest is not None and isinstance(client, backtest.SimulatedClient)
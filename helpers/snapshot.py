@@ -0,0 +1,266 @@
+import asyncio
+import dataclasses
+
+from web3 import AsyncWeb3, Web3
+from web3.types import BlockIdentifier
+
+from helpers import (
+    constants,
+    environment,
+    errors,
+    metrics,
+    multicall,
+    quote,
+    registry,
+)
+
+# Converted once, the price is read on every tick.
+ONE_TOKEN = Web3.to_wei(1, "ether")
+
+
+@dataclasses.dataclass(frozen=True)
+class MarketSnapshot:
+    """State of the market of a token and of the wallet, read at a single block."""
+
+    token_address: str
+    pair_address: str
+    block_number: int
+    timestamp: int
+    eth_balance_in_wei: int
+    token_balance: int
+    weth_reserve_in_wei: int
+    token_reserve: int
+    router_allowance: int = 0
+
+    @property
+    def price_in_wei(self) -> int:
+        """The price of one token in WEI, as returned by the router `getAmountsOut`.
+
+        :return int: The token price in WEI.
+        """
+
+        return quote.get_amount_out(
+            ONE_TOKEN, self.token_reserve, self.weth_reserve_in_wei
+        )
+
+    @property
+    def liquidity_in_wei(self) -> int:
+        """The WETH liquidity of the pair in WEI.
+
+        :return int: The token liquidity in WEI.
+        """
+
+        return self.weth_reserve_in_wei
+
+
+def sort_reserves(
+    token_address: str,
+    reserve0: int,
+    reserve1: int,
+) -> tuple[int, int]:
+    """Sort the reserves of the WETH pair of a token.
+
+    Uniswap V2 pairs order their tokens by address, so WETH is `token0` only when
+    its address is the lowest.
+
+    :param str token_address: The token address.
+    :param int reserve0: The reserve of `token0`.
+    :param int reserve1: The reserve of `token1`.
+    :return tuple[int, int]: The WETH reserve and the token reserve.
+    """
+
+    if int(constants.WETH_CONTRACT_ADDRESS, 16) < int(token_address, 16):
+        return reserve0, reserve1
+
+    return reserve1, reserve0
+
+
+def get_market_snapshot(
+    client: Web3,
+    token_address: str,
+    block_identifier: BlockIdentifier = "latest",
+) -> MarketSnapshot:
+    """Get the market snapshot of a token in a single Multicall3 `eth_call`.
+
+    :param Web3 client: The Web3 client.
+    :param str token_address: The token address.
+    :param BlockIdentifier block_identifier: The block to read the snapshot at.
+    :return MarketSnapshot: The market snapshot.
+    """
+
+    return get_market_snapshots(client, [token_address], block_identifier)[0]
+
+
+@metrics.timed("stage_duration_seconds", stage="snapshot")
+def get_market_snapshots(
+    client: Web3,
+    token_addresses: list[str],
+    block_identifier: BlockIdentifier = "latest",
+    return_exceptions: bool = False,
+) -> list[MarketSnapshot | errors.CallFailedError]:
+    """Get the market snapshots of many tokens in a single Multicall3 `eth_call`.
+
+    The block, timestamp and ETH balance are read once and shared by the snapshots.
+
+    :param Web3 client: The Web3 client.
+    :param list[str] token_addresses: The token addresses.
+    :param BlockIdentifier block_identifier: The block to read the snapshots at.
+    :param bool return_exceptions: Whether a token whose calls failed gets its error
+        in place of its snapshot, instead of raising it.
+    :return list[MarketSnapshot | errors.CallFailedError]: The market snapshots, in
+        the order of the tokens.
+    """
+
+    contracts = registry.get_registry(client)
+    pairs = [contracts.get_pair(token_address) for token_address in token_addresses]
+
+    results = multicall.aggregate(
+        client, _get_calls(contracts, token_addresses, pairs), block_identifier
+    )
+
+    return _get_market_snapshots(token_addresses, pairs, results, return_exceptions)
+
+
+async def async_get_market_snapshot(
+    client: AsyncWeb3,
+    token_address: str,
+    block_identifier: BlockIdentifier = "latest",
+) -> MarketSnapshot:
+    """Get the market snapshot of a token in a single Multicall3 `eth_call`.
+
+    :param AsyncWeb3 client: The AsyncWeb3 client.
+    :param str token_address: The token address.
+    :param BlockIdentifier block_identifier: The block to read the snapshot at.
+    :return MarketSnapshot: The market snapshot.
+    """
+
+    return (
+        await async_get_market_snapshots(client, [token_address], block_identifier)
+    )[0]
+
+
+@metrics.timed("stage_duration_seconds", stage="snapshot")
+async def async_get_market_snapshots(
+    client: AsyncWeb3,
+    token_addresses: list[str],
+    block_identifier: BlockIdentifier = "latest",
+    return_exceptions: bool = False,
+) -> list[MarketSnapshot | errors.CallFailedError]:
+    """Get the market snapshots of many tokens in a single Multicall3 `eth_call`.
+
+    :param AsyncWeb3 client: The AsyncWeb3 client.
+    :param list[str] token_addresses: The token addresses.
+    :param BlockIdentifier block_identifier: The block to read the snapshots at.
+    :param bool return_exceptions: Whether a token whose calls failed gets its error
+        in place of its snapshot, instead of raising it.
+    :return list[MarketSnapshot | errors.CallFailedError]: The market snapshots, in
+        the order of the tokens.
+    """
+
+    contracts = registry.get_registry(client)
+    pairs = await asyncio.gather(
+        *(contracts.get_pair(token_address) for token_address in token_addresses)
+    )
+
+    results = await multicall.async_aggregate(
+        client, _get_calls(contracts, token_addresses, pairs), block_identifier
+    )
+
+    return _get_market_snapshots(token_addresses, pairs, results, return_exceptions)
+
+
+def _get_calls(
+    contracts: registry.ContractRegistry,
+    token_addresses: list[str],
+    pairs: list,
+) -> list[tuple]:
+    """Get the Multicall3 calls of the market snapshots of tokens.
+
+    :param registry.ContractRegistry contracts: The contract registry.
+    :param list[str] token_addresses: The token addresses.
+    :param list pairs: The pair contracts of the tokens.
+    :return list[tuple]: The calls.
+    """
+
+    multicall_contract = contracts.get_multicall()
+    public_key = registry.to_checksum_address(environment.get_public_key())
+
+    calls = [
+        (multicall_contract, "getBlockNumber", []),
+        (multicall_contract, "getCurrentBlockTimestamp", []),
+        (multicall_contract, "getEthBalance", [public_key]),
+    ]
+
+    router_address = registry.to_checksum_address(
+        constants.UNISWAP_V2_ROUTER_CONTRACT_ADDRESS
+    )
+
+    for token_address, pair in zip(token_addresses, pairs):
+        token = contracts.get_token(token_address)
+        calls.append((token, "balanceOf", [public_key]))
+        calls.append((token, "allowance", [public_key, router_address]))
+        calls.append((pair, "getReserves", []))
+
+    return calls
+
+
+def _get_market_snapshots(
+    token_addresses: list[str],
+    pairs: list,
+    results: list,
+    return_exceptions: bool = False,
+) -> list[MarketSnapshot | errors.CallFailedError]:
+    """Build the market snapshots of tokens from the results of their calls.
+
+    :param list[str] token_addresses: The token addresses.
+    :param list pairs: The pair contracts of the tokens.
+    :param list results: The decoded results of the calls.
+    :param bool return_exceptions: Whether a token whose calls failed gets its error
+        in place of its snapshot, instead of raising it.
+    :return list[MarketSnapshot | errors.CallFailedError]: The market snapshots.
+    """
+
+    block_number, timestamp, eth_balance, *results = results
+    market_snapshots = []
+
+    # Shared by every token, no snapshot can be built without them.
+    for result in (block_number, timestamp, eth_balance):
+        if isinstance(result, errors.CallFailedError):
+            raise result
+
+    for index, token_address in enumerate(token_addresses):
+        token_results = results[3 * index : 3 * index + 3]
+        error = next(
+            (
+                result
+                for result in token_results
+                if isinstance(result, errors.CallFailedError)
+            ),
+            None,
+        )
+
+        if error is not None:
+            if not return_exceptions:
+                raise error
+
+            market_snapshots.append(error)
+            continue
+
+        token_balance, router_allowance, reserves = token_results
+        weth_reserve, token_reserve = sort_reserves(token_address, *reserves[:2])
+
+        market_snapshots.append(
+            MarketSnapshot(
+                token_address=registry.to_checksum_address(token_address),
+                pair_address=pairs[index].address,
+                block_number=block_number,
+                timestamp=timestamp,
+                eth_balance_in_wei=eth_balance,
+                token_balance=token_balance,
+                weth_reserve_in_wei=weth_reserve,
+                token_reserve=token_reserve,
+                router_allowance=router_allowance,
+            )
+        )
+
+    return market_snapshots
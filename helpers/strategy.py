@@ -0,0 +1,201 @@
+import threading
+import weakref
+
+from web3 import Web3
+
+from helpers import models, signals, snapshot
+
+_strategies = {}
+
+
+class Strategy:
+    """A trading strategy, one instance per traded token.
+
+    The engine calls `on_tick` with the market snapshot of every tick, so the
+    strategy keeps what it needs between ticks, like its indicators, instead of
+    fetching or recomputing a history. Subclasses set `name`, under which
+    `register` makes them available to `get_strategy`, and take their
+    parameters as keyword arguments. `client` is the client of the current tick.
+    """
+
+    name = None
+
+    def __init__(self, token_address: str, initial_price_in_wei: int) -> None:
+        self.token_address = token_address
+        self.initial_price_in_wei = initial_price_in_wei
+        self.client = None
+
+    def on_tick(
+        self, market_snapshot: snapshot.MarketSnapshot
+    ) -> tuple[models.TransactionType, int, int, str | None]:
+        """Trade on a tick.
+
+        :param snapshot.MarketSnapshot market_snapshot: The market snapshot.
+        :return tuple[models.TransactionType, int, int, str | None]: The transaction
+            type, current price, token balance, and transaction hash.
+        """
+
+        raise NotImplementedError
+
+    def hold(
+        self, market_snapshot: snapshot.MarketSnapshot
+    ) -> tuple[models.TransactionType, int, int, None]:
+        """Do nothing on a tick.
+
+        :param snapshot.MarketSnapshot market_snapshot: The market snapshot.
+        :return tuple[models.TransactionType, int, int, None]: The transaction type,
+            current price, token balance, and no transaction hash.
+        """
+
+        return (
+            models.TransactionType.HOLD,
+            market_snapshot.price_in_wei,
+            market_snapshot.token_balance,
+            None,
+        )
+
+    def sell_all(
+        self,
+        market_snapshot: snapshot.MarketSnapshot,
+        slippage_percent: int | float,
+    ) -> tuple[models.TransactionType, int, int, str | None]:
+        """Sell the whole token balance.
+
+        :param snapshot.MarketSnapshot market_snapshot: The market snapshot.
+        :param int | float slippage_percent: The slippage percentage.
+        :return tuple[models.TransactionType, int, int, str | None]: The transaction
+            type, current price, token balance, and transaction hash.
+        """
+
+        txn_hash = signals.sell(
+            self.client,
+            self.token_address,
+            market_snapshot.token_balance,
+            slippage_percent,
+            market_snapshot=market_snapshot,
+        )
+
+        return (
+            models.TransactionType.SELL,
+            market_snapshot.price_in_wei,
+            market_snapshot.token_balance,
+            txn_hash,
+        )
+
+
+class StrategyJob:
+    """Run a strategy as a job, with an instance per client and token.
+
+    The engine, `main.py` and the backtests call it like any job. An instance of
+    the strategy is built on the first tick of a token, with the parameters of
+    the job and the keyword arguments of that call. A new client, like the one of
+    every backtest, starts new instances, which are dropped with it: they only
+    hold the client during their ticks.
+    """
+
+    def __init__(self, strategy_class: type[Strategy], **parameters) -> None:
+        self.strategy_class = strategy_class
+        self.parameters = parameters
+
+        self._instances = weakref.WeakKeyDictionary()
+        self._lock = threading.Lock()
+
+    def __call__(
+        self,
+        client: Web3,
+        token_address: str,
+        initial_price_in_wei: int,
+        market_snapshot: snapshot.MarketSnapshot | None = None,
+        **parameters,
+    ) -> tuple[models.TransactionType, int, int, str | None]:
+        """Run the strategy of a token on a tick.
+
+        :param Web3 client: The Web3 client.
+        :param str token_address: The token address.
+        :param int initial_price_in_wei: The initial price in WEI.
+        :param snapshot.MarketSnapshot | None market_snapshot: The market snapshot of
+            the current tick, fetched if not given.
+        :return tuple[models.TransactionType, int, int, str | None]: The transaction
+            type, current price, token balance, and transaction hash.
+        """
+
+        instances = self._instances.get(client)
+        instance = instances.get(token_address) if instances is not None else None
+
+        if instance is None:
+            with self._lock:
+                instances = self._instances.setdefault(client, {})
+                instance = instances.get(token_address)
+
+                if instance is None:
+                    instance = self.strategy_class(
+                        token_address,
+                        initial_price_in_wei,
+                        **{**self.parameters, **parameters},
+                    )
+                    instances[token_address] = instance
+
+        if market_snapshot is None:
+            market_snapshot = snapshot.get_market_snapshot(client, token_address)
+
+        instance.client = client
+
+        try:
+            return instance.on_tick(market_snapshot)
+        finally:
+            instance.client = None
+
+    def __getstate__(self) -> dict:
+        # Sent to the processes of a sweep without its instances.
+        return {
+            "strategy_class": self.strategy_class,
+            "parameters": self.parameters,
+        }
+
+    def __setstate__(self, state: dict) -> None:
+        self.__init__(state["strategy_class"], **state["parameters"])
+
+
+def register(strategy_class: type[Strategy]) -> type[Strategy]:
+    """Make a strategy available by its name, as a class decorator.
+
+    :param type[Strategy] strategy_class: The strategy class.
+    :return type[Strategy]: The strategy class.
+    """
+
+    if not strategy_class.name:
+        raise ValueError(f"{strategy_class.__name__} has no name")
+
+    if _strategies.get(strategy_class.name, strategy_class) is not strategy_class:
+        raise ValueError(f"Strategy {strategy_class.name} is already registered")
+
+    _strategies[strategy_class.name] = strategy_class
+
+    return strategy_class
+
+
+def get_strategy(name: str) -> type[Strategy]:
+    """Get a registered strategy.
+
+    The strategies of `jobs` are registered when the package is imported.
+
+    :param str name: The name of the strategy.
+    :return type[Strategy]: The strategy class.
+    """
+
+    if name not in _strategies:
+        raise ValueError(
+            f"Unknown strategy {name}, expected one of: {', '.join(sorted(_strategies))}"
+        )
+
+    return _strategies[name]
+
+
+def get_job(name: str, **parameters) -> StrategyJob:
+    """Get the job of a registered strategy.
+
+    :param str name: The name of the strategy.
+    :return StrategyJob: The job.
+    """
+
+    return StrategyJob(get_strategy(name), **parameters)
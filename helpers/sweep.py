@@ -0,0 +1,246 @@
+import concurrent.futures
+import csv
+import functools
+import itertools
+import os
+import random
+from multiprocessing import shared_memory
+
+import numpy as np
+
+from helpers import backtest
+
+# The parameters of the backtest itself, the others are given to the job.
+BACKTEST_PARAMETERS = ("gas_price_in_wei", "delay_blocks")
+
+SUMMARY_COLUMNS = (
+    "rank",
+    "pnl_in_wei",
+    "pnl_percent",
+    "max_drawdown_percent",
+    "trade_count",
+    "failed_trade_count",
+    "error_count",
+    "gas_cost_in_wei",
+)
+
+# State of a worker process, set once by `_set_up_worker`.
+_worker = {}
+
+
+def get_grid(space: dict[str, list]) -> list[dict]:
+    """Get every combination of the values of the parameters.
+
+    :param dict[str, list] space: The values of every parameter.
+    :return list[dict]: The parameters of every run.
+    """
+
+    return [dict(zip(space, values)) for values in itertools.product(*space.values())]
+
+
+def get_random(
+    space: dict[str, list | tuple[float, float]],
+    count: int,
+    seed: int | None = None,
+) -> list[dict]:
+    """Draw random combinations of the values of the parameters.
+
+    :param dict[str, list | tuple[float, float]] space: The values of every
+        parameter, a list to choose from or the bounds of a uniform range.
+    :param int count: The number of runs.
+    :param int | None seed: The seed, for a search that can be repeated.
+    :return list[dict]: The parameters of every run.
+    """
+
+    generator = random.Random(seed)
+
+    return [
+        {
+            name: (
+                generator.uniform(*values)
+                if isinstance(values, tuple)
+                else generator.choice(values)
+            )
+            for name, values in space.items()
+        }
+        for _ in range(count)
+    ]
+
+
+def run(
+    job,
+    token_address: str,
+    events: np.ndarray,
+    parameters: list[dict],
+    eth_balance_in_wei: int,
+    token_balance: int = 0,
+    max_workers: int | None = None,
+) -> list[tuple[dict, backtest.BacktestResult]]:
+    """Backtest a job with many sets of parameters, across a process pool.
+
+    The events are copied once into shared memory, and every worker reads them
+    from there instead of receiving a copy with every run. The job must be a
+    module-level function, it is sent once to every worker and called with the
+    parameters as keyword arguments, except the ones of `BACKTEST_PARAMETERS`.
+
+    :param Job job: The job.
+    :param str token_address: The token address.
+    :param np.ndarray events: The events, from `backtest.load_sync_events`.
+    :param list[dict] parameters: The parameters of every run.
+    :param int eth_balance_in_wei: The initial ETH balance.
+    :param int token_balance: The initial token balance.
+    :param int | None max_workers: The number of processes, one per core if None.
+    :return list[tuple[dict, backtest.BacktestResult]]: The parameters and result
+        of every run, from the highest PnL to the lowest.
+    """
+
+    max_workers = max_workers or os.cpu_count() or 1
+    memory = shared_memory.SharedMemory(create=True, size=max(events.nbytes, 1))
+
+    try:
+        np.ndarray(events.shape, backtest.EVENT_DTYPE, memory.buf)[:] = events
+
+        with concurrent.futures.ProcessPoolExecutor(
+            max_workers,
+            initializer=_set_up_worker,
+            initargs=(
+                job,
+                token_address,
+                memory.name,
+                len(events),
+                eth_balance_in_wei,
+                token_balance,
+            ),
+        ) as executor:
+            # Runs are sent in chunks, a few per worker, to cut the round trips.
+            results = list(
+                executor.map(
+                    _run,
+                    parameters,
+                    chunksize=max(1, len(parameters) // (max_workers * 4)),
+                )
+            )
+    finally:
+        memory.close()
+        memory.unlink()
+
+    return sorted(
+        zip(parameters, results), key=lambda run: run[1].pnl_in_wei, reverse=True
+    )
+
+
+def write_summary(path: str, runs: list[tuple[dict, backtest.BacktestResult]]) -> None:
+    """Write the ranked runs of a sweep, one row per run.
+
+    The summary is written as Parquet when the path ends with `.parquet`, which
+    needs `pyarrow`, and as CSV otherwise.
+
+    :param str path: The file path.
+    :param list[tuple[dict, backtest.BacktestResult]] runs: The runs, ranked.
+    :return None:
+    """
+
+    names = list(dict.fromkeys(name for kwargs, _ in runs for name in kwargs))
+    rows = [
+        {
+            **kwargs,
+            "rank": rank,
+            "pnl_in_wei": result.pnl_in_wei,
+            "pnl_percent": result.pnl_percent,
+            "max_drawdown_percent": result.max_drawdown_percent,
+            "trade_count": result.trade_count,
+            "failed_trade_count": result.failed_trade_count,
+            "error_count": result.error_count,
+            "gas_cost_in_wei": result.gas_cost_in_wei,
+        }
+        for rank, (kwargs, result) in enumerate(runs, start=1)
+    ]
+    columns = list(SUMMARY_COLUMNS[:1]) + names + list(SUMMARY_COLUMNS[1:])
+
+    if path.endswith(".parquet"):
+        # Optional, only needed for this format.
+        import pyarrow
+        import pyarrow.parquet
+
+        table = pyarrow.table(
+            {
+                column: [
+                    # WEI amounts overflow 64-bit integers.
+                    (
+                        str(row.get(column))
+                        if column.endswith("_in_wei")
+                        else row.get(column)
+                    )
+                    for row in rows
+                ]
+                for column in columns
+            }
+        )
+        pyarrow.parquet.write_table(table, path)
+        return
+
+    with open(path, "w", newline="") as file:
+        writer = csv.DictWriter(file, columns)
+        writer.writeheader()
+        writer.writerows(rows)
+
+
+def _set_up_worker(
+    job,
+    token_address: str,
+    memory_name: str,
+    count: int,
+    eth_balance_in_wei: int,
+    token_balance: int,
+) -> None:
+    """Attach a worker process to the shared events.
+
+    :param Job job: The job.
+    :param str token_address: The token address.
+    :param str memory_name: The name of the shared memory of the events.
+    :param int count: The number of events.
+    :param int eth_balance_in_wei: The initial ETH balance.
+    :param int token_balance: The initial token balance.
+    :return None:
+    """
+
+    # The workers share the resource tracker of the parent, which unlinks it.
+    memory = shared_memory.SharedMemory(memory_name)
+    events = np.ndarray((count,), backtest.EVENT_DTYPE, memory.buf)
+    events.flags.writeable = False
+
+    _worker.update(
+        job=job,
+        token_address=token_address,
+        memory=memory,
+        events=events,
+        eth_balance_in_wei=eth_balance_in_wei,
+        token_balance=token_balance,
+    )
+
+
+def _run(parameters: dict) -> backtest.BacktestResult:
+    """Backtest the job of the worker with a set of parameters.
+
+    :param dict parameters: The parameters.
+    :return backtest.BacktestResult: The result.
+    """
+
+    kwargs = {
+        name: value
+        for name, value in parameters.items()
+        if name not in BACKTEST_PARAMETERS
+    }
+
+    return backtest.run_backtest(
+        functools.partial(_worker["job"], **kwargs),
+        _worker["token_address"],
+        _worker["events"],
+        _worker["eth_balance_in_wei"],
+        _worker["token_balance"],
+        **{
+            name: value
+            for name, value in parameters.items()
+            if name in BACKTEST_PARAMETERS
+        },
+    )
@@ -1,39 +1,95 @@
-import requests
-
-from web3 import Web3, contract
-
-from helpers import constants, environment, logger
+import concurrent.futures
+
+from web3 import AsyncWeb3, Web3, contract
+
+from helpers import (
+    abi_cache,
+    async_client,
+    constants,
+    environment,
+    errors,
+    logger,
+    metrics,
+    multi_provider,
+    quote,
+    registry,
+    rpc_middleware,
+    snapshot,
+)
 
 
 def get_client() -> Web3:
-    """Get the Web3 client based on the RPC URL.
+    """Get the Web3 client based on the RPC URL, and the backup ones if any.
 
     :return Web3: The Web3 client.
     """
 
     try:
-        return Web3(Web3.HTTPProvider(environment.get_rpc_url()))
+        rpc_urls = environment.get_rpc_urls()
+
+        # Caching lets web3 ask the chain ID once instead of around every call.
+        client = Web3(
+            multi_provider.MultiHTTPProvider(rpc_urls, cache_allowed_requests=True)
+        )
+        rpc_middleware.install(client)
+
+        return client
     except Exception as error:
         logger.fatal(f"Failed to get client: {error}")
 
 
-def get_abi(address: str) -> dict:
-    """Get the ABI from Etherscan based on the contract address.
+def prewarm(client: Web3, token_addresses: list[str]) -> bool:
+    """Connect to the node and resolve what the first snapshots read, in parallel.
+
+    The chain ID, the ABIs, the WETH pairs and the wallet address are resolved in
+    worker threads while the node answers, so the first tick only sends its
+    Multicall3 call.
+
+    :param Web3 client: The Web3 client.
+    :param list[str] token_addresses: The token addresses.
+    :return bool: Whether the client is connected.
+    """
+
+    contracts = registry.get_registry(client)
+    executor = concurrent.futures.ThreadPoolExecutor(
+        max_workers=2 * len(token_addresses) + 4, thread_name_prefix="prewarm"
+    )
+
+    try:
+        connected = executor.submit(client.is_connected)
+        futures = [
+            # Asked once, before the first call.
+            executor.submit(lambda: client.eth.chain_id),
+            executor.submit(contracts.get_multicall),
+            executor.submit(environment.get_public_key),
+        ]
+
+        for token_address in token_addresses:
+            futures.append(executor.submit(contracts.get_pair, token_address))
+            futures.append(executor.submit(contracts.get_token, token_address))
+
+        if not connected.result():
+            return False
+
+        for future in futures:
+            future.result()
+
+        return True
+    finally:
+        # Not waiting for the pairs of a node that is not connected.
+        executor.shutdown(wait=False, cancel_futures=True)
+
+
+def get_abi(address: str, kind: str | None = None) -> list:
+    """Get the ABI of a contract from the bundled ABIs, the caches or Etherscan.
 
     :param str address: The contract address.
-    :return dict: The ABI of the contract.
+    :param str | None kind: The name of a bundled ABI the contract implements.
+    :return list: The ABI of the contract.
     """
 
     try:
-        return requests.get(
-            "https://api.etherscan.io/api",
-            params={
-                "module": "contract",
-                "action": "getabi",
-                "address": address,
-                "apikey": environment.get_etherscan_api_key(),
-            },
-        ).json()["result"]
+        return abi_cache.get_abi(address, kind)
     except Exception as error:
         logger.fatal(f"Failed to get ABI for contract {address}: {error}")
 
@@ -46,10 +102,13 @@ def get_router(client: Web3) -> contract.Contract:
     """
 
     try:
-        address = constants.UNISWAP_V2_ROUTER_CONTRACT_ADDRESS
-        return client.eth.contract(address=address, abi=get_abi(address))
+        return registry.get_registry(client).get_router()
     except Exception as error:
-        logger.fatal(f"Failed to get router for contract {address}: {error}")
+        logger.fatal(
+            "Failed to get router for contract {}: {}".format(
+                constants.UNISWAP_V2_ROUTER_CONTRACT_ADDRESS, error
+            )
+        )
 
 
 def get_factory(client: Web3) -> contract.Contract:
@@ -60,10 +119,13 @@ def get_factory(client: Web3) -> contract.Contract:
     """
 
     try:
-        address = constants.UNISWAP_V2_FACTORY_CONTRACT_ADDRESS
-        return client.eth.contract(address=address, abi=get_abi(address))
+        return registry.get_registry(client).get_factory()
     except Exception as error:
-        logger.fatal(f"Failed to get factory for contract {address}: {error}")
+        logger.fatal(
+            "Failed to get factory for contract {}: {}".format(
+                constants.UNISWAP_V2_FACTORY_CONTRACT_ADDRESS, error
+            )
+        )
 
 
 def get_token_price_in_wei(client: Web3, token_address: str) -> int:
@@ -75,17 +137,10 @@ def get_token_price_in_wei(client: Web3, token_address: str) -> int:
     """
 
     try:
-        router = get_router(client)
-
-        path = [
-            client.to_checksum_address(token_address),
-            client.to_checksum_address(constants.WETH_CONTRACT_ADDRESS),
-        ]
-
-        return router.functions.getAmountsOut(
-            client.to_wei(1, "ether"),
-            path,
-        ).call()[-1]
+        return async_client.call(client, async_get_token_price_in_wei, token_address)
+    except errors.TransientError:
+        # Retried by the provider already, the caller skips its tick.
+        raise
     except Exception as error:
         logger.fatal(f"Failed to get token price: {error}")
 
@@ -99,19 +154,12 @@ def get_token_liquidity_in_wei(client: Web3, token_address: str) -> int:
     """
 
     try:
-        factory = get_factory(client)
-
-        pair_address = factory.functions.getPair(
-            client.to_checksum_address(constants.WETH_CONTRACT_ADDRESS),
-            client.to_checksum_address(token_address),
-        ).call()
-
-        pair = client.eth.contract(
-            address=pair_address,
-            abi=get_abi(pair_address),
+        return async_client.call(
+            client, async_get_token_liquidity_in_wei, token_address
         )
-
-        return pair.functions.getReserves().call()[0]
+    except errors.TransientError:
+        # Retried by the provider already, the caller skips its tick.
+        raise
     except Exception as error:
         logger.fatal(f"Failed to get token liquidity: {error}")
 
@@ -125,15 +173,72 @@ def get_token_balance(client: Web3, token_address: str) -> int:
     """
 
     try:
-        return (
-            client.eth.contract(
-                address=client.to_checksum_address(token_address),
-                abi=get_abi(token_address),
-            )
-            .functions.balanceOf(
-                client.to_checksum_address(environment.get_public_key())
-            )
-            .call()
-        )
+        return async_client.call(client, async_get_token_balance, token_address)
+    except errors.TransientError:
+        # Retried by the provider already, the caller skips its tick.
+        raise
     except Exception as error:
         logger.fatal(f"Failed to get token balance: {error}")
+
+
+@metrics.timed("stage_duration_seconds", stage="price")
+async def async_get_token_price_in_wei(client: AsyncWeb3, token_address: str) -> int:
+    """Get the token price in WEI.
+
+    :param AsyncWeb3 client: The AsyncWeb3 client.
+    :param str token_address: The token address.
+    :return int: The token price in WEI.
+    """
+
+    weth_reserve, token_reserve = await _async_get_reserves(client, token_address)
+
+    return quote.get_amount_out(client.to_wei(1, "ether"), token_reserve, weth_reserve)
+
+
+@metrics.timed("stage_duration_seconds", stage="liquidity")
+async def async_get_token_liquidity_in_wei(
+    client: AsyncWeb3,
+    token_address: str,
+) -> int:
+    """Get the token liquidity in WEI.
+
+    :param AsyncWeb3 client: The AsyncWeb3 client.
+    :param str token_address: The token address.
+    :return int: The token liquidity in WEI.
+    """
+
+    return (await _async_get_reserves(client, token_address))[0]
+
+
+@metrics.timed("stage_duration_seconds", stage="balance")
+async def async_get_token_balance(client: AsyncWeb3, token_address: str) -> int:
+    """Get the token balance of the wallet.
+
+    :param AsyncWeb3 client: The AsyncWeb3 client.
+    :param str token_address: The token address.
+    :return int: The token balance.
+    """
+
+    return (
+        await registry.get_registry(client)
+        .get_token(token_address)
+        .functions.balanceOf(registry.to_checksum_address(environment.get_public_key()))
+        .call()
+    )
+
+
+async def _async_get_reserves(
+    client: AsyncWeb3,
+    token_address: str,
+) -> tuple[int, int]:
+    """Get the reserves of the WETH pair of a token.
+
+    :param AsyncWeb3 client: The AsyncWeb3 client.
+    :param str token_address: The token address.
+    :return tuple[int, int]: The WETH reserve and the token reserve.
+    """
+
+    pair = await registry.get_registry(client).get_pair(token_address)
+    reserve0, reserve1, _ = await pair.functions.getReserves().call()
+
+    return snapshot.sort_reserves(token_address, reserve0, reserve1)
@@ -0,0 +1,2 @@
+# The strategies register themselves when their module is imported.
+from jobs import example_job, trailing_stop  # noqa: F401
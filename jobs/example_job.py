@@ -1,32 +1,52 @@
-from web3 import Web3
+from helpers import constants, models, snapshot, strategy
 
-from helpers import utils, models, signals
 
-
-def example_job(
-    client: Web3,
-    token_address: str,
-    initial_price_in_wei: int,
-) -> tuple[models.TransactionType, int, int, str | None]:
+@strategy.register
+class ExampleStrategy(strategy.Strategy):
     """Test trading strategy.
 
-    - If the price increase by 2%, sell 100%.
-
-    :param Web3 client: The Web3 client.
-    :param str token_address: The token address.
-    :param int initial_price_in_wei: The initial price in WEI.
-    :return tuple[models.TransactionType, int, int, str | None]: The transaction type,
-        current price, token balance, and transaction hash.
+    - If the price increase by `take_profit_percent`, sell 100%.
     """
 
-    current_price = utils.get_token_price_in_wei(client, token_address)
-    token_balance = utils.get_token_balance(client, token_address)
-
-    try:
-        if current_price >= initial_price_in_wei * 1.02:
-            txn_hash = signals.sell(client, token_address, token_balance)
-            return (models.TransactionType.SELL, current_price, token_balance, txn_hash)
-
-        return (models.TransactionType.HOLD, current_price, token_balance, None)
-    except Exception as error:
-        return (models.TransactionType.ERROR, current_price, token_address, error)
+    name = "example"
+
+    def __init__(
+        self,
+        token_address: str,
+        initial_price_in_wei: int,
+        take_profit_percent: int | float = 2,
+        slippage_percent: int | float = constants.SLIPPAGE_PERCENT,
+    ) -> None:
+        super().__init__(token_address, initial_price_in_wei)
+        self.take_profit_percent = take_profit_percent
+        self.slippage_percent = slippage_percent
+
+    def on_tick(
+        self, market_snapshot: snapshot.MarketSnapshot
+    ) -> tuple[models.TransactionType, int, int, str | None]:
+        """Sell everything once the price is up by `take_profit_percent`.
+
+        :param snapshot.MarketSnapshot market_snapshot: The market snapshot.
+        :return tuple[models.TransactionType, int, int, str | None]: The transaction
+            type, current price, token balance, and transaction hash.
+        """
+
+        current_price = market_snapshot.price_in_wei
+        target_price = self.initial_price_in_wei * (1 + self.take_profit_percent / 100)
+
+        try:
+            if current_price >= target_price:
+                return self.sell_all(market_snapshot, self.slippage_percent)
+
+            return self.hold(market_snapshot)
+        except Exception as error:
+            return (
+                models.TransactionType.ERROR,
+                current_price,
+                market_snapshot.token_balance,
+                error,
+            )
+
+
+# The job of the strategy, called like a function by the engine and backtests.
+example_job = strategy.StrategyJob(ExampleStrategy)
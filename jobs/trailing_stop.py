@@ -0,0 +1,75 @@
+from helpers import constants, indicators, models, snapshot, strategy
+
+
+@strategy.register
+class TrailingStopStrategy(strategy.Strategy):
+    """Trailing stop strategy.
+
+    - If the price falls below its highest price of the last `window` ticks by
+      more than `stop_percent`, or by more than `volatility_multiplier` times the
+      volatility of the tick returns, and below its EMA, sell 100%.
+    """
+
+    name = "trailing_stop"
+
+    def __init__(
+        self,
+        token_address: str,
+        initial_price_in_wei: int,
+        window: int = 300,
+        stop_percent: int | float = 5,
+        volatility_multiplier: int | float = 3,
+        ema_span: int = 20,
+        slippage_percent: int | float = constants.SLIPPAGE_PERCENT,
+    ) -> None:
+        super().__init__(token_address, initial_price_in_wei)
+        self.stop_percent = stop_percent
+        self.volatility_multiplier = volatility_multiplier
+        self.slippage_percent = slippage_percent
+
+        self.high = indicators.RollingMax(window)
+        self.ema = indicators.EMA(ema_span)
+        self.volatility = indicators.Volatility(window)
+
+        self._last_price = None
+
+    def on_tick(
+        self, market_snapshot: snapshot.MarketSnapshot
+    ) -> tuple[models.TransactionType, int, int, str | None]:
+        """Sell everything once the price falls past its trailing stop.
+
+        :param snapshot.MarketSnapshot market_snapshot: The market snapshot.
+        :return tuple[models.TransactionType, int, int, str | None]: The transaction
+            type, current price, token balance, and transaction hash.
+        """
+
+        current_price = market_snapshot.price_in_wei
+        high = self.high.update(current_price)
+        ema = self.ema.update(current_price)
+
+        if self._last_price:
+            self.volatility.update(current_price / self._last_price - 1)
+
+        self._last_price = current_price
+
+        stop_percent = max(
+            self.stop_percent,
+            self.volatility_multiplier * (self.volatility.value or 0) * 100,
+        )
+
+        try:
+            if (
+                market_snapshot.token_balance > 0
+                and current_price < high * (1 - stop_percent / 100)
+                and current_price < ema
+            ):
+                return self.sell_all(market_snapshot, self.slippage_percent)
+
+            return self.hold(market_snapshot)
+        except Exception as error:
+            return (
+                models.TransactionType.ERROR,
+                current_price,
+                market_snapshot.token_balance,
+                error,
+            )
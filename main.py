@@ -1,9 +1,21 @@
 import os
+import threading
 import dotenv
-import time
 
-from helpers import environment, logger, models, signals, utils
-from jobs.example_job import example_job
+from helpers import (
+    engine,
+    environment,
+    errors,
+    logger,
+    metrics,
+    models,
+    price_feed,
+    signals,
+    snapshot,
+    strategy,
+    utils,
+)
+import jobs  # noqa: F401, registers the strategies
 
 if os.path.exists("env/local.env") and not environment.get_websocket_uri():
     dotenv.load_dotenv(dotenv_path="env/local.env")
@@ -15,25 +27,40 @@ BUY_AT_START = False
 def main() -> None:
     """Run the main job."""
 
+    if environment.get_metrics_port() is not None:
+        metrics.start_server(environment.get_metrics_port())
+
     client = utils.get_client()
-    if not client.is_connected():
+    token_address = environment.get_token_address()
+
+    if not client.is_address(token_address):
+        raise ValueError(f"Invalid token address: {token_address}")
+
+    if environment.get_prewarm():
+        connected = utils.prewarm(client, [token_address])
+    else:
+        connected = client.is_connected()
+
+    if not connected:
         raise ConnectionError(
             "Failed to connect to client with RPC_URL={}".format(
                 environment.get_rpc_url()
             )
         )
 
-    token_address = environment.get_token_address()
-
-    if not client.is_address(token_address):
-        raise ValueError(f"Invalid token address: {token_address}")
-
-    initial_price_in_wei = utils.get_token_price_in_wei(client, token_address)
+    initial_snapshot = snapshot.get_market_snapshot(client, token_address)
+    initial_price_in_wei = initial_snapshot.price_in_wei
+    job = strategy.get_job(environment.get_strategy_name())
 
-    logger.info("Running default_job")
+    logger.info(f"Running the {job.strategy_class.name} strategy")
 
     if BUY_AT_START:
-        txn_hash = signals.buy(client, token_address, client.to_wei(0.002, "ether"))
+        txn_hash = signals.buy(
+            client,
+            token_address,
+            client.to_wei(0.002, "ether"),
+            market_snapshot=initial_snapshot,
+        )
         current_price_in_eth = client.from_wei(initial_price_in_wei, "ether")
         price_change_percent = (
             (current_price_in_eth - client.from_wei(initial_price_in_wei, "ether"))
@@ -47,31 +74,59 @@ def main() -> None:
             txn_hash,
         )
 
-    while True:
+    def run_job() -> None:
+        """Run the job, called on start and every time the reserves change."""
+
         try:
-            transaction_type, current_price_in_wei, _, message = example_job(
-                client, token_address, initial_price_in_wei
-            )
+            market_snapshot = snapshot.get_market_snapshot(client, token_address)
+        except Exception as error:
+            if not errors.is_transient(error):
+                logger.fatal(error)
 
-            price_change_percent = (
-                (current_price_in_wei - initial_price_in_wei) / initial_price_in_wei
-            ) * 100
+            logger.error(f"Skipped the tick: {error}")
+            return
 
-            liquidity_in_wei = utils.get_token_liquidity_in_wei(client, token_address)
+        engine.run_job(
+            client, job, token_address, initial_price_in_wei, market_snapshot
+        )
 
-            logger.txn(
-                transaction_type,
-                current_price_in_wei,
-                price_change_percent,
-                liquidity_in_wei,
-                message,
-            )
+        if environment.get_armed_exits():
+            try:
+                signals.arm_exits(client, [token_address])
+            except Exception as error:
+                logger.error(f"Failed to arm the exit: {error}")
 
-        except Exception as error:
-            logger.fatal(error)
-            break
+    changed = threading.Event()
+    failures = []
+
+    def run_ticks() -> None:
+        """Run the job after every change, out of the lock and loop of the feed.
 
-    time.sleep(60)
+        The changes made during a tick are coalesced into the next one.
+        """
+
+        try:
+            while True:
+                changed.wait()
+                changed.clear()
+
+                run_job()
+        except SystemExit as error:
+            # Raised by logger.fatal, the job exits once the feed is stopped.
+            failures.append(error)
+            feed.stop()
+
+    feed = price_feed.ReserveFeed(
+        client, lambda *_: changed.set(), environment.get_rpc_websocket_url()
+    )
+    feed.track(initial_snapshot.pair_address)
+
+    run_job()
+    threading.Thread(target=run_ticks, daemon=True).start()
+    feed.run()
+
+    if failures:
+        raise failures[0]
 
 
 if __name__ == "__main__":
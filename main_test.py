@@ -1,11 +1,169 @@
 import dotenv
 
 from helpers import environment, utils
-from tests import utils_test
+from tests import (
+    abi_cache_test,
+    allowance_test,
+    armed_exit_test,
+    async_client_test,
+    backtest_test,
+    circuit_breaker_test,
+    engine_test,
+    gas_oracle_test,
+    indicators_test,
+    journal_test,
+    log_hub_test,
+    logger_test,
+    metrics_test,
+    multi_provider_test,
+    notifier_test,
+    orchestrator_test,
+    price_feed_test,
+    quote_test,
+    registry_test,
+    retry_test,
+    rpc_middleware_test,
+    signals_test,
+    snapshot_test,
+    startup_test,
+    strategy_test,
+    sweep_test,
+    utils_test,
+)
 
 dotenv.load_dotenv(dotenv_path="env/local.env")
 
 print("Env loaded")
+print("Running logger tests")
+
+logger_test.run_all_tests()
+
+print("Finished logger tests")
+print("Running abi_cache tests")
+
+abi_cache_test.run_all_tests()
+
+print("Finished abi_cache tests")
+print("Running registry tests")
+
+registry_test.run_all_tests()
+
+print("Finished registry tests")
+print("Running quote tests")
+
+quote_test.run_all_tests()
+
+print("Finished quote tests")
+print("Running snapshot tests")
+
+snapshot_test.run_all_tests()
+
+print("Finished snapshot tests")
+print("Running price_feed tests")
+
+price_feed_test.run_all_tests()
+
+print("Finished price_feed tests")
+print("Running engine tests")
+
+engine_test.run_all_tests()
+
+print("Finished engine tests")
+print("Running journal tests")
+
+journal_test.run_all_tests()
+
+print("Finished journal tests")
+print("Running backtest tests")
+
+backtest_test.run_all_tests()
+
+print("Finished backtest tests")
+print("Running sweep tests")
+
+sweep_test.run_all_tests()
+
+print("Finished sweep tests")
+print("Running indicators tests")
+
+indicators_test.run_all_tests()
+
+print("Finished indicators tests")
+print("Running strategy tests")
+
+strategy_test.run_all_tests()
+
+print("Finished strategy tests")
+print("Running signals tests")
+
+signals_test.run_all_tests()
+
+print("Finished signals tests")
+print("Running allowance tests")
+
+allowance_test.run_all_tests()
+
+print("Finished allowance tests")
+print("Running gas_oracle tests")
+
+gas_oracle_test.run_all_tests()
+
+print("Finished gas_oracle tests")
+print("Running armed_exit tests")
+
+armed_exit_test.run_all_tests()
+
+print("Finished armed_exit tests")
+print("Running async_client tests")
+
+async_client_test.run_all_tests()
+
+print("Finished async_client tests")
+print("Running rpc_middleware tests")
+
+rpc_middleware_test.run_all_tests()
+
+print("Finished rpc_middleware tests")
+print("Running multi_provider tests")
+
+multi_provider_test.run_all_tests()
+
+print("Finished multi_provider tests")
+print("Running retry tests")
+
+retry_test.run_all_tests()
+
+print("Finished retry tests")
+print("Running circuit_breaker tests")
+
+circuit_breaker_test.run_all_tests()
+
+print("Finished circuit_breaker tests")
+print("Running metrics tests")
+
+metrics_test.run_all_tests()
+
+print("Finished metrics tests")
+print("Running log_hub tests")
+
+log_hub_test.run_all_tests()
+
+print("Finished log_hub tests")
+print("Running notifier tests")
+
+notifier_test.run_all_tests()
+
+print("Finished notifier tests")
+print("Running orchestrator tests")
+
+orchestrator_test.run_all_tests()
+
+print("Finished orchestrator tests")
+print("Running startup tests")
+
+startup_test.run_all_tests()
+
+print("Finished startup tests")
 print("Connecting to client")
 
 client = utils.get_client()
@@ -0,0 +1,118 @@
+import os
+import tempfile
+
+from helpers import abi_cache, constants
+from tests.fake_etherscan import FakeEtherscan
+
+TOKEN_ADDRESS = "0x6B175474E89094C44Da98b954EedeAC495271d0F"
+
+
+def _get_names(abi: list) -> set[str]:
+    """Get the names of the functions and events of an ABI.
+
+    :param list abi: The ABI.
+    :return set[str]: The names.
+    """
+
+    return {item.get("name") for item in abi}
+
+
+def _get_bundled_abi_test() -> None:
+    """Test that the router, factory, pair and ERC-20 ABIs are bundled.
+
+    :return None:
+    """
+
+    print("Test: get_bundled_abi")
+
+    with FakeEtherscan() as etherscan:
+        router_abi = abi_cache.get_abi(constants.UNISWAP_V2_ROUTER_CONTRACT_ADDRESS)
+        factory_abi = abi_cache.get_abi(constants.UNISWAP_V2_FACTORY_CONTRACT_ADDRESS)
+        pair_abi = abi_cache.get_abi(TOKEN_ADDRESS, abi_cache.UNISWAP_V2_PAIR_ABI)
+        token_abi = abi_cache.get_abi(TOKEN_ADDRESS, abi_cache.ERC20_ABI)
+
+    assert "getAmountsOut" in _get_names(router_abi), "Router ABI is incomplete"
+    assert "getPair" in _get_names(factory_abi), "Factory ABI is incomplete"
+    assert "getReserves" in _get_names(pair_abi), "Pair ABI is incomplete"
+    assert "balanceOf" in _get_names(token_abi), "ERC-20 ABI is incomplete"
+    assert not etherscan.requests, "Bundled ABIs were fetched from Etherscan"
+
+    print("Test: get_bundled_abi passed")
+
+
+def _get_abi_disk_cache_test() -> None:
+    """Test that an unknown ABI is fetched once and then served from disk.
+
+    :return None:
+    """
+
+    print("Test: get_abi disk cache")
+
+    with tempfile.TemporaryDirectory() as cache_dir, FakeEtherscan() as etherscan:
+        os.environ["CACHE_DIR"] = cache_dir
+        os.environ.setdefault("ETHERSCAN_API_KEY", "test")
+        abi_cache.clear()
+
+        try:
+            abi = abi_cache.get_abi(TOKEN_ADDRESS)
+            assert len(etherscan.requests) == 1, "ABI was not fetched from Etherscan"
+
+            assert abi_cache.get_abi(TOKEN_ADDRESS) == abi, "LRU returned another ABI"
+            assert len(etherscan.requests) == 1, "ABI was not served from the LRU"
+
+            # A fresh process only has the disk cache.
+            abi_cache.clear()
+
+            assert abi_cache.get_abi(TOKEN_ADDRESS) == abi, "Disk returned another ABI"
+            assert len(etherscan.requests) == 1, "ABI was not served from disk"
+
+            objects = os.listdir(os.path.join(cache_dir, "abi", "objects"))
+            assert len(objects) == 1, "ABI object was not written"
+        finally:
+            del os.environ["CACHE_DIR"]
+            abi_cache.clear()
+
+    print("Test: get_abi disk cache passed")
+
+
+def _get_abi_corrupted_cache_test() -> None:
+    """Test that a corrupted ABI object is refetched from Etherscan.
+
+    :return None:
+    """
+
+    print("Test: get_abi corrupted cache")
+
+    with tempfile.TemporaryDirectory() as cache_dir, FakeEtherscan() as etherscan:
+        os.environ["CACHE_DIR"] = cache_dir
+        os.environ.setdefault("ETHERSCAN_API_KEY", "test")
+        abi_cache.clear()
+
+        try:
+            abi = abi_cache.get_abi(TOKEN_ADDRESS)
+
+            objects_dir = os.path.join(cache_dir, "abi", "objects")
+            for name in os.listdir(objects_dir):
+                with open(os.path.join(objects_dir, name), "w") as file:
+                    file.write("[]")
+
+            abi_cache.clear()
+
+            assert abi_cache.get_abi(TOKEN_ADDRESS) == abi, "Corrupted ABI was used"
+            assert len(etherscan.requests) == 2, "Corrupted ABI was not refetched"
+        finally:
+            del os.environ["CACHE_DIR"]
+            abi_cache.clear()
+
+    print("Test: get_abi corrupted cache passed")
+
+
+def run_all_tests() -> None:
+    """Run all abi_cache tests.
+
+    :return None:
+    """
+
+    _get_bundled_abi_test()
+    _get_abi_disk_cache_test()
+    _get_abi_corrupted_cache_test()
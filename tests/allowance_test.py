@@ -0,0 +1,196 @@
+import asyncio
+import os
+
+from eth_account import Account
+from eth_account.messages import encode_typed_data
+
+from helpers import (
+    allowance,
+    async_client,
+    constants,
+    registry,
+    rpc_middleware,
+    signals,
+    snapshot,
+)
+from tests.fake_node import WALLET_PRIVATE_KEY, WALLET_PUBLIC_KEY, FakeNode
+
+TOKEN_ADDRESSES = (
+    "0x6B175474E89094C44Da98b954EedeAC495271d0F",
+    "0xdAC17F958D2ee523a2206206994597C13D831ec7",
+)
+PAIR_ADDRESS = "0xA478c2975Ab1Ea89e8196811F51A7B7Ade33eB11"
+AMOUNT = 10**18
+
+
+def _set_up_node(node: FakeNode) -> None:
+    """Give the wallet tokens to sell, and the token its pair.
+
+    :param FakeNode node: The fake node.
+    :return None:
+    """
+
+    node.set_pair(TOKEN_ADDRESSES[0], PAIR_ADDRESS, 50 * 10**18, 10**24)
+    node.token_balances[(TOKEN_ADDRESSES[0].lower(), WALLET_PUBLIC_KEY.lower())] = (
+        10 * AMOUNT
+    )
+
+    os.environ["RPC_URL"] = node.url
+    os.environ["WALLET_ADDRESS"] = WALLET_PRIVATE_KEY
+
+
+async def _sell(node: FakeNode, market_snapshot=None) -> int:
+    """Sell an amount of the token and mine it.
+
+    :param FakeNode node: The fake node.
+    :param snapshot.MarketSnapshot | None market_snapshot: The market snapshot,
+        read at the latest block if not given.
+    :return int: The number of transactions the sale sent.
+    """
+
+    client = await async_client.get_async_client()
+    transactions = len(node.transactions)
+
+    pending_txn = await signals.async_submit_sell(
+        client, TOKEN_ADDRESSES[0], AMOUNT, market_snapshot=market_snapshot
+    )
+
+    node.mine()
+    receipt = await asyncio.wait_for(pending_txn.receipt, 5)
+
+    assert receipt["status"] == 1, "Swap failed"
+
+    return len(node.transactions) - transactions
+
+
+async def _unlimited_approval_test() -> None:
+    """Test that a single unlimited approval is sent for all the sales.
+
+    :return None:
+    """
+
+    print("Test: unlimited approval")
+
+    with FakeNode() as node:
+        _set_up_node(node)
+
+        assert await _sell(node) == 2, "No approval before the first sale"
+        assert await _sell(node) == 1, "Approved again"
+        assert await _sell(node) == 1, "Approved again"
+
+        client = await async_client.get_async_client()
+        rpc_middleware.new_head(client, node.block_number)
+        market_snapshot = await snapshot.async_get_market_snapshot(
+            client, TOKEN_ADDRESSES[0]
+        )
+
+        assert (
+            market_snapshot.router_allowance == constants.MAX_UINT256
+        ), "Wrong allowance in the snapshot"
+
+    print("Test: unlimited approval passed")
+
+
+async def _approval_cap_test() -> None:
+    """Test that the cap is approved again once spent, from stale snapshots too.
+
+    :return None:
+    """
+
+    print("Test: approval cap")
+
+    os.environ["APPROVAL_CAP"] = str(2 * AMOUNT)
+
+    try:
+        with FakeNode() as node:
+            _set_up_node(node)
+            client = await async_client.get_async_client()
+
+            # The snapshot is read before the approval, the spent allowance is
+            # remembered locally.
+            market_snapshot = await snapshot.async_get_market_snapshot(
+                client, TOKEN_ADDRESSES[0]
+            )
+
+            assert [await _sell(node, market_snapshot) for _ in range(3)] == [2, 1, 2]
+            assert (
+                await registry.get_registry(client)
+                .get_token(TOKEN_ADDRESSES[0])
+                .functions.allowance(
+                    WALLET_PUBLIC_KEY, constants.UNISWAP_V2_ROUTER_CONTRACT_ADDRESS
+                )
+                .call()
+                == AMOUNT
+            ), "Wrong allowance"
+    finally:
+        os.environ.pop("APPROVAL_CAP")
+
+    print("Test: approval cap passed")
+
+
+async def _permit_test() -> None:
+    """Test that permits are signed for the tokens supporting EIP-2612 only.
+
+    :return None:
+    """
+
+    print("Test: permit")
+
+    with FakeNode() as node:
+        _set_up_node(node)
+        node.permit_tokens.add(TOKEN_ADDRESSES[1].lower())
+        client = await async_client.get_async_client()
+
+        assert (
+            await allowance.async_get_permit_version(client, TOKEN_ADDRESSES[1]) == "1"
+        )
+        assert (
+            await allowance.async_get_permit_version(client, TOKEN_ADDRESSES[0]) is None
+        ), "Permit without EIP-2612"
+
+        v, r, s = await allowance.async_sign_permit(
+            client,
+            TOKEN_ADDRESSES[1],
+            constants.UNISWAP_V2_ROUTER_CONTRACT_ADDRESS,
+            AMOUNT,
+            node.timestamp + 60,
+        )
+
+        signer = Account.recover_message(
+            encode_typed_data(
+                {
+                    "name": "Fake Token",
+                    "version": "1",
+                    "chainId": node.chain_id,
+                    "verifyingContract": TOKEN_ADDRESSES[1],
+                },
+                allowance.PERMIT_TYPES,
+                {
+                    "owner": WALLET_PUBLIC_KEY,
+                    "spender": constants.UNISWAP_V2_ROUTER_CONTRACT_ADDRESS,
+                    "value": AMOUNT,
+                    "nonce": 0,
+                    "deadline": node.timestamp + 60,
+                },
+            ),
+            vrs=(v, r, s),
+        )
+
+        assert signer == WALLET_PUBLIC_KEY, "Wrong permit signer"
+
+    print("Test: permit passed")
+
+
+async def _run_all_tests() -> None:
+    await _unlimited_approval_test()
+    await _approval_cap_test()
+    await _permit_test()
+
+
+def run_all_tests() -> None:
+    """Run all allowance tests.
+
+    :return None:
+    """
+
+    asyncio.run(_run_all_tests())
@@ -0,0 +1,259 @@
+import asyncio
+import os
+import tempfile
+
+from eth_utils import keccak
+from helpers import (
+    armed_exit,
+    async_client,
+    engine,
+    environment,
+    journal,
+    rpc_middleware,
+    signals,
+    snapshot,
+    utils,
+)
+from tests.engine_test import _RecordingJob, _wait_for
+from tests.fake_node import FakeNode
+from tests.signals_test import TOKEN_ADDRESSES, TOKEN_BALANCE, _set_up_node
+
+
+async def _arm(node: FakeNode) -> list[armed_exit.ArmedExit]:
+    """Arm the exit of the first token, with its approval mined.
+
+    :param FakeNode node: The fake node.
+    :return list[armed_exit.ArmedExit]: The armed exits.
+    """
+
+    client = await async_client.get_async_client()
+    armed_exits = await signals.async_arm_exits(client, [TOKEN_ADDRESSES[0]])
+
+    node.mine()
+    await asyncio.sleep(0.2)
+
+    return armed_exits
+
+
+async def _get_tick(node: FakeNode) -> snapshot.MarketSnapshot:
+    """Get the market snapshot of the first token at the latest block.
+
+    :param FakeNode node: The fake node.
+    :return snapshot.MarketSnapshot: The market snapshot.
+    """
+
+    client = await async_client.get_async_client()
+    rpc_middleware.new_head(client, node.block_number)
+
+    return await snapshot.async_get_market_snapshot(client, TOKEN_ADDRESSES[0])
+
+
+async def _fire(
+    node: FakeNode, market_snapshot: snapshot.MarketSnapshot, amount_in_wei: int
+) -> tuple[dict, list[str]]:
+    """Sell the first token on a tick and wait for the swap to be mined.
+
+    :param FakeNode node: The fake node.
+    :param snapshot.MarketSnapshot market_snapshot: The market snapshot of the
+        tick.
+    :param int amount_in_wei: The amount in wei to sell.
+    :return tuple[dict, list[str]]: The mined swap, and the JSON-RPC methods
+        requested before it was sent.
+    """
+
+    client = await async_client.get_async_client()
+    requests = len(node.requests)
+
+    pending_txn = await signals.async_submit_sell(
+        client, TOKEN_ADDRESSES[0], amount_in_wei, market_snapshot=market_snapshot
+    )
+    # The receipts of the other transactions are polled in the background.
+    methods = [
+        method
+        for method in node.requests[requests:]
+        if method != "eth_getTransactionReceipt"
+    ]
+
+    node.mine()
+    receipt = await asyncio.wait_for(pending_txn.receipt, 5)
+
+    assert receipt["status"] == 1, "Swap failed"
+
+    return node.transactions[pending_txn.txn_hash.to_0x_hex()], methods
+
+
+async def _fire_test() -> None:
+    """Test that an armed exit is sent with a single request.
+
+    :return None:
+    """
+
+    print("Test: fire")
+
+    with FakeNode() as node:
+        _set_up_node(node)
+        armed_exits = await _arm(node)
+
+        assert [armed_exit.amount_in_wei for armed_exit in armed_exits] == [
+            TOKEN_BALANCE
+        ], "Wrong armed exits"
+
+        txn, methods = await _fire(node, await _get_tick(node), TOKEN_BALANCE)
+
+        assert methods == ["eth_sendRawTransaction"], f"Requested {methods}"
+        assert (
+            txn["hash"] == "0x" + keccak(armed_exits[0].raw_transaction).hex()
+        ), "Signed again"
+        assert txn["nonce"] == 1, "Wrong nonce"
+        assert (
+            armed_exit.get_armory(environment.get_public_key()).get(TOKEN_ADDRESSES[0])
+            is None
+        ), "Fired twice"
+
+    print("Test: fire passed")
+
+
+async def _used_nonce_test() -> None:
+    """Test that an armed exit whose nonce was handed out is signed again.
+
+    :return None:
+    """
+
+    print("Test: used nonce")
+
+    with FakeNode() as node:
+        _set_up_node(node)
+        await _arm(node)
+
+        client = await async_client.get_async_client()
+        market_snapshot = await _get_tick(node)
+        pending_txn = await signals.async_submit_buy(
+            client, TOKEN_ADDRESSES[1], 10**17, market_snapshot=market_snapshot
+        )
+        txn, methods = await _fire(node, market_snapshot, TOKEN_BALANCE)
+
+        assert methods == ["eth_sendRawTransaction"], f"Requested {methods}"
+        assert (
+            node.transactions[pending_txn.txn_hash.to_0x_hex()]["nonce"] == 1
+        ), "Wrong nonce"
+        assert txn["nonce"] == 2, "Nonce collided"
+
+    print("Test: used nonce passed")
+
+
+async def _moved_reserves_test() -> None:
+    """Test that the minimum output of an armed exit follows the reserves.
+
+    :return None:
+    """
+
+    print("Test: moved reserves")
+
+    with FakeNode() as node:
+        _set_up_node(node)
+        armed_exits = await _arm(node)
+
+        node.sync(TOKEN_ADDRESSES[0], 40 * 10**18, 125 * 10**22)
+        node.mine()
+
+        txn, methods = await _fire(node, await _get_tick(node), TOKEN_BALANCE)
+        amount_out_min = node._decode_call(txn["data"])[1][1]
+
+        assert methods == ["eth_sendRawTransaction"], f"Requested {methods}"
+        assert (
+            amount_out_min < armed_exits[0].amount_out_min
+        ), "Minimum output not updated"
+
+    print("Test: moved reserves passed")
+
+
+async def _partial_sell_test() -> None:
+    """Test that a sale of part of a position does not send its armed exit.
+
+    :return None:
+    """
+
+    print("Test: partial sell")
+
+    with FakeNode() as node:
+        _set_up_node(node)
+        await _arm(node)
+
+        txn, methods = await _fire(node, await _get_tick(node), TOKEN_BALANCE // 2)
+
+        assert node._decode_call(txn["data"])[1][0] == TOKEN_BALANCE // 2
+        assert "eth_estimateGas" in methods, "Armed exit sent"
+        assert (
+            armed_exit.get_armory(environment.get_public_key()).get(TOKEN_ADDRESSES[0])
+            is None
+        ), "Stale exit still armed"
+
+    print("Test: partial sell passed")
+
+
+async def _get_armed_exit(token_address: str) -> armed_exit.ArmedExit | None:
+    """Get the armed exit of a token in the running event loop.
+
+    :param str token_address: The token address.
+    :return armed_exit.ArmedExit | None: The armed exit.
+    """
+
+    return armed_exit.get_armory(environment.get_public_key()).get(token_address)
+
+
+async def _engine_test() -> None:
+    """Test that the engine arms the exits of its tokens again on new blocks.
+
+    :return None:
+    """
+
+    print("Test: engine")
+
+    with FakeNode() as node, tempfile.TemporaryDirectory() as journal_dir:
+        os.environ["JOURNAL_DIR"] = journal_dir
+        node.block_number = 100
+        _set_up_node(node)
+
+        trading_engine = engine.Engine(
+            utils.get_client(), _RecordingJob(), poll_interval=0.01, armed_exits=True
+        )
+        engine_task = asyncio.create_task(trading_engine.run())
+
+        # Sync code, like the jobs, sends from the background event loop.
+        def get_armed_block() -> int | None:
+            exit_txn = async_client.run(_get_armed_exit(TOKEN_ADDRESSES[0]))
+            return exit_txn and exit_txn.block_number
+
+        try:
+            await trading_engine.add_token(TOKEN_ADDRESSES[0])
+            await _wait_for(lambda: get_armed_block() == node.block_number)
+
+            node.sync(TOKEN_ADDRESSES[0], 51 * 10**18, 10**24 - 10**21)
+            node.mine()
+
+            await _wait_for(lambda: get_armed_block() == node.block_number)
+        finally:
+            trading_engine.stop()
+            await engine_task
+
+            journal.close()
+            os.environ.pop("JOURNAL_DIR")
+
+    print("Test: engine passed")
+
+
+async def _run_async_tests() -> None:
+    await _fire_test()
+    await _used_nonce_test()
+    await _moved_reserves_test()
+    await _partial_sell_test()
+    await _engine_test()
+
+
+def run_all_tests() -> None:
+    """Run all armed exit tests.
+
+    :return None:
+    """
+
+    asyncio.run(_run_async_tests())
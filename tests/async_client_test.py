@@ -0,0 +1,162 @@
+import asyncio
+import os
+import threading
+import time
+
+from helpers import async_client, constants, utils
+from tests.fake_node import WALLET_PRIVATE_KEY, WALLET_PUBLIC_KEY, FakeNode
+
+TOKEN_ADDRESS = "0x6B175474E89094C44Da98b954EedeAC495271d0F"
+PAIR_ADDRESS = "0xA478c2975Ab1Ea89e8196811F51A7B7Ade33eB11"
+
+
+def _set_up(node: FakeNode) -> None:
+    """Set the pair and balance of the token on the fake node.
+
+    :param FakeNode node: The fake node.
+    :return None:
+    """
+
+    node.set_pair(TOKEN_ADDRESS, PAIR_ADDRESS, 50 * 10**18, 2_000_000 * 10**18)
+    node.token_balances[(TOKEN_ADDRESS.lower(), WALLET_PUBLIC_KEY.lower())] = 42
+
+    os.environ["RPC_URL"] = node.url
+
+
+def _helpers_test() -> None:
+    """Test that the async helpers and their sync wrappers match the chain.
+
+    :return None:
+    """
+
+    print("Test: helpers")
+
+    with FakeNode() as node:
+        _set_up(node)
+
+        client = utils.get_client()
+
+        async def read() -> tuple:
+            async_web3 = await async_client.get_async_client()
+
+            return await asyncio.gather(
+                utils.async_get_token_price_in_wei(async_web3, TOKEN_ADDRESS),
+                utils.async_get_token_liquidity_in_wei(async_web3, TOKEN_ADDRESS),
+                utils.async_get_token_balance(async_web3, TOKEN_ADDRESS),
+            )
+
+        price, liquidity, balance = async_client.run(read())
+
+        assert (
+            price
+            == utils.get_router(client)
+            .functions.getAmountsOut(
+                10**18, [TOKEN_ADDRESS, constants.WETH_CONTRACT_ADDRESS]
+            )
+            .call()[-1]
+        ), "Price does not match the router"
+        assert liquidity == 50 * 10**18, "Wrong liquidity"
+        assert balance == 42, "Wrong balance"
+
+        assert utils.get_token_price_in_wei(client, TOKEN_ADDRESS) == price
+        assert utils.get_token_liquidity_in_wei(client, TOKEN_ADDRESS) == liquidity
+        assert utils.get_token_balance(client, TOKEN_ADDRESS) == balance
+
+    print("Test: helpers passed")
+
+
+def _concurrency_test() -> None:
+    """Test that independent reads run concurrently, from coroutines and threads.
+
+    :return None:
+    """
+
+    print("Test: concurrency")
+
+    with FakeNode(latency=0.1) as node:
+        _set_up(node)
+
+        client = utils.get_client()
+        utils.get_token_balance(client, TOKEN_ADDRESS)
+
+        async def read() -> list:
+            async_web3 = await async_client.get_async_client()
+
+            return await asyncio.gather(
+                *(
+                    utils.async_get_token_balance(async_web3, TOKEN_ADDRESS)
+                    for _ in range(20)
+                )
+            )
+
+        start = time.perf_counter()
+        balances = async_client.run(read())
+
+        assert balances == [42] * 20, "Wrong balances"
+        assert time.perf_counter() - start < 1, "Reads did not run concurrently"
+
+        # The sync wrappers of many threads share the background event loop.
+        results = []
+        threads = [
+            threading.Thread(
+                target=lambda: results.append(
+                    utils.get_token_balance(client, TOKEN_ADDRESS)
+                )
+            )
+            for _ in range(10)
+        ]
+
+        start = time.perf_counter()
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        assert results == [42] * 10, "Wrong balances"
+        assert time.perf_counter() - start < 0.5, "Threads did not run concurrently"
+
+    print("Test: concurrency passed")
+
+
+def _lifecycle_test() -> None:
+    """Test that an event loop creates a single client, closed when it shuts down.
+
+    :return None:
+    """
+
+    print("Test: lifecycle")
+
+    with FakeNode() as node:
+        _set_up(node)
+
+        async def create() -> tuple:
+            clients = await asyncio.gather(
+                *(async_client.get_async_client() for _ in range(10))
+            )
+            sessions = list(async_client._clients[asyncio.get_running_loop()].sessions)
+
+            return clients, sessions
+
+        clients, sessions = asyncio.run(create())
+        other_clients, _ = asyncio.run(create())
+
+        assert all(client is clients[0] for client in clients), "Many clients"
+        assert len(sessions) == 1, "Many sessions"
+        assert sessions[0].closed, "Session not closed"
+        assert other_clients[0] is not clients[0], "Client shared by two loops"
+
+    print("Test: lifecycle passed")
+
+
+def run_all_tests() -> None:
+    """Run all async_client tests.
+
+    :return None:
+    """
+
+    os.environ.setdefault("TOKEN_ADDRESS", TOKEN_ADDRESS)
+    os.environ.setdefault("WALLET_ADDRESS", WALLET_PRIVATE_KEY)
+
+    _helpers_test()
+    _concurrency_test()
+    _lifecycle_test()
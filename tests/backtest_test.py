@@ -0,0 +1,187 @@
+import json
+import os
+import tempfile
+
+from web3 import Web3
+
+from helpers import backtest, constants, models, quote
+from jobs.example_job import example_job
+
+# Its address is below the WETH address, so it is `token0` of its pair.
+TOKEN_ADDRESS = "0x6B175474E89094C44Da98b954EedeAC495271d0F"
+PAIR_ADDRESS = "0xA478c2975Ab1Ea89e8196811F51A7B7Ade33eB11"
+TOKEN_RESERVE = 10**24
+TOKEN_BALANCE = 10_000 * 10**18
+ETH_BALANCE = 10**18
+SELL_GAS_COST = (
+    constants.BACKTEST_APPROVE_GAS + constants.BACKTEST_SWAP_GAS
+) * Web3.to_wei(constants.BACKTEST_GAS_PRICE, "gwei")
+
+
+def _get_log(block_number: int, log_index: int, weth_reserve: int, **fields) -> dict:
+    """Build a raw `Sync` log of the pair.
+
+    :param int block_number: The block number.
+    :param int log_index: The log index.
+    :param int weth_reserve: The WETH reserve, the token reserve is constant.
+    :return dict: The log.
+    """
+
+    return {
+        "address": PAIR_ADDRESS,
+        "blockNumber": hex(block_number),
+        "logIndex": hex(log_index),
+        "blockTimestamp": hex(1_700_000_000 + block_number * 12),
+        "data": "0x"
+        + TOKEN_RESERVE.to_bytes(32).hex()
+        + weth_reserve.to_bytes(32).hex(),
+        **fields,
+    }
+
+
+def _load_events(directory: str, weth_reserves: list[int]):
+    """Write the logs of a WETH reserve per block and load them.
+
+    :param str directory: The directory of the file.
+    :param list[int] weth_reserves: The WETH reserve of every block, from block 1.
+    :return np.ndarray: The events.
+    """
+
+    path = os.path.join(directory, "sync.jsonl")
+
+    with open(path, "w") as file:
+        for block_number, weth_reserve in enumerate(weth_reserves, start=1):
+            file.write(json.dumps(_get_log(block_number, 0, weth_reserve)) + "\n")
+
+    return backtest.load_sync_events(path, TOKEN_ADDRESS)
+
+
+def _load_sync_events_test() -> None:
+    """Test that the last log of every block is loaded, in order.
+
+    :return None:
+    """
+
+    print("Test: load_sync_events")
+
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, "sync.jsonl")
+        logs = [
+            _get_log(3, 1, 53 * 10**18),
+            _get_log(1, 4, 50 * 10**18),
+            _get_log(2, 7, 52 * 10**18),
+            _get_log(2, 2, 51 * 10**18),
+            _get_log(3, 5, 54 * 10**18, removed=True),
+        ]
+
+        with open(path, "w") as file:
+            file.write("\n".join(json.dumps(log) for log in logs) + "\n")
+
+        events = backtest.load_sync_events(path, TOKEN_ADDRESS)
+
+        assert events.dtype == backtest.EVENT_DTYPE, "Wrong dtype"
+        assert list(events["block_number"]) == [1, 2, 3], "Wrong blocks"
+        assert list(events["weth_reserve_in_wei"]) == [
+            50e18,
+            52e18,
+            53e18,
+        ], "Wrong WETH reserves"
+        assert list(events["token_reserve"]) == [1e24] * 3, "Wrong token reserves"
+        assert events["timestamp"][0] == 1_700_000_012, "Wrong timestamp"
+
+    print("Test: load_sync_events passed")
+
+
+def _run_backtest_test() -> None:
+    """Test that the swaps of a job are filled and accounted for.
+
+    :return None:
+    """
+
+    print("Test: run_backtest")
+
+    with tempfile.TemporaryDirectory() as directory:
+        weth_reserves = [
+            50 * 10**18,
+            50 * 10**18,
+            52 * 10**18,
+            53 * 10**18,
+            49 * 10**18,
+        ]
+        events = _load_events(directory, weth_reserves)
+
+    result = backtest.run_backtest(
+        example_job, TOKEN_ADDRESS, events, ETH_BALANCE, TOKEN_BALANCE
+    )
+
+    # Sold at +4%, mined in the next block, then nothing is left to sell at +6%.
+    # The reserves are replayed as floats.
+    amount_out = quote.get_amount_out(
+        TOKEN_BALANCE, int(float(TOKEN_RESERVE)), 53 * 10**18
+    )
+
+    assert result.trade_count == 1, "Wrong trade count"
+    assert result.failed_trade_count == 0, "Wrong failed trade count"
+    assert result.error_count == 1, "Wrong error count"
+    assert result.trades[0] == backtest.Trade(
+        block_number=4,
+        transaction_type=models.TransactionType.SELL,
+        amount_in=TOKEN_BALANCE,
+        amount_out=amount_out,
+        gas_cost_in_wei=SELL_GAS_COST,
+        filled=True,
+    ), "Wrong trade"
+    assert result.gas_cost_in_wei == SELL_GAS_COST, "Wrong gas cost"
+    assert (
+        result.initial_equity_in_wei
+        == ETH_BALANCE + TOKEN_BALANCE * 50 * 10**18 // int(float(TOKEN_RESERVE))
+    )
+    assert result.final_equity_in_wei == ETH_BALANCE + amount_out - SELL_GAS_COST
+    assert result.pnl_in_wei > 0, "Wrong PnL"
+
+    print("Test: run_backtest passed")
+
+
+def _slippage_test() -> None:
+    """Test that a swap reverts when the price moves beyond the slippage.
+
+    :return None:
+    """
+
+    print("Test: slippage")
+
+    with tempfile.TemporaryDirectory() as directory:
+        events = _load_events(directory, [50 * 10**18, 52 * 10**18, 40 * 10**18])
+
+    result = backtest.run_backtest(
+        example_job, TOKEN_ADDRESS, events, ETH_BALANCE, TOKEN_BALANCE
+    )
+
+    assert result.trade_count == 0, "Reverted swap was filled"
+    assert result.failed_trade_count == 1, "Wrong failed trade count"
+    assert result.error_count == 1, "Revert was not returned to the job"
+    assert (
+        result.final_equity_in_wei
+        == ETH_BALANCE
+        - SELL_GAS_COST
+        + TOKEN_BALANCE * 40 * 10**18 // int(float(TOKEN_RESERVE))
+    ), "Wrong final equity"
+
+    # Held from 52 down to 40.
+    peak = ETH_BALANCE + TOKEN_BALANCE * 52 / 10**6
+    bottom = ETH_BALANCE + TOKEN_BALANCE * 40 / 10**6 - SELL_GAS_COST
+
+    assert abs(result.max_drawdown_percent - (peak - bottom) / peak * 100) < 1e-9
+
+    print("Test: slippage passed")
+
+
+def run_all_tests() -> None:
+    """Run all backtest tests.
+
+    :return None:
+    """
+
+    _load_sync_events_test()
+    _run_backtest_test()
+    _slippage_test()
@@ -0,0 +1,109 @@
+import time
+
+from web3 import Web3
+
+from helpers import circuit_breaker, constants, errors, multi_provider, retry
+from tests.fake_node import FakeNode
+
+
+def _state_test() -> None:
+    """Test that the breaker opens, lets one trial through and closes.
+
+    :return None:
+    """
+
+    print("Test: state")
+
+    breaker = circuit_breaker.CircuitBreaker(
+        failure_threshold=2, reset_timeout=0.05, max_reset_timeout=0.2
+    )
+
+    breaker.record_failure()
+
+    assert breaker.state == circuit_breaker.CLOSED, "Opened too early"
+    assert breaker.allow_request(), "Request refused"
+
+    breaker.record_failure()
+
+    assert breaker.state == circuit_breaker.OPEN, "Not opened"
+    assert not breaker.allow_request(), "Request allowed"
+
+    time.sleep(0.06)
+
+    assert breaker.state == circuit_breaker.HALF_OPEN, "Not half-open"
+    assert breaker.allow_request(), "Trial refused"
+    assert not breaker.allow_request(), "Second trial allowed"
+
+    # A failed trial opens it again, for twice as long.
+    breaker.record_failure()
+    time.sleep(0.06)
+
+    assert breaker.state == circuit_breaker.OPEN, "Timeout not doubled"
+
+    time.sleep(0.05)
+
+    assert breaker.allow_request(), "Trial refused"
+
+    breaker.record_success()
+
+    assert breaker.state == circuit_breaker.CLOSED, "Not closed"
+    assert breaker.failures == 0, "Failures not reset"
+
+    print("Test: state passed")
+
+
+def _fail_fast_test() -> None:
+    """Test that an endpoint down is not called once its circuit is open, and is
+    called again once it recovers.
+
+    :return None:
+    """
+
+    print("Test: fail fast")
+
+    with FakeNode() as node:
+        node.http_status = 503
+        node.block_number = 42
+        client = Web3(
+            multi_provider.MultiHTTPProvider(
+                [node.url], retry_policy=retry.RetryPolicy(attempts=1)
+            )
+        )
+
+        for _ in range(constants.CIRCUIT_FAILURE_THRESHOLD):
+            try:
+                client.eth.block_number
+                raise AssertionError("Read did not fail")
+            except errors.RPCUnavailableError:
+                pass
+
+        requests = node.http_requests
+
+        try:
+            client.eth.block_number
+            raise AssertionError("Read did not fail")
+        except errors.CircuitOpenError:
+            pass
+
+        assert node.http_requests == requests, "Endpoint was called"
+
+        node.http_status = 200
+        time.sleep(constants.CIRCUIT_RESET_TIMEOUT)
+
+        assert client.eth.block_number == 42, "Wrong block number"
+        assert (
+            multi_provider.get_endpoint_stats(node.url).breaker.state
+            == circuit_breaker.CLOSED
+        ), "Not closed"
+
+    print("Test: fail fast passed")
+
+
+def run_all_tests() -> None:
+    """Run all circuit breaker tests.
+
+    :return None:
+    """
+
+    _state_test()
+    _fail_fast_test()
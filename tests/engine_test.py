@@ -0,0 +1,269 @@
+import asyncio
+import os
+import tempfile
+import time
+
+from helpers import engine, journal, models, snapshot, utils
+from tests.fake_node import WALLET_PRIVATE_KEY, FakeNode
+
+# One token above and one below the WETH address, to cover both pair orders.
+TOKEN_ADDRESSES = (
+    "0x6B175474E89094C44Da98b954EedeAC495271d0F",
+    "0xdAC17F958D2ee523a2206206994597C13D831ec7",
+)
+PAIR_ADDRESSES = (
+    "0xA478c2975Ab1Ea89e8196811F51A7B7Ade33eB11",
+    "0x0d4a11d5EEaaC28EC3F61d100daF4d40471f1852",
+)
+
+
+class _RecordingJob:
+    """Job recording its calls, it fails for the tokens in `failing`."""
+
+    def __init__(self) -> None:
+        self.calls = []
+        self.failing = set()
+
+    def __call__(
+        self,
+        client,
+        token_address: str,
+        initial_price_in_wei: int,
+        market_snapshot: snapshot.MarketSnapshot,
+    ) -> tuple:
+        if token_address in self.failing:
+            raise RuntimeError("Job failed")
+
+        self.calls.append((token_address, market_snapshot.block_number))
+
+        return (
+            models.TransactionType.HOLD,
+            market_snapshot.price_in_wei,
+            market_snapshot.token_balance,
+            None,
+        )
+
+
+async def _wait_for(condition, timeout: float = 10) -> None:
+    """Wait until a condition is true.
+
+    :param condition: The condition.
+    :param float timeout: The timeout in seconds.
+    :return None:
+    """
+
+    deadline = time.monotonic() + timeout
+
+    while not condition():
+        assert time.monotonic() < deadline, "Timed out"
+        await asyncio.sleep(0.01)
+
+
+async def _engine_test() -> None:
+    """Test that the engine only runs the jobs of the tokens whose reserves changed.
+
+    :return None:
+    """
+
+    print("Test: engine")
+
+    with FakeNode() as node, tempfile.TemporaryDirectory() as journal_dir:
+        os.environ["JOURNAL_DIR"] = journal_dir
+        node.block_number = 100
+
+        for token_address, pair_address in zip(TOKEN_ADDRESSES, PAIR_ADDRESSES):
+            node.set_pair(token_address, pair_address, 50 * 10**18, 10**24)
+
+        os.environ["RPC_URL"] = node.url
+        job = _RecordingJob()
+        trading_engine = engine.Engine(utils.get_client(), job, poll_interval=0.01)
+        engine_task = asyncio.create_task(trading_engine.run())
+
+        try:
+            # The job of a new token runs right away.
+            for token_address in TOKEN_ADDRESSES:
+                await trading_engine.add_token(token_address)
+
+            await _wait_for(lambda: len(job.calls) == 2)
+
+            assert trading_engine.token_addresses == list(TOKEN_ADDRESSES)
+
+            # Both pairs change in the same block, their snapshots are read at once.
+            requests = len(node.requests)
+
+            for token_address in TOKEN_ADDRESSES:
+                node.sync(token_address, 51 * 10**18, 10**24 - 10**21)
+            node.mine()
+
+            await _wait_for(lambda: len(job.calls) == 4)
+
+            assert set(job.calls[2:]) == {
+                (token_address, 101) for token_address in TOKEN_ADDRESSES
+            }, "Wrong jobs"
+            assert node.requests[requests:].count("eth_call") == 1, "Not batched"
+
+            # Only the job of the changed token runs.
+            node.sync(TOKEN_ADDRESSES[1], 52 * 10**18, 10**24 - 2 * 10**21)
+            node.mine()
+
+            await _wait_for(lambda: len(job.calls) == 5)
+
+            assert job.calls[4] == (TOKEN_ADDRESSES[1], 102), "Wrong job"
+
+            # A failing job only removes its token.
+            job.failing.add(TOKEN_ADDRESSES[0])
+
+            for token_address in TOKEN_ADDRESSES:
+                node.sync(token_address, 53 * 10**18, 10**24 - 3 * 10**21)
+            node.mine()
+
+            await _wait_for(lambda: len(trading_engine.token_addresses) == 1)
+            await _wait_for(lambda: len(job.calls) == 6)
+
+            assert trading_engine.token_addresses == [TOKEN_ADDRESSES[1]]
+
+            # A removed token is not traded anymore.
+            assert await trading_engine.remove_token(TOKEN_ADDRESSES[1])
+            assert not await trading_engine.remove_token(TOKEN_ADDRESSES[1])
+
+            node.sync(TOKEN_ADDRESSES[1], 54 * 10**18, 10**24 - 4 * 10**21)
+            node.mine()
+            await asyncio.sleep(0.1)
+
+            assert len(job.calls) == 6, "Removed token was traded"
+        finally:
+            trading_engine.stop()
+            await engine_task
+
+            journal.close()
+            os.environ.pop("JOURNAL_DIR")
+
+        # Every job that ran recorded its tick.
+        ticks = journal.read_ticks(journal_dir)
+
+        assert sorted(zip(ticks["token_id"], ticks["block_number"])) == sorted(
+            (journal.get_token_id(token_address), block_number)
+            for token_address, block_number in job.calls
+        ), "Wrong ticks"
+
+    print("Test: engine passed")
+
+
+async def _reverting_token_test() -> None:
+    """Test that a token whose calls revert does not stop the ticks of the others.
+
+    :return None:
+    """
+
+    print("Test: reverting token")
+
+    with FakeNode() as node, tempfile.TemporaryDirectory() as journal_dir:
+        os.environ["JOURNAL_DIR"] = journal_dir
+        node.block_number = 100
+
+        for token_address, pair_address in zip(TOKEN_ADDRESSES, PAIR_ADDRESSES):
+            node.set_pair(token_address, pair_address, 50 * 10**18, 10**24)
+
+        os.environ["RPC_URL"] = node.url
+        job = _RecordingJob()
+        trading_engine = engine.Engine(utils.get_client(), job, poll_interval=0.01)
+        engine_task = asyncio.create_task(trading_engine.run())
+
+        try:
+            for token_address in TOKEN_ADDRESSES:
+                await trading_engine.add_token(token_address)
+
+            await _wait_for(lambda: len(job.calls) == 2)
+
+            # The token starts reverting, e.g. paused by its owner.
+            node.reverting.add(TOKEN_ADDRESSES[0].lower())
+
+            for index, block_number in enumerate((101, 102), 1):
+                for token_address in TOKEN_ADDRESSES:
+                    node.sync(token_address, (50 + index) * 10**18, 10**24 - index)
+                node.mine()
+
+                await _wait_for(lambda: (TOKEN_ADDRESSES[1], block_number) in job.calls)
+
+            assert job.calls[2:] == [
+                (TOKEN_ADDRESSES[1], 101),
+                (TOKEN_ADDRESSES[1], 102),
+            ], "Wrong jobs"
+            assert trading_engine.token_addresses == list(TOKEN_ADDRESSES)
+
+            # Its next change is traded once it stops reverting.
+            node.reverting.clear()
+            node.sync(TOKEN_ADDRESSES[0], 53 * 10**18, 10**24 - 3)
+            node.mine()
+
+            await _wait_for(lambda: (TOKEN_ADDRESSES[0], 103) in job.calls)
+        finally:
+            trading_engine.stop()
+            await engine_task
+
+            journal.close()
+            os.environ.pop("JOURNAL_DIR")
+
+    print("Test: reverting token passed")
+
+
+async def _feed_failure_test() -> None:
+    """Test that the feed is started again when it fails.
+
+    :return None:
+    """
+
+    print("Test: feed failure")
+
+    with FakeNode() as node, tempfile.TemporaryDirectory() as journal_dir:
+        os.environ["JOURNAL_DIR"] = journal_dir
+        node.block_number = 100
+        node.set_pair(TOKEN_ADDRESSES[0], PAIR_ADDRESSES[0], 50 * 10**18, 10**24)
+
+        os.environ["RPC_URL"] = node.url
+        job = _RecordingJob()
+        trading_engine = engine.Engine(utils.get_client(), job, poll_interval=0.01)
+        poll = trading_engine.feed.poll
+        failures = []
+
+        def failing_poll() -> None:
+            if not failures:
+                failures.append(None)
+                raise RuntimeError("Feed failed")
+
+            poll()
+
+        trading_engine.feed.poll = failing_poll
+        engine_task = asyncio.create_task(trading_engine.run())
+
+        try:
+            await trading_engine.add_token(TOKEN_ADDRESSES[0])
+            await _wait_for(lambda: failures and job.calls)
+
+            node.sync(TOKEN_ADDRESSES[0], 51 * 10**18, 10**24 - 1)
+            node.mine()
+
+            await _wait_for(lambda: (TOKEN_ADDRESSES[0], 101) in job.calls)
+            assert not engine_task.done(), "Engine stopped"
+        finally:
+            trading_engine.stop()
+            await engine_task
+
+            journal.close()
+            os.environ.pop("JOURNAL_DIR")
+
+    print("Test: feed failure passed")
+
+
+def run_all_tests() -> None:
+    """Run all engine tests.
+
+    :return None:
+    """
+
+    os.environ.setdefault("TOKEN_ADDRESS", TOKEN_ADDRESSES[0])
+    os.environ.setdefault("WALLET_ADDRESS", WALLET_PRIVATE_KEY)
+
+    asyncio.run(_engine_test())
+    asyncio.run(_reverting_token_test())
+    asyncio.run(_feed_failure_test())
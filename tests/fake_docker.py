@@ -0,0 +1,219 @@
+import queue
+import threading
+import time
+
+
+class FakeContainer:
+    """Stand-in for a container of the Docker SDK."""
+
+    def __init__(
+        self,
+        docker_client: "FakeDockerClient",
+        name: str,
+        labels: dict | None = None,
+        health: str | None = None,
+    ) -> None:
+        self.docker_client = docker_client
+        self.name = name
+        self.status = "running"
+        self.labels = labels or {}
+        self.attrs = {"State": {"Health": {"Status": health}} if health else {}}
+        self.kwargs = {}
+
+    def stop(self) -> None:
+        self.docker_client.call("stop", self.docker_client.stop_latency)
+        self.status = "exited"
+        self.docker_client.emit("die", self.name)
+        self.docker_client.emit("stop", self.name)
+
+    def remove(self, force: bool = False) -> None:
+        self.docker_client.call("remove")
+
+        if self.status == "running" and not force:
+            raise ValueError(f"Conflict, the container {self.name} is running")
+
+        self.docker_client.containers.by_name.pop(self.name)
+        self.docker_client.emit("destroy", self.name)
+
+
+class FakeContainers:
+    """Stand-in for the `containers` collection of the Docker SDK."""
+
+    def __init__(self, docker_client: "FakeDockerClient") -> None:
+        self.docker_client = docker_client
+        self.by_name = {}
+
+    def list(self, all: bool = False) -> list[FakeContainer]:
+        self.docker_client.call("list")
+
+        return [
+            container
+            for container in list(self.by_name.values())
+            if all or container.status == "running"
+        ]
+
+    def get(self, name: str) -> FakeContainer:
+        self.docker_client.call("get")
+
+        return self.by_name[name]
+
+    def run(self, image: str, name: str, **kwargs) -> FakeContainer:
+        self.docker_client.call("run", self.docker_client.run_latency)
+
+        if name in self.by_name:
+            raise ValueError(f"Conflict, the container name {name} is in use")
+
+        container = FakeContainer(
+            self.docker_client, name, self.docker_client.images.get(image).labels
+        )
+        container.kwargs = kwargs
+        self.by_name[name] = container
+        self.docker_client.emit("create", name)
+        self.docker_client.emit("start", name)
+
+        return container
+
+
+class FakeImage:
+    """Stand-in for an image of the Docker SDK."""
+
+    def __init__(self, id: str, tags: list[str], labels: dict) -> None:
+        self.id = id
+        self.tags = tags
+        self.labels = labels
+
+
+class FakeImages:
+    """Stand-in for the `images` collection of the Docker SDK."""
+
+    def __init__(self, docker_client: "FakeDockerClient") -> None:
+        self.docker_client = docker_client
+        self.by_tag = {}
+
+    def list(self, name: str | None = None) -> list[FakeImage]:
+        self.docker_client.call("images.list")
+
+        return [image for tag, image in self.by_tag.items() if name in (None, tag)]
+
+    def get(self, tag: str) -> FakeImage:
+        return self.by_tag.get(tag) or FakeImage("sha256:unknown", [tag], {})
+
+    def build(
+        self,
+        path: str,
+        tag: str,
+        labels: dict | None = None,
+        **kwargs,
+    ) -> tuple[FakeImage, list]:
+        self.docker_client.call("images.build", self.docker_client.build_latency)
+
+        image = FakeImage(f"sha256:{len(self.by_tag)}", [tag], labels or {})
+        self.by_tag[tag] = image
+
+        return image, []
+
+
+class FakeEventStream:
+    """Stand-in for the blocking stream of Docker events, closed with `close`."""
+
+    def __init__(self) -> None:
+        self.events = queue.Queue()
+
+    def __iter__(self):
+        while (event := self.events.get()) is not None:
+            yield event
+
+    def close(self) -> None:
+        self.events.put(None)
+
+
+class FakeDockerClient:
+    """Local stand-in for the Docker SDK client.
+
+    Its calls block like the real ones, `stop` for `stop_latency` seconds, `run`
+    for `run_latency` and `images.build` for `build_latency`. Every call is counted
+    in `calls`, and the most calls in flight at once is kept in `max_concurrency`.
+    The containers emit their events to the streams of `events`.
+    """
+
+    def __init__(
+        self,
+        stop_latency: float = 0.0,
+        run_latency: float = 0.0,
+        build_latency: float = 0.0,
+    ) -> None:
+        self.stop_latency = stop_latency
+        self.run_latency = run_latency
+        self.build_latency = build_latency
+        self.calls = {}
+        self.concurrency = 0
+        self.max_concurrency = 0
+        self.containers = FakeContainers(self)
+        self.images = FakeImages(self)
+        self.streams = []
+
+        self._lock = threading.Lock()
+
+    def add_container(
+        self,
+        name: str,
+        status: str = "running",
+        labels: dict | None = None,
+        health: str | None = None,
+    ) -> FakeContainer:
+        """Add a container without an event, as if it existed before.
+
+        :param str name: The container name.
+        :param str status: The container status.
+        :param dict | None labels: The labels of the container.
+        :param str | None health: The health status, None without a health check.
+        :return FakeContainer: The container.
+        """
+
+        container = FakeContainer(self, name, labels, health)
+        container.status = status
+        self.containers.by_name[name] = container
+
+        return container
+
+    def events(self, decode: bool = False, filters: dict | None = None):
+        stream = FakeEventStream()
+        self.streams.append(stream)
+
+        return stream
+
+    def call(self, name: str, latency: float = 0.0) -> None:
+        """Count a call, and block for its latency.
+
+        :param str name: The call.
+        :param float latency: The latency in seconds.
+        :return None:
+        """
+
+        with self._lock:
+            self.calls[name] = self.calls.get(name, 0) + 1
+            self.concurrency += 1
+            self.max_concurrency = max(self.max_concurrency, self.concurrency)
+
+        try:
+            time.sleep(latency)
+        finally:
+            with self._lock:
+                self.concurrency -= 1
+
+    def emit(self, action: str, name: str) -> None:
+        """Send a container event to the streams.
+
+        :param str action: The action, e.g. `start`.
+        :param str name: The container name.
+        :return None:
+        """
+
+        for stream in self.streams:
+            stream.events.put(
+                {
+                    "Type": "container",
+                    "Action": action,
+                    "Actor": {"Attributes": {"name": name}},
+                }
+            )
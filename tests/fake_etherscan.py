@@ -0,0 +1,66 @@
+import http.server
+import json
+import threading
+import time
+import urllib.parse
+
+from helpers import abi_cache, constants
+
+
+class FakeEtherscan:
+    """Local stand-in for the Etherscan `getabi` endpoint.
+
+    Every address is answered with the bundled ERC-20 ABI after `latency` seconds.
+    Use it as a context manager, `constants.ETHERSCAN_API_URL` points to it while
+    it is running.
+    """
+
+    def __init__(self, latency: float = 0.0) -> None:
+        self.latency = latency
+        self.requests = []
+
+        fake = self
+
+        class Handler(http.server.BaseHTTPRequestHandler):
+            def do_GET(self) -> None:
+                query = urllib.parse.parse_qs(urllib.parse.urlparse(self.path).query)
+                fake.requests.append(query["address"][0])
+
+                time.sleep(fake.latency)
+
+                body = json.dumps(
+                    {
+                        "status": "1",
+                        "message": "OK",
+                        "result": json.dumps(
+                            abi_cache.get_bundled_abi(abi_cache.ERC20_ABI)
+                        ),
+                    }
+                ).encode()
+
+                self.send_response(200)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, *args) -> None:
+                pass
+
+        self._server = http.server.ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        self._previous_url = None
+
+    @property
+    def url(self) -> str:
+        return "http://{}:{}/api".format(*self._server.server_address)
+
+    def __enter__(self) -> "FakeEtherscan":
+        threading.Thread(target=self._server.serve_forever, daemon=True).start()
+        self._previous_url = constants.ETHERSCAN_API_URL
+        constants.ETHERSCAN_API_URL = self.url
+        return self
+
+    def __exit__(self, *args) -> None:
+        constants.ETHERSCAN_API_URL = self._previous_url
+        self._server.shutdown()
+        self._server.server_close()
@@ -0,0 +1,89 @@
+import asyncio
+import json
+import threading
+
+import websockets
+
+from tests.fake_node import WEBSOCKET_LOGGER
+
+
+class FakeLogServer:
+    """Local stand-in for the WebSocket log server of the bot.
+
+    It records the frames sent by `logger.LogShipper`, JSON arrays of records or
+    single messages, and answers every message like the servers of older versions.
+    Use it as a context manager, `uri` is the WebSocket URI.
+    """
+
+    def __init__(self) -> None:
+        self.frames = []
+        self.uri = None
+
+        self._connections = set()
+        self._loop = asyncio.new_event_loop()
+        self._stop = None
+
+    @property
+    def messages(self) -> list[dict | str]:
+        return [message for frame in self.frames for message in _parse_frame(frame)]
+
+    def __enter__(self) -> "FakeLogServer":
+        started = threading.Event()
+
+        async def handle(connection) -> None:
+            self._connections.add(connection)
+
+            try:
+                async for frame in connection:
+                    self.frames.append(frame)
+
+                    for message in _parse_frame(frame):
+                        await connection.send(json.dumps(message))
+            except websockets.exceptions.ConnectionClosed:
+                pass
+            finally:
+                self._connections.discard(connection)
+
+        async def serve() -> None:
+            async with websockets.serve(
+                handle, "127.0.0.1", 0, logger=WEBSOCKET_LOGGER
+            ) as server:
+                self.uri = "ws://127.0.0.1:{}".format(
+                    server.sockets[0].getsockname()[1]
+                )
+                self._stop = asyncio.Event()
+                started.set()
+
+                await self._stop.wait()
+
+        threading.Thread(
+            target=self._loop.run_until_complete, args=(serve(),), daemon=True
+        ).start()
+        started.wait()
+
+        return self
+
+    def __exit__(self, *args) -> None:
+        self._loop.call_soon_threadsafe(self._stop.set)
+
+    def drop_connections(self) -> None:
+        """Close the open connections.
+
+        :return None:
+        """
+
+        async def drop() -> None:
+            for connection in list(self._connections):
+                await connection.close()
+
+        asyncio.run_coroutine_threadsafe(drop(), self._loop).result()
+
+
+def _parse_frame(frame: str) -> list[dict | str]:
+    """Get the messages of a frame.
+
+    :param str frame: The frame.
+    :return list[dict | str]: The messages.
+    """
+
+    return json.loads(frame) if frame.startswith("[") else [frame]
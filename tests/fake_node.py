@@ -0,0 +1,692 @@
+import asyncio
+import http.server
+import json
+import logging
+import threading
+import time
+
+import websockets
+from eth_abi import decode, encode
+from eth_account import Account
+from eth_account.typed_transactions import TypedTransaction
+from eth_utils import function_abi_to_4byte_selector, keccak
+from eth_utils.abi import get_abi_input_types, get_abi_output_types
+from hexbytes import HexBytes
+
+from helpers import (
+    abi_cache,
+    allowance,
+    armed_exit,
+    constants,
+    gas_oracle,
+    multi_provider,
+    nonce_manager,
+    rpc_middleware,
+)
+
+ZERO_ADDRESS = "0x0000000000000000000000000000000000000000"
+SYNC_TOPIC = "0x1c411e9a96e071241c2f21f7726b17ae89e3cab4c78be50e062b03a9fffbbad1"
+
+# The connections of the WebSocket server are not worth logging.
+WEBSOCKET_LOGGER = logging.getLogger("fake_node")
+WEBSOCKET_LOGGER.setLevel(logging.WARNING)
+
+# Well-known development key, never use it on a real network.
+WALLET_PRIVATE_KEY = (
+    "0x4c0883a69102937d6231471b5dbb6204fe5129617082792ae468d01a3f362318"
+)
+WALLET_PUBLIC_KEY = "0x2c7536E3605D9C16a7a3D7b1898e529396a65c23"
+
+
+class RPCError(Exception):
+    """Error returned to the JSON-RPC client."""
+
+
+class FakeNode:
+    """Local stand-in for an Ethereum JSON-RPC node.
+
+    It emulates the Uniswap V2 router, factory and pairs, ERC-20 tokens and
+    Multicall3 from an in-memory state, which is enough to run the helpers without
+    a real node. Use it as a context manager, `url` is the HTTP endpoint.
+    """
+
+    def __init__(self, latency: float = 0.0) -> None:
+        self.latency = latency
+        self.chain_id = 1
+        self.block_number = 1
+        self.timestamp = 1_700_000_000
+        self.base_fee = 10**9
+        self.eth_balances = {}
+        self.token_balances = {}
+        self.pairs = {}
+        self.logs = []
+        self.block_hashes = {}
+        self.gas_price = 2 * 10**9
+        self.priority_fee = 10**8  # the median of the blocks, scaled by percentile
+        self.allowances = {}
+        self.permit_tokens = set()
+        self.reverting = set()  # lowercase addresses whose calls revert
+        self.nonces = {}
+        self.transactions = {}
+        self._pending_syncs = []
+        self._pending_transactions = []
+
+        # Every JSON-RPC method received, and the number of HTTP requests, so
+        # tests can count round trips.
+        self.requests = []
+        self.http_requests = 0
+
+        # Set to an error status to fail every request, like a node down.
+        self.http_status = 200
+
+        # The number of next requests failing with a 503, like a node blip.
+        self.failing_requests = 0
+
+        self.methods = {
+            "web3_clientVersion": lambda: "FakeNode/v1",
+            "eth_chainId": lambda: hex(self.chain_id),
+            "eth_blockNumber": lambda: hex(self.block_number),
+            "eth_getBalance": lambda address, block="latest": hex(
+                self.eth_balances.get(address.lower(), 0)
+            ),
+            "eth_getBlockByNumber": self._get_block_by_number,
+            "eth_call": self._eth_call,
+            "eth_getLogs": self._get_logs,
+            "eth_gasPrice": lambda: hex(self.gas_price),
+            "eth_feeHistory": self._fee_history,
+            "eth_estimateGas": self._estimate_gas,
+            "eth_getTransactionCount": self._get_transaction_count,
+            "eth_sendRawTransaction": self._send_raw_transaction,
+            "eth_getTransactionReceipt": self._get_transaction_receipt,
+        }
+
+        self._functions = {}
+        for name in (
+            abi_cache.ERC20_PERMIT_ABI,
+            abi_cache.UNISWAP_V2_PAIR_ABI,
+            abi_cache.UNISWAP_V2_FACTORY_ABI,
+            abi_cache.UNISWAP_V2_ROUTER_ABI,
+            abi_cache.MULTICALL3_ABI,
+        ):
+            for item in abi_cache.get_bundled_abi(name):
+                if item["type"] == "function":
+                    self._functions[function_abi_to_4byte_selector(item)] = item
+
+        node = self
+
+        class Handler(http.server.BaseHTTPRequestHandler):
+            # Keep the connections alive, like a real node, without Nagle delaying
+            # the body sent after the headers.
+            protocol_version = "HTTP/1.1"
+            disable_nagle_algorithm = True
+
+            def do_POST(self) -> None:
+                body = json.loads(self.rfile.read(int(self.headers["Content-Length"])))
+
+                node.http_requests += 1
+                time.sleep(node.latency)
+
+                status = node.http_status
+
+                if node.failing_requests > 0:
+                    node.failing_requests -= 1
+                    status = 503
+
+                if status != 200:
+                    self.send_response(status)
+                    self.send_header("Content-Length", "0")
+                    self.end_headers()
+                    return
+
+                if isinstance(body, list):
+                    response = [node.handle(request) for request in body]
+                else:
+                    response = node.handle(body)
+
+                content = json.dumps(response).encode()
+
+                # The client may have given up, like on a hedged read answered first.
+                try:
+                    self.send_response(200)
+                    self.send_header("Content-Type", "application/json")
+                    self.send_header("Content-Length", str(len(content)))
+                    self.end_headers()
+                    self.wfile.write(content)
+                except (BrokenPipeError, ConnectionResetError):
+                    self.close_connection = True
+
+            def log_message(self, *args) -> None:
+                pass
+
+        self._server = http.server.ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        self._websocket_loop = None
+
+    @property
+    def url(self) -> str:
+        return "http://{}:{}".format(*self._server.server_address)
+
+    def __enter__(self) -> "FakeNode":
+        # The port may be the one of a previous node, whose results are cached.
+        rpc_middleware.get_block_cache(self.url).clear()
+
+        # A new chain, where the nonces, allowances and armed exits of the wallet,
+        # the fees and the latencies of the endpoints, are unknown.
+        nonce_manager._managers.clear()
+        allowance._managers.clear()
+        armed_exit._armories.clear()
+        multi_provider._stats.clear()
+
+        for oracle in gas_oracle._oracles.values():
+            oracle.stop()
+
+        gas_oracle._oracles.clear()
+
+        threading.Thread(target=self._server.serve_forever, daemon=True).start()
+        return self
+
+    def __exit__(self, *args) -> None:
+        self._server.shutdown()
+        self._server.server_close()
+
+        if self._websocket_loop:
+            self._websocket_loop.call_soon_threadsafe(self._websocket_stop.set)
+
+    def start_websocket(self) -> str:
+        """Serve `eth_subscribe` log subscriptions over a WebSocket.
+
+        :return str: The WebSocket URL.
+        """
+
+        started = threading.Event()
+        self._subscriptions = set()
+
+        async def handle(connection) -> None:
+            try:
+                async for message in connection:
+                    request = json.loads(message)
+
+                    if request["method"] == "eth_subscribe":
+                        self._subscriptions.add(connection)
+                        response = {
+                            "jsonrpc": "2.0",
+                            "id": request["id"],
+                            "result": "0x1",
+                        }
+                    else:
+                        response = self.handle(request)
+
+                    await connection.send(json.dumps(response))
+            except websockets.exceptions.ConnectionClosed:
+                # Closed with an error by the client.
+                pass
+            finally:
+                self._subscriptions.discard(connection)
+
+        async def serve() -> None:
+            self._websocket_loop = asyncio.get_running_loop()
+            self._websocket_stop = asyncio.Event()
+
+            async with websockets.serve(
+                handle, "127.0.0.1", 0, logger=WEBSOCKET_LOGGER
+            ) as server:
+                self._websocket_url = "ws://{}:{}".format(
+                    *next(iter(server.sockets)).getsockname()[:2]
+                )
+                started.set()
+                await self._websocket_stop.wait()
+
+        threading.Thread(target=asyncio.run, args=(serve(),), daemon=True).start()
+        started.wait()
+
+        return self._websocket_url
+
+    def push_logs(self, logs: list[dict]) -> None:
+        """Add logs to the chain and notify them to the subscriptions.
+
+        :param list[dict] logs: The logs.
+        :return None:
+        """
+
+        self.logs.extend(logs)
+
+        async def push() -> None:
+            for connection in list(self._subscriptions):
+                for log in logs:
+                    await connection.send(
+                        json.dumps(
+                            {
+                                "jsonrpc": "2.0",
+                                "method": "eth_subscription",
+                                "params": {"subscription": "0x1", "result": log},
+                            }
+                        )
+                    )
+
+        asyncio.run_coroutine_threadsafe(push(), self._websocket_loop).result()
+
+    def drop_websockets(self) -> None:
+        """Close every WebSocket connection, like a node restart.
+
+        :return None:
+        """
+
+        async def drop() -> None:
+            for connection in list(self._subscriptions):
+                await connection.close()
+
+            self._subscriptions.clear()
+
+        asyncio.run_coroutine_threadsafe(drop(), self._websocket_loop).result()
+
+    def get_block_hash(self, number: int) -> str:
+        """Get the hash of a block, overridden in `block_hashes` to simulate reorgs.
+
+        :param int number: The block number.
+        :return str: The block hash.
+        """
+
+        return self.block_hashes.get(number, "0x" + number.to_bytes(32, "big").hex())
+
+    def set_pair(
+        self,
+        token_address: str,
+        pair_address: str,
+        weth_reserve: int,
+        token_reserve: int,
+    ) -> None:
+        """Create or update the WETH pair of a token.
+
+        :param str token_address: The token address.
+        :param str pair_address: The pair address.
+        :param int weth_reserve: The WETH reserve of the pair.
+        :param int token_reserve: The token reserve of the pair.
+        :return None:
+        """
+
+        self.pairs[token_address.lower()] = (
+            pair_address.lower(),
+            weth_reserve,
+            token_reserve,
+        )
+
+    def sync(self, token_address: str, weth_reserve: int, token_reserve: int) -> None:
+        """Swap in the WETH pair of a token, applied with its `Sync` log by `mine`.
+
+        :param str token_address: The token address.
+        :param int weth_reserve: The new WETH reserve of the pair.
+        :param int token_reserve: The new token reserve of the pair.
+        :return None:
+        """
+
+        self._pending_syncs.append((token_address, weth_reserve, token_reserve))
+
+    def mine(self, blocks: int = 1) -> None:
+        """Advance the chain, the pending swaps are applied in the first new block.
+
+        :param int blocks: The number of blocks to mine.
+        :return None:
+        """
+
+        block_number = self.block_number + 1
+        pending_syncs, self._pending_syncs = self._pending_syncs, []
+
+        for index, (token_address, weth_reserve, token_reserve) in enumerate(
+            pending_syncs
+        ):
+            pair_address = self.pairs[token_address.lower()][0]
+            self.set_pair(token_address, pair_address, weth_reserve, token_reserve)
+            _, reserves = self._get_pair(pair_address)
+
+            self.logs.append(
+                {
+                    "address": pair_address,
+                    "topics": [SYNC_TOPIC],
+                    "data": "0x" + encode(["uint112", "uint112"], reserves).hex(),
+                    "blockNumber": hex(block_number),
+                    "blockHash": self.get_block_hash(block_number),
+                    "transactionHash": "0x" + f"{len(self.logs):064x}",
+                    "transactionIndex": hex(index),
+                    "logIndex": hex(index),
+                    "removed": False,
+                }
+            )
+
+        # The pending transactions of a sender are mined in nonce order, up to
+        # the first gap.
+        for txn in sorted(
+            self._pending_transactions, key=lambda txn: (txn["from"], txn["nonce"])
+        ):
+            if txn["nonce"] == self.nonces.get(txn["from"], 0):
+                self.nonces[txn["from"]] = txn["nonce"] + 1
+                txn["blockNumber"] = block_number
+                txn["status"] = self._execute(txn)
+                self._pending_transactions.remove(txn)
+
+        self.block_number += blocks
+        self.timestamp += 12 * blocks
+
+    def handle(self, request: dict) -> dict:
+        """Handle a single JSON-RPC request.
+
+        :param dict request: The JSON-RPC request.
+        :return dict: The JSON-RPC response.
+        """
+
+        self.requests.append(request["method"])
+
+        response = {"jsonrpc": "2.0", "id": request.get("id")}
+
+        try:
+            method = self.methods.get(request["method"])
+
+            if method is None:
+                raise RPCError(f"Method {request['method']} is not supported")
+
+            response["result"] = method(*request.get("params", []))
+        except Exception as error:
+            response["error"] = {"code": -32000, "message": str(error)}
+
+        return response
+
+    def _get_block_by_number(self, block: str, full_transactions: bool) -> dict:
+        if block in ("latest", "pending"):
+            number = self.block_number
+        elif block in ("safe", "finalized"):
+            number = max(self.block_number - 64, 0)
+        else:
+            number = int(block, 16)
+
+        return {
+            "number": hex(number),
+            "hash": self.get_block_hash(number),
+            "parentHash": self.get_block_hash(number - 1),
+            "timestamp": hex(self.timestamp - 12 * (self.block_number - number)),
+            "baseFeePerGas": hex(self.base_fee),
+            "gasLimit": hex(30_000_000),
+            "gasUsed": hex(15_000_000),
+            "transactions": [],
+        }
+
+    def _get_logs(self, log_filter: dict) -> list[dict]:
+        from_block = int(log_filter.get("fromBlock", hex(self.block_number)), 16)
+        to_block = int(log_filter.get("toBlock", hex(self.block_number)), 16)
+        addresses = log_filter.get("address", [])
+        addresses = {
+            address.lower()
+            for address in (addresses if isinstance(addresses, list) else [addresses])
+        }
+        topics = log_filter.get("topics", [None])[0]
+        topics = topics if isinstance(topics, list) or topics is None else [topics]
+
+        return [
+            log
+            for log in self.logs
+            if from_block <= int(log["blockNumber"], 16) <= to_block
+            and (not addresses or log["address"].lower() in addresses)
+            and (topics is None or log["topics"][0] in topics)
+        ]
+
+    def _decode_call(self, data: str | bytes) -> tuple[str, tuple]:
+        """Decode the function name and arguments of call data."""
+
+        data = bytes.fromhex(data[2:]) if isinstance(data, str) else data
+        function = self._functions.get(data[:4])
+
+        if function is None:
+            raise RPCError("execution reverted")
+
+        return function["name"], decode(get_abi_input_types(function), data[4:])
+
+    def _execute(self, txn: dict) -> int:
+        """Apply a mined approval, a swap only checks its allowance.
+
+        :param dict txn: The transaction.
+        :return int: The status of its receipt.
+        """
+
+        name, args = self._decode_call(txn["data"])
+
+        if name == "approve":
+            self.allowances[(txn["to"], txn["from"], args[0].lower())] = args[1]
+        elif name == "swapExactTokensForETH":
+            key = (args[2][0].lower(), txn["from"], txn["to"])
+
+            if self.allowances.get(key, 0) < args[0]:
+                return 0
+
+            # Like most tokens, an unlimited allowance is not spent.
+            if self.allowances[key] < constants.MAX_UINT256:
+                self.allowances[key] -= args[0]
+
+        return 1
+
+    def _estimate_gas(self, transaction: dict, block: str = "latest") -> str:
+        name, args = self._decode_call(transaction["data"])
+
+        if (
+            name == "swapExactTokensForETH"
+            and self.allowances.get(
+                (
+                    args[2][0].lower(),
+                    transaction["from"].lower(),
+                    transaction["to"].lower(),
+                ),
+                0,
+            )
+            < args[0]
+        ):
+            raise RPCError("execution reverted: TransferHelper: TRANSFER_FROM_FAILED")
+
+        return hex(100_000)
+
+    def _fee_history(
+        self, block_count: str | int, newest_block: str, percentiles: list
+    ) -> dict:
+        block_count = (
+            int(block_count, 16) if isinstance(block_count, str) else block_count
+        )
+        block_count = min(block_count, self.block_number)
+
+        return {
+            "oldestBlock": hex(self.block_number - block_count + 1),
+            "baseFeePerGas": [hex(self.base_fee)] * (block_count + 1),
+            "gasUsedRatio": [0.5] * block_count,
+            "reward": [
+                [
+                    hex(int(self.priority_fee * percentile / 50))
+                    for percentile in percentiles
+                ]
+            ]
+            * block_count,
+        }
+
+    def _get_transaction_count(self, address: str, block: str = "latest") -> str:
+        nonce = self.nonces.get(address.lower(), 0)
+
+        if block == "pending":
+            nonces = {
+                txn["nonce"]
+                for txn in self._pending_transactions
+                if txn["from"] == address.lower()
+            }
+
+            while nonce in nonces:
+                nonce += 1
+
+        return hex(nonce)
+
+    def _send_raw_transaction(self, raw_transaction: str) -> str:
+        sender = Account.recover_transaction(raw_transaction).lower()
+        raw_transaction = HexBytes(raw_transaction)
+        txn = TypedTransaction.from_bytes(raw_transaction).as_dict()
+
+        if txn["nonce"] < self.nonces.get(sender, 0) or any(
+            pending_txn["from"] == sender and pending_txn["nonce"] == txn["nonce"]
+            for pending_txn in self._pending_transactions
+        ):
+            raise RPCError("nonce too low")
+
+        txn_hash = "0x" + keccak(raw_transaction).hex()
+        txn = {
+            "hash": txn_hash,
+            "from": sender,
+            "to": "0x" + txn["to"].hex(),
+            "nonce": txn["nonce"],
+            "data": bytes(txn["data"]),
+            "blockNumber": None,
+            "status": None,
+        }
+
+        self.transactions[txn_hash] = txn
+        self._pending_transactions.append(txn)
+
+        return txn_hash
+
+    def _get_transaction_receipt(self, txn_hash: str) -> dict | None:
+        txn = self.transactions.get(txn_hash)
+
+        if txn is None or txn["blockNumber"] is None:
+            return None
+
+        return {
+            "transactionHash": txn_hash,
+            "transactionIndex": "0x0",
+            "blockNumber": hex(txn["blockNumber"]),
+            "blockHash": self.get_block_hash(txn["blockNumber"]),
+            "from": txn["from"],
+            "to": txn["to"],
+            "contractAddress": None,
+            "cumulativeGasUsed": hex(100_000),
+            "gasUsed": hex(100_000),
+            "effectiveGasPrice": hex(self.gas_price),
+            "logs": [],
+            "logsBloom": "0x" + "00" * 256,
+            "status": hex(txn["status"]),
+            "type": "0x2",
+        }
+
+    def _eth_call(self, transaction: dict, block: str = "latest") -> str:
+        return "0x" + self._call(transaction["to"], transaction["data"]).hex()
+
+    def _call(self, to: str, data: str | bytes) -> bytes:
+        data = bytes.fromhex(data[2:]) if isinstance(data, str) else data
+        function = self._functions.get(data[:4])
+
+        if function is None or to.lower() in self.reverting:
+            raise RPCError("execution reverted")
+
+        args = decode(get_abi_input_types(function), data[4:])
+        result = getattr(self, f"_call_{function['name']}")(to.lower(), *args)
+
+        if len(function["outputs"]) == 1:
+            result = (result,)
+
+        return encode(get_abi_output_types(function), result)
+
+    def _get_pair(self, address: str) -> tuple[str, tuple[int, int]]:
+        """Get the token and the reserves, sorted like the pair, of a pair address."""
+
+        for token, (pair, weth_reserve, token_reserve) in self.pairs.items():
+            if pair == address:
+                if int(constants.WETH_CONTRACT_ADDRESS, 16) < int(token, 16):
+                    return token, (weth_reserve, token_reserve)
+
+                return token, (token_reserve, weth_reserve)
+
+        raise RPCError("execution reverted")
+
+    def _call_getPair(self, to: str, token_a: str, token_b: str) -> str:
+        token = (
+            token_b
+            if token_a.lower() == constants.WETH_CONTRACT_ADDRESS.lower()
+            else token_a
+        )
+        return self.pairs.get(token.lower(), (ZERO_ADDRESS,))[0]
+
+    def _call_getReserves(self, to: str) -> tuple[int, int, int]:
+        _, (reserve0, reserve1) = self._get_pair(to)
+        return (reserve0, reserve1, self.timestamp)
+
+    def _call_token0(self, to: str) -> str:
+        token, _ = self._get_pair(to)
+        return min(
+            token, constants.WETH_CONTRACT_ADDRESS.lower(), key=lambda a: int(a, 16)
+        )
+
+    def _call_token1(self, to: str) -> str:
+        token, _ = self._get_pair(to)
+        return max(
+            token, constants.WETH_CONTRACT_ADDRESS.lower(), key=lambda a: int(a, 16)
+        )
+
+    def _call_allowance(self, to: str, owner: str, spender: str) -> int:
+        return self.allowances.get((to, owner.lower(), spender.lower()), 0)
+
+    def _call_name(self, to: str) -> str:
+        return "Fake Token"
+
+    def _call_nonces(self, to: str, owner: str) -> int:
+        return 0
+
+    def _call_DOMAIN_SEPARATOR(self, to: str) -> bytes:
+        # Only the tokens in `permit_tokens` support EIP-2612.
+        if to not in self.permit_tokens:
+            raise RPCError("execution reverted")
+
+        return allowance.get_domain_separator(
+            self._call_name(to), "1", self.chain_id, to
+        )
+
+    def _call_balanceOf(self, to: str, owner: str) -> int:
+        return self.token_balances.get((to, owner.lower()), 0)
+
+    def _call_getAmountsOut(self, to: str, amount_in: int, path: list) -> list[int]:
+        amounts = [amount_in]
+
+        for token_in, token_out in zip(path, path[1:]):
+            token = (
+                token_out
+                if token_in.lower() == constants.WETH_CONTRACT_ADDRESS.lower()
+                else token_in
+            )
+            _, weth_reserve, token_reserve = self.pairs[token.lower()]
+
+            if token_in.lower() == constants.WETH_CONTRACT_ADDRESS.lower():
+                reserve_in, reserve_out = weth_reserve, token_reserve
+            else:
+                reserve_in, reserve_out = token_reserve, weth_reserve
+
+            amount_in_with_fee = amounts[-1] * 997
+            amounts.append(
+                amount_in_with_fee
+                * reserve_out
+                // (reserve_in * 1000 + amount_in_with_fee)
+            )
+
+        return amounts
+
+    def _call_aggregate3(self, to: str, calls: list) -> list[tuple[bool, bytes]]:
+        results = []
+
+        for target, allow_failure, call_data in calls:
+            try:
+                results.append((True, self._call(target, call_data)))
+            except RPCError:
+                if not allow_failure:
+                    raise
+
+                results.append((False, b""))
+
+        return results
+
+    def _call_getBlockNumber(self, to: str) -> int:
+        return self.block_number
+
+    def _call_getCurrentBlockTimestamp(self, to: str) -> int:
+        return self.timestamp
+
+    def _call_getEthBalance(self, to: str, address: str) -> int:
+        return self.eth_balances.get(address.lower(), 0)
+
+    def _call_getBasefee(self, to: str) -> int:
+        return self.base_fee
@@ -0,0 +1,67 @@
+import time
+
+
+class FakeFloodWaitError(Exception):
+    """Stand-in for the flood wait error of Telethon, with its `seconds`."""
+
+    def __init__(self, seconds: float) -> None:
+        super().__init__(f"A wait of {seconds} seconds is required")
+        self.seconds = seconds
+
+
+class FakeTelegramClient:
+    """Local stand-in for the `send_message` of a Telegram client.
+
+    Every message sent is kept in `messages` with the time it was sent at. The
+    first `flood_waits` calls fail with a flood wait of `flood_wait` seconds, the
+    next `failures` calls with another error.
+    """
+
+    def __init__(
+        self,
+        flood_waits: int = 0,
+        flood_wait: float = 0.1,
+        failures: int = 0,
+    ) -> None:
+        self.flood_waits = flood_waits
+        self.flood_wait = flood_wait
+        self.failures = failures
+        self.messages = []
+        self.calls = []
+
+    async def send_message(self, entity: str | int, message: str) -> None:
+        self.calls.append(time.monotonic())
+
+        if self.flood_waits:
+            self.flood_waits -= 1
+            raise FakeFloodWaitError(self.flood_wait)
+
+        if self.failures:
+            self.failures -= 1
+            raise ConnectionError("Telegram is unreachable")
+
+        self.messages.append((time.monotonic(), entity, message))
+
+    async def send(self, chat_id: str | int, message: str) -> None:
+        """Send a message like the bot, to pass as the `send` of a notifier.
+
+        :param str | int chat_id: The chat.
+        :param str message: The message.
+        :return None:
+        """
+
+        await self.send_message(entity=chat_id, message=message)
+
+    def get_lines(self, chat_id: str | int) -> list[str]:
+        """Get the lines sent to a chat.
+
+        :param str | int chat_id: The chat.
+        :return list[str]: The lines, in their order.
+        """
+
+        return [
+            line
+            for _, entity, message in self.messages
+            if entity == chat_id
+            for line in message.split("\n")
+        ]
@@ -0,0 +1,135 @@
+import asyncio
+import os
+
+from helpers import async_client, gas_oracle, signals
+from tests.fake_node import WALLET_PRIVATE_KEY, WALLET_PUBLIC_KEY, FakeNode
+
+TOKEN_ADDRESS = "0x6B175474E89094C44Da98b954EedeAC495271d0F"
+PAIR_ADDRESS = "0xA478c2975Ab1Ea89e8196811F51A7B7Ade33eB11"
+
+
+def _set_up_node(node: FakeNode) -> None:
+    """Give the wallet ETH, and the token its pair.
+
+    :param FakeNode node: The fake node.
+    :return None:
+    """
+
+    node.set_pair(TOKEN_ADDRESS, PAIR_ADDRESS, 50 * 10**18, 10**24)
+    node.eth_balances[WALLET_PUBLIC_KEY.lower()] = 10**18
+    node.block_number = 100
+
+    os.environ["RPC_URL"] = node.url
+    os.environ["WALLET_ADDRESS"] = WALLET_PRIVATE_KEY
+
+
+async def _fees_test() -> None:
+    """Test the fees suggested from the fee history.
+
+    :return None:
+    """
+
+    print("Test: fees")
+
+    with FakeNode() as node:
+        _set_up_node(node)
+        client = await async_client.get_async_client()
+        oracle = gas_oracle.GasOracle(priority_percentile=90)
+
+        assert await oracle.async_get_fees(client) == (
+            18 * 10**7,
+            2 * 10**9 + 18 * 10**7,
+        ), "Wrong fees"
+        assert oracle.block_number == 100, "Wrong block number"
+
+        # The fees are known, they are returned without a request.
+        requests = len(node.requests)
+        await oracle.async_get_fees(client)
+
+        assert len(node.requests) == requests, "Fees were requested"
+
+        # The priority fee is never below the minimum.
+        node.priority_fee = 0
+        await oracle.async_update(client)
+
+        assert oracle.priority_fee == client.to_wei(
+            0.05, "gwei"
+        ), "Priority fee too low"
+
+        oracle.stop()
+
+    print("Test: fees passed")
+
+
+async def _watch_test() -> None:
+    """Test that the fees follow the new blocks in the background.
+
+    :return None:
+    """
+
+    print("Test: watch")
+
+    with FakeNode() as node:
+        _set_up_node(node)
+        client = await async_client.get_async_client()
+        oracle = gas_oracle.GasOracle()
+        await oracle.async_update(client)
+
+        task = asyncio.create_task(oracle.watch(client, poll_interval=0.05))
+        node.base_fee = 3 * 10**9
+        node.mine()
+
+        for _ in range(100):
+            if oracle.base_fee == 3 * 10**9:
+                break
+
+            await asyncio.sleep(0.05)
+
+        task.cancel()
+
+        assert oracle.base_fee == 3 * 10**9, "Base fee was not updated"
+        assert oracle.block_number == 101, "Block number was not updated"
+
+    print("Test: watch passed")
+
+
+async def _gas_estimates_test() -> None:
+    """Test that the trades estimate their gas once and never ask the gas price.
+
+    :return None:
+    """
+
+    print("Test: gas estimates")
+
+    with FakeNode() as node:
+        _set_up_node(node)
+        client = await async_client.get_async_client()
+
+        for _ in range(3):
+            pending_txn = await signals.async_submit_buy(client, TOKEN_ADDRESS, 10**16)
+            node.mine()
+            await asyncio.wait_for(pending_txn.receipt, 5)
+
+        assert node.requests.count("eth_estimateGas") == 1, "Gas estimated again"
+        assert node.requests.count("eth_feeHistory") == 1, "Fee history read again"
+        assert "eth_gasPrice" not in node.requests, "Gas price requested"
+
+        txn = list(node.transactions.values())[-1]
+        assert txn["nonce"] == 2, "Wrong nonce"
+
+    print("Test: gas estimates passed")
+
+
+async def _run_all_tests() -> None:
+    await _fees_test()
+    await _watch_test()
+    await _gas_estimates_test()
+
+
+def run_all_tests() -> None:
+    """Run all gas_oracle tests.
+
+    :return None:
+    """
+
+    asyncio.run(_run_all_tests())
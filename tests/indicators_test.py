@@ -0,0 +1,148 @@
+import random
+import statistics
+
+from helpers import indicators
+
+
+def _get_series(count: int = 1000) -> list[float]:
+    """Build a random walk of prices.
+
+    :param int count: The number of values.
+    :return list[float]: The values.
+    """
+
+    generator = random.Random(0)
+    values = [100.0]
+
+    for _ in range(count - 1):
+        values.append(values[-1] * (1 + generator.gauss(0, 0.01)))
+
+    return values
+
+
+def _ring_buffer_test() -> None:
+    """Test that a ring buffer evicts its oldest value once full.
+
+    :return None:
+    """
+
+    print("Test: RingBuffer")
+
+    buffer = indicators.RingBuffer(3)
+
+    assert [buffer.append(value) for value in (1, 2, 3, 4, 5)] == [
+        None,
+        None,
+        None,
+        1,
+        2,
+    ], "Wrong evicted values"
+    assert list(buffer) == [3, 4, 5], "Wrong values"
+    assert len(buffer) == 3, "Wrong length"
+
+    print("Test: RingBuffer passed")
+
+
+def _ema_test() -> None:
+    """Test the EMA against its definition.
+
+    :return None:
+    """
+
+    print("Test: EMA")
+
+    values = _get_series()
+    ema = indicators.EMA(20)
+    expected = values[0]
+
+    for value in values:
+        expected = expected + 2 / 21 * (value - expected)
+        assert abs(ema.update(value) - expected) < 1e-9, "Wrong EMA"
+
+    print("Test: EMA passed")
+
+
+def _rolling_extremum_test() -> None:
+    """Test the rolling minimum and maximum against the window.
+
+    :return None:
+    """
+
+    print("Test: RollingMin RollingMax")
+
+    values = _get_series()
+
+    for window in (1, 2, 50):
+        minimum = indicators.RollingMin(window)
+        maximum = indicators.RollingMax(window)
+
+        for index, value in enumerate(values):
+            last_values = values[max(0, index - window + 1) : index + 1]
+
+            assert minimum.update(value) == min(last_values), "Wrong minimum"
+            assert maximum.update(value) == max(last_values), "Wrong maximum"
+
+    print("Test: RollingMin RollingMax passed")
+
+
+def _vwap_test() -> None:
+    """Test the VWAP against the window.
+
+    :return None:
+    """
+
+    print("Test: VWAP")
+
+    prices = _get_series()
+    volumes = [abs(price - 100) for price in prices]
+    vwap = indicators.VWAP(50)
+
+    for index, (price, volume) in enumerate(zip(prices, volumes)):
+        last = slice(max(0, index - 49), index + 1)
+        notional = sum(p * v for p, v in zip(prices[last], volumes[last]))
+        value = vwap.update(price, volume)
+
+        if sum(volumes[last]):
+            expected = notional / sum(volumes[last])
+            assert abs(value - expected) < 1e-6 * expected, "Wrong VWAP"
+
+    print("Test: VWAP passed")
+
+
+def _volatility_test() -> None:
+    """Test the volatility against the standard deviation of the window.
+
+    :return None:
+    """
+
+    print("Test: Volatility")
+
+    returns = [value / 100 - 1 for value in _get_series()]
+
+    for window in (1, 2, 50):
+        volatility = indicators.Volatility(window)
+
+        for index, value in enumerate(returns):
+            last_values = returns[max(0, index - window + 1) : index + 1]
+            result = volatility.update(value)
+
+            if len(last_values) > 1:
+                expected = statistics.stdev(last_values)
+                assert abs(result - expected) < 1e-9, "Wrong volatility"
+            elif window == 1 or index == 0:
+                assert result is None, "Volatility of a single value"
+
+    print("Test: Volatility passed")
+
+
+def run_all_tests() -> None:
+    """Run all indicators tests.
+
+    :return None:
+    """
+
+    _ring_buffer_test()
+    _ema_test()
+    _rolling_extremum_test()
+    _vwap_test()
+    _volatility_test()
@@ -0,0 +1,140 @@
+import os
+import tempfile
+
+import numpy as np
+
+from helpers import journal, models, snapshot
+
+TOKEN_ADDRESSES = (
+    "0x6B175474E89094C44Da98b954EedeAC495271d0F",
+    "0xdAC17F958D2ee523a2206206994597C13D831ec7",
+)
+PAIR_ADDRESS = "0xA478c2975Ab1Ea89e8196811F51A7B7Ade33eB11"
+
+
+def _get_market_snapshot(token_address: str, block_number: int):
+    """Build the market snapshot of a token at a block.
+
+    :param str token_address: The token address.
+    :param int block_number: The block number.
+    :return snapshot.MarketSnapshot: The market snapshot.
+    """
+
+    return snapshot.MarketSnapshot(
+        token_address=token_address,
+        pair_address=PAIR_ADDRESS,
+        block_number=block_number,
+        timestamp=1_700_000_000 + block_number * 12,
+        eth_balance_in_wei=10**18,
+        token_balance=block_number * 10**18,
+        weth_reserve_in_wei=50 * 10**18 + block_number,
+        token_reserve=10**24 - block_number * 10**18,
+    )
+
+
+def _write_read_test() -> None:
+    """Test that the ticks are read back from memory-mapped segments.
+
+    :return None:
+    """
+
+    print("Test: write read")
+
+    with tempfile.TemporaryDirectory() as directory:
+        market_snapshots = []
+
+        # Room for 10 ticks in a segment, after its header.
+        with journal.JournalWriter(directory, segment_size=64 * 11) as writer:
+            for block_number in range(25):
+                for token_address in TOKEN_ADDRESSES:
+                    market_snapshot = _get_market_snapshot(token_address, block_number)
+                    transaction_type = journal.ACTIONS[block_number % 4]
+
+                    writer.write(market_snapshot, transaction_type)
+                    market_snapshots.append((market_snapshot, transaction_type))
+
+        segments = journal.read_segments(directory)
+
+        assert len(segments) == 5, "Segments were not rotated"
+        assert all(
+            isinstance(segment, np.memmap) for segment in segments
+        ), "Segments were copied"
+
+        ticks = journal.read_ticks(directory)
+
+        assert ticks.dtype == journal.get_tick_dtype(), "Wrong dtype"
+        assert len(ticks) == len(market_snapshots), "Wrong tick count"
+
+        for tick, (market_snapshot, transaction_type) in zip(ticks, market_snapshots):
+            assert tick["block_number"] == market_snapshot.block_number
+            assert tick["timestamp"] == market_snapshot.timestamp
+            assert tick["token_id"] == journal.get_token_id(
+                market_snapshot.token_address
+            )
+            assert tick["weth_reserve_in_wei"] == float(
+                market_snapshot.weth_reserve_in_wei
+            )
+            assert tick["token_reserve"] == float(market_snapshot.token_reserve)
+            assert tick["price_in_wei"] == float(market_snapshot.price_in_wei)
+            assert tick["token_balance"] == float(market_snapshot.token_balance)
+            assert journal.ACTIONS[tick["action"]] == transaction_type
+
+        assert journal.read_token_addresses(directory) == {
+            journal.get_token_id(token_address): token_address
+            for token_address in TOKEN_ADDRESSES
+        }, "Wrong token addresses"
+
+    print("Test: write read passed")
+
+
+def _partial_record_test() -> None:
+    """Test that a record still being written is left out, and that a restarted
+    writer does not append to the segments of the previous one.
+
+    :return None:
+    """
+
+    print("Test: partial record")
+
+    with tempfile.TemporaryDirectory() as directory:
+        with journal.JournalWriter(directory) as writer:
+            writer.write(
+                _get_market_snapshot(TOKEN_ADDRESSES[0], 1), models.TransactionType.BUY
+            )
+
+        paths = [
+            os.path.join(directory, name)
+            for name in os.listdir(directory)
+            if name.endswith(journal.SEGMENT_EXTENSION)
+        ]
+
+        with open(paths[0], "ab") as file:
+            file.write(b"\x01" * 10)
+
+        assert len(journal.read_ticks(directory)) == 1, "Partial record was read"
+
+        # Same host and process ID, like a restarted container.
+        with journal.JournalWriter(directory) as writer:
+            writer.write(
+                _get_market_snapshot(TOKEN_ADDRESSES[0], 2), models.TransactionType.SELL
+            )
+
+        ticks = journal.read_ticks(directory)
+
+        assert list(ticks["block_number"]) == [1, 2], "Segment was overwritten"
+        assert journal.ACTIONS[ticks["action"][1]] == models.TransactionType.SELL
+
+        # An empty journal has no tick.
+        assert len(journal.read_ticks(os.path.join(directory, "empty"))) == 0
+
+    print("Test: partial record passed")
+
+
+def run_all_tests() -> None:
+    """Run all journal tests.
+
+    :return None:
+    """
+
+    _write_read_test()
+    _partial_record_test()
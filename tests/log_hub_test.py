@@ -0,0 +1,274 @@
+import asyncio
+import json
+import os
+import time
+
+import websockets.sync.client
+
+from helpers import log_hub, logger, models
+from tests.fake_node import WEBSOCKET_LOGGER
+
+TOKEN_ADDRESSES = (
+    "0x6B175474E89094C44Da98b954EedeAC495271d0F",
+    "0xdAC17F958D2ee523a2206206994597C13D831ec7",
+)
+
+
+class _StalledConnection:
+    """Connection of a subscriber that never reads, its sends never complete."""
+
+    def __init__(self) -> None:
+        self.close_code = None
+
+    async def send(self, frame: str) -> None:
+        await asyncio.Event().wait()
+
+    async def close(self, code: int, reason: str) -> None:
+        self.close_code = code
+
+
+class _RecordingConnection:
+    """Connection of a subscriber that reads everything."""
+
+    def __init__(self) -> None:
+        self.frames = []
+
+    async def send(self, frame: str) -> None:
+        self.frames.append(frame)
+
+    @property
+    def records(self) -> list[dict]:
+        return [record for frame in self.frames for record in json.loads(frame)]
+
+
+def _wait_for(condition, timeout: float = 10) -> None:
+    """Wait until a condition is true.
+
+    :param condition: The condition.
+    :param float timeout: The timeout in seconds.
+    :return None:
+    """
+
+    deadline = time.monotonic() + timeout
+
+    while not condition():
+        assert time.monotonic() < deadline, "Timed out"
+        time.sleep(0.01)
+
+
+def _receive(websocket, count: int) -> tuple[list[dict], int]:
+    """Receive records until there are enough.
+
+    :param websocket: The WebSocket connection of a subscriber.
+    :param int count: The number of records.
+    :return tuple[list[dict], int]: The records and the number of frames.
+    """
+
+    records = []
+    frames = 0
+
+    while len(records) < count:
+        records.extend(json.loads(websocket.recv(timeout=5)))
+        frames += 1
+
+    return records, frames
+
+
+def _parse_test() -> None:
+    """Test that the records and the messages of older jobs are parsed.
+
+    :return None:
+    """
+
+    print("Test: parse")
+
+    hub = log_hub.LogHub()
+    records = hub.parse_frame(
+        json.dumps(
+            [
+                {"token": TOKEN_ADDRESSES[0], "level": "ERROR", "message": "a::b"},
+                "2024-01-01T00:00:00::None::INFO::\x1b[42m[BUY]\x1b[0m PRICE: 1::2",
+                {"level": "INFO"},
+                42,
+            ]
+        )
+    )
+
+    assert len(records) == 2 and hub.invalid == 2, "Invalid records not skipped"
+    assert records[0]["message"] == "a::b" and records[0]["level"] == "ERROR"
+    assert records[1]["token"] is None, "Wrong token"
+    assert records[1]["message"].endswith("PRICE: 1::2"), "Message was split"
+    assert records[1]["txn"] == "BUY", "Transaction not recognized"
+    assert hub.parse_frame("Not a record") == [] and hub.invalid == 3
+
+    print("Test: parse passed")
+
+
+def _parse_invalid_fields_test() -> None:
+    """Test that the records with fields of the wrong types are skipped.
+
+    :return None:
+    """
+
+    print("Test: parse invalid fields")
+
+    hub = log_hub.LogHub()
+    received = []
+    hub.on_records = received.extend
+    records = [
+        {"message": "a", "token": 1},
+        {"message": "b", "level": ["ERROR"]},
+        {"message": "c", "level": None},
+        {"message": "d", "txn": {"type": "BUY"}},
+        {"message": "e", "token": None, "txn": "SELL"},
+    ]
+
+    hub.publish(hub.parse_frame(json.dumps(records)))
+
+    assert hub.invalid == 4, "Invalid records not skipped"
+    assert [record["message"] for record in received] == ["e"], "Wrong records"
+
+    print("Test: parse invalid fields passed")
+
+
+def _fan_out_test() -> None:
+    """Test that the records reach the subscribers of their tokens, in batches.
+
+    :return None:
+    """
+
+    print("Test: fan out")
+
+    received = []
+    hub = log_hub.LogHub(received.extend).start("127.0.0.1", 0, logger=WEBSOCKET_LOGGER)
+
+    try:
+        with (
+            websockets.sync.client.connect(
+                f"{hub.uri}/subscribe?token={TOKEN_ADDRESSES[0]}"
+            ) as first,
+            websockets.sync.client.connect(f"{hub.uri}/subscribe") as every,
+            websockets.sync.client.connect(hub.uri) as producer,
+        ):
+            _wait_for(lambda: hub.subscribers == 2 and hub.producers == 1)
+
+            producer.send(
+                json.dumps(
+                    [
+                        {"token": TOKEN_ADDRESSES[index % 2], "message": str(index)}
+                        for index in range(200)
+                    ]
+                )
+            )
+
+            records, frames = _receive(every, 200)
+
+            assert [record["message"] for record in records] == [
+                str(index) for index in range(200)
+            ], "Wrong records"
+            assert frames < 200, "Records were not batched"
+
+            records, _ = _receive(first, 100)
+
+            assert {record["token"] for record in records} == {TOKEN_ADDRESSES[0]}
+
+            # The topics change without reconnecting.
+            first.send(json.dumps({"subscribe": [TOKEN_ADDRESSES[1]]}))
+            _wait_for(lambda: TOKEN_ADDRESSES[1].lower() in hub._subscribers)
+            producer.send(json.dumps({"token": TOKEN_ADDRESSES[1], "message": "B"}))
+
+            assert _receive(first, 1)[0][0]["message"] == "B", "Topic not added"
+            assert len(received) == 201, "Records not passed to the callback"
+    finally:
+        hub.stop()
+
+    print("Test: fan out passed")
+
+
+def _eviction_test() -> None:
+    """Test that a subscriber falling behind is evicted, not the others.
+
+    :return None:
+    """
+
+    print("Test: eviction")
+
+    async def run() -> None:
+        hub = log_hub.LogHub(queue_size=5)
+        stalled = _StalledConnection()
+        reading = _RecordingConnection()
+        tasks = [
+            asyncio.create_task(hub.subscribe(connection, {log_hub.ALL_TOPICS}).run())
+            for connection in (stalled, reading)
+        ]
+
+        for index in range(4):
+            hub.publish(
+                [
+                    {"token": TOKEN_ADDRESSES[0], "message": f"{index}.{i}"}
+                    for i in range(3)
+                ]
+            )
+            await asyncio.sleep(0)
+
+        await asyncio.sleep(0)
+
+        for task in tasks:
+            task.cancel()
+
+        assert stalled.close_code == log_hub.SLOW_CONSUMER_CLOSE_CODE, "Not evicted"
+        assert hub.evicted == 1 and hub.subscribers == 1, "Wrong subscribers"
+        assert len(reading.records) == 12, "Reading subscriber missed records"
+
+    asyncio.run(run())
+
+    print("Test: eviction passed")
+
+
+def _logger_test() -> None:
+    """Test that the records shipped by the logger reach a subscriber.
+
+    :return None:
+    """
+
+    print("Test: logger")
+
+    hub = log_hub.LogHub().start("127.0.0.1", 0, logger=WEBSOCKET_LOGGER)
+    os.environ["WEBSOCKET_URI"] = hub.uri
+    logger.token_address.set(TOKEN_ADDRESSES[0])
+
+    try:
+        with websockets.sync.client.connect(
+            f"{hub.uri}/subscribe?token={TOKEN_ADDRESSES[0]}"
+        ) as subscriber:
+            _wait_for(lambda: hub.subscribers == 1)
+
+            logger.txn(models.TransactionType.BUY, 10**15, 1.5, 10**18, "0x01")
+
+            assert logger._get_shipper(hub.uri).flush(), "Record was not sent"
+
+            record = _receive(subscriber, 1)[0][0]
+
+            assert record["v"] == 1 and record["level"] == "INFO", "Wrong record"
+            assert record["token"] == TOKEN_ADDRESSES[0], "Wrong token"
+            assert record["txn"] == "BUY", "Wrong transaction type"
+    finally:
+        logger._get_shipper(hub.uri).stop()
+        logger.token_address.set(None)
+        os.environ.pop("WEBSOCKET_URI")
+        hub.stop()
+
+    print("Test: logger passed")
+
+
+def run_all_tests() -> None:
+    """Run all log hub tests.
+
+    :return None:
+    """
+
+    _parse_test()
+    _parse_invalid_fields_test()
+    _fan_out_test()
+    _eviction_test()
+    _logger_test()
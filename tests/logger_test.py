@@ -0,0 +1,153 @@
+import asyncio
+import logging
+import os
+import threading
+import time
+
+from helpers import logger, models
+from tests.fake_log_server import FakeLogServer
+
+TOKEN_ADDRESS = "0x6B175474E89094C44Da98b954EedeAC495271d0F"
+
+
+def _wait_for(condition, timeout: float = 10) -> None:
+    """Wait until a condition is true.
+
+    :param condition: The condition.
+    :param float timeout: The timeout in seconds.
+    :return None:
+    """
+
+    deadline = time.monotonic() + timeout
+
+    while not condition():
+        assert time.monotonic() < deadline, "Timed out"
+        time.sleep(0.01)
+
+
+def _ship_test() -> None:
+    """Test that the messages are shipped in batches, from anywhere.
+
+    :return None:
+    """
+
+    print("Test: ship")
+
+    with FakeLogServer() as server:
+        os.environ["WEBSOCKET_URI"] = server.uri
+
+        try:
+            for index in range(500):
+                logger.info(f"Message {index}")
+
+            logger.info("Not shipped", disable_ws_message=True)
+
+            # Logging from a running event loop does not start another one.
+            async def log() -> None:
+                logger.warning("From a running loop")
+
+            asyncio.run(log())
+
+            assert logger._get_shipper(server.uri).flush(), "Messages were not sent"
+            _wait_for(lambda: len(server.messages) == 501)
+        finally:
+            logger._get_shipper(server.uri).stop()
+            os.environ.pop("WEBSOCKET_URI")
+
+        messages = server.messages
+
+        assert [message["message"] for message in messages] == [
+            f"Message {index}" for index in range(500)
+        ] + ["From a running loop"], "Wrong messages"
+        assert messages[-1]["level"] == "WARNING", "Wrong level"
+        assert messages[-1]["token"] == TOKEN_ADDRESS, "Wrong token"
+        assert len(server.frames) < len(messages), "Messages were not batched"
+
+    print("Test: ship passed")
+
+
+def _reconnect_test() -> None:
+    """Test that the messages logged while disconnected are sent after.
+
+    :return None:
+    """
+
+    print("Test: reconnect")
+
+    with FakeLogServer() as server:
+        shipper = logger.LogShipper(server.uri)
+
+        try:
+            shipper.put("Before")
+            _wait_for(lambda: server.messages == ["Before"])
+
+            server.drop_connections()
+            shipper.put("After")
+
+            _wait_for(lambda: "After" in server.messages)
+        finally:
+            shipper.stop()
+
+        assert server.messages == ["Before", "After"], "Wrong messages"
+
+    print("Test: reconnect passed")
+
+
+def _drop_policy_test() -> None:
+    """Test the drop policies when the server is unreachable.
+
+    :return None:
+    """
+
+    print("Test: drop policy")
+
+    # Nothing listens on the port, the messages stay queued.
+    logging.disable(logging.ERROR)
+
+    try:
+        for drop_policy, kept in (
+            (models.DropPolicy.DROP_OLDEST, ["2", "3", "4"]),
+            (models.DropPolicy.DROP_NEWEST, ["0", "1", "2"]),
+        ):
+            shipper = logger.LogShipper("ws://127.0.0.1:9", drop_policy, queue_size=3)
+
+            for index in range(5):
+                shipper.put(str(index))
+
+            assert list(shipper._queue) == kept, f"Wrong messages for {drop_policy}"
+            assert shipper.dropped == 2, "Wrong drop count"
+            assert not shipper.flush(0.1), "Messages were sent"
+
+            shipper.stop()
+
+        # The logging thread waits for room in the queue.
+        shipper = logger.LogShipper(
+            "ws://127.0.0.1:9", models.DropPolicy.BLOCK, queue_size=1
+        )
+        shipper.put("0")
+
+        thread = threading.Thread(target=shipper.put, args=("1",))
+        thread.start()
+        thread.join(0.1)
+
+        assert thread.is_alive(), "Put did not wait"
+
+        shipper.stop()
+        thread.join()
+    finally:
+        logging.disable(logging.NOTSET)
+
+    print("Test: drop policy passed")
+
+
+def run_all_tests() -> None:
+    """Run all logger tests.
+
+    :return None:
+    """
+
+    os.environ.setdefault("TOKEN_ADDRESS", TOKEN_ADDRESS)
+
+    _ship_test()
+    _reconnect_test()
+    _drop_policy_test()
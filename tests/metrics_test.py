@@ -0,0 +1,126 @@
+import asyncio
+import os
+import urllib.request
+
+from helpers import metrics, snapshot, utils
+from tests.fake_node import WALLET_PRIVATE_KEY, FakeNode
+
+TOKEN_ADDRESS = "0x6B175474E89094C44Da98b954EedeAC495271d0F"
+PAIR_ADDRESS = "0xA478c2975Ab1Ea89e8196811F51A7B7Ade33eB11"
+
+
+def _disabled_test() -> None:
+    """Test that nothing is recorded while the metrics are disabled.
+
+    :return None:
+    """
+
+    print("Test: disabled")
+
+    metrics.disable()
+
+    @metrics.timed("stage_duration_seconds", stage="test")
+    def stage() -> int:
+        return 1
+
+    assert stage() == 1, "Wrong result"
+
+    metrics.inc("retries_total")
+
+    with metrics.timer("stage_duration_seconds", stage="test"):
+        pass
+
+    assert "stage_duration_seconds" not in metrics.render(), "Stage recorded"
+    assert "retries_total" not in metrics.render(), "Retry recorded"
+
+    print("Test: disabled passed")
+
+
+def _render_test() -> None:
+    """Test that the counters and histograms are rendered in the Prometheus format.
+
+    :return None:
+    """
+
+    print("Test: render")
+
+    metrics.enable()
+
+    try:
+
+        @metrics.timed("stage_duration_seconds", stage="test")
+        async def stage() -> int:
+            return 1
+
+        assert asyncio.run(stage()) == 1, "Wrong result"
+
+        metrics.inc("retries_total")
+        metrics.inc("retries_total")
+        metrics.observe("trade_duration_seconds", 0.2, side="buy")
+        lines = metrics.render().splitlines()
+
+        assert "# TYPE retries_total counter" in lines, "Counter type missing"
+        assert "retries_total 2" in lines, "Wrong counter"
+        assert 'trade_duration_seconds_bucket{side="buy",le="0.1"} 0' in lines
+        assert 'trade_duration_seconds_bucket{side="buy",le="0.25"} 1' in lines
+        assert 'trade_duration_seconds_bucket{side="buy",le="+Inf"} 1' in lines
+        assert 'trade_duration_seconds_count{side="buy"} 1' in lines
+        assert 'stage_duration_seconds_count{stage="test"} 1' in lines
+    finally:
+        metrics.disable()
+
+    print("Test: render passed")
+
+
+def _endpoint_test() -> None:
+    """Test that the stages, RPC requests and caches of a tick are served.
+
+    :return None:
+    """
+
+    print("Test: endpoint")
+
+    with FakeNode() as node:
+        os.environ["RPC_URL"] = node.url
+        os.environ["WALLET_ADDRESS"] = WALLET_PRIVATE_KEY
+        node.set_pair(TOKEN_ADDRESS, PAIR_ADDRESS, 50 * 10**18, 10**24)
+        server = metrics.start_server(0, "127.0.0.1")
+
+        try:
+            client = utils.get_client()
+            snapshot.get_market_snapshot(client, TOKEN_ADDRESS)
+            utils.get_token_balance(client, TOKEN_ADDRESS)
+            utils.get_token_balance(client, TOKEN_ADDRESS)
+
+            with urllib.request.urlopen(
+                f"http://127.0.0.1:{server.server_address[1]}/metrics"
+            ) as response:
+                content = response.read().decode()
+
+            lines = content.splitlines()
+
+            assert 'stage_duration_seconds_count{stage="snapshot"} 1' in lines
+            assert 'stage_duration_seconds_count{stage="balance"} 2' in lines
+            assert 'rpc_requests_total{method="eth_call"}' in content
+            assert 'cache_requests_total{cache="rpc",result="hit"}' in content
+            assert f'rpc_endpoint_latency_seconds_count{{endpoint="{node.url}"}}' in (
+                content
+            )
+            assert f'rpc_endpoint_circuit_open{{endpoint="{node.url}"}} 0' in lines
+        finally:
+            server.shutdown()
+            server.server_close()
+            metrics.disable()
+
+    print("Test: endpoint passed")
+
+
+def run_all_tests() -> None:
+    """Run all metrics tests.
+
+    :return None:
+    """
+
+    _disabled_test()
+    _render_test()
+    _endpoint_test()
@@ -0,0 +1,185 @@
+import asyncio
+import os
+import time
+
+from eth_account import Account
+from web3 import AsyncWeb3, Web3
+
+from helpers import async_client, multi_provider, utils
+from tests.fake_node import WALLET_PRIVATE_KEY, WALLET_PUBLIC_KEY, FakeNode
+
+
+def _use_nodes(*nodes: FakeNode) -> None:
+    """Use fake nodes as the RPC URL and the backup RPC URLs.
+
+    :param FakeNode nodes: The fake nodes, the first one is the RPC URL.
+    :return None:
+    """
+
+    os.environ["RPC_URL"] = nodes[0].url
+    os.environ["RPC_BACKUP_URLS"] = ",".join(node.url for node in nodes[1:])
+
+
+def _failover_test() -> None:
+    """Test that the reads skip an endpoint that is down.
+
+    :return None:
+    """
+
+    print("Test: failover")
+
+    with FakeNode() as down, FakeNode() as up:
+        _use_nodes(down, up)
+        down.http_status = 503
+        up.block_number = 42
+        client = utils.get_client()
+
+        assert client.eth.block_number == 42, "Wrong block number"
+
+        stats = multi_provider.get_endpoint_stats(down.url)
+        requests = down.http_requests
+
+        assert stats.breaker.failures == 1, "Failure not recorded"
+
+        for _ in range(5):
+            assert client.eth.block_number == 42, "Wrong block number"
+
+        assert down.http_requests == requests, "Endpoint down was used"
+        assert multi_provider.rank([down.url, up.url]) == [up.url, down.url]
+
+    print("Test: failover passed")
+
+
+def _hedged_read_test() -> None:
+    """Test that a slow read is sent to the next endpoint, which answers first.
+
+    :return None:
+    """
+
+    print("Test: hedged read")
+
+    with FakeNode(latency=0.5) as slow, FakeNode() as fast:
+        client = Web3(
+            multi_provider.MultiHTTPProvider([slow.url, fast.url], hedge_delay=0.05)
+        )
+
+        start = time.perf_counter()
+        client.eth.block_number
+
+        assert time.perf_counter() - start < 0.3, "Read was not hedged"
+        assert slow.http_requests == fast.http_requests == 1
+
+        # The slow endpoint is avoided while its request is in flight, and after.
+        client.eth.block_number
+        time.sleep(0.5)
+        client.eth.block_number
+
+        assert slow.http_requests == 1, "Slow endpoint was used"
+        assert fast.http_requests == 3, "Fast endpoint was not used"
+
+    print("Test: hedged read passed")
+
+
+async def _async_hedged_read_test() -> None:
+    """Test that an async read is hedged, and the slower request cancelled.
+
+    :return None:
+    """
+
+    print("Test: async hedged read")
+
+    with FakeNode(latency=0.5) as slow, FakeNode() as fast:
+        client = AsyncWeb3(
+            multi_provider.AsyncMultiHTTPProvider(
+                [slow.url, fast.url], hedge_delay=0.05
+            )
+        )
+
+        start = time.perf_counter()
+        await client.eth.block_number
+
+        assert time.perf_counter() - start < 0.3, "Read was not hedged"
+        assert multi_provider.rank([slow.url, fast.url]) == [fast.url, slow.url]
+
+    print("Test: async hedged read passed")
+
+
+async def _broadcast_test() -> None:
+    """Test that a raw transaction is sent to every endpoint, even one down.
+
+    :return None:
+    """
+
+    print("Test: broadcast")
+
+    with FakeNode() as first, FakeNode() as down, FakeNode(latency=0.1) as slow:
+        _use_nodes(first, down, slow)
+        os.environ["WALLET_ADDRESS"] = WALLET_PRIVATE_KEY
+        down.http_status = 503
+
+        client = await async_client.get_async_client()
+        signed_txn = Account.sign_transaction(
+            {
+                "chainId": 1,
+                "nonce": 0,
+                "to": WALLET_PUBLIC_KEY,
+                "value": 0,
+                "gas": 21_000,
+                "maxFeePerGas": 10**10,
+                "maxPriorityFeePerGas": 10**9,
+            },
+            WALLET_PRIVATE_KEY,
+        )
+
+        start = time.perf_counter()
+        txn_hash = await client.eth.send_raw_transaction(signed_txn.raw_transaction)
+
+        assert time.perf_counter() - start < 0.1, "Waited for the slow endpoint"
+
+        await asyncio.sleep(0.3)
+
+        assert txn_hash.to_0x_hex() in first.transactions, "Not sent to the first node"
+        assert txn_hash.to_0x_hex() in slow.transactions, "Not sent to the slow node"
+        assert multi_provider.get_endpoint_stats(down.url).failures == 1
+
+    print("Test: broadcast passed")
+
+
+def _histogram_test() -> None:
+    """Test that the latencies of every endpoint are counted in its histogram.
+
+    :return None:
+    """
+
+    print("Test: histogram")
+
+    with FakeNode(latency=0.03) as node:
+        client = Web3(multi_provider.MultiHTTPProvider([node.url]))
+
+        for _ in range(3):
+            client.eth.block_number
+
+        histogram = multi_provider.get_histograms()[node.url]
+        counts = dict(histogram["buckets"])
+
+        assert histogram["count"] == 3, "Wrong count"
+        assert histogram["sum"] >= 0.09, "Wrong sum"
+        assert counts[0.025] == 0 and counts[0.05] == counts[float("inf")] == 3
+
+    print("Test: histogram passed")
+
+
+def run_all_tests() -> None:
+    """Run all multi provider tests.
+
+    :return None:
+    """
+
+    try:
+        _failover_test()
+        _hedged_read_test()
+        asyncio.run(_async_hedged_read_test())
+        asyncio.run(_broadcast_test())
+        _histogram_test()
+    finally:
+        os.environ.pop("RPC_BACKUP_URLS", None)
@@ -0,0 +1,164 @@
+import asyncio
+import time
+
+from helpers import notifier
+from tests.fake_telegram import FakeTelegramClient
+
+CHAT_ID = -1001
+OTHER_CHAT_ID = -1002
+
+
+def _digest_test() -> None:
+    """Test that the messages of a chat are gathered in few messages.
+
+    :return None:
+    """
+
+    print("Test: digest")
+
+    async def run() -> None:
+        client = FakeTelegramClient()
+        telegram = notifier.Notifier(
+            client.send, rate=100, burst=100, digest_interval=0.05, max_length=100
+        )
+        telegram.start()
+
+        for index in range(100):
+            telegram.notify(CHAT_ID, f"Container {index} is deleted!")
+
+        telegram.notify(OTHER_CHAT_ID, "No tokens are traded!")
+        await asyncio.wait_for(telegram.join(), 5)
+        await telegram.stop()
+
+        assert client.get_lines(CHAT_ID) == [
+            f"Container {index} is deleted!" for index in range(100)
+        ], "Wrong lines"
+        assert client.get_lines(OTHER_CHAT_ID) == ["No tokens are traded!"]
+        assert len(client.messages) < 40, "Messages were not gathered"
+        assert all(len(message) <= 100 for _, _, message in client.messages)
+
+    asyncio.run(run())
+
+    print("Test: digest passed")
+
+
+def _rate_limit_test() -> None:
+    """Test that the messages are not sent faster than the rate limit.
+
+    :return None:
+    """
+
+    print("Test: rate limit")
+
+    async def run() -> None:
+        client = FakeTelegramClient()
+        telegram = notifier.Notifier(
+            client.send, rate=20, burst=3, digest_interval=0, max_length=10
+        )
+        telegram.start()
+
+        for index in range(10):
+            telegram.notify(CHAT_ID, f"Message {index}")
+
+        await asyncio.wait_for(telegram.join(), 5)
+        await telegram.stop()
+
+        times = [sent_at - client.messages[0][0] for sent_at, _, _ in client.messages]
+
+        assert len(times) == 10, "Messages were gathered or lost"
+        assert times[2] < 0.04, "The burst was not sent at once"
+
+        for index in range(3, 10):
+            assert times[index] >= (index - 2) / 20 - 0.01, "Rate limit exceeded"
+
+    asyncio.run(run())
+
+    print("Test: rate limit passed")
+
+
+def _priority_test() -> None:
+    """Test that the trades are sent before the other messages, without waiting.
+
+    :return None:
+    """
+
+    print("Test: priority")
+
+    async def run() -> None:
+        client = FakeTelegramClient()
+        telegram = notifier.Notifier(
+            client.send, rate=10, burst=1, digest_interval=0.2, max_length=20
+        )
+        telegram.start()
+
+        for index in range(5):
+            telegram.notify(CHAT_ID, f"Status {index}")
+
+        start = time.monotonic()
+        telegram.notify(OTHER_CHAT_ID, "[BUY] 1 ETH", notifier.TRADE)
+        await asyncio.sleep(0.1)
+
+        assert [message for _, _, message in client.messages] == ["[BUY] 1 ETH"]
+        assert client.messages[0][0] - start < 0.05, "The trade waited the digest"
+
+        # Queued after the digest is ready, sent before its rest.
+        await asyncio.sleep(0.15)
+        telegram.notify(CHAT_ID, "[SELL] 2 ETH", notifier.TRADE)
+        await asyncio.wait_for(telegram.join(), 5)
+        await telegram.stop()
+
+        assert client.get_lines(CHAT_ID) == [
+            "Status 0",
+            "Status 1",
+            "[SELL] 2 ETH",
+            "Status 2",
+            "Status 3",
+            "Status 4",
+        ], "Wrong order"
+
+    asyncio.run(run())
+
+    print("Test: priority passed")
+
+
+def _flood_wait_test() -> None:
+    """Test that a message is sent again after a flood wait, not after another error.
+
+    :return None:
+    """
+
+    print("Test: flood wait")
+
+    async def run() -> None:
+        client = FakeTelegramClient(flood_waits=1, flood_wait=0.2, failures=1)
+        telegram = notifier.Notifier(client.send, rate=100, burst=100)
+        telegram.start()
+
+        telegram.notify(CHAT_ID, "[BUY] 1 ETH", notifier.TRADE)
+        await asyncio.wait_for(telegram.join(), 5)
+
+        assert client.get_lines(CHAT_ID) == [], "Failed message was sent"
+        assert telegram.failed == 1 and telegram.sent == 0
+
+        telegram.notify(CHAT_ID, "[SELL] 2 ETH", notifier.TRADE)
+        await asyncio.wait_for(telegram.join(), 5)
+        await telegram.stop()
+
+        assert client.get_lines(CHAT_ID) == ["[SELL] 2 ETH"], "Message was lost"
+        assert client.calls[1] - client.calls[0] >= 0.2, "Flood wait not waited"
+
+    asyncio.run(run())
+
+    print("Test: flood wait passed")
+
+
+def run_all_tests() -> None:
+    """Run all notifier tests.
+
+    :return None:
+    """
+
+    _digest_test()
+    _rate_limit_test()
+    _priority_test()
+    _flood_wait_test()
@@ -0,0 +1,256 @@
+import asyncio
+import os
+import tempfile
+import time
+
+from helpers import constants, orchestrator
+from tests.fake_docker import FakeDockerClient
+
+TOKEN_ADDRESSES = [f"0x{index:040x}" for index in range(10)]
+
+
+async def _wait_for(condition, timeout: float = 5) -> None:
+    """Wait until a condition is true.
+
+    :param condition: The condition.
+    :param float timeout: The timeout in seconds.
+    :return None:
+    """
+
+    deadline = time.monotonic() + timeout
+
+    while not condition():
+        assert time.monotonic() < deadline, "Timed out"
+        await asyncio.sleep(0.01)
+
+
+async def _measure_lag(lags: list[float], stop: asyncio.Event) -> None:
+    """Measure how late the event loop wakes a sleeping task.
+
+    :param list[float] lags: The lags in seconds, updated.
+    :param asyncio.Event stop: Set to stop.
+    :return None:
+    """
+
+    while not stop.is_set():
+        start = time.perf_counter()
+        await asyncio.sleep(0.01)
+        lags.append(time.perf_counter() - start - 0.01)
+
+
+def _stop_all_test() -> None:
+    """Test that the containers are stopped concurrently, off the event loop.
+
+    :return None:
+    """
+
+    print("Test: stop all")
+
+    async def run() -> None:
+        docker_client = FakeDockerClient(stop_latency=0.1)
+
+        for token in TOKEN_ADDRESSES:
+            docker_client.add_container(token)
+
+        docker = orchestrator.Orchestrator(docker_client, parallelism=4)
+        lags = []
+        stop = asyncio.Event()
+        monitor = asyncio.create_task(_measure_lag(lags, stop))
+
+        start = time.monotonic()
+        errors = await docker.stop_all([*TOKEN_ADDRESSES, "0xmissing"])
+        duration = time.monotonic() - start
+
+        stop.set()
+        await monitor
+        docker.close()
+
+        assert all(errors[token] is None for token in TOKEN_ADDRESSES), "Not stopped"
+        assert isinstance(errors["0xmissing"], KeyError), "Error not returned"
+        assert not docker_client.containers.by_name, "Not removed"
+        assert docker_client.max_concurrency <= 4, "Parallelism not bounded"
+        assert duration < 0.6, f"Not stopped concurrently: {duration:.2f}s"
+        assert max(lags) < 0.05, f"Event loop blocked: {max(lags):.3f}s"
+
+    asyncio.run(run())
+
+    print("Test: stop all passed")
+
+
+def _inventory_test() -> None:
+    """Test that the inventory follows the Docker events without listing.
+
+    :return None:
+    """
+
+    print("Test: inventory")
+
+    async def run() -> None:
+        docker_client = FakeDockerClient()
+        docker_client.add_container(TOKEN_ADDRESSES[0])
+        docker_client.add_container(TOKEN_ADDRESSES[1], status="exited")
+
+        docker = orchestrator.Orchestrator(docker_client)
+        docker.watch()
+
+        await _wait_for(lambda: docker._synced.is_set())
+
+        assert await docker.get_containers() == {
+            TOKEN_ADDRESSES[0]: "running",
+            TOKEN_ADDRESSES[1]: "exited",
+        }, "Wrong inventory"
+
+        await docker.start("tun43p/smart", TOKEN_ADDRESSES[2], {})
+        # Started by someone else, seen from its events only.
+        await asyncio.to_thread(
+            docker_client.containers.run, "tun43p/smart", TOKEN_ADDRESSES[3]
+        )
+        await asyncio.to_thread(
+            docker_client.containers.by_name[TOKEN_ADDRESSES[0]].stop
+        )
+
+        await _wait_for(
+            lambda: docker._containers.get(TOKEN_ADDRESSES[3]) == "running"
+            and docker._containers.get(TOKEN_ADDRESSES[0]) == "exited"
+        )
+        await docker.stop(TOKEN_ADDRESSES[1])
+        containers = await docker.get_containers()
+        docker.close()
+
+        assert containers == {
+            TOKEN_ADDRESSES[0]: "exited",
+            TOKEN_ADDRESSES[2]: "running",
+            TOKEN_ADDRESSES[3]: "running",
+        }, "Wrong inventory"
+        assert docker_client.calls["list"] == 1, "Containers listed again"
+
+    asyncio.run(run())
+
+    print("Test: inventory passed")
+
+
+def _reconnect_test() -> None:
+    """Test that the containers are listed again when the events stop.
+
+    :return None:
+    """
+
+    print("Test: reconnect")
+
+    retry_delay = constants.DOCKER_EVENTS_RETRY_DELAY
+    constants.DOCKER_EVENTS_RETRY_DELAY = 0.05
+
+    async def run() -> None:
+        docker_client = FakeDockerClient()
+        docker = orchestrator.Orchestrator(docker_client)
+        docker.watch()
+
+        await _wait_for(lambda: docker._synced.is_set())
+
+        # The daemon restarts, the containers created meanwhile have no event.
+        docker_client.streams[0].close()
+        docker_client.add_container(TOKEN_ADDRESSES[0])
+
+        await _wait_for(lambda: len(docker_client.streams) == 2)
+        await _wait_for(lambda: docker._synced.is_set())
+
+        assert await docker.get_containers() == {TOKEN_ADDRESSES[0]: "running"}
+        assert docker_client.calls["list"] == 2, "Containers not listed again"
+
+        docker.close()
+
+    try:
+        asyncio.run(run())
+    finally:
+        constants.DOCKER_EVENTS_RETRY_DELAY = retry_delay
+
+    print("Test: reconnect passed")
+
+
+def _build_image_test() -> None:
+    """Test that the image is only built when its files changed.
+
+    :return None:
+    """
+
+    print("Test: build image")
+
+    with tempfile.TemporaryDirectory() as path:
+        for relative_path in constants.DOCKER_BUILD_PATHS:
+            if "." in relative_path or relative_path == "Dockerfile":
+                with open(os.path.join(path, relative_path), "w") as file:
+                    file.write(relative_path)
+            else:
+                os.makedirs(os.path.join(path, relative_path, "__pycache__"))
+
+                with open(os.path.join(path, relative_path, "module.py"), "w") as file:
+                    file.write("VALUE = 1")
+
+        docker_client = FakeDockerClient()
+        docker = orchestrator.Orchestrator(docker_client)
+
+        assert docker.build_image("tun43p/smart", path), "Image not built"
+        assert not docker.build_image("tun43p/smart", path), "Image built again"
+
+        # Compiled by the tests or the bot, not copied to the image.
+        with open(os.path.join(path, "helpers", "__pycache__", "a.pyc"), "w") as file:
+            file.write("compiled")
+
+        assert not docker.build_image("tun43p/smart", path), "Built for a .pyc"
+
+        with open(os.path.join(path, "jobs", "module.py"), "w") as file:
+            file.write("VALUE = 2")
+
+        assert docker.build_image("tun43p/smart", path), "Image not built again"
+        assert docker_client.calls["images.build"] == 2
+
+        docker.close()
+
+    print("Test: build image passed")
+
+
+def _remove_stale_containers_test() -> None:
+    """Test that the healthy containers of the image built are kept.
+
+    :return None:
+    """
+
+    print("Test: remove stale containers")
+
+    docker_client = FakeDockerClient()
+    docker = orchestrator.Orchestrator(docker_client)
+    docker.build_hash = "current"
+    labels = {orchestrator.BUILD_HASH_LABEL: "current"}
+
+    docker_client.add_container(TOKEN_ADDRESSES[0], labels=labels)
+    docker_client.add_container(TOKEN_ADDRESSES[1], labels=labels, health="healthy")
+    docker_client.add_container(TOKEN_ADDRESSES[2], labels=labels, health="unhealthy")
+    docker_client.add_container(TOKEN_ADDRESSES[3], status="exited", labels=labels)
+    docker_client.add_container(
+        TOKEN_ADDRESSES[4], labels={orchestrator.BUILD_HASH_LABEL: "outdated"}
+    )
+    docker_client.add_container("postgres")
+
+    removed = docker.remove_stale_containers()
+    docker.close()
+
+    assert sorted(removed) == TOKEN_ADDRESSES[2:5], "Wrong containers removed"
+    assert sorted(docker_client.containers.by_name) == [
+        *TOKEN_ADDRESSES[:2],
+        "postgres",
+    ], "Wrong containers kept"
+
+    print("Test: remove stale containers passed")
+
+
+def run_all_tests() -> None:
+    """Run all orchestrator tests.
+
+    :return None:
+    """
+
+    _stop_all_test()
+    _inventory_test()
+    _reconnect_test()
+    _build_image_test()
+    _remove_stale_containers_test()
@@ -0,0 +1,283 @@
+import json
+import os
+import threading
+import time
+
+from helpers import constants, price_feed, utils
+from tests.fake_node import FakeNode
+
+TOKEN_ADDRESS = "0x6B175474E89094C44Da98b954EedeAC495271d0F"
+PAIR_ADDRESS = "0xA478c2975Ab1Ea89e8196811F51A7B7Ade33eB11"
+
+# Recorded Sync logs of the pair, from block 101 to 119. Block 107 syncs the
+# same reserves again.
+with open(
+    os.path.join(os.path.dirname(__file__), "fixtures", "sync_logs.json")
+) as file:
+    SYNC_LOGS = json.load(file)
+
+
+def _get_reserves(log: dict) -> tuple[int, int]:
+    """Get the reserves of a raw Sync log.
+
+    :param dict log: The log.
+    :return tuple[int, int]: The reserves.
+    """
+
+    data = bytes.fromhex(log["data"][2:])
+    return int.from_bytes(data[:32]), int.from_bytes(data[32:])
+
+
+def _start_feed(node: FakeNode, websocket_url: str | None = None) -> tuple:
+    """Start a feed tracking the pair at block 100.
+
+    :param FakeNode node: The fake node.
+    :param str | None websocket_url: The WebSocket URL.
+    :return tuple: The feed and the list of its `on_change` calls.
+    """
+
+    node.block_number = 100
+    node.set_pair(TOKEN_ADDRESS, PAIR_ADDRESS, 50 * 10**18, 2_000_000 * 10**18)
+
+    os.environ["RPC_URL"] = node.url
+    changes = []
+
+    feed = price_feed.ReserveFeed(
+        utils.get_client(),
+        lambda *change: changes.append(change),
+        websocket_url,
+    )
+    feed.track(PAIR_ADDRESS)
+
+    return feed, changes
+
+
+def _wait_for(condition, timeout: float = 10) -> None:
+    """Wait until a condition is true.
+
+    :param condition: The condition.
+    :param float timeout: The timeout in seconds.
+    :return None:
+    """
+
+    deadline = time.monotonic() + timeout
+
+    while not condition():
+        assert time.monotonic() < deadline, "Timed out"
+        time.sleep(0.01)
+
+
+def _poll_test() -> None:
+    """Test that the strategy is only called when the reserves change.
+
+    :return None:
+    """
+
+    print("Test: poll")
+
+    with FakeNode() as node:
+        node.logs = list(SYNC_LOGS)
+        feed, changes = _start_feed(node)
+
+        for block_number in range(101, 121):
+            node.block_number = block_number
+            feed.poll()
+
+        blocks = {int(log["blockNumber"], 16) for log in SYNC_LOGS} - {107}
+
+        assert [change[1] for change in changes] == sorted(blocks), "Wrong calls"
+        assert changes[-1][0][PAIR_ADDRESS] == _get_reserves(
+            SYNC_LOGS[-1]
+        ), "Wrong reserves"
+        assert (
+            feed.reserves[PAIR_ADDRESS] == changes[-1][0][PAIR_ADDRESS]
+        ), "Wrong reserves"
+
+    print("Test: poll passed")
+
+
+def _reorg_test() -> None:
+    """Test that a reorganization rolls back the reserves.
+
+    :return None:
+    """
+
+    print("Test: reorg")
+
+    with FakeNode() as node:
+        node.logs = list(SYNC_LOGS)
+        node.block_number = 120
+        feed, changes = _start_feed(node)
+        node.block_number = 120
+        feed.poll()
+
+        # Blocks 118 to 120 are replaced, the new block 118 has no Sync log.
+        for block_number in range(118, 122):
+            node.block_hashes[block_number] = "0x" + "ab" * 31 + f"{block_number:02x}"
+
+        node.logs = [log for log in SYNC_LOGS if int(log["blockNumber"], 16) < 118]
+        node.block_number = 121
+        feed.poll()
+
+        assert feed.reserves[PAIR_ADDRESS] == _get_reserves(
+            node.logs[-1]
+        ), "Reserves were not rolled back"
+        assert changes[-1][0][PAIR_ADDRESS] == _get_reserves(node.logs[-1]), "No call"
+
+        # The new block 122 brings the reserves of the old chain back.
+        log = dict(
+            SYNC_LOGS[-1], blockNumber=hex(122), blockHash=node.get_block_hash(122)
+        )
+        node.logs.append(log)
+        node.block_number = 122
+        feed.poll()
+
+        assert feed.reserves[PAIR_ADDRESS] == _get_reserves(log), "Log was not applied"
+
+    print("Test: reorg passed")
+
+
+def _subscribe_test() -> None:
+    """Test the WebSocket subscription, with a catch-up after a reconnection.
+
+    :return None:
+    """
+
+    print("Test: subscribe")
+
+    with FakeNode() as node:
+        websocket_url = node.start_websocket()
+        feed, changes = _start_feed(node, websocket_url)
+
+        # Logs mined before the subscription are caught up with eth_getLogs.
+        node.logs = SYNC_LOGS[:6]
+        node.block_number = 106
+
+        thread = threading.Thread(target=feed.run)
+        thread.start()
+
+        try:
+            _wait_for(
+                lambda: feed.reserves[PAIR_ADDRESS] == _get_reserves(SYNC_LOGS[5])
+            )
+
+            node.block_number = 111
+            node.push_logs(SYNC_LOGS[6:11])
+            _wait_for(
+                lambda: feed.reserves[PAIR_ADDRESS] == _get_reserves(SYNC_LOGS[10])
+            )
+
+            # Logs mined while disconnected are caught up after the reconnection.
+            node.drop_websockets()
+            node.logs.extend(SYNC_LOGS[11:])
+            node.block_number = 120
+            _wait_for(
+                lambda: feed.reserves[PAIR_ADDRESS] == _get_reserves(SYNC_LOGS[-1])
+            )
+        finally:
+            feed.stop()
+            thread.join()
+
+        blocks = {int(log["blockNumber"], 16) for log in SYNC_LOGS}
+
+        assert len(changes) <= len(SYNC_LOGS), "Logs were applied twice"
+        assert {change[1] for change in changes} <= blocks, "Wrong calls"
+
+    print("Test: subscribe passed")
+
+
+def _transient_errors_test() -> None:
+    """Test that the feed recovers once the node answers again.
+
+    :return None:
+    """
+
+    print("Test: transient errors")
+
+    with FakeNode() as node:
+        feed, changes = _start_feed(node)
+
+        thread = threading.Thread(target=feed.run, args=(0.01,))
+        thread.start()
+
+        try:
+            # Opens the circuit, the retries of the provider are refused.
+            node.failing_requests = constants.CIRCUIT_FAILURE_THRESHOLD
+            node.logs = list(SYNC_LOGS)
+            node.block_number = 120
+            _wait_for(
+                lambda: feed.reserves[PAIR_ADDRESS] == _get_reserves(SYNC_LOGS[-1]),
+                timeout=15,
+            )
+
+            assert thread.is_alive(), "Feed stopped"
+        finally:
+            feed.stop()
+            thread.join()
+
+        assert node.failing_requests == 0, "Node did not fail"
+        assert changes[-1][0][PAIR_ADDRESS] == _get_reserves(SYNC_LOGS[-1]), "No call"
+
+    print("Test: transient errors passed")
+
+
+def _subscribe_errors_test() -> None:
+    """Test that a failed catch-up and a malformed notification do not stop the
+    subscription.
+
+    :return None:
+    """
+
+    print("Test: subscribe errors")
+
+    with FakeNode() as node:
+        websocket_url = node.start_websocket()
+        feed, changes = _start_feed(node, websocket_url)
+
+        node.logs = SYNC_LOGS[:6]
+        node.block_number = 106
+        # The catch-up fails, the subscription is opened again.
+        node.failing_requests = constants.CIRCUIT_FAILURE_THRESHOLD
+
+        thread = threading.Thread(target=feed.run)
+        thread.start()
+
+        try:
+            _wait_for(
+                lambda: feed.reserves[PAIR_ADDRESS] == _get_reserves(SYNC_LOGS[5]),
+                timeout=15,
+            )
+
+            node.push_logs([{"address": PAIR_ADDRESS}])
+            # Never returned by eth_getLogs, a node would not store it.
+            node.logs.pop()
+
+            node.block_number = 111
+            node.push_logs(SYNC_LOGS[6:11])
+            _wait_for(
+                lambda: feed.reserves[PAIR_ADDRESS] == _get_reserves(SYNC_LOGS[10])
+            )
+
+            assert thread.is_alive(), "Feed stopped"
+        finally:
+            feed.stop()
+            thread.join()
+
+        assert changes[-1][1] == int(SYNC_LOGS[10]["blockNumber"], 16), "No call"
+
+    print("Test: subscribe errors passed")
+
+
+def run_all_tests() -> None:
+    """Run all price_feed tests.
+
+    :return None:
+    """
+
+    os.environ.setdefault("TOKEN_ADDRESS", TOKEN_ADDRESS)
+
+    _poll_test()
+    _reorg_test()
+    _subscribe_test()
+    _transient_errors_test()
+    _subscribe_errors_test()
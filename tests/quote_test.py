@@ -0,0 +1,134 @@
+import numpy as np
+
+from helpers import quote
+
+# Reserves of a 50 ETH / 2M token pair, from WETH to the token.
+RESERVES = (50 * 10**18, 2_000_000 * 10**18)
+
+
+def _get_amount_out_test() -> None:
+    """Test get_amount_out against the values of the Uniswap V2 router tests.
+
+    :return None:
+    """
+
+    print("Test: get_amount_out")
+
+    assert quote.get_amount_out(2, 100, 100) == 1, "Wrong amount out"
+    assert quote.get_amount_out(10**18, *RESERVES) == (
+        10**18 * 997 * RESERVES[1] // (RESERVES[0] * 1000 + 10**18 * 997)
+    ), "Wrong amount out"
+
+    for amount_in, reserve_in, reserve_out in ((0, 100, 100), (2, 0, 100)):
+        try:
+            quote.get_amount_out(amount_in, reserve_in, reserve_out)
+        except ValueError:
+            pass
+        else:
+            raise AssertionError("Invalid amount out did not raise")
+
+    print("Test: get_amount_out passed")
+
+
+def _get_amount_in_test() -> None:
+    """Test get_amount_in against the values of the Uniswap V2 router tests.
+
+    :return None:
+    """
+
+    print("Test: get_amount_in")
+
+    assert quote.get_amount_in(1, 100, 100) == 2, "Wrong amount in"
+
+    for amount_out in (1, 10**15, 10**18, 10**21):
+        amount_in = quote.get_amount_in(amount_out, *RESERVES)
+
+        assert quote.get_amount_out(amount_in, *RESERVES) >= amount_out, "Too small"
+        assert (
+            amount_in == 1
+            or quote.get_amount_out(amount_in - 1, *RESERVES) < amount_out
+        ), "Too big"
+
+    print("Test: get_amount_in passed")
+
+
+def _get_amounts_test() -> None:
+    """Test the multi-hop quotes.
+
+    :return None:
+    """
+
+    print("Test: get_amounts")
+
+    assert quote.get_amounts_out(2, [(10000, 10000)]) == [2, 1], "Wrong amounts out"
+    assert quote.get_amounts_in(1, [(10000, 10000)]) == [2, 1], "Wrong amounts in"
+
+    path = [RESERVES, RESERVES[::-1]]
+    amounts = quote.get_amounts_out(10**18, path)
+
+    assert amounts[1] == quote.get_amount_out(10**18, *RESERVES), "Wrong first hop"
+    assert amounts[2] < 10**18, "Round trip did not pay the fees"
+    assert quote.get_amounts_in(amounts[2], path)[0] <= 10**18, "Wrong amounts in"
+
+    print("Test: get_amounts passed")
+
+
+def _get_price_impact_test() -> None:
+    """Test the price impact and the order sizing.
+
+    :return None:
+    """
+
+    print("Test: get_price_impact")
+
+    assert quote.get_spot_price(*RESERVES) == 40_000, "Wrong spot price"
+
+    amount_in = quote.get_max_amount_in(1, RESERVES[0])
+    impact = quote.get_price_impact_percent(amount_in, RESERVES[0])
+
+    assert abs(impact - 1) < 1e-9, "Wrong max amount in"
+
+    print("Test: get_price_impact passed")
+
+
+def _get_amounts_out_array_test() -> None:
+    """Test that the vectorized quotes match the exact quotes.
+
+    :return None:
+    """
+
+    print("Test: get_amounts_out_array")
+
+    amounts_in = np.linspace(1e15, 1e20, 5000)
+    amounts_out = quote.get_amounts_out_array(amounts_in, *RESERVES)
+    impacts = quote.get_price_impacts_percent_array(amounts_in, RESERVES[0])
+
+    for index in (0, 1234, 4999):
+        amount_in = int(amounts_in[index])
+
+        assert np.isclose(
+            amounts_out[index],
+            quote.get_amount_out(amount_in, *RESERVES),
+            rtol=1e-12,
+        ), "Vectorized amount out does not match"
+
+        assert np.isclose(
+            impacts[index],
+            quote.get_price_impact_percent(amount_in, RESERVES[0]),
+            rtol=1e-12,
+        ), "Vectorized price impact does not match"
+
+    print("Test: get_amounts_out_array passed")
+
+
+def run_all_tests() -> None:
+    """Run all quote tests.
+
+    :return None:
+    """
+
+    _get_amount_out_test()
+    _get_amount_in_test()
+    _get_amounts_test()
+    _get_price_impact_test()
+    _get_amounts_out_array_test()
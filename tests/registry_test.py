@@ -0,0 +1,139 @@
+import os
+import tempfile
+
+from eth_abi import encode
+from web3 import Web3
+from web3.providers import BaseProvider
+
+from helpers import constants, registry
+
+TOKEN_ADDRESS = "0x6b175474e89094c44da98b954eedeac495271d0f"
+PAIR_ADDRESS = "0xA478c2975Ab1Ea89e8196811F51A7B7Ade33eB11"
+
+
+class _GetPairProvider(BaseProvider):
+    """Provider answering every `eth_call` with the pair address."""
+
+    def __init__(self) -> None:
+        super().__init__()
+        self.calls = 0
+
+    def make_request(self, method: str, params: list) -> dict:
+        if method == "eth_call":
+            self.calls += 1
+            result = "0x" + encode(["address"], [PAIR_ADDRESS]).hex()
+        elif method == "eth_chainId":
+            result = "0x1"
+        else:
+            raise NotImplementedError(method)
+
+        return {"jsonrpc": "2.0", "id": 0, "result": result}
+
+
+def _get_contract_test() -> None:
+    """Test that contracts are built once per client.
+
+    :return None:
+    """
+
+    print("Test: get_contract")
+
+    client = Web3()
+    contracts = registry.get_registry(client)
+
+    assert registry.get_registry(client) is contracts, "Registry was rebuilt"
+    assert contracts.get_router() is contracts.get_router(), "Router was rebuilt"
+    assert contracts.get_factory() is contracts.get_factory(), "Factory was rebuilt"
+    assert contracts.get_token(TOKEN_ADDRESS) is contracts.get_token(
+        Web3.to_checksum_address(TOKEN_ADDRESS)
+    ), "Token was rebuilt"
+
+    assert (
+        registry.get_registry(Web3()) is not contracts
+    ), "Registry is shared between clients"
+
+    print("Test: get_contract passed")
+
+
+def _get_pair_address_test() -> None:
+    """Test that the pair address is resolved once.
+
+    :return None:
+    """
+
+    print("Test: get_pair_address")
+
+    provider = _GetPairProvider()
+    contracts = registry.get_registry(Web3(provider))
+
+    pair = contracts.get_pair(TOKEN_ADDRESS)
+
+    assert pair.address == PAIR_ADDRESS, "Wrong pair address"
+    assert contracts.get_pair(TOKEN_ADDRESS) is pair, "Pair was rebuilt"
+    assert provider.calls == 1, "getPair was called more than once"
+
+    print("Test: get_pair_address passed")
+
+
+def _pair_address_disk_cache_test() -> None:
+    """Test that the pair address is read from the disk by a new process.
+
+    :return None:
+    """
+
+    print("Test: pair address disk cache")
+
+    with tempfile.TemporaryDirectory() as cache_dir:
+        os.environ["CACHE_DIR"] = cache_dir
+        os.environ["CACHE_PAIRS"] = "true"
+
+        try:
+            provider = _GetPairProvider()
+            registry.get_registry(Web3(provider)).get_pair_address(TOKEN_ADDRESS)
+
+            # Another registry, like the one of a new container.
+            pair_address = registry.get_registry(Web3(provider)).get_pair_address(
+                TOKEN_ADDRESS
+            )
+
+            assert pair_address == PAIR_ADDRESS, "Wrong pair address"
+            assert provider.calls == 1, "Pair address not read from the disk"
+
+            os.environ["CACHE_PAIRS"] = "false"
+            registry.get_registry(Web3(provider)).get_pair_address(TOKEN_ADDRESS)
+
+            assert provider.calls == 2, "Pair address read from the disk"
+        finally:
+            del os.environ["CACHE_DIR"]
+            del os.environ["CACHE_PAIRS"]
+
+    print("Test: pair address disk cache passed")
+
+
+def _to_checksum_address_test() -> None:
+    """Test the memoized checksum address.
+
+    :return None:
+    """
+
+    print("Test: to_checksum_address")
+
+    assert registry.to_checksum_address(
+        constants.WETH_CONTRACT_ADDRESS.lower()
+    ) == Web3.to_checksum_address(
+        constants.WETH_CONTRACT_ADDRESS
+    ), "Wrong checksum address"
+
+    print("Test: to_checksum_address passed")
+
+
+def run_all_tests() -> None:
+    """Run all registry tests.
+
+    :return None:
+    """
+
+    _get_contract_test()
+    _get_pair_address_test()
+    _pair_address_disk_cache_test()
+    _to_checksum_address_test()
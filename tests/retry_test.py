@@ -0,0 +1,140 @@
+import asyncio
+import os
+
+from eth_account import Account
+from web3 import Web3
+
+from helpers import async_client, errors, multi_provider, retry, rpc_middleware, utils
+from tests.fake_node import WALLET_PRIVATE_KEY, WALLET_PUBLIC_KEY, FakeNode
+
+
+def _jitter_test() -> None:
+    """Test that the delays are drawn below the exponential backoff, capped.
+
+    :return None:
+    """
+
+    print("Test: jitter")
+
+    policy = retry.RetryPolicy(attempts=8, base_delay=0.1, max_delay=1)
+
+    for attempt in range(8):
+        delays = [policy.get_delay(attempt) for _ in range(100)]
+
+        assert all(0 <= delay <= min(1, 0.1 * 2**attempt) for delay in delays)
+        assert len(set(delays)) > 1, "Delays are not jittered"
+
+    print("Test: jitter passed")
+
+
+def _transient_errors_test() -> None:
+    """Test that only the errors that may not happen again are retried.
+
+    :return None:
+    """
+
+    print("Test: transient errors")
+
+    assert errors.is_transient(errors.RPCUnavailableError("down"))
+    assert errors.is_transient(TimeoutError())
+    assert not errors.is_transient(errors.TransactionError("sent", "0x01"))
+    assert not errors.is_transient(ValueError("execution reverted"))
+    assert errors.is_transient_response({"error": {"code": -32005}})
+    assert not errors.is_transient_response({"error": {"code": 3}})
+
+    calls = []
+
+    def fail() -> None:
+        calls.append(None)
+        raise ValueError("execution reverted")
+
+    try:
+        retry.RetryPolicy(base_delay=0).call(fail)
+    except ValueError:
+        pass
+
+    assert len(calls) == 1, "Permanent error was retried"
+
+    print("Test: transient errors passed")
+
+
+def _blip_test() -> None:
+    """Test that the reads ride through a node failing a few requests.
+
+    :return None:
+    """
+
+    print("Test: blip")
+
+    with FakeNode() as node:
+        os.environ["RPC_URL"] = node.url
+        node.block_number = 42
+        client = utils.get_client()
+
+        node.failing_requests = 2
+
+        assert client.eth.block_number == 42, "Wrong block number"
+        assert node.failing_requests == 0, "Read was not retried"
+
+        async def read() -> int:
+            return await (await async_client.get_async_client()).eth.block_number
+
+        # The block number read above is cached for the URL.
+        rpc_middleware.get_block_cache(node.url).clear()
+        node.failing_requests = 2
+
+        assert asyncio.run(read()) == 42, "Wrong block number"
+        assert node.failing_requests == 0, "Async read was not retried"
+
+    print("Test: blip passed")
+
+
+def _send_not_retried_test() -> None:
+    """Test that a raw transaction failing is not sent again.
+
+    :return None:
+    """
+
+    print("Test: send not retried")
+
+    with FakeNode() as node:
+        client = Web3(multi_provider.MultiHTTPProvider([node.url]))
+        signed_txn = Account.sign_transaction(
+            {
+                "chainId": 1,
+                "nonce": 0,
+                "to": WALLET_PUBLIC_KEY,
+                "value": 0,
+                "gas": 21_000,
+                "maxFeePerGas": 10**10,
+                "maxPriorityFeePerGas": 10**9,
+            },
+            WALLET_PRIVATE_KEY,
+        )
+
+        client.eth.chain_id
+        requests = node.http_requests
+        node.failing_requests = 1
+
+        try:
+            client.eth.send_raw_transaction(signed_txn.raw_transaction)
+            raise AssertionError("Send did not fail")
+        except errors.RPCUnavailableError:
+            pass
+
+        assert node.http_requests == requests + 1, "Send was retried"
+        assert not node.transactions, "Transaction was sent"
+
+    print("Test: send not retried passed")
+
+
+def run_all_tests() -> None:
+    """Run all retry tests.
+
+    :return None:
+    """
+
+    _jitter_test()
+    _transient_errors_test()
+    _blip_test()
+    _send_not_retried_test()
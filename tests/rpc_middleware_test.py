@@ -0,0 +1,244 @@
+import asyncio
+import os
+import threading
+
+from web3 import AsyncWeb3
+
+from helpers import rpc_middleware, utils
+from tests.fake_node import WALLET_PRIVATE_KEY, WALLET_PUBLIC_KEY, FakeNode
+
+TOKEN_ADDRESSES = (
+    "0x6B175474E89094C44Da98b954EedeAC495271d0F",
+    "0xdAC17F958D2ee523a2206206994597C13D831ec7",
+    "0xA0b86991c6218b36c1d19D4a2e9Eb0cE3606eB48",
+    "0x2260FAC5E5542a773Aa44fBCfeDf7C193bc2C599",
+    "0x514910771AF9Ca656af840dff83E8264EcF986CA",
+)
+PAIR_ADDRESSES = (
+    "0xA478c2975Ab1Ea89e8196811F51A7B7Ade33eB11",
+    "0x0d4a11d5EEaaC28EC3F61d100daF4d40471f1852",
+    "0xB4e16d0168e52d35CaCD2c6185b44281Ec28C9Dc",
+    "0xBb2b8038a1640196FbE3e38816F3e67Cba72D940",
+    "0xa2107FA5B38d9bbd2C461D6EDf11B11A50F6b974",
+)
+
+
+def _set_up(node: FakeNode) -> None:
+    """Set the pairs and balances of the tokens on the fake node.
+
+    :param FakeNode node: The fake node.
+    :return None:
+    """
+
+    for index, (token_address, pair_address) in enumerate(
+        zip(TOKEN_ADDRESSES, PAIR_ADDRESSES)
+    ):
+        node.set_pair(token_address, pair_address, 50 * 10**18, 10**24)
+        node.token_balances[(token_address.lower(), WALLET_PUBLIC_KEY.lower())] = index
+
+    node.eth_balances[WALLET_PUBLIC_KEY.lower()] = 3 * 10**18
+    node.block_number = 100
+
+    os.environ["RPC_URL"] = node.url
+
+
+async def _read_tick(client: AsyncWeb3) -> list:
+    """Read what a job and its sell read for every token, concurrently.
+
+    :param AsyncWeb3 client: The AsyncWeb3 client.
+    :return list: The prices, liquidities and balances.
+    """
+
+    return await asyncio.gather(
+        *(
+            read(client, token_address)
+            for token_address in TOKEN_ADDRESSES
+            for read in (
+                utils.async_get_token_price_in_wei,
+                utils.async_get_token_liquidity_in_wei,
+                utils.async_get_token_balance,
+                utils.async_get_token_balance,
+                utils.async_get_token_liquidity_in_wei,
+            )
+        )
+    )
+
+
+def _cache_test() -> None:
+    """Test that the reads are cached until a new head.
+
+    :return None:
+    """
+
+    print("Test: cache")
+
+    with FakeNode() as node:
+        _set_up(node)
+
+        client = utils.get_client()
+        client.eth.get_block("latest")
+
+        assert client.eth.get_balance(WALLET_PUBLIC_KEY) == 3 * 10**18
+        assert utils.get_token_balance(client, TOKEN_ADDRESSES[1]) == 1
+
+        requests = len(node.requests)
+
+        assert client.eth.get_balance(WALLET_PUBLIC_KEY) == 3 * 10**18
+        assert utils.get_token_balance(client, TOKEN_ADDRESSES[1]) == 1
+        assert len(node.requests) == requests, "Reads were not cached"
+
+        # The pending block and the latest block are always read.
+        client.eth.get_balance(WALLET_PUBLIC_KEY, "pending")
+        client.eth.get_block("latest")
+
+        assert node.requests[requests:] == [
+            "eth_getBalance",
+            "eth_getBlockByNumber",
+        ], "Pending or latest block was cached"
+
+        # The latest block shows a new head, which drops the cached reads.
+        node.eth_balances[WALLET_PUBLIC_KEY.lower()] = 4 * 10**18
+        node.block_number = 101
+
+        assert client.eth.get_balance(WALLET_PUBLIC_KEY) == 3 * 10**18
+        assert client.eth.get_block("latest")["number"] == 101
+        assert client.eth.get_balance(WALLET_PUBLIC_KEY) == 4 * 10**18
+
+        # A block read by number stays cached until the next head.
+        client.eth.get_block(100)
+        requests = len(node.requests)
+
+        client.eth.get_block(100)
+        assert len(node.requests) == requests, "Block was not cached"
+
+        rpc_middleware.new_head(client, 102)
+        client.eth.get_block(100)
+        assert "eth_getBlockByNumber" in node.requests[requests:], "Block was cached"
+
+    print("Test: cache passed")
+
+
+def _batch_test() -> None:
+    """Test that concurrent requests share JSON-RPC batches.
+
+    :return None:
+    """
+
+    print("Test: batch")
+
+    with FakeNode(latency=0.05) as node:
+        _set_up(node)
+
+        client = utils.get_client()
+
+        async def read() -> list:
+            async_client = AsyncWeb3(AsyncWeb3.AsyncHTTPProvider(node.url))
+            rpc_middleware.install(async_client)
+
+            balances = await asyncio.gather(
+                *(
+                    utils.async_get_token_balance(async_client, token_address)
+                    for token_address in TOKEN_ADDRESSES
+                )
+            )
+            await async_client.provider.disconnect()
+
+            return balances
+
+        requests = node.http_requests
+        balances = asyncio.run(read())
+
+        assert balances == list(range(len(TOKEN_ADDRESSES))), "Wrong balances"
+        assert node.http_requests - requests == 1, "Requests were not batched"
+
+        # The requests of the threads sent while a batch is in flight share the
+        # next batch.
+        for token_address in TOKEN_ADDRESSES:
+            client.eth.get_balance(token_address)
+
+        rpc_middleware.new_head(client, 101)
+
+        results = {}
+        threads = [
+            threading.Thread(
+                target=lambda address=token_address: results.update(
+                    {address: client.eth.get_balance(address)}
+                )
+            )
+            for token_address in TOKEN_ADDRESSES
+        ]
+
+        requests = node.http_requests
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        assert len(results) == len(TOKEN_ADDRESSES), "Wrong balances"
+        assert node.http_requests - requests <= 2, "Requests were not batched"
+
+    print("Test: batch passed")
+
+
+def _request_count_test() -> None:
+    """Test that the reads of a tick take at most half the requests.
+
+    :return None:
+    """
+
+    print("Test: request count")
+
+    with FakeNode() as node:
+        _set_up(node)
+
+        async def count(install: bool) -> tuple[int, int, list]:
+            rpc_middleware.get_block_cache(node.url).clear()
+
+            async_client = AsyncWeb3(
+                AsyncWeb3.AsyncHTTPProvider(node.url, cache_allowed_requests=True)
+            )
+            if install:
+                rpc_middleware.install(async_client)
+
+            # The pair addresses are resolved once, before the ticks.
+            await _read_tick(async_client)
+            rpc_middleware.new_head(async_client, node.block_number)
+
+            http_requests = node.http_requests
+            requests = len(node.requests)
+            results = await _read_tick(async_client)
+            await async_client.provider.disconnect()
+
+            return (
+                node.http_requests - http_requests,
+                len(node.requests) - requests,
+                results,
+            )
+
+        http_requests, requests, results = asyncio.run(count(install=False))
+        batched_http_requests, batched_requests, batched_results = asyncio.run(
+            count(install=True)
+        )
+
+        assert batched_results == results, "Results changed"
+        assert batched_http_requests * 2 <= http_requests, "Not half the requests"
+        assert batched_requests * 2 <= requests, "Not half the JSON-RPC requests"
+
+        # The reserves and the balance of each token are read once.
+        assert batched_requests == 2 * len(TOKEN_ADDRESSES), "Reads were repeated"
+
+    print("Test: request count passed")
+
+
+def run_all_tests() -> None:
+    """Run all rpc_middleware tests.
+
+    :return None:
+    """
+
+    os.environ.setdefault("TOKEN_ADDRESS", TOKEN_ADDRESSES[0])
+    os.environ.setdefault("WALLET_ADDRESS", WALLET_PRIVATE_KEY)
+
+    _cache_test()
+    _batch_test()
+    _request_count_test()
@@ -0,0 +1,202 @@
+import asyncio
+import os
+
+from helpers import async_client, signals, snapshot, utils
+from tests.fake_node import WALLET_PRIVATE_KEY, WALLET_PUBLIC_KEY, FakeNode
+
+TOKEN_ADDRESSES = (
+    "0x6B175474E89094C44Da98b954EedeAC495271d0F",
+    "0xdAC17F958D2ee523a2206206994597C13D831ec7",
+)
+PAIR_ADDRESSES = (
+    "0xA478c2975Ab1Ea89e8196811F51A7B7Ade33eB11",
+    "0x0d4a11d5EEaaC28EC3F61d100daF4d40471f1852",
+)
+TOKEN_BALANCE = 10 * 10**18
+
+
+def _set_up_node(node: FakeNode) -> None:
+    """Give the wallet ETH and tokens, and the tokens their pairs.
+
+    :param FakeNode node: The fake node.
+    :return None:
+    """
+
+    node.eth_balances[WALLET_PUBLIC_KEY.lower()] = 10**18
+
+    for token_address, pair_address in zip(TOKEN_ADDRESSES, PAIR_ADDRESSES):
+        node.set_pair(token_address, pair_address, 50 * 10**18, 10**24)
+        node.token_balances[(token_address.lower(), WALLET_PUBLIC_KEY.lower())] = (
+            TOKEN_BALANCE
+        )
+
+    os.environ["RPC_URL"] = node.url
+    os.environ["WALLET_ADDRESS"] = WALLET_PRIVATE_KEY
+
+
+async def _mine_until(node: FakeNode, futures: list, timeout: float = 10) -> None:
+    """Mine a block at a time until the receipt futures are done.
+
+    :param FakeNode node: The fake node.
+    :param list futures: The receipt futures.
+    :param float timeout: The timeout in seconds.
+    :return None:
+    """
+
+    for _ in range(int(timeout / 0.05)):
+        if all(future.done() for future in futures):
+            return
+
+        node.mine()
+        await asyncio.sleep(0.05)
+
+    raise AssertionError("Receipts were not received")
+
+
+async def _pipelined_sell_test() -> None:
+    """Test that the approval and the swap of a sale are mined in one block.
+
+    :return None:
+    """
+
+    print("Test: pipelined sell")
+
+    with FakeNode() as node:
+        _set_up_node(node)
+        client = await async_client.get_async_client()
+
+        pending_txn = await signals.async_submit_sell(
+            client, TOKEN_ADDRESSES[0], TOKEN_BALANCE
+        )
+
+        assert not pending_txn.receipt.done(), "Waited for a receipt"
+
+        node.mine()
+        receipt = await asyncio.wait_for(pending_txn.receipt, 5)
+
+        assert receipt["status"] == 1, "Swap failed"
+        assert [txn["blockNumber"] for txn in node.transactions.values()] == [
+            2,
+            2,
+        ], "Approval and swap were not mined in the same block"
+        assert [txn["nonce"] for txn in node.transactions.values()] == [0, 1]
+
+    print("Test: pipelined sell passed")
+
+
+async def _concurrent_sells_test() -> None:
+    """Test that concurrent sales and buys get distinct nonces.
+
+    :return None:
+    """
+
+    print("Test: concurrent sells")
+
+    with FakeNode() as node:
+        _set_up_node(node)
+        client = await async_client.get_async_client()
+        requests = len(node.requests)
+
+        pending_txns = await asyncio.gather(
+            *(
+                signals.async_submit_sell(client, token_address, TOKEN_BALANCE)
+                for token_address in TOKEN_ADDRESSES
+            ),
+            signals.async_submit_buy(client, TOKEN_ADDRESSES[0], 10**17),
+        )
+
+        assert sorted(txn["nonce"] for txn in node.transactions.values()) == list(
+            range(5)
+        ), "Nonces collided"
+        assert (
+            node.requests[requests:].count("eth_getTransactionCount") == 1
+        ), "Nonces were not handed out locally"
+
+        await _mine_until(node, [pending_txn.receipt for pending_txn in pending_txns])
+
+        assert all(
+            pending_txn.receipt.result()["status"] == 1 for pending_txn in pending_txns
+        ), "Transaction failed"
+
+    print("Test: concurrent sells passed")
+
+
+async def _resync_test() -> None:
+    """Test that the nonces are read again after a failed send.
+
+    :return None:
+    """
+
+    print("Test: resync")
+
+    with FakeNode() as node:
+        _set_up_node(node)
+        client = await async_client.get_async_client()
+        market_snapshot = await snapshot.async_get_market_snapshot(
+            client, TOKEN_ADDRESSES[0]
+        )
+
+        pending_txn = await signals.async_submit_buy(
+            client, TOKEN_ADDRESSES[0], 10**17, market_snapshot=market_snapshot
+        )
+        await _mine_until(node, [pending_txn.receipt])
+
+        # Transactions sent by another bot of the same wallet.
+        node.nonces[WALLET_PUBLIC_KEY.lower()] = 10
+
+        try:
+            await signals.async_submit_buy(
+                client, TOKEN_ADDRESSES[0], 10**17, market_snapshot=market_snapshot
+            )
+        except Exception as error:
+            assert "nonce too low" in str(error), f"Wrong error: {error}"
+        else:
+            raise AssertionError("Sent with a used nonce")
+
+        pending_txn = await signals.async_submit_buy(
+            client, TOKEN_ADDRESSES[0], 10**17, market_snapshot=market_snapshot
+        )
+
+        assert node.transactions[pending_txn.txn_hash.to_0x_hex()]["nonce"] == 10
+
+        await _mine_until(node, [pending_txn.receipt])
+
+    print("Test: resync passed")
+
+
+def _submit_sell_test() -> None:
+    """Test that a sale from synchronous code returns before its receipts.
+
+    :return None:
+    """
+
+    print("Test: submit_sell")
+
+    with FakeNode() as node:
+        _set_up_node(node)
+        client = utils.get_client()
+        pending_txn = signals.submit_sell(client, TOKEN_ADDRESSES[1], TOKEN_BALANCE)
+
+        assert not pending_txn.receipt.done(), "Waited for a receipt"
+
+        node.mine()
+
+        assert pending_txn.receipt.result(timeout=5)["status"] == 1, "Swap failed"
+
+    print("Test: submit_sell passed")
+
+
+async def _run_async_tests() -> None:
+    await _pipelined_sell_test()
+    await _concurrent_sells_test()
+    await _resync_test()
+
+
+def run_all_tests() -> None:
+    """Run all signals tests.
+
+    :return None:
+    """
+
+    asyncio.run(_run_async_tests())
+    _submit_sell_test()
@@ -0,0 +1,119 @@
+import os
+
+from helpers import constants, rpc_middleware, snapshot, utils
+from tests.fake_node import WALLET_PRIVATE_KEY, WALLET_PUBLIC_KEY, FakeNode
+
+# One token above and one below the WETH address, to cover both pair orders.
+TOKEN_ADDRESSES = (
+    "0x6B175474E89094C44Da98b954EedeAC495271d0F",
+    "0xdAC17F958D2ee523a2206206994597C13D831ec7",
+)
+PAIR_ADDRESS = "0xA478c2975Ab1Ea89e8196811F51A7B7Ade33eB11"
+PAIR_ADDRESSES = (PAIR_ADDRESS, "0x0d4a11d5EEaaC28EC3F61d100daF4d40471f1852")
+
+
+def _get_market_snapshot_test(token_address: str) -> None:
+    """Test that the snapshot is read in one request and matches the router.
+
+    :param str token_address: The token address.
+    :return None:
+    """
+
+    print(f"Test: get_market_snapshot {token_address}")
+
+    with FakeNode() as node:
+        node.set_pair(token_address, PAIR_ADDRESS, 50 * 10**18, 2_000_000 * 10**18)
+        node.eth_balances[WALLET_PUBLIC_KEY.lower()] = 3 * 10**18
+        node.token_balances[(token_address.lower(), WALLET_PUBLIC_KEY.lower())] = 42
+        node.block_number = 123
+
+        os.environ["RPC_URL"] = node.url
+        client = utils.get_client()
+
+        # The pair address is resolved once, outside of the snapshot, which is
+        # cached until the next head.
+        snapshot.get_market_snapshot(client, token_address)
+        rpc_middleware.new_head(client, node.block_number)
+
+        requests = node.http_requests
+        market_snapshot = snapshot.get_market_snapshot(client, token_address)
+
+        assert node.http_requests - requests == 1, "Snapshot took more than one request"
+
+        assert market_snapshot.block_number == 123, "Wrong block number"
+        assert market_snapshot.timestamp == node.timestamp, "Wrong timestamp"
+        assert market_snapshot.eth_balance_in_wei == 3 * 10**18, "Wrong ETH balance"
+        assert market_snapshot.token_balance == 42, "Wrong token balance"
+        assert market_snapshot.liquidity_in_wei == 50 * 10**18, "Wrong liquidity"
+        assert market_snapshot.token_reserve == 2_000_000 * 10**18, "Wrong reserve"
+
+        assert (
+            market_snapshot.price_in_wei
+            == utils.get_router(client)
+            .functions.getAmountsOut(
+                10**18, [token_address, constants.WETH_CONTRACT_ADDRESS]
+            )
+            .call()[-1]
+        ), "Price does not match the router"
+
+        assert market_snapshot.liquidity_in_wei == utils.get_token_liquidity_in_wei(
+            client, token_address
+        ), "Liquidity does not match the pair"
+
+    print(f"Test: get_market_snapshot {token_address} passed")
+
+
+def _get_market_snapshots_test() -> None:
+    """Test that the snapshots of many tokens are read in one request.
+
+    :return None:
+    """
+
+    print("Test: get_market_snapshots")
+
+    with FakeNode() as node:
+        for index, token_address in enumerate(TOKEN_ADDRESSES):
+            node.set_pair(
+                token_address,
+                PAIR_ADDRESSES[index],
+                (index + 1) * 10**18,
+                (index + 1) * 10**21,
+            )
+            node.token_balances[(token_address.lower(), WALLET_PUBLIC_KEY.lower())] = (
+                index + 1
+            )
+
+        os.environ["RPC_URL"] = node.url
+        client = utils.get_client()
+
+        snapshot.get_market_snapshots(client, TOKEN_ADDRESSES)
+        rpc_middleware.new_head(client, node.block_number)
+
+        requests = node.http_requests
+        market_snapshots = snapshot.get_market_snapshots(client, TOKEN_ADDRESSES)
+
+        assert (
+            node.http_requests - requests == 1
+        ), "Snapshots took more than one request"
+
+        for index, market_snapshot in enumerate(market_snapshots):
+            assert market_snapshot == snapshot.get_market_snapshot(
+                client, TOKEN_ADDRESSES[index]
+            ), "Snapshot does not match the single token snapshot"
+            assert market_snapshot.token_balance == index + 1, "Wrong token balance"
+
+    print("Test: get_market_snapshots passed")
+
+
+def run_all_tests() -> None:
+    """Run all snapshot tests.
+
+    :return None:
+    """
+
+    os.environ.setdefault("WALLET_ADDRESS", WALLET_PRIVATE_KEY)
+
+    for token_address in TOKEN_ADDRESSES:
+        _get_market_snapshot_test(token_address)
+
+    _get_market_snapshots_test()
@@ -0,0 +1,139 @@
+import os
+import subprocess
+import sys
+import time
+
+from helpers import errors, snapshot, utils
+from tests.fake_node import WALLET_PRIVATE_KEY, FakeNode
+
+TOKEN_ADDRESS = "0x6B175474E89094C44Da98b954EedeAC495271d0F"
+PAIR_ADDRESS = "0xA478c2975Ab1Ea89e8196811F51A7B7Ade33eB11"
+
+# Imported on first use only, a trading job never needs them before its first tick.
+LAZY_MODULES = ("numpy", "colorama", "helpers.backtest", "helpers.sweep")
+# Import time of the modules of the repository themselves, without their packages.
+IMPORT_TIME_BUDGET = 0.3  # seconds
+RPC_LATENCY = 0.05
+
+
+def _get_import_times(module: str) -> dict[str, float]:
+    """Import a module in a new interpreter, with `-X importtime`.
+
+    :param str module: The module.
+    :return dict[str, float]: The import time of every module imported, without
+        the modules it imported, in seconds.
+    """
+
+    root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        env={**os.environ, "PYTHONPATH": root},
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+    import_times = {}
+
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+
+        self_time, _, name = line.removeprefix("import time:").split("|")
+        import_times[name.strip()] = int(self_time) / 1_000_000
+
+    return import_times
+
+
+def _import_time_test() -> None:
+    """Test that the job imports no module it does not need, within its budget.
+
+    :return None:
+    """
+
+    print("Test: import time")
+
+    import_times = _get_import_times("main")
+    imported = [module for module in LAZY_MODULES if module in import_times]
+    own_import_time = sum(
+        import_time
+        for module, import_time in import_times.items()
+        if module == "main" or module.startswith(("helpers", "jobs"))
+    )
+
+    assert "helpers.engine" in import_times, "Wrong import times"
+    assert not imported, f"Imported before their first use: {imported}"
+    assert (
+        own_import_time < IMPORT_TIME_BUDGET
+    ), f"Import time over budget: {own_import_time:.3f}s"
+
+    print("Test: import time passed")
+
+
+def _prewarm_test() -> None:
+    """Test that the first snapshot is resolved while connecting.
+
+    :return None:
+    """
+
+    print("Test: prewarm")
+
+    with FakeNode(latency=RPC_LATENCY) as node:
+        node.set_pair(TOKEN_ADDRESS, PAIR_ADDRESS, 50 * 10**18, 10**24)
+
+        os.environ["RPC_URL"] = node.url
+        client = utils.get_client()
+
+        start = time.monotonic()
+        connected = utils.prewarm(client, [TOKEN_ADDRESS])
+        duration = time.monotonic() - start
+
+        requests = node.http_requests
+        market_snapshot = snapshot.get_market_snapshot(client, TOKEN_ADDRESS)
+
+        assert connected, "Not connected"
+        assert duration < 3 * RPC_LATENCY, f"Not resolved in parallel: {duration:.2f}s"
+        assert node.http_requests - requests == 1, "First tick took more requests"
+        assert market_snapshot.pair_address == PAIR_ADDRESS, "Wrong pair"
+
+    print("Test: prewarm passed")
+
+
+def _prewarm_not_connected_test() -> None:
+    """Test that a node down is reported without waiting for the pairs.
+
+    :return None:
+    """
+
+    print("Test: prewarm not connected")
+
+    with FakeNode() as node:
+        os.environ["RPC_URL"] = node.url
+
+    # Closed, nothing listens on its port anymore.
+    client = utils.get_client()
+
+    start = time.monotonic()
+
+    try:
+        connected = utils.prewarm(client, [TOKEN_ADDRESS])
+    except errors.TransientError:
+        # Raised once the retries of the provider are exhausted.
+        connected = False
+
+    assert not connected, "Connected to a closed node"
+    assert time.monotonic() - start < 5, "Waited for the pairs"
+
+    print("Test: prewarm not connected passed")
+
+
+def run_all_tests() -> None:
+    """Run all startup tests.
+
+    :return None:
+    """
+
+    os.environ.setdefault("WALLET_ADDRESS", WALLET_PRIVATE_KEY)
+
+    _import_time_test()
+    _prewarm_test()
+    _prewarm_not_connected_test()
@@ -0,0 +1,170 @@
+import os
+import pickle
+
+import numpy as np
+
+import jobs  # noqa: F401, registers the strategies
+from helpers import backtest, environment, models, snapshot, strategy
+from jobs.example_job import ExampleStrategy
+
+TOKEN_ADDRESSES = (
+    "0x6B175474E89094C44Da98b954EedeAC495271d0F",
+    "0xdAC17F958D2ee523a2206206994597C13D831ec7",
+)
+PAIR_ADDRESS = "0xA478c2975Ab1Ea89e8196811F51A7B7Ade33eB11"
+
+
+class _Client:
+    """Client of a job, like a Web3 client or a backtest."""
+
+
+class _CountingStrategy(strategy.Strategy):
+    """Strategy counting its ticks."""
+
+    name = "counting"
+
+    def __init__(self, token_address, initial_price_in_wei, step=1) -> None:
+        super().__init__(token_address, initial_price_in_wei)
+        self.step = step
+        self.count = 0
+
+    def on_tick(self, market_snapshot: snapshot.MarketSnapshot) -> tuple:
+        self.count += self.step
+
+        return (models.TransactionType.HOLD, self.count, self.step, None)
+
+
+def _get_market_snapshot(token_address: str) -> snapshot.MarketSnapshot:
+    """Build a market snapshot of a token.
+
+    :param str token_address: The token address.
+    :return snapshot.MarketSnapshot: The market snapshot.
+    """
+
+    return snapshot.MarketSnapshot(
+        token_address=token_address,
+        pair_address=PAIR_ADDRESS,
+        block_number=1,
+        timestamp=0,
+        eth_balance_in_wei=10**18,
+        token_balance=0,
+        weth_reserve_in_wei=50 * 10**18,
+        token_reserve=10**24,
+    )
+
+
+def _registry_test() -> None:
+    """Test that the strategies are selected by name.
+
+    :return None:
+    """
+
+    print("Test: registry")
+
+    assert strategy.get_strategy("example") is ExampleStrategy, "Wrong strategy"
+    assert strategy.get_strategy("trailing_stop").name == "trailing_stop"
+
+    os.environ["STRATEGY"] = "trailing_stop"
+
+    try:
+        job = strategy.get_job(environment.get_strategy_name())
+    finally:
+        os.environ.pop("STRATEGY")
+
+    assert job.strategy_class.name == "trailing_stop", "Wrong strategy from env"
+    assert environment.get_strategy_name() == "example", "Wrong default strategy"
+
+    for register, name in (
+        (lambda: strategy.get_strategy("unknown"), "unknown"),
+        (lambda: strategy.register(type("Nameless", (strategy.Strategy,), {})), None),
+        (
+            lambda: strategy.register(
+                type("Other", (strategy.Strategy,), {"name": "example"})
+            ),
+            "duplicate",
+        ),
+    ):
+        try:
+            register()
+        except ValueError:
+            pass
+        else:
+            raise AssertionError(f"No error for {name}")
+
+    print("Test: registry passed")
+
+
+def _strategy_job_test() -> None:
+    """Test that a job keeps an instance per client and token.
+
+    :return None:
+    """
+
+    print("Test: StrategyJob")
+
+    job = strategy.StrategyJob(_CountingStrategy, step=2)
+    client, other_client = _Client(), _Client()
+
+    def run(client, token_address: str, **kwargs) -> int:
+        return job(
+            client, token_address, 1, _get_market_snapshot(token_address), **kwargs
+        )[1]
+
+    assert [run(client, TOKEN_ADDRESSES[0]) for _ in range(3)] == [2, 4, 6]
+    assert run(client, TOKEN_ADDRESSES[1]) == 2, "Tokens share an instance"
+    assert (
+        run(other_client, TOKEN_ADDRESSES[0], step=5) == 5
+    ), "Clients share an instance"
+
+    # A job is sent to the processes of a sweep without its instances.
+    copy = pickle.loads(pickle.dumps(strategy.StrategyJob(ExampleStrategy, a=1)))
+
+    assert copy.strategy_class is ExampleStrategy and copy.parameters == {"a": 1}
+
+    # The instances of a client are dropped with it.
+    del client
+    assert len(job._instances) == 1, "Instances were kept"
+
+    print("Test: StrategyJob passed")
+
+
+def _trailing_stop_test() -> None:
+    """Test that the trailing stop sells once the price falls from its high.
+
+    :return None:
+    """
+
+    print("Test: trailing_stop")
+
+    weth_reserves = [50, 52, 54, 56, 55, 54, 53, 50, 49, 48]
+    events = np.zeros(len(weth_reserves), dtype=backtest.EVENT_DTYPE)
+    events["block_number"] = np.arange(1, len(weth_reserves) + 1)
+    events["weth_reserve_in_wei"] = np.array(weth_reserves) * 1e18
+    events["token_reserve"] = 1e24
+
+    result = backtest.run_backtest(
+        strategy.get_job(
+            "trailing_stop", window=5, ema_span=3, volatility_multiplier=0
+        ),
+        TOKEN_ADDRESSES[0],
+        events,
+        10**18,
+        10**22,
+    )
+
+    # From 56 down to 53 is -5.4%, the sale is mined at 50.
+    assert result.trade_count == 1, "Wrong trade count"
+    assert result.trades[0].block_number == 8, "Wrong trade block"
+
+    print("Test: trailing_stop passed")
+
+
+def run_all_tests() -> None:
+    """Run all strategy tests.
+
+    :return None:
+    """
+
+    _registry_test()
+    _strategy_job_test()
+    _trailing_stop_test()
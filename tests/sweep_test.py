@@ -0,0 +1,151 @@
+import csv
+import os
+import tempfile
+
+import numpy as np
+
+from helpers import backtest, sweep
+from jobs.example_job import example_job
+
+TOKEN_ADDRESS = "0x6B175474E89094C44Da98b954EedeAC495271d0F"
+TOKEN_BALANCE = 10_000 * 10**18
+ETH_BALANCE = 10**18
+
+
+def _get_events() -> np.ndarray:
+    """Build a history where the price rises 0.2% per block, for 100 blocks.
+
+    :return np.ndarray: The events.
+    """
+
+    events = np.zeros(100, dtype=backtest.EVENT_DTYPE)
+    events["block_number"] = np.arange(1, 101)
+    events["weth_reserve_in_wei"] = 50e18 + np.arange(100) * 1e17
+    events["token_reserve"] = 1e24
+
+    return events
+
+
+def _search_space_test() -> None:
+    """Test the grid and random search spaces.
+
+    :return None:
+    """
+
+    print("Test: search space")
+
+    grid = sweep.get_grid({"take_profit_percent": [1, 2], "slippage_percent": [0.1]})
+
+    assert grid == [
+        {"take_profit_percent": 1, "slippage_percent": 0.1},
+        {"take_profit_percent": 2, "slippage_percent": 0.1},
+    ], "Wrong grid"
+
+    space = {"take_profit_percent": (1.0, 5.0), "delay_blocks": [1, 2]}
+    parameters = sweep.get_random(space, 50, seed=1)
+
+    assert len(parameters) == 50, "Wrong run count"
+    assert parameters == sweep.get_random(space, 50, seed=1), "Not repeatable"
+    assert all(
+        1 <= kwargs["take_profit_percent"] <= 5 and kwargs["delay_blocks"] in (1, 2)
+        for kwargs in parameters
+    ), "Out of the space"
+
+    print("Test: search space passed")
+
+
+def _run_test() -> None:
+    """Test that a sweep ranks the results of every run.
+
+    :return None:
+    """
+
+    print("Test: run")
+
+    events = _get_events()
+    parameters = sweep.get_grid(
+        {"take_profit_percent": [1, 5, 50], "delay_blocks": [1, 10]}
+    )
+
+    runs = sweep.run(
+        example_job,
+        TOKEN_ADDRESS,
+        events,
+        parameters,
+        ETH_BALANCE,
+        TOKEN_BALANCE,
+        max_workers=2,
+    )
+
+    assert sorted(tuple(kwargs.items()) for kwargs, _ in runs) == sorted(
+        tuple(kwargs.items()) for kwargs in parameters
+    ), "Runs are missing"
+
+    for kwargs, result in runs:
+        expected = backtest.run_backtest(
+            lambda *args: example_job(
+                *args, take_profit_percent=kwargs["take_profit_percent"]
+            ),
+            TOKEN_ADDRESS,
+            events,
+            ETH_BALANCE,
+            TOKEN_BALANCE,
+            delay_blocks=kwargs["delay_blocks"],
+        )
+
+        assert result == expected, f"Wrong result for {kwargs}"
+
+    pnls = [result.pnl_in_wei for _, result in runs]
+
+    assert pnls == sorted(pnls, reverse=True), "Runs are not ranked"
+    # The price only rises, holding beats every sale.
+    assert runs[0][1].trade_count == 0, "Wrong ranking"
+
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, "summary.csv")
+        sweep.write_summary(path, runs)
+
+        with open(path) as file:
+            rows = list(csv.DictReader(file))
+
+    assert list(rows[0])[:3] == ["rank", "take_profit_percent", "delay_blocks"]
+    assert [int(row["pnl_in_wei"]) for row in rows] == pnls, "Wrong summary"
+
+    print("Test: run passed")
+
+
+def _shared_memory_test() -> None:
+    """Test that the shared memory of the events is released after a sweep.
+
+    :return None:
+    """
+
+    print("Test: shared memory")
+
+    before = set(os.listdir("/dev/shm"))
+
+    runs = sweep.run(
+        example_job,
+        TOKEN_ADDRESS,
+        _get_events(),
+        [{}],
+        ETH_BALANCE,
+        TOKEN_BALANCE,
+        max_workers=1,
+    )
+
+    assert len(runs) == 1, "Wrong run count"
+    assert set(os.listdir("/dev/shm")) == before, "Shared memory was not released"
+
+    print("Test: shared memory passed")
+
+
+def run_all_tests() -> None:
+    """Run all sweep tests.
+
+    :return None:
+    """
+
+    _search_space_test()
+    _run_test()
+    _shared_memory_test()